@@ -3,10 +3,15 @@
 FastAPI backend para análisis técnico de criptomonedas
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import threading
 import uvicorn
 import pytz
 from pydantic import BaseModel, Field
@@ -30,17 +35,21 @@ logging.getLogger('src.core.trading_bot').setLevel(logging.INFO)
 logging.getLogger('src.core.balance_manager').setLevel(logging.INFO)
 logging.getLogger('src.core.capital_client').setLevel(logging.INFO)
 
-# 🤖 Importar Trading Engine
-from src.core.trading_bot import TradingBot
+logger = logging.getLogger(__name__)
 
-# Estrategias mejoradas
-# Estrategias originales removidas - solo se usan las profesionales avanzadas
-from src.core.professional_adapter import ProfessionalStrategyAdapter
-from src.core.paper_trader import PaperTrader
-from src.core.enhanced_risk_manager import EnhancedRiskManager
+# Logging asíncrono: los hilos de trading sólo encolan; formateo y E/S en segundo plano
+from src.utils.async_logging import async_logging
+
+async_logging.install()
+
+# 🤖 Trading Engine: TradingBot, PaperTrader y EnhancedRiskManager (con pandas,
+# ta y los módulos de estrategias) se importan al primer uso, no al arrancar,
+# para que /health, /bot/profile o /bot/symbols no paguen ese coste.
+# tests/test_import_time.py (y scripts/check_import_time.py) vigilan el presupuesto
+# de import en frío.
 
 # Capital.com API Client
-from src.core.capital_client import CapitalClient, create_capital_client_from_env
+from src.core.capital_client import CapitalClient, get_shared_capital_client
 
 # Balance Manager
 from src.core.balance_manager import (
@@ -53,6 +62,15 @@ from src.core.balance_manager import (
 from src.config.main_config import GLOBAL_SYMBOLS, TradingProfiles
 import re
 import os
+import json
+
+# Métricas internas (formato Prometheus) y profiler por muestreo
+from src.utils import metrics
+from src.utils.profiler import sampling_profiler, MAX_DURATION_SECONDS as MAX_PROFILE_SECONDS
+
+# Stream de eventos del bot (SSE)
+from src.utils.event_stream import event_stream, format_sse, SubscriberLagged
+from src.utils.shared_cache import get_cache_stats
 
 # Load environment variables
 load_dotenv(".env")
@@ -62,12 +80,21 @@ trading_bot = None
 paper_trader = None
 capital_client = None
 
+# Las instancias pueden crearse desde varios workers del pool a la vez
+_instances_lock = threading.Lock()
+
 
 def get_trading_bot():
-    """Obtener o crear instancia del trading bot"""
+    """Obtener o crear instancia del trading bot (sin I/O; la cuenta se sincroniza en segundo plano)"""
     global trading_bot
     if trading_bot is None:
-        trading_bot = TradingBot()
+        with _instances_lock:
+            if trading_bot is None:
+                from src.core.trading_bot import TradingBot
+
+                bot = TradingBot(deferred_init=True)
+                bot.start_background_init()
+                trading_bot = bot
     return trading_bot
 
 
@@ -75,6 +102,8 @@ def get_paper_trader():
     """Obtener o crear instancia del paper trader"""
     global paper_trader
     if paper_trader is None:
+        from src.core.paper_trader import PaperTrader
+
         paper_trader = PaperTrader()
     return paper_trader
 
@@ -83,14 +112,17 @@ def get_capital_client():
     """Obtener o crear instancia del cliente de Capital.com"""
     global capital_client
     if capital_client is None:
-        capital_client = create_capital_client_from_env()
-        # Crear sesión automáticamente
-        try:
-            capital_client.create_session()
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to connect to Capital.com: {str(e)}"
-            )
+        with _instances_lock:
+            if capital_client is None:
+                # Cliente compartido con el bot (misma sesión y rate limiter)
+                try:
+                    client = get_shared_capital_client("api")
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to connect to Capital.com: {str(e)}",
+                    )
+                capital_client = client
     return capital_client
 
 
@@ -104,7 +136,7 @@ def ensure_bot_exists():
 
 def change_trading_profile(new_profile: str) -> bool:
     """
-    Cambiar el perfil de trading modificando el archivo main_config.py
+    Cambiar el perfil de trading en el proceso y persistirlo en profiles_config.py
 
     Args:
         new_profile: Nuevo perfil a establecer ("SCALPING", "INTRADAY")
@@ -114,23 +146,26 @@ def change_trading_profile(new_profile: str) -> bool:
     """
     try:
         config_file_path = os.path.join(
-            os.path.dirname(__file__), "src", "config", "main_config.py"
+            os.path.dirname(__file__), "src", "config", "profiles_config.py"
         )
 
         # Leer el archivo actual
         with open(config_file_path, "r", encoding="utf-8") as file:
             content = file.read()
 
-        # Buscar y reemplazar la línea TRADING_PROFILE
-        pattern = r'TRADING_PROFILE\s*=\s*["\'][^"\']*["\']'
+        # Buscar y reemplazar la línea TRADING_PROFILE activa (no las comentadas)
+        pattern = r'^TRADING_PROFILE\s*=\s*["\'][^"\']*["\']'
         replacement = f'TRADING_PROFILE = "{new_profile}"'
 
         # Verificar que el patrón existe
-        if not re.search(pattern, content):
+        if not re.search(pattern, content, flags=re.MULTILINE):
             return False
 
+        # Activar el perfil en memoria (valida el nombre)
+        TradingProfiles.set_current_profile(new_profile)
+
         # Realizar el reemplazo
-        new_content = re.sub(pattern, replacement, content)
+        new_content = re.sub(pattern, replacement, content, count=1, flags=re.MULTILINE)
 
         # Escribir el archivo modificado
         with open(config_file_path, "w", encoding="utf-8") as file:
@@ -143,6 +178,115 @@ def change_trading_profile(new_profile: str) -> bool:
         return False
 
 
+# ⚙️ **EJECUCIÓN NO BLOQUEANTE**
+# Las llamadas bloqueantes del bot (HTTP a Capital.com, análisis completos)
+# se ejecutan en un pool acotado para no congelar el event loop de FastAPI.
+
+API_WORKER_POOL_SIZE = int(os.getenv("API_WORKER_POOL_SIZE", "8"))
+api_executor = ThreadPoolExecutor(
+    max_workers=API_WORKER_POOL_SIZE, thread_name_prefix="APIWorker"
+)
+
+# Límites por endpoint: (concurrencia máxima, timeout en segundos)
+ENDPOINT_LIMITS = {
+    "health": (2, 5),
+    "status": (4, 15),
+    "dashboard": (4, 30),
+    "bot_control": (1, 600),
+    "force_analysis": (1, 600),
+    "strategy_analysis": (2, 60),
+    "risk_analysis": (2, 60),
+    "consensus_analysis": (2, 90),
+}
+DEFAULT_ENDPOINT_LIMIT = (2, 30)
+
+# Health, estado y dashboard usan un pool propio con un worker por cada hueco
+# de sus semáforos: los análisis largos, el arranque y las tareas en segundo
+# plano del pool general nunca los dejan esperando un worker
+STATUS_ENDPOINTS = ("health", "status", "dashboard")
+status_executor = ThreadPoolExecutor(
+    max_workers=sum(ENDPOINT_LIMITS[name][0] for name in STATUS_ENDPOINTS),
+    thread_name_prefix="APIStatusWorker",
+)
+
+_endpoint_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_endpoint_semaphore(endpoint: str) -> asyncio.Semaphore:
+    """Semáforo de concurrencia del endpoint (creado bajo demanda en el loop)"""
+    semaphore = _endpoint_semaphores.get(endpoint)
+    if semaphore is None:
+        limit = ENDPOINT_LIMITS.get(endpoint, DEFAULT_ENDPOINT_LIMIT)[0]
+        semaphore = _endpoint_semaphores.setdefault(endpoint, asyncio.Semaphore(limit))
+    return semaphore
+
+
+def _submit_to_pool(endpoint: str, semaphore: asyncio.Semaphore, func, *args):
+    """Enviar la llamada al pool; el semáforo se libera cuando termina el worker"""
+    loop = asyncio.get_running_loop()
+    executor = status_executor if endpoint in STATUS_ENDPOINTS else api_executor
+    try:
+        future = loop.run_in_executor(executor, functools.partial(func, *args))
+    except Exception:
+        semaphore.release()
+        raise
+    future.add_done_callback(lambda _future: semaphore.release())
+    return future
+
+
+async def run_blocking(endpoint: str, func, *args):
+    """
+    Ejecutar una llamada bloqueante en el pool con límite de concurrencia y timeout
+
+    El semáforo se mantiene hasta que el worker termina realmente (aunque el
+    request haya expirado), así la concurrencia real por endpoint queda acotada.
+
+    Raises:
+        HTTPException 503: si no hay hueco en el endpoint dentro del timeout
+        HTTPException 504: si la llamada no termina dentro del timeout
+    """
+    timeout = ENDPOINT_LIMITS.get(endpoint, DEFAULT_ENDPOINT_LIMIT)[1]
+    semaphore = _get_endpoint_semaphore(endpoint)
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503, detail=f"Too many concurrent requests for '{endpoint}'"
+        )
+
+    future = _submit_to_pool(endpoint, semaphore, func, *args)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504, detail=f"Timeout after {timeout}s in '{endpoint}'"
+        )
+
+
+async def submit_background(endpoint: str, func, *args) -> bool:
+    """
+    Lanzar una llamada bloqueante en el pool sin esperar su resultado
+
+    Returns:
+        False si el endpoint ya tiene todas sus ejecuciones en curso
+    """
+    semaphore = _get_endpoint_semaphore(endpoint)
+    if semaphore.locked():
+        return False
+    # Hay hueco: acquire() retorna sin suspender (sin carrera dentro del loop)
+    await semaphore.acquire()
+    future = _submit_to_pool(endpoint, semaphore, func, *args)
+
+    def _log_failure(done_future):
+        if not done_future.cancelled() and done_future.exception() is not None:
+            logging.getLogger(__name__).error(
+                f"❌ Background task '{endpoint}' failed: {done_future.exception()}"
+            )
+
+    future.add_done_callback(_log_failure)
+    return True
+
+
 # Crear instancia de FastAPI
 app = FastAPI(
     title="🚀 Universal Trading Analyzer + Trading Bot",
@@ -165,13 +309,40 @@ app.add_middleware(
 # Eventos de startup y shutdown
 @app.on_event("startup")
 async def startup_event():
-    """Inicializar servicios al arrancar el servidor"""
-    try:
-        # Inicializar Balance Manager
-        await start_balance_manager()
-        print("✅ Balance Manager iniciado correctamente")
-    except Exception as e:
-        print(f"❌ Error iniciando Balance Manager: {e}")
+    """
+    Inicializar servicios al arrancar el servidor
+
+    Nada aquí espera a Capital.com ni a los imports pesados: el bot se
+    construye en el pool (importando pandas, ta y las estrategias fuera del
+    event loop) y su sincronización de cuenta y warm-up de estrategias corren
+    en segundo plano (estado en /health), igual que el arranque del Balance
+    Manager.
+    """
+
+    def _trading_bot_built(future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(f"❌ Error construyendo el trading bot: {future.exception()}")
+        else:
+            print("✅ Trading bot construido; inicialización en segundo plano")
+
+    asyncio.get_running_loop().run_in_executor(
+        api_executor, get_trading_bot
+    ).add_done_callback(_trading_bot_built)
+
+    def _balance_manager_started(task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            print(f"❌ Error iniciando Balance Manager: {task.exception()}")
+        else:
+            print("✅ Balance Manager iniciado correctamente")
+
+    # Inicializar Balance Manager sin bloquear el arranque
+    asyncio.create_task(start_balance_manager()).add_done_callback(
+        _balance_manager_started
+    )
 
 
 @app.on_event("shutdown")
@@ -184,6 +355,10 @@ async def shutdown_event():
     except Exception as e:
         print(f"❌ Error deteniendo Balance Manager: {e}")
 
+    # Liberar los pools de llamadas bloqueantes sin esperar a los workers
+    api_executor.shutdown(wait=False)
+    status_executor.shutdown(wait=False)
+
 
 # Capital.com client se inicializa bajo demanda usando get_capital_client()
 
@@ -371,6 +546,9 @@ async def root():
                 "endpoints": [
                     "GET / - Información de la API",
                     "GET /health - Estado de salud del servidor",
+                    "GET /metrics - Métricas en formato Prometheus",
+                    "POST /debug/profile - Profiling por muestreo (duration | next_cycle)",
+                    "GET /debug/profile - Resultado del profiling (collapsed stacks)",
                 ],
             },
             "trading_bot": {
@@ -388,6 +566,13 @@ async def root():
                     "POST /bot/emergency-stop - Parada de emergencia",
                 ],
             },
+            "events": {
+                "title": "📡 Eventos",
+                "endpoints": [
+                    "GET /events/stream - Stream SSE de trades, señales y monitor (Last-Event-ID para reanudar)",
+                    "GET /events - Eventos desde una secuencia (since, limit)",
+                ],
+            },
             "real_time_analysis": {
                 "title": "📊 Análisis en tiempo real",
                 "endpoints": [
@@ -410,99 +595,375 @@ async def health_check():
     🏥 Estado de salud del servidor
     """
     try:
-        # Verificar conexión a Capital.com
+        # Verificar conexión a Capital.com (en el pool, con timeout corto)
         try:
-            client = get_capital_client()
-            ping_result = client.ping()
+            ping_result = await run_blocking(
+                "health", lambda: get_capital_client().ping()
+            )
             capital_status = (
                 "connected" if ping_result.get("success") else "disconnected"
             )
+        except HTTPException as e:
+            capital_status = "timeout" if e.status_code == 504 else "disconnected"
         except Exception:
             capital_status = "disconnected"
 
         # Verificar trading bot
         bot_status = "not_initialized"
+        readiness = None
         if trading_bot is not None:
-            bot_status = "running" if trading_bot.is_running else "stopped"
+            readiness = trading_bot.get_readiness()
+            if trading_bot.is_running:
+                bot_status = "running"
+            elif not readiness["initialized"]:
+                bot_status = "initializing"
+            elif not readiness["ready"]:
+                bot_status = "init_failed"
+            else:
+                bot_status = "stopped"
 
         return {
             "status": "healthy",
             "timestamp": datetime.now(pytz.UTC).isoformat(),
             "services": {"capital_com": capital_status, "trading_bot": bot_status},
+            "readiness": readiness,
             "version": "4.0.0",
         }
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
 
 
+def _refresh_state_gauges():
+    """Actualizar gauges de estado leyendo atributos en memoria (sin I/O)"""
+    registry = metrics.metrics_registry
+    registry.gauge(
+        "trading_bot_running", "1 si el trading bot está en ejecución"
+    ).set(1 if trading_bot is not None and trading_bot.is_running else 0)
+
+    if trading_bot is not None:
+        bot_stats = getattr(trading_bot, "stats", {}) or {}
+        registry.gauge(
+            "trading_bot_trades_executed", "Trades ejecutados desde el arranque"
+        ).set(bot_stats.get("trades_executed", 0))
+        registry.gauge(
+            "trading_bot_event_queue_size", "Eventos pendientes en la cola del bot"
+        ).set(trading_bot.event_queue.qsize())
+        monitor = getattr(trading_bot, "position_monitor", None)
+        if monitor is not None:
+            registry.gauge(
+                "position_monitor_cycles", "Ciclos completados por el PositionMonitor"
+            ).set(monitor.stats.get("monitoring_cycles", 0))
+
+    logging_status = async_logging.get_status()
+    if logging_status["enabled"]:
+        registry.gauge(
+            "log_queue_size", "Registros de log pendientes en la cola asíncrona"
+        ).set(logging_status["queue_size"])
+        registry.gauge(
+            "log_records_dropped", "Registros descartados por cola de logging llena"
+        ).set(logging_status["dropped_queue_full"])
+        registry.gauge(
+            "log_records_rate_limited", "Registros descartados por el límite por módulo"
+        ).set(logging_status["rate_limited"])
+        registry.gauge(
+            "log_records_sampled_out", "Registros repetidos omitidos por muestreo"
+        ).set(logging_status["sampled_out"])
+
+    for namespace, cache_stats in get_cache_stats().items():
+        registry.gauge(
+            "shared_cache_entries", "Entradas en los caches compartidos", ("cache",)
+        ).set(cache_stats["entries"], cache=namespace)
+        registry.gauge(
+            "shared_cache_bytes", "Bytes estimados en los caches compartidos", ("cache",)
+        ).set(cache_stats["bytes"], cache=namespace)
+        registry.gauge(
+            "shared_cache_evictions", "Desalojos LRU de los caches compartidos", ("cache",)
+        ).set(cache_stats["evictions"], cache=namespace)
+        if cache_stats["hit_ratio"] is not None:
+            registry.gauge(
+                "shared_cache_hit_ratio", "Hit ratio de los caches compartidos", ("cache",)
+            ).set(cache_stats["hit_ratio"], cache=namespace)
+
+    client = capital_client
+    if client is None and trading_bot is not None:
+        client = getattr(trading_bot, "capital_client", None)
+    if client is not None:
+        registry.gauge(
+            "capital_session_active", "1 si la sesión de Capital.com está activa"
+        ).set(1 if client.session_active else 0)
+        registry.gauge(
+            "capital_session_renewals", "Renovaciones de sesión de Capital.com"
+        ).set(client.session_renewals)
+        registry.gauge(
+            "capital_session_failures", "Fallos de sesión de Capital.com"
+        ).set(client.session_failures)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    📈 Métricas internas en formato de exposición de Prometheus
+    """
+    try:
+        _refresh_state_gauges()
+        body = metrics.metrics_registry.render()
+    except Exception as e:
+        logger.error(f"❌ Error generando /metrics: {e}", exc_info=True)
+        return PlainTextResponse(
+            f"# error: {e}\n", status_code=500, media_type=metrics.CONTENT_TYPE_LATEST
+        )
+    return PlainTextResponse(body, media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+# 🔬 **DIAGNÓSTICO**
+
+
+@app.post("/debug/profile")
+async def start_profile(
+    mode: str = "duration",
+    seconds: Optional[float] = None,
+    interval_ms: float = 10.0,
+):
+    """
+    🔬 Iniciar un profiling por muestreo de todos los hilos en segundo plano
+
+    - mode=duration: perfila durante `seconds`
+    - mode=next_cycle: perfila exactamente el próximo ciclo de análisis
+      (`seconds` actúa como tope, máximo 120s)
+    """
+    if seconds is None:
+        seconds = MAX_PROFILE_SECONDS if mode == "next_cycle" else 10.0
+    result = sampling_profiler.start(mode=mode, seconds=seconds, interval_ms=interval_ms)
+    if not result.get("success"):
+        raise HTTPException(status_code=409, detail=result.get("error"))
+    return {
+        "status": "success",
+        "message": "🔬 Profiling iniciado",
+        "session": result["session"],
+        "timestamp": datetime.now(pytz.UTC).isoformat(),
+    }
+
+
+@app.get("/debug/profile")
+async def get_profile(format: str = "collapsed"):
+    """
+    🔥 Resultado del último profiling
+
+    - format=collapsed: texto collapsed-stack (flamegraph.pl / speedscope)
+    - format=json: estado de la sesión
+    """
+    session = sampling_profiler.get_status()
+    if not session:
+        raise HTTPException(status_code=404, detail="No profiling session found")
+    if format == "json" or session.get("status") in ("sampling", "waiting_cycle"):
+        return {
+            "status": "success",
+            "session": session,
+            "timestamp": datetime.now(pytz.UTC).isoformat(),
+        }
+    return PlainTextResponse(sampling_profiler.get_collapsed())
+
+
+@app.delete("/debug/profile")
+async def stop_profile():
+    """
+    🛑 Detener el profiling en curso (conserva las muestras tomadas)
+    """
+    result = sampling_profiler.stop()
+    return {
+        "status": "success",
+        "session": result["session"],
+        "timestamp": datetime.now(pytz.UTC).isoformat(),
+    }
+
+
+# 📡 **EVENTOS**
+
+SSE_HEARTBEAT_SECONDS = 15
+
+
+@app.get("/events/stream")
+async def stream_events(request: Request, since: Optional[int] = None):
+    """
+    📡 Stream Server-Sent Events de trades, señales y eventos del monitor
+
+    Para reanudar tras una reconexión se usa la cabecera estándar
+    `Last-Event-ID` (o `?since=<seq>`). Si el cliente se queda demasiado
+    atrás, recibe un evento `lagged` y se cierra su conexión; el productor
+    nunca se frena por un consumidor lento.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id is not None and last_event_id.strip().isdigit():
+        since = int(last_event_id.strip())
+
+    try:
+        subscription = event_stream.subscribe(last_event_id=since)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def event_generator():
+        try:
+            subscription.attach_loop()
+            # Avisar si parte del historial solicitado ya no está disponible
+            if since is not None and subscription.cursor > since + 1:
+                gap = {
+                    "seq": subscription.cursor - 1,
+                    "type": "gap",
+                    "data": {
+                        "requested_from": since + 1,
+                        "resumed_from": subscription.cursor,
+                    },
+                }
+                yield format_sse(gap)
+
+            while not await request.is_disconnected():
+                try:
+                    events = subscription.poll()
+                except SubscriberLagged as e:
+                    lagged = {
+                        "seq": e.cursor - 1,
+                        "type": "lagged",
+                        "data": {
+                            "cursor": e.cursor,
+                            "oldest_available": e.oldest_available,
+                        },
+                    }
+                    yield format_sse(lagged)
+                    break
+
+                for event in events:
+                    yield format_sse(event)
+
+                if not events:
+                    if not await subscription.wait(timeout=SSE_HEARTBEAT_SECONDS):
+                        yield ": keepalive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/events")
+async def get_events(since: Optional[int] = None, limit: int = 100):
+    """
+    📥 Eventos desde una secuencia (alternativa sin streaming)
+
+    Devuelve `next_since` para encadenar la siguiente consulta.
+    """
+    limit = max(1, min(limit, 1000))
+    cursor = event_stream.oldest_seq if since is None else since + 1
+    gap = cursor < event_stream.oldest_seq
+    cursor = max(cursor, event_stream.oldest_seq)
+    try:
+        events, next_cursor = event_stream.read_from(cursor, limit)
+    except SubscriberLagged as e:
+        # El productor avanzó entre la comprobación y la lectura
+        gap = True
+        events, next_cursor = event_stream.read_from(e.oldest_available, limit)
+    return JSONResponse(
+        content={
+            "status": "success",
+            "events": json.loads(json.dumps(events, default=str)),
+            "next_since": next_cursor - 1,
+            "gap": gap,
+            "stream": event_stream.get_status(),
+            "timestamp": datetime.now(pytz.UTC).isoformat(),
+        }
+    )
+
+
 # 🤖 **TRADING BOT**
 
 
+def _snapshot_response(
+    request: Request, snapshot, variant: str, content: dict
+) -> Response:
+    """
+    Responder con el snapshot del bot soportando ETag / If-None-Match
+
+    El ETag identifica el snapshot publicado (y la variante de la vista), por lo
+    que los clientes que hacen polling reciben 304 hasta el siguiente snapshot.
+    """
+    is_running = trading_bot is not None and trading_bot.is_running
+    etag = f'W/"{snapshot.etag[:16]}-{snapshot.version}-{int(is_running)}-{variant}"'
+    age_seconds = max(0.0, snapshot.age_seconds())
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "X-Snapshot-Age": f"{age_seconds:.1f}",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match == "*":
+        return Response(status_code=304, headers=headers)
+
+    content["snapshot"] = {
+        "version": snapshot.version,
+        "generated_at": snapshot.generated_at.isoformat(),
+        "reason": snapshot.reason,
+        "age_seconds": round(age_seconds, 1),
+        "stale": snapshot.is_stale(),
+    }
+    return JSONResponse(content=content, headers=headers)
+
+
+async def _get_bot_snapshot():
+    """Obtener bot y snapshot publicado; 503 si aún no hay snapshot"""
+    bot = trading_bot
+    if bot is None:
+        # Sólo la primera vez: la creación del bot sí requiere conexión
+        bot = await run_blocking("dashboard", ensure_bot_exists)
+    snapshot = bot.get_status_snapshot()
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Status snapshot not available yet, retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    return bot, snapshot
+
+
 @app.get("/bot/dashboard")
-async def get_bot_dashboard(detailed: bool = False):
+async def get_bot_dashboard(request: Request, detailed: bool = False):
     """
     📊 Dashboard del trading bot - Estado y reporte unificado
 
+    Sirve el último snapshot publicado por el bot (tras cada ciclo de análisis
+    y cada tick del monitor) sin consultar Capital.com. Soporta ETag /
+    If-None-Match e incluye un indicador de antigüedad (`snapshot.stale`).
+
     Args:
         detailed: Si es True, incluye información detallada del bot y análisis completo
     """
     try:
-        bot = ensure_bot_exists()
-        status = bot.get_status()
-
-        # Obtener balance inicial real del paper trader
-        initial_balance = (
-            bot.paper_trader.initial_balance if bot.paper_trader else 1000.0
-        )
+        bot, snapshot = await _get_bot_snapshot()
 
         # Información básica (siempre incluida)
+        bot_status = dict(snapshot.bot_status)
+        bot_status["is_running"] = bot.is_running
         dashboard_data = {
             "status": "success",
-            "bot_status": {
-                "is_running": status.is_running,
-                "uptime": status.uptime,
-                "total_signals_generated": status.total_signals_generated,
-                "total_trades_executed": status.total_trades_executed,
-                "successful_trades": status.successful_trades,
-                "win_rate": (
-                    status.successful_trades / max(1, status.total_trades_executed)
-                )
-                * 100,
-                "current_portfolio_value": status.current_portfolio_value,
-                "total_pnl": status.total_pnl,
-                "total_return_percentage": (
-                    (status.current_portfolio_value - initial_balance)
-                    / max(1e-9, initial_balance)
-                )
-                * 100,
-                "initial_balance": initial_balance,
-                "active_strategies": status.active_strategies,
-                "last_analysis_time": (
-                    status.last_analysis_time.isoformat()
-                    if status.last_analysis_time
-                    else None
-                ),
-                "next_analysis_time": (
-                    status.next_analysis_time.isoformat()
-                    if status.next_analysis_time
-                    else None
-                ),
-            },
+            "bot_status": bot_status,
             "timestamp": datetime.now(pytz.UTC).isoformat(),
         }
 
         # Si se solicita información detallada, agregar reporte completo
         if detailed:
-            detailed_report = (
-                bot.get_detailed_report() if hasattr(bot, "get_detailed_report") else {}
-            )
-            dashboard_data["detailed_report"] = detailed_report
+            dashboard_data["detailed_report"] = snapshot.detailed_report
             dashboard_data["note"] = (
                 "Información detallada incluida - reporte completo del bot"
             )
 
-        return dashboard_data
+        return _snapshot_response(
+            request, snapshot, "detailed" if detailed else "basic", dashboard_data
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error getting bot dashboard: {str(e)}"
@@ -515,16 +976,22 @@ async def start_trading_bot():
     🚀 Iniciar el trading bot
     """
     try:
-        bot = get_trading_bot()
+        bot = await run_blocking("bot_control", get_trading_bot)
         if bot.is_running:
             return {
                 "status": "warning",
                 "message": "🤖 Trading bot is already running",
-                "bot_status": bot.get_status().is_running,
+                "bot_status": bot.is_running,
                 "timestamp": datetime.now(pytz.UTC).isoformat(),
             }
 
-        bot.start()
+        await run_blocking("bot_control", bot.start)
+        if not bot.is_running:
+            # Inicialización fallida o sin terminar: no se opera con la cuenta sin sincronizar
+            raise HTTPException(
+                status_code=503,
+                detail={"message": "Trading bot not ready", "readiness": bot.get_readiness()},
+            )
 
         return {
             "status": "success",
@@ -540,6 +1007,8 @@ async def start_trading_bot():
             },
             "timestamp": datetime.now(pytz.UTC).isoformat(),
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting bot: {str(e)}")
 
@@ -558,7 +1027,7 @@ async def stop_trading_bot():
                 "timestamp": datetime.now(pytz.UTC).isoformat(),
             }
 
-        trading_bot.stop()
+        await run_blocking("bot_control", trading_bot.stop)
 
         return {
             "status": "success",
@@ -628,43 +1097,35 @@ async def get_bot_configuration():
 
 
 @app.get("/bot/status")
-async def get_bot_status():
+async def get_bot_status(request: Request):
     """
     📊 Obtener estado básico del trading bot
     
     Endpoint simplificado que devuelve solo la información esencial del estado del bot.
+    Se sirve desde el snapshot publicado (sin I/O), con soporte de ETag.
     """
     try:
-        bot = ensure_bot_exists()
-        status = bot.get_status()
-        
-        return {
-            "status": "success",
-            "bot_status": {
-                "is_running": status.is_running,
-                "uptime": status.uptime,
-                "total_signals_generated": status.total_signals_generated,
-                "total_trades_executed": status.total_trades_executed,
-                "successful_trades": status.successful_trades,
-                "win_rate": (
-                    status.successful_trades / max(1, status.total_trades_executed)
-                ) * 100,
-                "current_portfolio_value": status.current_portfolio_value,
-                "total_pnl": status.total_pnl,
-                "active_strategies": status.active_strategies,
-                "last_analysis_time": (
-                    status.last_analysis_time.isoformat()
-                    if status.last_analysis_time
-                    else None
-                ),
-                "next_analysis_time": (
-                    status.next_analysis_time.isoformat()
-                    if status.next_analysis_time
-                    else None
-                ),
-            },
-            "timestamp": datetime.now(pytz.UTC).isoformat(),
+        bot, snapshot = await _get_bot_snapshot()
+
+        bot_status = {
+            key: value
+            for key, value in snapshot.bot_status.items()
+            if key not in ("initial_balance", "total_return_percentage")
         }
+        bot_status["is_running"] = bot.is_running
+
+        return _snapshot_response(
+            request,
+            snapshot,
+            "status",
+            {
+                "status": "success",
+                "bot_status": bot_status,
+                "timestamp": datetime.now(pytz.UTC).isoformat(),
+            },
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error getting bot status: {str(e)}"
@@ -859,18 +1320,42 @@ async def get_trading_capabilities():
         )
 
 
+@app.get("/bot/order-latency")
+async def get_order_latency():
+    """
+    ⚡ Latencia señal -> orden y estado de las plantillas de orden pre-validadas
+    """
+    try:
+        bot = await run_blocking("status", ensure_bot_exists)
+        templates = getattr(bot, "order_templates", None)
+        return {
+            "status": "success",
+            "enabled": bool(bot.enable_real_trading and templates is not None),
+            "order_templates": templates.get_status() if templates is not None else None,
+            "timestamp": datetime.now(pytz.UTC).isoformat(),
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error getting order latency: {str(e)}"
+        )
+
+
 @app.post("/bot/force-analysis")
 async def force_immediate_analysis():
     """
     🔄 Forzar análisis inmediato del mercado
     """
     try:
-        bot = ensure_bot_exists()
+        bot = await run_blocking("status", ensure_bot_exists)
         
         # Permitir análisis forzado incluso si el bot está detenido
         # Solo verificar que el bot tenga el método force_analysis
         if hasattr(bot, "force_analysis"):
-            bot.force_analysis()
+            # El ciclo completo corre en el pool; el endpoint responde al instante
+            if not await submit_background("force_analysis", bot.force_analysis):
+                raise HTTPException(
+                    status_code=409, detail="An analysis is already in progress"
+                )
         else:
             raise HTTPException(
                 status_code=501, detail="Force analysis not implemented"
@@ -882,6 +1367,8 @@ async def force_immediate_analysis():
             "timestamp": datetime.now(pytz.UTC).isoformat(),
             "note": "Check bot logs or status for analysis results",
         }
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_msg = str(e) if str(e) else f"Unknown error: {type(e).__name__}"
@@ -929,18 +1416,15 @@ async def get_current_profile():
     📋 Obtener el perfil de trading activo actual
     """
     try:
-        current_profile = TradingProfiles.get_current_profile()
+        current_profile = TradingProfiles.snapshot()
         available_profiles = list(TradingProfiles.PROFILES.keys())
 
         return {
             "status": "success",
             "current_profile": {
-                "name": current_profile["name"],
-                "key": [
-                    k
-                    for k, v in TradingProfiles.PROFILES.items()
-                    if v == current_profile
-                ][0],
+                "name": current_profile.name,
+                "key": current_profile.key,
+                "version": current_profile.version,
                 "description": current_profile["description"],
                 "analysis_interval": current_profile["analysis_interval"],
                 "min_confidence": current_profile["min_confidence"],
@@ -972,7 +1456,7 @@ async def update_trading_profile(profile_config: ProfileUpdate):
         - **INTRADAY**: Timeframes 15m-1h, análisis cada 15 min, operaciones diarias balanceadas CFD
 
     **Funcionalidad:** Cambia automáticamente el perfil modificando el archivo de configuración.
-    El bot se reiniciará automáticamente si `restart_bot=True`.
+    Si `restart_bot=True` el bot aplica el nuevo perfil en caliente (sin reconstruirse).
     """
     try:
         # Validar que el perfil existe
@@ -984,11 +1468,7 @@ async def update_trading_profile(profile_config: ProfileUpdate):
             )
 
         # Obtener información del perfil actual y nuevo
-        current_profile_key = [
-            k
-            for k, v in TradingProfiles.PROFILES.items()
-            if v == TradingProfiles.get_current_profile()
-        ][0]
+        current_profile_key = TradingProfiles.get_current_profile_name()
         new_profile = TradingProfiles.PROFILES[profile_config.profile]
 
         if current_profile_key == profile_config.profile:
@@ -1007,36 +1487,15 @@ async def update_trading_profile(profile_config: ProfileUpdate):
                 status_code=500, detail="Error modificando el archivo de configuración"
             )
 
-        # Reiniciar el bot si se solicita
+        # Aplicar el perfil al bot en caliente (sin reconstruirlo ni reconectar)
         restart_performed = False
         bot_restart_error = None
+        applied_config = None
 
-        if profile_config.restart_bot:
+        if profile_config.restart_bot and trading_bot is not None:
             try:
-                global trading_bot
-                bot = get_trading_bot()
-                if getattr(bot, "is_running", False):
-                    bot.stop()
-                    # Recargar el módulo de configuración para que tome el nuevo perfil
-                    import importlib
-                    import src.config.main_config
-
-                    importlib.reload(src.config.main_config)
-
-                    # Crear nuevo bot con la nueva configuración
-                    trading_bot = None
-                    bot = get_trading_bot()
-                    bot.start()
-                    restart_performed = True
-                else:
-                    # Si el bot no está corriendo, solo recargar la configuración
-                    import importlib
-                    import src.config.main_config
-
-                    importlib.reload(src.config.main_config)
-                    trading_bot = None  # Forzar recreación del bot
-                    restart_performed = True
-
+                applied_config = trading_bot.reconfigure()
+                restart_performed = True
             except Exception as e:
                 bot_restart_error = str(e)
 
@@ -1052,9 +1511,11 @@ async def update_trading_profile(profile_config: ProfileUpdate):
                 "min_confidence": new_profile["min_confidence"],
                 "timeframes": new_profile["timeframes"],
             },
+            "profile_version": TradingProfiles.snapshot().version,
             "restart_performed": restart_performed,
             "restart_error": bot_restart_error,
-            "note": "El cambio se aplicó al archivo de configuración. Reinicia la aplicación para garantizar que todos los módulos usen la nueva configuración.",
+            "applied_config": applied_config,
+            "note": "El perfil se aplicó en caliente y se guardó en profiles_config.py.",
             "timestamp": datetime.now(pytz.UTC).isoformat(),
         }
 
@@ -1219,7 +1680,7 @@ async def analyze_with_enhanced_strategy(
     """🔍 Analizar símbolo con estrategia mejorada"""
     try:
         # Obtener el TradingBot existente
-        bot = get_trading_bot()
+        bot = await run_blocking("status", get_trading_bot)
 
         # Usar las estrategias del TradingBot que ya tienen la referencia asignada
         strategy_key = None
@@ -1244,7 +1705,9 @@ async def analyze_with_enhanced_strategy(
         strategy = bot.strategies[strategy_key]
 
         # Analizar
-        signal = strategy.analyze(symbol, timeframe)
+        signal = await run_blocking(
+            "strategy_analysis", strategy.analyze, symbol, timeframe
+        )
 
         return {
             "strategy": strategy_name,
@@ -1266,6 +1729,8 @@ async def analyze_with_enhanced_strategy(
             },
             "timestamp": signal.timestamp.isoformat(),
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1273,57 +1738,66 @@ async def analyze_with_enhanced_strategy(
 # Endpoint de test strategy eliminado - se usa análisis directo de estrategias
 
 
-@app.get("/enhanced/risk-analysis/{symbol}")
-async def get_enhanced_risk_analysis(symbol: str):
-    """🛡️ Análisis de riesgo mejorado"""
-    try:
-        # Crear señal de prueba para análisis
-        from src.core.trend_following_professional import TrendFollowingProfessional
-
-        strategy = TrendFollowingProfessional()
-        signal = strategy.analyze(symbol, "1h")
+def _build_risk_analysis(symbol: str) -> dict:
+    """🛡️ Análisis de riesgo (bloqueante: estrategia completa + risk manager)"""
+    # Crear señal de prueba para análisis
+    from src.core.trend_following_professional import TrendFollowingProfessional
 
-        # Verificar si se generó una señal válida
-        if signal is None:
-            return {
-                "symbol": symbol,
-                "error": "No se pudo generar una señal válida para este símbolo",
-                "message": "El mercado puede estar en condiciones laterales o sin tendencia clara",
-                "timestamp": datetime.now(pytz.UTC).isoformat(),
-            }
-
-        # Obtener balance real del paper trader
-        bot = get_trading_bot()
-        current_portfolio_value = (
-            bot.paper_trader.get_balance() if bot.paper_trader else 1000.0
-        )
-
-        # Analizar riesgo
-        risk_manager = EnhancedRiskManager()
-        risk_assessment = risk_manager.assess_trade_risk(
-            signal, current_portfolio_value
-        )
+    strategy = TrendFollowingProfessional()
+    signal = strategy.analyze(symbol, "1h")
 
+    # Verificar si se generó una señal válida
+    if signal is None:
         return {
             "symbol": symbol,
-            "risk_analysis": {
-                "overall_risk_score": risk_assessment.overall_risk_score,
-                "risk_level": risk_assessment.risk_level.value,
-                "position_sizing": {
-                    "recommended_size": risk_assessment.position_sizing.recommended_size,
-                    "max_position_size": risk_assessment.position_sizing.max_position_size,
-                    "risk_per_trade": risk_assessment.position_sizing.risk_per_trade,
-                },
-                "stop_loss": {
-                    "price": risk_assessment.dynamic_stop_loss.stop_loss_price,
-                    "type": risk_assessment.dynamic_stop_loss.stop_type,
-                    "trailing_distance": risk_assessment.dynamic_stop_loss.trailing_distance,
-                },
-                "recommendations": risk_assessment.recommendations,
-                "market_risk_factors": risk_assessment.market_risk_factors,
-            },
+            "error": "No se pudo generar una señal válida para este símbolo",
+            "message": "El mercado puede estar en condiciones laterales o sin tendencia clara",
             "timestamp": datetime.now(pytz.UTC).isoformat(),
         }
+
+    # Obtener balance real del paper trader
+    bot = get_trading_bot()
+    current_portfolio_value = (
+        bot.paper_trader.get_balance() if bot.paper_trader else 1000.0
+    )
+
+    # Analizar riesgo
+    from src.core.enhanced_risk_manager import EnhancedRiskManager
+
+    risk_manager = EnhancedRiskManager()
+    risk_assessment = risk_manager.assess_trade_risk(
+        signal, current_portfolio_value
+    )
+
+    return {
+        "symbol": symbol,
+        "risk_analysis": {
+            "overall_risk_score": risk_assessment.overall_risk_score,
+            "risk_level": risk_assessment.risk_level.value,
+            "position_sizing": {
+                "recommended_size": risk_assessment.position_sizing.recommended_size,
+                "max_position_size": risk_assessment.position_sizing.max_position_size,
+                "risk_per_trade": risk_assessment.position_sizing.risk_per_trade,
+            },
+            "stop_loss": {
+                "price": risk_assessment.dynamic_stop_loss.stop_loss_price,
+                "type": risk_assessment.dynamic_stop_loss.stop_type,
+                "trailing_distance": risk_assessment.dynamic_stop_loss.trailing_distance,
+            },
+            "recommendations": risk_assessment.recommendations,
+            "market_risk_factors": risk_assessment.market_risk_factors,
+        },
+        "timestamp": datetime.now(pytz.UTC).isoformat(),
+    }
+
+
+@app.get("/enhanced/risk-analysis/{symbol}")
+async def get_enhanced_risk_analysis(symbol: str):
+    """🛡️ Análisis de riesgo mejorado"""
+    try:
+        return await run_blocking("risk_analysis", _build_risk_analysis, symbol)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1475,7 +1949,7 @@ async def get_last_consensus_details():
 async def analyze_symbol_with_consensus(symbol: str, timeframe: str = "1h"):
     """🧠 Analizar símbolo con la estrategia de consenso"""
     try:
-        bot = get_trading_bot()
+        bot = await run_blocking("status", get_trading_bot)
 
         # Verificar que la estrategia de consenso existe
         if "ConsensusStrategy" not in bot.strategies:
@@ -1486,10 +1960,14 @@ async def analyze_symbol_with_consensus(symbol: str, timeframe: str = "1h"):
         consensus_adapter = bot.strategies["ConsensusStrategy"]
 
         # Analizar con consenso
-        consensus_signal = consensus_adapter.analyze(symbol, timeframe)
+        consensus_signal = await run_blocking(
+            "consensus_analysis", consensus_adapter.analyze, symbol, timeframe
+        )
 
         # Obtener también las señales individuales para comparación
-        individual_signals = bot.get_individual_strategy_signals(symbol)
+        individual_signals = await run_blocking(
+            "consensus_analysis", bot.get_individual_strategy_signals, symbol
+        )
 
         if consensus_signal:
             return {
@@ -1539,14 +2017,18 @@ async def analyze_symbol_with_consensus(symbol: str, timeframe: str = "1h"):
 async def get_individual_strategy_signals(symbol: str):
     """🔍 Obtener señales individuales de cada estrategia para un símbolo"""
     try:
-        bot = get_trading_bot()
-        signals = bot.get_individual_strategy_signals(symbol)
+        bot = await run_blocking("status", get_trading_bot)
+        signals = await run_blocking(
+            "consensus_analysis", bot.get_individual_strategy_signals, symbol
+        )
 
         return {
             "status": "success",
             "data": signals,
             "timestamp": datetime.now(pytz.UTC).isoformat(),
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error getting individual signals: {str(e)}"
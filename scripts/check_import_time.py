@@ -0,0 +1,128 @@
+"""
+Test: Presupuesto de tiempo de import en frío de la API (`import main`).
+
+Lanza varios intérpretes nuevos que sólo importan `main` y mide cuánto
+tarda cada uno. Falla (exit code 1) si la mediana supera el presupuesto o
+si el import arrastra módulos pesados que deben cargarse al primer uso
+(pandas, numpy, ta, talib, estrategias, indicadores, TradingBot).
+
+Uso:
+  python scripts/check_import_time.py --budget 1.0 --runs 5
+
+Argumentos:
+  --budget   Segundos máximos para la mediana de `import main`
+             (por defecto: IMPORT_TIME_BUDGET o 1.0)
+  --runs     Intérpretes en frío a lanzar (por defecto: 5)
+  --top      Módulos más lentos a mostrar según -X importtime (por defecto: 10)
+
+Nota:
+- Cada medición corre en un proceso nuevo con `-X importtime`, así que no
+  hay módulos precargados entre ejecuciones.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Raíz del proyecto (donde vive main.py)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que `import main` NO debe cargar: se importan al primer uso
+DEFERRED_MODULES = [
+    "pandas",
+    "numpy",
+    "ta",
+    "talib",
+    "src.core.trading_bot",
+    "src.core.enhanced_strategies",
+    "src.core.advanced_indicators",
+    "src.core.enhanced_risk_manager",
+    "src.core.paper_trader",
+    "src.core.consensus_strategy",
+]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def measure_once() -> dict:
+    """Importar `main` en un intérprete nuevo y devolver tiempo y módulos cargados."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE % (DEFERRED_MODULES,)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"`import main` falló:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["importtime"] = parse_importtime(proc.stderr)
+    return result
+
+
+def parse_importtime(stderr: str) -> list:
+    """Extraer (cumulative_us, módulo) de la salida de -X importtime."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            _, cumulative_us, module = line.split("|", 2)
+            rows.append((int(cumulative_us), module.rstrip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de import en frío de main")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("IMPORT_TIME_BUDGET", "1.0")),
+        help="Segundos máximos para la mediana de `import main`",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Intérpretes en frío a lanzar")
+    parser.add_argument("--top", type=int, default=10, help="Módulos más lentos a mostrar")
+    args = parser.parse_args()
+
+    results = [measure_once() for _ in range(max(1, args.runs))]
+    timings = [r["elapsed"] for r in results]
+    median = statistics.median(timings)
+    loaded = sorted({m for r in results for m in r["loaded"]})
+
+    print(f"⏱️ import main: mediana {median * 1000:.0f}ms "
+          f"(min {min(timings) * 1000:.0f}ms, max {max(timings) * 1000:.0f}ms, "
+          f"{len(timings)} ejecuciones) | presupuesto {args.budget * 1000:.0f}ms")
+
+    print(f"🐢 Top {args.top} módulos por tiempo acumulado (última ejecución):")
+    for cumulative_us, module in sorted(results[-1]["importtime"], reverse=True)[: args.top]:
+        print(f"   {cumulative_us / 1000:8.1f}ms  {module.strip()}")
+
+    failed = False
+    if loaded:
+        failed = True
+        print(f"❌ Módulos pesados cargados al importar main: {', '.join(loaded)}")
+    if median > args.budget:
+        failed = True
+        print(f"❌ Import en frío fuera de presupuesto: {median:.3f}s > {args.budget:.3f}s")
+
+    if failed:
+        sys.exit(1)
+    print("✅ Import en frío dentro de presupuesto")
+
+
+if __name__ == "__main__":
+    main()
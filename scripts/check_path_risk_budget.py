@@ -0,0 +1,118 @@
+"""
+Test: Presupuesto de latencia del control de riesgo de trayectoria (Monte Carlo).
+
+Alimenta un motor de riesgo de portfolio con velas sintéticas, ejecuta la
+evaluación completa que hace EnhancedRiskManager antes de cada orden
+(posiciones abiertas + trade propuesto a todos los tamaños de
+PATH_RISK_SCALES sobre un mismo lote de trayectorias) y mide la latencia
+sin cache. Falla (exit code 1) si la mediana supera el presupuesto.
+
+Uso:
+  python scripts/check_path_risk_budget.py --budget 0.05 --runs 20
+
+Argumentos:
+  --budget   Segundos máximos para la mediana de una evaluación
+             (por defecto: PATH_RISK_BUDGET o 0.05)
+  --runs     Evaluaciones a medir (por defecto: 20)
+  --paths    Trayectorias por evaluación (por defecto: RiskManagerConfig.MONTE_CARLO_PATHS)
+  --symbols  Símbolos con posición abierta (por defecto: 5)
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Asegurar que el proyecto esté en sys.path para importar 'src.*'
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from src.config.main_config import RiskManagerConfig
+from src.core.enhanced_risk_manager import PATH_RISK_SCALES
+from src.core.monte_carlo_risk import MonteCarloRiskSimulator
+from src.core.portfolio_risk import PortfolioRiskEngine
+
+
+def build_engine(symbols: int) -> PortfolioRiskEngine:
+    """Motor de riesgo con una ventana completa de velas sintéticas correlacionadas."""
+    engine = PortfolioRiskEngine(
+        timeframe=RiskManagerConfig.PORTFOLIO_RISK_TIMEFRAME,
+        window=RiskManagerConfig.PORTFOLIO_RISK_WINDOW,
+        min_observations=RiskManagerConfig.PORTFOLIO_RISK_MIN_OBSERVATIONS,
+    )
+    rng = np.random.default_rng(7)
+    bars = engine.window + 1
+    timestamps = np.arange(1, bars + 1) * 3600.0
+    market = rng.normal(0, 0.006, bars)
+    for i in range(symbols + 1):
+        log_returns = 0.7 * market + rng.normal(0, 0.006, bars)
+        engine.record_closes(
+            f"SYM{i}", engine.timeframe, timestamps, 100.0 * np.exp(np.cumsum(log_returns))
+        )
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de latencia del riesgo de trayectoria")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("PATH_RISK_BUDGET", "0.05")),
+        help="Segundos máximos para la mediana de una evaluación",
+    )
+    parser.add_argument("--runs", type=int, default=20, help="Evaluaciones a medir")
+    parser.add_argument("--paths", type=int, default=RiskManagerConfig.MONTE_CARLO_PATHS)
+    parser.add_argument("--symbols", type=int, default=5, help="Símbolos con posición abierta")
+    args = parser.parse_args()
+
+    engine = build_engine(args.symbols)
+    simulator = MonteCarloRiskSimulator(
+        engine,
+        n_paths=args.paths,
+        horizon_bars=RiskManagerConfig.MONTE_CARLO_HORIZON_BARS,
+        bars_per_day=RiskManagerConfig.MONTE_CARLO_BARS_PER_DAY,
+        size_bucket=RiskManagerConfig.MONTE_CARLO_SIZE_BUCKET,
+        min_observations=RiskManagerConfig.PORTFOLIO_RISK_MIN_OBSERVATIONS,
+        seed=1,
+    )
+    exposures = {f"SYM{i}": (1 if i % 2 else -1) * 1000.0 for i in range(args.symbols)}
+
+    timings = []
+    for run in range(max(1, args.runs) + 1):
+        started = time.perf_counter()
+        # Exposición distinta en cada ejecución para no medir la cache
+        result = simulator.simulate_scaled(
+            exposures,
+            10_000.0,
+            max_drawdown=0.10,
+            daily_loss_limit=0.03,
+            candidate=f"SYM{args.symbols}",
+            candidate_exposure=2000.0 + 100.0 * run,
+            scales=PATH_RISK_SCALES,
+        )
+        elapsed = time.perf_counter() - started
+        if not result.get("success") or result.get("cached"):
+            print(f"❌ Simulación inválida: {result}")
+            sys.exit(1)
+        if run:  # La primera ejecución calienta NumPy
+            timings.append(elapsed)
+
+    median = statistics.median(timings)
+    print(
+        f"⏱️ Riesgo de trayectoria ({args.paths} trayectorias x {simulator.horizon_bars} barras, "
+        f"{len(PATH_RISK_SCALES)} tamaños): mediana {median * 1000:.1f}ms "
+        f"(min {min(timings) * 1000:.1f}ms, max {max(timings) * 1000:.1f}ms) "
+        f"| presupuesto {args.budget * 1000:.0f}ms"
+    )
+    if median > args.budget:
+        print(f"❌ Fuera de presupuesto: {median:.3f}s > {args.budget:.3f}s")
+        sys.exit(1)
+    print("✅ Dentro de presupuesto")
+
+
+if __name__ == "__main__":
+    main()
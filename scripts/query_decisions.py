@@ -0,0 +1,106 @@
+"""
+Consulta del decision log columnar del TradingBot.
+
+Filtra los segmentos escritos por `DecisionLog` (una fila por señal con
+veredicto y tiempo de cada filtro) y muestra un resumen: acciones, qué
+filtros bloquearon y cuánto tardaron, símbolos, y las últimas filas.
+
+Uso:
+  python scripts/query_decisions.py --hours 24 --action filtered --failed-filter mtf
+  python scripts/query_decisions.py --symbol US500 --show 20 --json
+
+Argumentos:
+  --dir            Directorio de segmentos (por defecto: TradingBotConfig.DECISION_LOG_DIR)
+  --symbol         Filtrar por símbolo
+  --strategy       Filtrar por estrategia
+  --action         executed | filtered | risk_rejected | execution_failed | trading_disabled | error
+  --failed-filter  Filas bloqueadas por ese filtro (confidence, mtf, market_hours, anti_chop...)
+  --hours          Sólo las últimas N horas
+  --show           Últimas filas a mostrar (por defecto: 10)
+  --json           Imprimir el resultado como JSON
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+# Asegurar que el proyecto esté en sys.path para importar 'src.*'
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from src.core.decision_log import (
+    ACTIONS,
+    FILTERS,
+    iter_records,
+    query_decisions,
+    summarize_decisions,
+)
+
+
+def default_directory() -> str:
+    try:
+        from src.config.main_config import TradingBotConfig
+
+        directory = TradingBotConfig.DECISION_LOG_DIR
+    except Exception:
+        directory = "data/decision_log"
+    return directory if os.path.isabs(directory) else os.path.join(PROJECT_ROOT, directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta del decision log del TradingBot")
+    parser.add_argument("--dir", default=None, help="Directorio de segmentos")
+    parser.add_argument("--symbol", default=None)
+    parser.add_argument("--strategy", default=None)
+    parser.add_argument("--action", default=None, choices=ACTIONS)
+    parser.add_argument("--failed-filter", default=None, choices=FILTERS)
+    parser.add_argument("--hours", type=float, default=None, help="Sólo las últimas N horas")
+    parser.add_argument("--show", type=int, default=10, help="Últimas filas a mostrar")
+    parser.add_argument("--json", action="store_true", help="Salida JSON")
+    args = parser.parse_args()
+
+    directory = args.dir or default_directory()
+    started = time.perf_counter()
+    result = query_decisions(
+        directory,
+        symbol=args.symbol,
+        strategy=args.strategy,
+        action=args.action,
+        failed_filter=args.failed_filter,
+        since=time.time() - args.hours * 3600 if args.hours else None,
+    )
+    elapsed = time.perf_counter() - started
+    summary = summarize_decisions(result)
+    rows = list(iter_records(result))[-args.show :] if args.show > 0 else []
+
+    if args.json:
+        print(json.dumps({"summary": summary, "rows": rows, "query_seconds": elapsed}, indent=2))
+        return
+
+    print(f"🔎 {summary['records']} decisiones en {elapsed * 1000:.0f}ms ({directory})")
+    if not summary["records"]:
+        return
+    print("📊 Acciones: " + ", ".join(f"{k}={v}" for k, v in summary["actions"].items()))
+    print("🧱 Filtros (evaluados / bloqueos / p50 / p95 µs):")
+    for name, stats in summary["filters"].items():
+        if stats["evaluated"]:
+            print(
+                f"   {name:<16} {stats['evaluated']:>8} {stats['blocked']:>8} "
+                f"{stats['p50_us']:>10} {stats['p95_us']:>10}"
+            )
+    top = list(summary["symbols"].items())[:10]
+    print("🏷️ Símbolos: " + ", ".join(f"{k}={v}" for k, v in top))
+    for row in rows:
+        moment = datetime.fromtimestamp(row["ts"], timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(
+            f"   {moment} {row['symbol']:<8} {row['side']:<4} {row['strategy']:<24} "
+            f"{row['confidence']:5.1f}% -> {row['action']:<16} {row['reason']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
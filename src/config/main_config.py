@@ -54,7 +54,13 @@ proporcionando una arquitectura modular y escalable para la gestión de parámet
 
 import logging
 import os
-from typing import List, Dict, Any
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
 # Carga de variables de entorno desde .env si está presente
@@ -68,6 +74,7 @@ load_dotenv()
 from .symbols_config import GLOBAL_SYMBOLS
 
 # 👤 Perfiles de Trading: Configuraciones especializadas (SCALPING/INTRADAY)
+from . import profiles_config
 from .profiles_config import TRADING_PROFILE, PROFILES
 
 # ⏰ Configuraciones Temporales: Horarios, zonas horarias y programación
@@ -143,6 +150,103 @@ def _get_env_bool(var_name: str, default: bool) -> bool:
         return default
 
 
+# Atributos tipados del snapshot: nombre -> (conversión, default si falta en el perfil)
+_PROFILE_SNAPSHOT_FIELDS = {
+    "name": (str, ""),
+    "analysis_interval": (int, 15),
+    "timeframes": (tuple, ("30m", "1h", "4h")),
+    "min_confidence_threshold": (float, 70.0),
+    "max_daily_trades": (int, 10),
+    "max_positions": (int, 8),
+    "min_time_between_trades_minutes": (float, 0.0),
+    "min_time_between_opposite_signals_minutes": (float, 0.0),
+    "antiflip_min_hold_minutes": (int, 0),
+    "antiflip_cooldown_after_exit_minutes": (int, 0),
+    "antiflip_opposite_persistence_count": (int, 0),
+    "antiflip_hysteresis_multiplier": (float, 1.0),
+    "antiflip_require_strong_opposite": (bool, False),
+    "daily_trades_quality_threshold": (float, 80.0),
+    "mtf_require_trend_alignment": (bool, True),
+    "mtf_min_consensus": (float, 0.80),
+    "mtf_filter_consensus_threshold": (float, 0.66),
+    "chop_filter_enabled": (bool, False),
+    "chop_timeframe": (str, "15m"),
+    "adx_threshold": (float, 20.0),
+    "atr_min_ratio": (float, 0.0012),
+    "ema_slope_min_ratio": (float, 0.0003),
+    "use_trailing_stop": (bool, False),
+    "default_trailing_distance": (float, 0.0),
+}
+
+
+@dataclass(frozen=True, eq=False)
+class ProfileSnapshot(Mapping):
+    """
+    📸 Perfil activo compilado: inmutable, versionado y con atributos tipados.
+
+    Los caminos calientes lo capturan una vez por ciclo con
+    `TradingProfiles.snapshot()` y leen atributos (`snap.max_positions`) en
+    lugar de repetir lookups con defaults. Sigue siendo un Mapping de solo
+    lectura (`snap["rsi_period"]`, `snap.get(...)`) para el resto de claves.
+    Un cambio de perfil publica un snapshot nuevo con `version` + 1; el que
+    ya capturó un ciclo no cambia.
+    """
+
+    version: int
+    key: str
+    name: str
+    analysis_interval: int
+    timeframes: Tuple[str, ...]
+    min_confidence_threshold: float
+    max_daily_trades: int
+    max_positions: int
+    max_positions_per_symbol: Optional[int]
+    min_time_between_trades_minutes: float
+    min_time_between_opposite_signals_minutes: float
+    antiflip_min_hold_minutes: int
+    antiflip_cooldown_after_exit_minutes: int
+    antiflip_opposite_persistence_count: int
+    antiflip_hysteresis_multiplier: float
+    antiflip_require_strong_opposite: bool
+    daily_trades_quality_threshold: float
+    mtf_require_trend_alignment: bool
+    mtf_min_consensus: float
+    mtf_filter_consensus_threshold: float
+    chop_filter_enabled: bool
+    chop_timeframe: str
+    adx_threshold: float
+    atr_min_ratio: float
+    ema_slope_min_ratio: float
+    use_trailing_stop: bool
+    default_trailing_distance: float
+    settings: Mapping
+
+    @classmethod
+    def compile(cls, key: str, profile: Dict[str, Any], version: int) -> "ProfileSnapshot":
+        """Construir el snapshot desde el dict del perfil (copiado, no referenciado)."""
+        typed = {
+            name: cast(profile.get(name, default))
+            for name, (cast, default) in _PROFILE_SNAPSHOT_FIELDS.items()
+        }
+        per_symbol = profile.get("max_positions_per_symbol")
+        return cls(
+            version=version,
+            key=key,
+            max_positions_per_symbol=int(per_symbol) if per_symbol is not None else None,
+            settings=MappingProxyType(dict(profile)),
+            **typed,
+        )
+
+    def __getitem__(self, item: str) -> Any:
+        return self.settings[item]
+
+    def __iter__(self):
+        return iter(self.settings)
+
+    def __len__(self) -> int:
+        return len(self.settings)
+
+
 class TradingProfiles:
     """
     🎯 Gestión centralizada de perfiles de trading especializados para CFDs.
@@ -165,6 +269,12 @@ class TradingProfiles:
     # 📋 Referencia a los perfiles importados desde profiles_config.py
     PROFILES = PROFILES
 
+    # 📸 Snapshot compilado del perfil activo (se reemplaza, nunca se muta)
+    _snapshot: Optional[ProfileSnapshot] = None
+    _snapshot_lock = threading.Lock()
+    # Snapshot fijado en el contexto actual (cada hilo tiene el suyo)
+    _pinned: ContextVar[Optional[ProfileSnapshot]] = ContextVar("pinned_profile", default=None)
+
     @classmethod
     def get_profile(cls, profile_name: str) -> Dict[str, Any]:
         """
@@ -187,8 +297,87 @@ class TradingProfiles:
 
     @classmethod
     def get_current_profile(cls) -> Dict[str, Any]:
-        """Obtiene el perfil actualmente configurado."""
-        return cls.get_profile(TRADING_PROFILE)
+        """Obtiene el perfil actualmente configurado (o el fijado con `pinned`)."""
+        return cls.get_profile(cls.get_current_profile_name())
+
+    @classmethod
+    def get_current_profile_name(cls) -> str:
+        """Nombre del perfil actualmente configurado (o el fijado con `pinned`)."""
+        pinned = cls._pinned.get()
+        return pinned.key if pinned is not None else TRADING_PROFILE
+
+    @classmethod
+    def set_current_profile(cls, profile_name: str) -> Dict[str, Any]:
+        """
+        🔄 Activa otro perfil en el proceso sin recargar módulos.
+
+        Los getters de configuración leen el perfil en cada llamada, así que
+        basta con cambiar el selector aquí y en profiles_config y publicar
+        un snapshot con la versión siguiente.
+
+        Raises:
+            ValueError: Si el perfil no existe
+        """
+        global TRADING_PROFILE
+        profile = cls.get_profile(profile_name)
+        with cls._snapshot_lock:
+            TRADING_PROFILE = profile_name
+            profiles_config.TRADING_PROFILE = profile_name
+            cls._publish_snapshot(profile_name)
+        return profile
+
+    @classmethod
+    def _publish_snapshot(cls, profile_name: str) -> ProfileSnapshot:
+        """Compilar y publicar una nueva versión (llamar con _snapshot_lock tomado)."""
+        previous = cls._snapshot
+        snapshot = ProfileSnapshot.compile(
+            profile_name,
+            cls.get_profile(profile_name),
+            version=(previous.version + 1) if previous else 1,
+        )
+        # Asignación de una sola referencia: los lectores ven la versión
+        # anterior o la nueva, nunca una mezcla
+        cls._snapshot = snapshot
+        logger.info(f"📸 Perfil {profile_name} publicado (versión {snapshot.version})")
+        return snapshot
+
+    @classmethod
+    def snapshot(cls) -> ProfileSnapshot:
+        """
+        📸 Snapshot inmutable y versionado del perfil activo.
+
+        Capturarlo una vez por ciclo garantiza que el ciclo completo use un
+        único perfil aunque otro hilo lo cambie a mitad. Dentro de un bloque
+        `pinned` devuelve el snapshot fijado.
+        """
+        pinned = cls._pinned.get()
+        if pinned is not None:
+            return pinned
+        snapshot = cls._snapshot
+        if snapshot is not None and snapshot.key == TRADING_PROFILE:
+            return snapshot
+        with cls._snapshot_lock:
+            snapshot = cls._snapshot
+            if snapshot is None or snapshot.key != TRADING_PROFILE:
+                snapshot = cls._publish_snapshot(TRADING_PROFILE)
+            return snapshot
+
+    @classmethod
+    @contextmanager
+    def pinned(cls, snapshot: ProfileSnapshot):
+        """
+        📌 Fijar `snapshot` en el hilo/contexto actual mientras dure el bloque.
+
+        `snapshot()`, `get_current_profile()` y los getters que dependen de
+        ellos devuelven ese perfil aunque otro hilo publique uno nuevo. Un
+        hilo del executor no hereda el contexto: quien le envía trabajo debe
+        pasarle el snapshot y fijarlo dentro del hilo.
+        """
+        token = cls._pinned.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            cls._pinned.reset(token)
 
     @classmethod
     def get_max_daily_trades(cls) -> int:
@@ -309,12 +498,12 @@ def _get_capital_balance() -> float:
 
         # Importar dinámicamente el módulo
         capital_module = importlib.import_module("src.core.capital_client")
-        create_capital_client_from_env = getattr(
-            capital_module, "create_capital_client_from_env"
+        get_shared_capital_client = getattr(
+            capital_module, "get_shared_capital_client"
         )
 
-        # Crear cliente de Capital.com
-        capital_client = create_capital_client_from_env()
+        # Cliente compartido del proceso (no abre una sesión propia)
+        capital_client = get_shared_capital_client("config")
 
         # Obtener balance disponible
         balance_info = capital_client.get_available_balance()
@@ -427,6 +616,17 @@ class TradingBotConfig:
     # Símbolos para el bot en vivo - Misma lista optimizada
     SYMBOLS_LIVE_BOT = GLOBAL_SYMBOLS
 
+    # Segundos que start() espera a la sincronización de cuenta y el warm-up de estrategias
+    BACKGROUND_INIT_TIMEOUT = 120
+
+    # Decision log columnar (una fila por señal: filtros, tiempos y acción final)
+    DECISION_LOG_ENABLED: bool = _get_env_bool("DECISION_LOG_ENABLED", True)
+    DECISION_LOG_DIR: str = os.getenv("DECISION_LOG_DIR", "data/decision_log")
+    DECISION_LOG_SEGMENT_RECORDS: int = 50000  # Filas máximas por segmento
+    DECISION_LOG_FLUSH_INTERVAL: int = 60  # Segundos máximos antes de escribir un segmento
+    DECISION_LOG_RETENTION_DAYS: float = 30.0  # Segmentos más viejos se borran
+    DECISION_LOG_MAX_MB: int = 1024  # Tamaño máximo del directorio (borra los más viejos)
+
     # 🎯 CONFIGURACIÓN DINÁMICA BASADA EN PERFIL SELECCIONADO
 
     @classmethod
@@ -678,6 +878,11 @@ class PaperTraderConfig:
     # Máximo % del balance disponible para trading (reserva para fees)
     MAX_BALANCE_USAGE: float = 0.95
 
+    # Journal persistente (append-only + snapshots) del paper trader principal
+    JOURNAL_ENABLED: bool = _get_env_bool("PAPER_JOURNAL_ENABLED", True)
+    JOURNAL_DIR: str = os.getenv("PAPER_JOURNAL_DIR", "data/paper_journal")
+    JOURNAL_SNAPSHOT_EVERY: int = 500  # Eventos entre snapshots compactos
+
 
 # ============================================================================
 # 🛡️ CONFIGURACIÓN DEL GESTOR DE RIESGO
@@ -915,6 +1120,19 @@ class RiskManagerConfig:
         PaperTraderConfig.INITIAL_BALANCE
     )  # Mantiene consistencia automática
 
+    # Motor de riesgo de portfolio (matriz de retornos / covarianza / VaR)
+    PORTFOLIO_RISK_TIMEFRAME: str = "1h"  # Timeframe de las velas que alimentan la matriz
+    PORTFOLIO_RISK_WINDOW: int = 250  # Barras en la ventana móvil de retornos
+    PORTFOLIO_RISK_MIN_OBSERVATIONS: int = 30  # Barras comunes mínimas por par de símbolos
+    PORTFOLIO_VAR_CONFIDENCE: float = 0.95  # Nivel de confianza del VaR
+
+    # Simulación Monte Carlo de drawdown / pérdida diaria para el sizing
+    MONTE_CARLO_PATHS: int = 10000  # Trayectorias simuladas por evaluación
+    MONTE_CARLO_HORIZON_BARS: int = 120  # Barras simuladas (5 días de velas de 1h)
+    MONTE_CARLO_BARS_PER_DAY: int = 24  # Barras por día para el límite de pérdida diaria
+    MONTE_CARLO_MAX_BREACH_PROBABILITY: float = 0.05  # Probabilidad máxima aceptada de romper límites
+    MONTE_CARLO_SIZE_BUCKET: float = 0.01  # Granularidad (fracción del portfolio) de la cache
+
 
 # ============================================================================
 # 📊 CONFIGURACIÓN DE ESTRATEGIAS DE TRADING
@@ -1061,6 +1279,35 @@ class LoggingConfig:
     # 🔄 Número de archivos de backup a mantener durante la rotación
     LOG_BACKUP_COUNT: int = 5
 
+    # 📨 Logging asíncrono: los hilos de trading sólo encolan el registro;
+    # el formateo y la escritura los hace un hilo en segundo plano
+    ASYNC_LOGGING_ENABLED: bool = True
+
+    # 📦 Capacidad de la cola (llena: se descarta y cuenta, salvo WARNING+ y órdenes/trades)
+    ASYNC_LOG_QUEUE_SIZE: int = 10000
+
+    # ⏳ Con la cola llena, WARNING+ y órdenes/trades esperan esto un hueco
+    # (segundos) y, si sigue llena, se escriben en el hilo que loguea
+    ASYNC_LOG_BLOCK_TIMEOUT: float = 0.05
+
+    # 🚦 Límite por punto de llamada (token bucket) para registros < WARNING
+    LOG_RATE_LIMIT_PER_SECOND: float = 50.0
+    LOG_RATE_LIMIT_BURST: int = 200
+
+    # 🧾 Loggers de órdenes y trades: nunca se limitan ni se muestrean
+    # (en otros módulos, usar logger.info(..., extra=AUDIT))
+    LOG_UNLIMITED_LOGGERS: Tuple[str, ...] = (
+        "src.core.capital_client",
+        "src.core.paper_trader",
+        "src.core.trade_journal",
+    )
+
+    # 🎲 Muestreo de mensajes repetidos (mismo punto de llamada): tras
+    # LOG_SAMPLE_AFTER repeticiones en la ventana sólo pasa 1 de cada LOG_SAMPLE_EVERY
+    LOG_SAMPLE_WINDOW_SECONDS: float = 60.0
+    LOG_SAMPLE_AFTER: int = 20
+    LOG_SAMPLE_EVERY: int = 50
+
 
 # ============================================================================
 # 🚀 CONFIGURACIÓN DE TRADING EN VIVO (LIVE TRADING)
@@ -1119,6 +1366,12 @@ class LiveTradingConfig:
     # Scalping: 1s (alta frecuencia) - Intraday: 1.8s (frecuencia moderada)
     ORDER_CHECK_INTERVAL: int = 1  # Estrategia rápida
 
+    # ⚡ Plantillas de orden pre-validadas por símbolo (fast path de ejecución)
+    # Cuenta, dealing rules y bid/offer se refrescan en segundo plano
+    ORDER_TEMPLATE_REFRESH_INTERVAL: int = 15  # segundos entre refrescos
+    # Antigüedad máxima del bid/offer de la plantilla antes de consultarlo en línea
+    ORDER_TEMPLATE_QUOTE_MAX_AGE: int = 20
+
 
 # Expone TRADING_FEES a nivel de módulo para compatibilidad retroactiva
 TRADING_FEES: float = LiveTradingConfig.TRADING_FEES
@@ -1287,6 +1540,27 @@ class CacheConfig:
     MAX_CACHE_ENTRIES = 1000
     CLEANUP_THRESHOLD = 1200
 
+    # Snapshot de estado del bot (dashboard / status)
+    SNAPSHOT_MIN_PUBLISH_INTERVAL = 15  # segundos mínimos entre snapshots por ticks del monitor
+    SNAPSHOT_STALE_AFTER = 300  # segundos tras los cuales el snapshot se marca como desactualizado
+
+    # Snapshot de posiciones abiertas (compartido por todos los lectores)
+    POSITIONS_SNAPSHOT_TTL = 15  # segundos; se invalida además tras órdenes propias
+    POSITIONS_SNAPSHOT_REFRESH_INTERVAL = 8  # segundos; refresco en segundo plano antes del TTL
+
+    # Metadatos de instrumentos (dealing rules, tamaño mínimo, apalancamiento, trailing)
+    INSTRUMENT_METADATA_TTL = 6 * 3600  # segundos; cambian muy rara vez
+    INSTRUMENT_METADATA_REFRESH_INTERVAL = 600  # segundos entre pasadas del refresco en segundo plano
+
+    # Caches compartidos en memoria (src/utils/shared_cache.py): TTL, límites y locks por namespace
+    SHARED_CACHE_STRIPES = 16  # Locks independientes por cache (potencia de 2)
+    SHARED_CACHE_NAMESPACES = {
+        # namespace: (tipo de operación para el TTL, entradas máximas, bytes máximos)
+        "trading_bot": ("price_data", 500, 16 * 1024 * 1024),
+        "enhanced_strategies": ("price_data", MAX_CACHE_ENTRIES, 32 * 1024 * 1024),
+        "advanced_indicators": ("technical_analysis", MAX_CACHE_ENTRIES, 16 * 1024 * 1024),
+    }
+
     # Cache Keys
     CACHE_KEY_PREFIXES = {
         "volume_analysis": "vol_",
@@ -1305,6 +1579,19 @@ class CacheConfig:
         }
         return ttl_map.get(operation_type, cls.DEFAULT_TTL)
 
+    @classmethod
+    def get_namespace_settings(cls, namespace: str) -> dict:
+        """Obtener TTL y límites de un cache compartido por namespace"""
+        operation_type, max_entries, max_bytes = cls.SHARED_CACHE_NAMESPACES.get(
+            namespace, ("default", cls.MAX_CACHE_ENTRIES, 16 * 1024 * 1024)
+        )
+        return {
+            "ttl": cls.get_ttl_for_operation(operation_type),
+            "max_entries": max_entries,
+            "max_bytes": max_bytes,
+            "stripes": cls.SHARED_CACHE_STRIPES,
+        }
+
 
 class TechnicalAnalysisConfig:
     """📊 Configuración centralizada de análisis técnico"""
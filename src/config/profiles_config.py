@@ -76,6 +76,8 @@ PROFILES = {
         "trailing_stop_activation": 0.025,  # Activación de trailing stop al 2.5%
         "breakeven_threshold_percent": 0.4,  # Umbral para mover stop a breakeven (0.4%)
         "intelligent_trailing": True,  # Activar trailing stop inteligente
+        "trailing_amend_min_interval": 10,  # Segundos mínimos entre modificaciones de SL/TP por posición
+        "trailing_max_amends_per_minute": 30,  # Presupuesto global de modificaciones hacia Capital.com
         "dynamic_position_sizing": True,  # Activar dimensionamiento dinámico de posiciones
         # === CONFIGURACIÓN DE CAPITAL.COM ===
         "use_trailing_stop": True,  # Usar trailing stops nativos de Capital.com
@@ -133,6 +135,9 @@ PROFILES = {
         # === CONFIGURACIÓN DE MONITOREO DE POSICIONES ===
         "enable_position_monitoring": False,  # Desactivado: solo usar TP/SL automáticos
         "position_monitoring_interval": 5,  # Intervalo de monitoreo en segundos
+        "monitor_min_interval": 1,  # Intervalo mínimo por símbolo cerca de un SL/TP (segundos)
+        "monitor_max_interval": 60,  # Intervalo máximo por símbolo lejos de sus SL/TP (segundos)
+        "monitor_max_quotes_per_minute": 60,  # Presupuesto global de consultas de precio del monitor
         "price_cache_duration": 5,  # Duración del cache de precios
         "max_close_attempts": 2,  # Máximo de intentos para cerrar posiciones
         "position_timeout_hours": 4,  # Timeout para cerrar posiciones automáticamente
@@ -228,6 +233,8 @@ PROFILES = {
         "trailing_stop_activation": 0.030,  # Trailing stop al 3% - conservador
         "breakeven_threshold_percent": 0.8,  # Breakeven al 0.8% - conservador
         "intelligent_trailing": True,
+        "trailing_amend_min_interval": 30,  # Modificaciones de SL/TP menos frecuentes
+        "trailing_max_amends_per_minute": 15,  # Presupuesto global moderado
         "dynamic_position_sizing": True,
         # === CONFIGURACIÓN DE CAPITAL.COM ===
         "use_trailing_stop": True,  # Usar trailing stops nativos
@@ -285,6 +292,9 @@ PROFILES = {
         # === CONFIGURACIÓN ANTI-LATERAL ===
         "enable_position_monitoring": True,  # Activado para cerrar trades lentos
         "position_monitoring_interval": 20,  # Monitoreo más frecuente
+        "monitor_min_interval": 5,  # Intervalo mínimo por símbolo cerca de un SL/TP
+        "monitor_max_interval": 180,  # Intervalo máximo por símbolo lejos de sus SL/TP
+        "monitor_max_quotes_per_minute": 30,  # Presupuesto global de consultas de precio
         "price_cache_duration": 15,  # Cache más fresco
         "max_close_attempts": 3,  # Intentos estándar de cierre
         "position_timeout_hours": 5,  # Cerrar posiciones después de 5 horas
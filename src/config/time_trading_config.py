@@ -22,6 +22,7 @@ Versión: 2.0
 
 import pytz
 from datetime import datetime, time
+from functools import lru_cache
 
 # Importar configuración de símbolos para mantener consistencia
 from .symbols_config import (
@@ -532,6 +533,54 @@ def get_weekend_trading_params(profile_name: str = None) -> dict:
     }
 
 
+@lru_cache(maxsize=64)
+def _compile_smart_window(profile_name: str, market_type: str) -> tuple:
+    """
+    ⚙️ Resuelve una vez la ventana de SMART_TRADING_HOURS para (perfil, mercado).
+
+    Aplica los ajustes por perfil y por mercado y parsea "HH:MM" a segundos
+    del día UTC. Si SMART_TRADING_HOURS se modifica en caliente, llamar a
+    `_compile_smart_window.cache_clear()`.
+
+    Returns:
+        tuple: (start_str, end_str, market_reason, start_seconds, end_seconds)
+    """
+    # Obtener horarios base (formato HH:MM en UTC)
+    start_time_str = SMART_TRADING_HOURS["start_time"]
+    end_time_str = SMART_TRADING_HOURS["end_time"]
+
+    # Aplicar ajustes por perfil si existen
+    profile_adjustments = SMART_TRADING_HOURS.get("profile_adjustments", {})
+    if profile_name in profile_adjustments:
+        start_time_str = profile_adjustments[profile_name].get("start_time", start_time_str)
+        end_time_str = profile_adjustments[profile_name].get("end_time", end_time_str)
+
+    # Aplicar configuración específica por mercado
+    market_config = SMART_TRADING_HOURS.get("market_specific", {}).get(market_type)
+    if market_config and market_config.get("enabled", True):
+        start_time_str = market_config.get("start_time", start_time_str)
+        end_time_str = market_config.get("end_time", end_time_str)
+        market_reason = market_config.get("reason", "Market-specific hours")
+    else:
+        market_reason = "General trading hours"
+
+    # Fix: Convertir objetos time() a string si es necesario
+    if isinstance(start_time_str, time):
+        start_time_str = start_time_str.strftime("%H:%M")
+    if isinstance(end_time_str, time):
+        end_time_str = end_time_str.strftime("%H:%M")
+
+    start_hour, start_minute = map(int, start_time_str.split(":"))
+    end_hour, end_minute = map(int, end_time_str.split(":"))
+    return (
+        start_time_str,
+        end_time_str,
+        market_reason,
+        start_hour * 3600 + start_minute * 60,
+        end_hour * 3600 + end_minute * 60,
+    )
+
+
 def is_smart_trading_hours_allowed(
     symbol: str = None, profile_name: str = None
 ) -> dict:
@@ -546,8 +595,6 @@ def is_smart_trading_hours_allowed(
     Returns:
         dict: Información detallada sobre el estado del horario de trading
     """
-    from datetime import datetime, time
-    import pytz
     from .profiles_config import TRADING_PROFILE
 
     # Si los horarios inteligentes están deshabilitados, permitir siempre
@@ -560,76 +607,33 @@ def is_smart_trading_hours_allowed(
         }
 
     try:
-        # Obtener zona horaria UTC
-        utc_tz = pytz.timezone(SMART_TRADING_HOURS["timezone"])
-
         # Obtener tiempo actual en UTC
-        utc_now = datetime.now(pytz.UTC)
-        current_time_utc = utc_now
+        current_time_utc = datetime.now(pytz.UTC)
 
         # Si no se especifica perfil, usar el actual
         if profile_name is None:
             profile_name = TRADING_PROFILE
 
-        # Obtener horarios base (formato HH:MM en UTC)
-        start_time_str = SMART_TRADING_HOURS["start_time"]
-        end_time_str = SMART_TRADING_HOURS["end_time"]
-
-        # Aplicar ajustes por perfil si existen
-        profile_adjustments = SMART_TRADING_HOURS.get("profile_adjustments", {})
-        if profile_name in profile_adjustments:
-            start_time_str = profile_adjustments[profile_name].get(
-                "start_time", start_time_str
-            )
-            end_time_str = profile_adjustments[profile_name].get(
-                "end_time", end_time_str
-            )
-
-        # Aplicar configuración específica por mercado si se proporciona símbolo
+        # Ventana ya resuelta y parseada para (perfil, mercado)
         market_type = _detect_market_type(symbol) if symbol else "general"
-        market_config = SMART_TRADING_HOURS.get("market_specific", {}).get(market_type)
-
-        if market_config and market_config.get("enabled", True):
-            start_time_str = market_config.get("start_time", start_time_str)
-            end_time_str = market_config.get("end_time", end_time_str)
-            market_reason = market_config.get("reason", "Market-specific hours")
-        else:
-            market_reason = "General trading hours"
-
-        # Crear horarios en UTC para comparaciones precisas
-        # Fix: Convertir objetos time() a string si es necesario
-        if isinstance(start_time_str, time):
-            start_time_str = start_time_str.strftime("%H:%M")
-        if isinstance(end_time_str, time):
-            end_time_str = end_time_str.strftime("%H:%M")
-
-        start_hour, start_minute = map(int, start_time_str.split(":"))
-        end_hour, end_minute = map(int, end_time_str.split(":"))
-
-        # Crear datetime en UTC para hoy con los horarios configurados
-        today_utc = current_time_utc.date()
-        start_datetime_utc = utc_tz.localize(
-            datetime.combine(today_utc, time(start_hour, start_minute))
-        )
-        end_datetime_utc = utc_tz.localize(
-            datetime.combine(today_utc, time(end_hour, end_minute))
+        start_time_str, end_time_str, market_reason, start_s, end_s = (
+            _compile_smart_window(profile_name, market_type)
         )
 
-        # Verificar si estamos dentro del horario (comparación en UTC)
+        # Verificar si estamos dentro del horario (segundos del día en UTC)
         # Manejar correctamente horarios que cruzan medianoche
-        current_time_only = current_time_utc.time()
-        start_time_only = start_datetime_utc.time()
-        end_time_only = end_datetime_utc.time()
-
-        if start_time_only <= end_time_only:
+        now_s = (
+            current_time_utc.hour * 3600
+            + current_time_utc.minute * 60
+            + current_time_utc.second
+            + current_time_utc.microsecond / 1e6
+        )
+        if start_s <= end_s:
             # Horario normal (no cruza medianoche): ej. 08:00 - 17:00
-            is_within_hours = start_time_only <= current_time_only <= end_time_only
+            is_within_hours = start_s <= now_s <= end_s
         else:
             # Horario que cruza medianoche: ej. 11:00 - 02:30
-            is_within_hours = (
-                current_time_only >= start_time_only
-                or current_time_only <= end_time_only
-            )
+            is_within_hours = now_s >= start_s or now_s <= end_s
 
         if is_within_hours:
             return {
@@ -664,6 +668,7 @@ def is_smart_trading_hours_allowed(
         }
 
 
+@lru_cache(maxsize=256)
 def _detect_market_type(symbol: str) -> str:
     """
     🔍 Detecta el tipo de mercado basado en el símbolo.
@@ -1,22 +1,28 @@
 """
 🤖 Universal Trading Analyzer - Trading Engine
 Motor de trading automático con estrategias inteligentes
-"""
 
-# Estrategias base y mejoradas
-from .enhanced_strategies import (
-    TradingStrategy,
-    TradingSignal,
-    EnhancedTradingStrategy,
-    # Solo usamos las estrategias profesionales avanzadas
-)
+Los exports se cargan bajo demanda: importar un submódulo ligero
+(`src.core.capital_client`, `src.core.balance_manager`...) no arrastra
+pandas, ta ni los módulos de estrategias e indicadores. Éstos se importan
+la primera vez que se accede al nombre.
+"""
 
-# Gestión de riesgo
-from .enhanced_risk_manager import EnhancedRiskManager
+import importlib
 
-# Trading
-from .paper_trader import PaperTrader
-from .trading_bot import TradingBot
+# Nombre exportado -> submódulo que lo define
+_LAZY_EXPORTS = {
+    # Estrategias base y mejoradas
+    # (solo usamos las estrategias profesionales avanzadas)
+    "TradingStrategy": ".enhanced_strategies",
+    "TradingSignal": ".enhanced_strategies",
+    "EnhancedTradingStrategy": ".enhanced_strategies",
+    # Gestión de riesgo
+    "EnhancedRiskManager": ".enhanced_risk_manager",
+    # Trading
+    "PaperTrader": ".paper_trader",
+    "TradingBot": ".trading_bot",
+}
 
 __all__ = [
     # Estrategias base
@@ -31,3 +37,17 @@ __all__ = [
     "PaperTrader",
     "TradingBot",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # Cachear en el módulo para que los siguientes accesos no pasen por aquí
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -10,11 +10,11 @@ from ta.volatility import BollingerBands, AverageTrueRange
 from ta.volume import OnBalanceVolumeIndicator, MFIIndicator, VolumeWeightedAveragePrice
 import numpy as np
 import warnings
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Hashable, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 from functools import lru_cache
-import hashlib
+import time
 
 # Importar configuración centralizada
 from src.config.main_config import (
@@ -23,6 +23,8 @@ from src.config.main_config import (
     OscillatorConfig,
     CalculationConfig,
 )
+from src.utils import metrics
+from src.utils.shared_cache import get_shared_cache
 
 # Suprimir warnings específicos de pandas_ta
 warnings.filterwarnings("ignore", message=".*dtype incompatible.*")
@@ -58,35 +60,111 @@ class IchimokuCloud:
 class AdvancedIndicators:
     """Clase para calcular indicadores técnicos avanzados con optimizaciones"""
 
-    # Cache para resultados de indicadores
-    _indicator_cache = {}
-    _cache_max_size = 1000
+    # Cache para resultados de indicadores (LRU thread-safe; TTL y límites en CacheConfig)
+    _indicator_cache = get_shared_cache("advanced_indicators")
+
+    # Último ATR calculado por símbolo: symbol -> (atr, time.time())
+    _atr_by_symbol: Dict[str, Tuple[float, float]] = {}
+    ATR_MAX_AGE_SECONDS = 3600
+
+    # True Range reciente por (symbol, timeframe): -> (np.ndarray, time.time())
+    _atr_history: Dict[Tuple[str, str], Tuple[np.ndarray, float]] = {}
+    ATR_HISTORY_LENGTH = 240
+    ATR_HISTORY_WARMUP = 120  # Barras extra guardadas para que la EMA converja
 
     @classmethod
-    def _get_cache_key(cls, df: pd.DataFrame, indicator_name: str, **kwargs) -> str:
+    def _get_cache_key(cls, df: pd.DataFrame, indicator_name: str, **kwargs) -> Hashable:
         """🔑 Generar clave de cache basada en datos y parámetros"""
         try:
-            # Usar hash de los últimos valores para identificar el dataset
-            last_values = f"{df['close'].iloc[-1]}_{df['volume'].iloc[-1]}_{len(df)}"
-            params_str = "_".join([f"{k}_{v}" for k, v in sorted(kwargs.items())])
-            cache_key = f"{indicator_name}_{last_values}_{params_str}"
-            return hashlib.md5(cache_key.encode()).hexdigest()[:16]
-        except:
+            # Los últimos valores y el largo identifican el dataset
+            return (
+                indicator_name,
+                float(df["close"].iloc[-1]),
+                float(df["volume"].iloc[-1]),
+                len(df),
+                tuple(sorted(kwargs.items())),
+            )
+        except Exception:
             return f"{indicator_name}_{id(df)}"
 
     @classmethod
-    def _get_from_cache(cls, cache_key: str):
+    def _get_from_cache(cls, cache_key: Hashable):
         """📦 Obtener resultado del cache"""
         return cls._indicator_cache.get(cache_key)
 
     @classmethod
-    def _store_in_cache(cls, cache_key: str, result):
-        """💾 Almacenar resultado en cache"""
-        if len(cls._indicator_cache) >= cls._cache_max_size:
-            # Limpiar cache más antiguo (FIFO simple)
-            oldest_key = next(iter(cls._indicator_cache))
-            del cls._indicator_cache[oldest_key]
-        cls._indicator_cache[cache_key] = result
+    def _store_in_cache(cls, cache_key: Hashable, result):
+        """💾 Almacenar resultado en cache (LRU acotado por entradas y bytes)"""
+        cls._indicator_cache.set(cache_key, result)
+
+    @classmethod
+    def record_atr(cls, symbol: str, atr: float):
+        """📏 Guardar el último ATR calculado para un símbolo"""
+        try:
+            atr = float(atr)
+        except (TypeError, ValueError):
+            return
+        if symbol and atr > 0 and not np.isnan(atr):
+            cls._atr_by_symbol[symbol] = (atr, time.time())
+
+    @classmethod
+    def get_cached_atr(cls, symbol: str, max_age: float = None) -> Optional[float]:
+        """📏 Último ATR conocido de un símbolo (None si no hay o está vencido)"""
+        entry = cls._atr_by_symbol.get(symbol)
+        metrics.record_cache_lookup("atr_by_symbol", entry is not None)
+        if entry is None:
+            return None
+        atr, recorded_at = entry
+        max_age = cls.ATR_MAX_AGE_SECONDS if max_age is None else max_age
+        if time.time() - recorded_at > max_age:
+            return None
+        return atr
+
+    @classmethod
+    def record_atr_history(cls, symbol: str, timeframe: str, df: pd.DataFrame):
+        """
+        📏 Guardar el True Range reciente de unas velas
+
+        Se alimenta desde la capa compartida de velas para que el percentil
+        de ATR del risk manager no tenga que volver a pedir históricos. El
+        período del ATR lo elige quien lee (`get_atr_history`).
+        """
+        try:
+            if df is None or len(df) < 2:
+                return
+            high, low, close = df["high"], df["low"], df["close"]
+            prev_close = close.shift(1)
+            true_range = pd.concat(
+                [high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1
+            ).max(axis=1)
+            keep = cls.ATR_HISTORY_LENGTH + cls.ATR_HISTORY_WARMUP
+            values = true_range.dropna().to_numpy(dtype=float)[-keep:]
+            if len(values):
+                cls._atr_history[(symbol, timeframe)] = (values, time.time())
+        except Exception:
+            pass
+
+    @classmethod
+    def get_atr_history(
+        cls, symbol: str, timeframe: str, span: int = 14, max_age: float = None
+    ) -> Optional[np.ndarray]:
+        """
+        📏 Serie reciente de ATR (EMA del True Range con `span` períodos)
+
+        Returns:
+            Hasta ATR_HISTORY_LENGTH valores, o None si no hay velas
+            registradas o están vencidas
+        """
+        entry = cls._atr_history.get((symbol, timeframe))
+        metrics.record_cache_lookup("atr_history", entry is not None)
+        if entry is None:
+            return None
+        true_range, recorded_at = entry
+        max_age = cls.ATR_MAX_AGE_SECONDS if max_age is None else max_age
+        if time.time() - recorded_at > max_age:
+            return None
+        atr = pd.Series(true_range).ewm(span=span).mean().to_numpy()
+        return atr[-cls.ATR_HISTORY_LENGTH :]
 
     @staticmethod
     def safe_float(value, default: float = 0.0) -> float:
@@ -107,6 +185,38 @@ class AdvancedIndicators:
         except (ValueError, TypeError):
             return default
 
+    @staticmethod
+    def session_bars(
+        df: pd.DataFrame, symbol: str, tradable: bool = False
+    ) -> pd.DataFrame:
+        """
+        🕘 Filtrar las velas fuera de sesión del símbolo
+
+        Usa la máscara vectorizada del calendario de mercado, de modo que
+        índices como US500, UK100, FR40 o HK50 calculan sus indicadores sólo
+        con barras de sesión. Crypto y forex quedan igual (siempre abiertos).
+
+        Args:
+            df: DataFrame con DatetimeIndex o columna 'timestamp'
+            symbol: Símbolo del activo
+            tradable: Exigir la ventana operable (buffers y pausas)
+
+        Returns:
+            DataFrame sólo con las barras dentro de sesión
+        """
+        from src.utils.market_hours import market_hours_checker
+
+        if df is None or df.empty:
+            return df
+        if isinstance(df.index, pd.DatetimeIndex):
+            timestamps = df.index.values
+        elif "timestamp" in df.columns:
+            timestamps = pd.to_datetime(df["timestamp"], utc=True).values
+        else:
+            return df
+        mask = market_hours_checker.session_mask(symbol, timestamps, tradable=tradable)
+        return df[mask]
+
     @staticmethod
     def fibonacci_retracement(
         df: pd.DataFrame, lookback: int = None
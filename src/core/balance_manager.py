@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from contextlib import asynccontextmanager
 
-from src.core.capital_client import create_capital_client_from_env
+from src.core.capital_client import get_shared_capital_client
 
 # Base de datos eliminada - usando Capital.com directamente
 from src.config.main_config import _get_env_float, _get_env_bool
@@ -87,10 +87,12 @@ class BalanceManager:
         """Establece conexión con Capital.com"""
         try:
             logger.info("🔗 Conectando a Capital.com...")
-            self.capital_client = create_capital_client_from_env()
+            self.capital_client = await asyncio.to_thread(
+                get_shared_capital_client, "balance_manager"
+            )
 
             # Verificar conexión obteniendo información de cuenta
-            account_info = self.capital_client.get_accounts()
+            account_info = await asyncio.to_thread(self.capital_client.get_accounts)
             if account_info:
                 logger.info("✅ Conexión a Capital.com establecida correctamente")
                 self.last_session_refresh = datetime.now()
@@ -109,13 +111,13 @@ class BalanceManager:
         time_since_refresh = datetime.now() - self.last_session_refresh
         if time_since_refresh.total_seconds() > self.session_refresh_interval:
             try:
-                logger.info("🔄 Renovando sesión de Capital.com...")
+                logger.info("🔄 Verificando sesión compartida de Capital.com...")
 
-                # Crear nueva sesión
-                self.capital_client = create_capital_client_from_env()
+                # La renovación la hace el cliente compartido (una sola vez para
+                # todo el proceso); aquí sólo se comprueba que sigue funcionando
 
-                # Verificar que la nueva sesión funciona
-                account_info = self.capital_client.get_accounts()
+                # Verificar que la sesión funciona
+                account_info = await asyncio.to_thread(self.capital_client.get_accounts)
                 if account_info:
                     self.last_session_refresh = datetime.now()
                     logger.info("✅ Sesión renovada correctamente")
@@ -139,7 +141,9 @@ class BalanceManager:
             await self._refresh_session_if_needed()
 
             # Obtener balance de Capital.com
-            balance_info = self.capital_client.get_available_balance()
+            balance_info = await asyncio.to_thread(
+                self.capital_client.get_available_balance
+            )
 
             if not balance_info:
                 logger.error("❌ No se pudo obtener balance de Capital.com")
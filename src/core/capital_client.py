@@ -15,17 +15,23 @@ from datetime import datetime, timedelta
 
 # Import symbol functions from main_config
 try:
-    from ..config.main_config import get_all_capital_symbols, GLOBAL_SYMBOLS
+    from ..config.main_config import get_all_capital_symbols, GLOBAL_SYMBOLS, CacheConfig
     from ..config.time_trading_config import UTC_TZ
     from ..utils.market_hours import market_hours_checker
+    from ..utils import metrics
+    from .positions_snapshot import PositionsCache
+    from .instrument_cache import InstrumentMetadataCache
 except ImportError:
     # Fallback for direct execution
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from config.main_config import get_all_capital_symbols, GLOBAL_SYMBOLS
+    from config.main_config import get_all_capital_symbols, GLOBAL_SYMBOLS, CacheConfig
     from config.time_trading_config import UTC_TZ
     from utils.market_hours import market_hours_checker
+    from utils import metrics
+    from core.positions_snapshot import PositionsCache
+    from core.instrument_cache import InstrumentMetadataCache
 
 logger = logging.getLogger(__name__)
 
@@ -116,6 +122,11 @@ class CapitalClient:
         # Thread safety
         self._session_lock = threading.Lock()
 
+        # Background session renewer (keeps logins off the request path)
+        self.renewer_check_interval = 15  # seconds between renewer checks
+        self._renewer_stop = threading.Event()
+        self._renewer_thread: Optional[threading.Thread] = None
+
         # Session persistence
         self.session_file = (
             f".capital_session_{'demo' if config.use_demo else 'live'}.json"
@@ -136,9 +147,66 @@ class CapitalClient:
             {"Content-Type": "application/json", "X-CAP-API-KEY": self.config.api_key}
         )
 
+        # Metrics: every response goes through this hook (endpoint + status)
+        self.session.hooks["response"].append(self._record_http_metrics)
+
+        # Shared positions snapshot (background refresh + invalidation after our own orders)
+        self.positions_cache = PositionsCache(
+            self.get_positions,
+            ttl=CacheConfig.POSITIONS_SNAPSHOT_TTL,
+            refresh_interval=CacheConfig.POSITIONS_SNAPSHOT_REFRESH_INTERVAL,
+        )
+
+        # Per-epic instrument metadata (dealing rules, min size, leverage, trailing)
+        self.instrument_cache = InstrumentMetadataCache(
+            self._fetch_instrument_metadata,
+            ttl=CacheConfig.INSTRUMENT_METADATA_TTL,
+            refresh_interval=CacheConfig.INSTRUMENT_METADATA_REFRESH_INTERVAL,
+        )
+
         # Try to load existing session
         self._load_session_from_file()
 
+    @staticmethod
+    def _normalize_endpoint(path: str) -> str:
+        """Collapse a request path to a low-cardinality endpoint label"""
+        path = path.split("?", 1)[0]
+        parts = [p for p in path.split("/") if p]
+        # Drop the /api/v1 prefix
+        if len(parts) >= 2 and parts[0] == "api":
+            parts = parts[2:]
+        if not parts:
+            return "/"
+        if len(parts) == 1:
+            return f"/{parts[0]}"
+        if parts[0] == "prices":
+            return "/prices/{epic}"
+        if parts[0] == "markets":
+            return "/markets/{epic}"
+        if parts[0] == "positions":
+            return "/positions/{dealId}"
+        return f"/{parts[0]}/{parts[1]}"
+
+    def _record_http_metrics(self, response, *args, **kwargs):
+        """requests response hook: count calls and latency per endpoint"""
+        try:
+            request = response.request
+            endpoint = self._normalize_endpoint(request.path_url)
+            metrics.capital_http_requests.inc(
+                method=request.method, endpoint=endpoint, status=response.status_code
+            )
+            metrics.capital_http_latency.observe(
+                response.elapsed.total_seconds(), method=request.method, endpoint=endpoint
+            )
+        except Exception:
+            pass
+        return response
+
+    def _rate_limit_sleep(self, seconds: float, reason: str):
+        """Sleep for rate limiting / backoff and record the wait"""
+        metrics.record_rate_limit_wait(reason, seconds)
+        time.sleep(seconds)
+
     def _is_session_expired(self) -> bool:
         """Check if the current session has expired"""
         if not self.session_active or not self.session_created_at:
@@ -162,11 +230,18 @@ class CapitalClient:
         return self.failed_requests < self.max_failed_requests
 
     def _update_session_headers(self):
-        """Update session headers with authentication tokens"""
+        """Update session headers with authentication tokens
+
+        The header mapping is replaced in a single assignment, so a request
+        being prepared concurrently sees either the old or the new token
+        pair, never a mix. Requests already in flight finish on the old tokens.
+        """
         if self.cst_token and self.security_token:
-            self.session.headers.update(
+            headers = self.session.headers.copy()
+            headers.update(
                 {"CST": self.cst_token, "X-SECURITY-TOKEN": self.security_token}
             )
+            self.session.headers = headers
 
     def create_session(self) -> Dict[str, Any]:
         """
@@ -181,6 +256,60 @@ class CapitalClient:
         with self._session_lock:
             return self._create_session_with_retry()
 
+    def _renew_session(self, reason: str, trigger: str = "inline"):
+        """Renew the session once even if several threads detect expiry at the same time
+
+        Args:
+            reason: Why the session is renewed (for session alerts)
+            trigger: "background" (renewer thread) or "inline" (request path)
+        """
+        requested_at = datetime.now(UTC_TZ)
+        with self._session_lock:
+            # Another thread may have renewed while we waited for the lock
+            if (
+                self.session_active
+                and self.session_created_at is not None
+                and self.session_created_at >= requested_at
+            ):
+                return
+            self._track_session_renewal(reason)
+            with metrics.capital_session_renew_latency.time(trigger=trigger):
+                self._create_session_with_retry()
+
+    def _renewer_active(self) -> bool:
+        return self._renewer_thread is not None and self._renewer_thread.is_alive()
+
+    def _session_renewer_loop(self):
+        """Renew tokens before expiry and run health checks off the request path"""
+        while not self._renewer_stop.wait(self.renewer_check_interval):
+            try:
+                if self._should_renew_session():
+                    self._renew_session("Background renewal before expiry", trigger="background")
+                elif not self._is_session_healthy():
+                    self._renew_session("Session health check failed", trigger="background")
+                elif self._should_perform_health_check():
+                    self._perform_health_check()
+            except Exception as e:
+                self._track_session_failure(f"Background session renewal failed: {str(e)}")
+
+    def start_session_renewer(self):
+        """Start the background session renewer (idempotent)"""
+        if self._renewer_active():
+            return
+        self._renewer_stop.clear()
+        self._renewer_thread = threading.Thread(
+            target=self._session_renewer_loop, daemon=True, name="CapitalSessionRenewer"
+        )
+        self._renewer_thread.start()
+        logger.info("🔄 Background session renewer started")
+
+    def stop_session_renewer(self, timeout: float = 5.0):
+        """Stop the background session renewer"""
+        self._renewer_stop.set()
+        if self._renewer_thread and self._renewer_thread.is_alive():
+            self._renewer_thread.join(timeout=timeout)
+        self._renewer_thread = None
+
     def _create_session_with_retry(self) -> Dict[str, Any]:
         """Internal method to create session with retry logic"""
         url = f"{self.base_url}/session"
@@ -203,7 +332,7 @@ class CapitalClient:
                     logger.info(
                         f"Retrying session creation in {delay} seconds... (attempt {attempt + 1}/{self.max_retries})"
                     )
-                    time.sleep(delay)
+                    self._rate_limit_sleep(delay, "session_retry")
 
                 logger.info(
                     f"Creating new Capital.com session... (attempt {attempt + 1}/{self.max_retries})"
@@ -212,10 +341,12 @@ class CapitalClient:
 
                 if response.status_code == 200:
                     # Extract tokens from response headers
-                    self.cst_token = response.headers.get("CST")
-                    self.security_token = response.headers.get("X-SECURITY-TOKEN")
+                    cst_token = response.headers.get("CST")
+                    security_token = response.headers.get("X-SECURITY-TOKEN")
 
-                    if self.cst_token and self.security_token:
+                    if cst_token and security_token:
+                        self.cst_token = cst_token
+                        self.security_token = security_token
                         self.session_active = True
                         self.last_activity = time.time()
                         self.session_created_at = datetime.now(UTC_TZ)
@@ -290,14 +421,19 @@ class CapitalClient:
             bool: True if session is valid, False otherwise
         """
         try:
+            # With the background renewer running, the request path only logs
+            # in when the session has actually expired (e.g. renewer failing)
+            if self._renewer_active():
+                if self._is_session_expired():
+                    self._renew_session("Session expired before background renewal")
+                return self.session_active
+
             # Check if session needs renewal
             if self._should_renew_session():
-                self._track_session_renewal("Session approaching expiry")
-                self.create_session()
+                self._renew_session("Session approaching expiry")
                 return True
             elif not self._is_session_healthy():
-                self._track_session_renewal("Session health check failed")
-                self.create_session()
+                self._renew_session("Session health check failed")
                 return True
 
             # Perform health check if needed
@@ -569,7 +705,12 @@ class CapitalClient:
         try:
             # Usar la función mejorada de clasificación de activos
             asset_type = self.get_asset_type_from_symbol(symbol)
-            return CAPITAL_MIN_SIZES[asset_type]
+            min_size = CAPITAL_MIN_SIZES[asset_type]
+            # Mínimo real del instrumento si ya está en cache (sin consultar la API)
+            metadata, _ = self.instrument_cache.get(symbol, allow_fetch=False)
+            if metadata is not None and metadata.min_deal_size:
+                min_size = max(min_size, metadata.min_deal_size)
+            return min_size
                 
         except Exception as e:
             logger.warning(f"Error determining minimum size for {symbol}: {e}")
@@ -716,6 +857,15 @@ class CapitalClient:
         Returns:
             Dict containing leverage information for the symbol
         """
+        metadata, _ = self.instrument_cache.get(symbol)
+        if metadata is not None and metadata.leverage:
+            return {
+                "success": True,
+                "symbol": symbol,
+                "detected_asset_type": metadata.asset_type,
+                **metadata.leverage,
+            }
+
         asset_type = self.get_asset_type_from_symbol(symbol)
         leverage_info = self.get_leverage_for_asset_type(asset_type)
 
@@ -758,7 +908,7 @@ class CapitalClient:
 
         try:
             # Add small delay to avoid rate limiting
-            time.sleep(0.5)
+            self._rate_limit_sleep(0.5, "markets_throttle")
             response = self.session.get(url, params=params, timeout=10)
             self.last_activity = time.time()
 
@@ -774,7 +924,7 @@ class CapitalClient:
                 )
                 logger.warning(error_msg)
                 logger.info("Waiting 5 seconds due to rate limiting...")
-                time.sleep(5)
+                self._rate_limit_sleep(5, "http_429")
                 self.failed_requests += 1
                 return {"success": False, "error": error_msg}
             else:
@@ -819,7 +969,7 @@ class CapitalClient:
 
             # Add delay between batches to avoid rate limiting (429 errors)
             if i > 0:  # No delay for first batch
-                time.sleep(2.0)  # 2 second delay between batches
+                self._rate_limit_sleep(2.0, "market_data_batch")  # 2 second delay between batches
 
             try:
                 result = self.get_markets(epics=batch_symbols)
@@ -876,30 +1026,66 @@ class CapitalClient:
     def get_dealing_rules(self, epic: str) -> Dict[str, Any]:
         """Get dealing rules (min stop/profit distance, step, increment, trailing preference).
 
+        Served from the instrument metadata cache; only an epic never seen
+        before triggers a /markets request.
+
         Returns a dict with keys:
             success, min_stop_distance, min_step_distance, min_size_increment, trailing_preference, error (optional)
         """
         try:
-            result = self.get_markets(epics=[epic])
-            if not result.get("success"):
-                return {"success": False, "error": result.get("error")}
+            return self.instrument_cache.dealing_rules(epic)
+        except Exception as e:
+            logger.error(f"Error getting dealing rules for {epic}: {e}")
+            return {"success": False, "error": str(e)}
 
-            markets_response = result.get("markets", {})
-            details = markets_response.get("marketDetails")
-            if not details:
-                return {"success": False, "error": "No marketDetails found"}
+    def _fetch_instrument_metadata(self, epics: List[str]) -> Dict[str, Any]:
+        """Fetch metadata for a batch of epics (one /markets call + account leverages)
 
-            dealing_rules = details[0].get("dealingRules", {})
-            return {
-                "success": True,
+        Returns:
+            {"success": bool, "instruments": {epic: fields of InstrumentMetadata}}
+        """
+        result = self.get_markets(epics=epics)
+        if not result.get("success"):
+            return {"success": False, "error": result.get("error")}
+
+        details = (result.get("markets") or {}).get("marketDetails") or []
+        if not details:
+            return {"success": False, "error": "No marketDetails found"}
+
+        preferences = self.get_account_preferences()
+        leverages = preferences.get("leverages", {}) if preferences.get("success") else {}
+
+        instruments = {}
+        for market_detail in details:
+            epic = (market_detail.get("instrument") or {}).get("epic")
+            if not epic:
+                continue
+            dealing_rules = market_detail.get("dealingRules", {}) or {}
+            min_deal_size = (dealing_rules.get("minDealSize") or {}).get("value")
+            asset_type = self.get_asset_type_from_symbol(epic)
+            asset_leverage = leverages.get(asset_type) or {}
+            leverage = {}
+            if asset_leverage:
+                available = asset_leverage.get("available", [1]) or [1]
+                leverage = {
+                    "asset_type": asset_type,
+                    "current_leverage": asset_leverage.get("current", 1),
+                    "available_leverages": available,
+                    "max_leverage": max(available),
+                }
+            instruments[epic] = {
                 "min_stop_distance": dealing_rules.get("minStopOrProfitDistance", {}),
                 "min_step_distance": dealing_rules.get("minStepDistance", {}),
                 "min_size_increment": dealing_rules.get("minSizeIncrement", {}),
-                "trailing_preference": dealing_rules.get("trailingStopsPreference", "NOT_AVAILABLE"),
+                "min_deal_size": float(min_deal_size) if min_deal_size else None,
+                "trailing_preference": dealing_rules.get(
+                    "trailingStopsPreference", "NOT_AVAILABLE"
+                ),
+                "asset_type": asset_type,
+                "leverage": leverage,
             }
-        except Exception as e:
-            logger.error(f"Error getting dealing rules for {epic}: {e}")
-            return {"success": False, "error": str(e)}
+
+        return {"success": True, "instruments": instruments}
 
     def get_historical_prices(
         self,
@@ -1142,8 +1328,11 @@ class CapitalClient:
         }
 
         try:
-            with open(self.session_file, "w") as f:
+            # Atomic replace: readers never see a half-written session file
+            tmp_path = f"{self.session_file}.tmp"
+            with open(tmp_path, "w") as f:
                 json.dump(session_data, f)
+            os.replace(tmp_path, self.session_file)
             logger.debug("Session saved to file")
         except Exception as e:
             logger.warning(f"Failed to save session to file: {str(e)}")
@@ -1239,6 +1428,7 @@ class CapitalClient:
             ),
             "session_healthy": self._is_session_healthy(),
             "needs_renewal": self._should_renew_session(),
+            "background_renewer": self._renewer_active(),
             "environment": "demo" if self.config.use_demo else "live",
         }
 
@@ -1407,6 +1597,7 @@ class CapitalClient:
             if response.status_code == 200:
                 result = response.json()
                 logger.info(f"Order placed successfully: {result}")
+                self.positions_cache.invalidate("place_order")
                 return {
                     "success": True,
                     "deal_reference": result.get("dealReference"),
@@ -1531,6 +1722,45 @@ class CapitalClient:
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
 
+    def get_positions_snapshot(
+        self, force_refresh: bool = False, max_age: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Get the shared, versioned positions snapshot
+
+        Args:
+            force_refresh: Bypass the TTL and query /positions
+            max_age: Per-call TTL override in seconds
+
+        Returns:
+            Dict with the PositionsSnapshot under "snapshot" or error. A failed
+            refresh is an error for every reader (stale data is never served).
+        """
+        snapshot, error = self.positions_cache.get_snapshot(
+            force_refresh=force_refresh, max_age=max_age
+        )
+        if snapshot is None:
+            return {"success": False, "error": error or "No positions snapshot available"}
+        return {"success": True, "snapshot": snapshot}
+
+    def get_cached_positions(
+        self, force_refresh: bool = False, max_age: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Get open positions from the shared snapshot (same shape as get_positions)
+
+        Args:
+            force_refresh: Bypass the TTL and query /positions
+            max_age: Per-call TTL override in seconds
+
+        Returns:
+            Dict containing positions data
+        """
+        snapshot_result = self.get_positions_snapshot(force_refresh, max_age)
+        if not snapshot_result.get("success"):
+            return snapshot_result
+        return snapshot_result["snapshot"].as_result()
+
     def find_position_by_symbol(self, symbol: str) -> Dict[str, Any]:
         """
         Find open positions for a specific symbol
@@ -1541,22 +1771,16 @@ class CapitalClient:
         Returns:
             Dict containing matching positions or error
         """
-        positions_result = self.get_positions()
+        snapshot_result = self.get_positions_snapshot()
         
-        if not positions_result.get("success"):
-            return positions_result
+        if not snapshot_result.get("success"):
+            return snapshot_result
             
-        positions = positions_result.get("positions", [])
-        
         # Convert symbol to Capital.com format for comparison
         capital_symbol = self.get_capital_symbol(symbol)
         
-        # Find positions matching the symbol
-        matching_positions = []
-        for position in positions:
-            position_epic = position.get("epic", "")
-            if position_epic == capital_symbol:
-                matching_positions.append(position)
+        # O(1) lookup on the snapshot symbol index
+        matching_positions = list(snapshot_result["snapshot"].for_symbol(capital_symbol))
                 
         return {
             "success": True,
@@ -1576,24 +1800,27 @@ class CapitalClient:
         Returns:
             Dict containing the position or error
         """
-        positions_result = self.get_positions()
+        snapshot_result = self.get_positions_snapshot()
         
-        if not positions_result.get("success"):
-            return positions_result
+        if not snapshot_result.get("success"):
+            return snapshot_result
             
-        positions = positions_result.get("positions", [])
-        
-        # Find position with matching deal ID
         # Note: Capital.com API returns positions in format: {"position": {...}, "market": {...}}
-        for position_data in positions:
-            position = position_data.get("position", {})
-            if position.get("dealId") == deal_id:
-                logger.info(f"✅ Position {deal_id} found successfully")
-                return {
-                    "success": True,
-                    "position": position_data,  # Return the full structure
-                    "found": True
-                }
+        position_data = snapshot_result["snapshot"].get(deal_id)
+        if position_data is None:
+            # Position may have been opened after the snapshot: confirm with a fresh one
+            snapshot_result = self.get_positions_snapshot(force_refresh=True)
+            if not snapshot_result.get("success"):
+                return snapshot_result
+            position_data = snapshot_result["snapshot"].get(deal_id)
+
+        if position_data is not None:
+            logger.info(f"✅ Position {deal_id} found successfully")
+            return {
+                "success": True,
+                "position": position_data,  # Return the full structure
+                "found": True
+            }
                 
         return {
             "success": True,
@@ -1662,6 +1889,8 @@ class CapitalClient:
                     result = response.json()
                     logger.info(f"✅ Position close response JSON: {result}")
                     
+                    self.positions_cache.invalidate("close_position")
+
                     # Verificar si realmente se cerró la posición
                     deal_reference = result.get("dealReference")
                     if deal_reference:
@@ -1693,6 +1922,7 @@ class CapitalClient:
                 # Handle specific error types
                 if error_details.get("errorCode") == "error.invalid.dealId":
                     logger.warning(f"⚠️ Position {deal_id} became invalid during close attempt - marking as resolved")
+                    self.positions_cache.invalidate("close_position")
                     return {
                         "success": True,  # Treat as success since position is no longer available
                         "deal_id": deal_id,
@@ -1714,6 +1944,66 @@ class CapitalClient:
             logger.error(error_msg)
             return {"success": False, "error": error_msg, "error_type": "network", "position_data": position_data}
 
+    def update_position(
+        self,
+        deal_id: str,
+        stop_level: Optional[float] = None,
+        profit_level: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Amend stop loss / take profit levels of an open position
+
+        Args:
+            deal_id: Deal ID of the position to amend
+            stop_level: New stop loss level (None keeps it out of the request)
+            profit_level: New take profit level (None keeps it out of the request)
+
+        Returns:
+            Dict containing amendment result
+        """
+        if stop_level is None and profit_level is None:
+            return {"success": False, "error": "Nothing to update"}
+
+        if not self._ensure_valid_session():
+            return {"success": False, "error": "Failed to establish valid session", "error_type": "session"}
+
+        url = f"{self.base_url}/positions/{deal_id}"
+        payload = {}
+        if stop_level is not None:
+            payload["stopLevel"] = stop_level
+        if profit_level is not None:
+            payload["profitLevel"] = profit_level
+
+        try:
+            response = self.session.put(url, json=payload)
+
+            if response.status_code == 200:
+                result = response.json()
+                self.positions_cache.invalidate("update_position")
+                logger.info(f"✅ Position {deal_id} amended: {payload}")
+                return {
+                    "success": True,
+                    "deal_reference": result.get("dealReference"),
+                    "deal_id": deal_id,
+                    "stop_level": stop_level,
+                    "profit_level": profit_level,
+                }
+            else:
+                error_details = self._parse_api_error(response)
+                error_msg = f"Failed to amend position: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                return {
+                    "success": False,
+                    "error": error_msg,
+                    "error_type": error_details.get("errorCode", "api_error"),
+                    "status_code": response.status_code,
+                }
+
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Network error amending position: {str(e)}"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "error_type": "network"}
+
     def _parse_api_error(self, response) -> Dict[str, Any]:
         """
         Parse API error response to extract error details
@@ -1823,36 +2113,20 @@ class CapitalClient:
                     "instrument_supported": None,
                 }
 
-            # Get market details to check instrument-specific trailing stop support
-            market_info = self.get_markets(epics=[epic])
+            # Instrument-specific trailing stop support (instrument metadata cache)
+            metadata, error = self.instrument_cache.get(epic)
 
-            if not market_info.get("success", False):
+            if metadata is None:
                 return {
                     "success": False,
                     "available": False,
-                    "reason": f"Failed to get market information for {epic}",
+                    "reason": f"Failed to get market information for {epic}: {error}",
                     "account_enabled": True,
                     "instrument_supported": None,
                 }
 
-            # Check if market data contains dealing rules
-            market_details = market_info.get("data", {}).get("marketDetails", [])
-            if not market_details:
-                return {
-                    "success": True,
-                    "available": False,
-                    "reason": f"No market details found for {epic}",
-                    "account_enabled": True,
-                    "instrument_supported": False,
-                }
-
-            # Check trailing stop preference in dealing rules
-            dealing_rules = market_details[0].get("dealingRules", {})
-            trailing_preference = dealing_rules.get(
-                "trailingStopsPreference", "NOT_AVAILABLE"
-            )
-
-            is_available = trailing_preference != "NOT_AVAILABLE"
+            trailing_preference = metadata.trailing_preference
+            is_available = metadata.trailing_supported
 
             return {
                 "success": True,
@@ -1955,3 +2229,105 @@ def create_capital_client_from_env() -> CapitalClient:
     )
 
     return CapitalClient(config)
+
+
+class CapitalClientHandle:
+    """
+    Lightweight handle over the process-wide CapitalClient
+
+    Delegates every attribute to the shared client, so it can be used
+    wherever a CapitalClient is expected. `close_session()` only releases
+    the handle; the shared session stays open for the other holders.
+    """
+
+    __slots__ = ("_hub", "_client", "owner")
+
+    def __init__(self, hub: "CapitalClientHub", client: CapitalClient, owner: str):
+        object.__setattr__(self, "_hub", hub)
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "owner", owner)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._client, name, value)
+
+    def close_session(self) -> Dict[str, Any]:
+        self._hub.release(self)
+        return {"success": True, "message": f"Handle '{self.owner}' released (shared session kept open)"}
+
+    def __repr__(self) -> str:
+        return f"<CapitalClientHandle owner={self.owner!r} client={id(self._client):#x}>"
+
+
+class CapitalClientHub:
+    """
+    Process-wide owner of the authenticated Capital.com client
+
+    The bot, the API, the balance manager and the config helpers all share
+    one CapitalClient: one login, one requests.Session (connection pool),
+    one rate limiter, one positions snapshot and one writer of the session
+    file. Renewals happen once and every handle sees the new tokens.
+    """
+
+    def __init__(self, factory=None):
+        self._factory = factory or create_capital_client_from_env
+        self._client: Optional[CapitalClient] = None
+        self._lock = threading.Lock()
+        self._holders: Dict[str, int] = {}
+
+    def _get_client(self) -> CapitalClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    client = self._factory()
+                    client.start_session_renewer()
+                    self._client = client
+                    logger.info("🔌 Shared Capital.com client created")
+        return self._client
+
+    def acquire(self, owner: str, connect: bool = True) -> CapitalClientHandle:
+        """
+        Get a handle to the shared client
+
+        Args:
+            owner: Name of the component holding the handle (for status)
+            connect: Make sure the shared session is authenticated (reuses a
+                live or persisted session instead of logging in again)
+
+        Raises:
+            Exception: If connect=True and no valid session can be established
+        """
+        client = self._get_client()
+        if connect and not client._ensure_valid_session():
+            raise Exception("Failed to establish a valid Capital.com session")
+        with self._lock:
+            self._holders[owner] = self._holders.get(owner, 0) + 1
+        return CapitalClientHandle(self, client, owner)
+
+    def release(self, handle: CapitalClientHandle):
+        with self._lock:
+            count = self._holders.get(handle.owner, 0) - 1
+            if count > 0:
+                self._holders[handle.owner] = count
+            else:
+                self._holders.pop(handle.owner, None)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Status of the shared client and its holders"""
+        client = self._client
+        return {
+            "client_created": client is not None,
+            "holders": dict(self._holders),
+            "session": client.get_session_status() if client is not None else None,
+        }
+
+
+# Process-wide hub
+capital_client_hub = CapitalClientHub()
+
+
+def get_shared_capital_client(owner: str, connect: bool = True) -> CapitalClientHandle:
+    """Handle to the process-wide CapitalClient (see CapitalClientHub)"""
+    return capital_client_hub.acquire(owner, connect=connect)
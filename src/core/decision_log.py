@@ -0,0 +1,487 @@
+"""
+🧾 Decision Log - Registro columnar de cada decisión de trading
+Cada señal que pasa por `TradingBot._process_signals` deja una fila con:
+
+- Entradas: símbolo, estrategia, lado, confianza y precio.
+- Snapshot de indicadores usados por los filtros (MTF, Anti-Chop, riesgo...).
+- Veredicto y tiempo de cada filtro evaluado (máscaras de bits + µs).
+- Acción final (ejecutado, filtrado, rechazado por riesgo...) y motivo.
+
+El hilo de trading sólo completa una DecisionTrace y la encola (sin
+bloquear). Un hilo en segundo plano acumula lotes y escribe segmentos
+columnares NumPy (`decisions_<desde>_<hasta>_<ms>_<seq>.npz`, escritura
+atómica). La retención está acotada por antigüedad (`retention_days`) y
+por tamaño total en disco (`max_bytes`); se borran primero los más viejos.
+Sin hilo escritor (antes de `start()` o tras `stop()`) las trazas se
+descartan en lugar de acumularse en la cola.
+
+`query_decisions` filtra millones de filas con máscaras vectorizadas
+leyendo sólo las columnas necesarias y saltando segmentos por rango de
+tiempo (en el nombre del archivo). Ver scripts/query_decisions.py.
+"""
+
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Filtros en el orden en que _process_signals los evalúa (bit i = FILTERS[i])
+FILTERS = (
+    "confidence",
+    "daily_limit",
+    "max_positions",
+    "cooldown",
+    "consensus",
+    "mtf",
+    "market_hours",
+    "anti_chop",
+    "breakout_retest",
+    "risk",
+    "antiflip",
+)
+_FILTER_INDEX = {name: i for i, name in enumerate(FILTERS)}
+
+ACTIONS = (
+    "executed",
+    "filtered",
+    "risk_rejected",
+    "execution_failed",
+    "trading_disabled",
+    "error",
+)
+_ACTION_INDEX = {name: i for i, name in enumerate(ACTIONS)}
+
+# Snapshot de indicadores (float32, NaN si no se calculó)
+INDICATORS = (
+    "price",
+    "consensus_pct",
+    "coherence",
+    "risk_reward",
+    "mtf_consensus",
+    "mtf_strength",
+    "adx",
+    "atr_ratio",
+    "ema_slope_ratio",
+    "risk_score",
+    "position_size",
+)
+_INDICATOR_INDEX = {name: i for i, name in enumerate(INDICATORS)}
+
+SEGMENT_PREFIX = "decisions_"
+_FLUSH = object()
+
+
+class DecisionTrace:
+    """
+    🧾 Traza de una señal a través de los filtros
+
+    `check()` registra el veredicto de un filtro y el tiempo transcurrido
+    desde el veredicto anterior; `finish()` (idempotente) encola la fila.
+    """
+
+    __slots__ = (
+        "_log",
+        "ts",
+        "symbol",
+        "strategy",
+        "side",
+        "confidence",
+        "evaluated",
+        "failed",
+        "timings",
+        "indicators",
+        "action",
+        "reason",
+        "_started",
+        "_last",
+    )
+
+    def __init__(self, log: "DecisionLog", signal):
+        self._log = log
+        self.ts = time.time()
+        self.symbol = str(getattr(signal, "symbol", ""))
+        self.strategy = str(getattr(signal, "strategy_name", ""))
+        self.side = str(getattr(signal, "signal_type", ""))
+        self.confidence = float(getattr(signal, "confidence_score", 0.0) or 0.0)
+        self.evaluated = 0
+        self.failed = 0
+        self.timings: Dict[int, float] = {}
+        self.indicators: Dict[int, float] = {}
+        self.action: Optional[str] = None
+        self.reason = ""
+        self._started = self._last = time.perf_counter()
+        self.note(price=getattr(signal, "price", None))
+
+    def check(self, name: str, passed: bool, reason: str = "") -> bool:
+        """Registrar el veredicto del filtro `name` y devolver `passed`"""
+        now = time.perf_counter()
+        index = _FILTER_INDEX[name]
+        self.evaluated |= 1 << index
+        self.timings[index] = (now - self._last) * 1e6
+        self._last = now
+        if not passed:
+            self.failed |= 1 << index
+            if not self.reason:
+                self.reason = reason or name
+        return passed
+
+    def note(self, **values):
+        """Añadir valores al snapshot de indicadores (se ignoran los no numéricos)"""
+        for name, value in values.items():
+            try:
+                if value is not None:
+                    self.indicators[_INDICATOR_INDEX[name]] = float(value)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def finish(self, action: Optional[str] = None, reason: str = ""):
+        """Cerrar la traza y encolarla (sólo la primera llamada cuenta)"""
+        if self.action is not None:
+            return
+        self.action = action or ("filtered" if self.failed else "error")
+        if reason and not self.reason:
+            self.reason = reason
+        self._log.submit(self)
+
+
+class DecisionLog:
+    """
+    📚 Decision log columnar con escritura por lotes en segundo plano
+
+    Args:
+        directory: Directorio de los segmentos
+        segment_records: Filas máximas por segmento
+        flush_interval: Segundos máximos que una fila espera a ser escrita
+        retention_days: Se borran los segmentos cuyas filas son más viejas
+        max_bytes: Tamaño máximo del directorio; se borran los más viejos
+            (el segmento más reciente siempre se conserva)
+        enabled: Si es False las trazas se descartan sin escribir
+        queue_size: Capacidad de la cola (si se llena, se descarta y se cuenta)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_records: int = 50000,
+        flush_interval: float = 60.0,
+        retention_days: float = 30.0,
+        max_bytes: int = 1024 * 1024 * 1024,
+        enabled: bool = True,
+        queue_size: int = 100000,
+    ):
+        self.directory = directory
+        self.segment_records = max(1, int(segment_records))
+        self.flush_interval = flush_interval
+        self.retention_seconds = max(0.0, float(retention_days)) * 86400.0
+        self.max_bytes = max(0, int(max_bytes))
+        self.enabled = enabled
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._flushed = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sequence = 0
+        self.stats = {
+            "records": 0,
+            "segments": 0,
+            "dropped": 0,
+            "not_running": 0,
+            "rotated": 0,
+            "errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Camino caliente
+    # ------------------------------------------------------------------
+
+    def begin(self, signal) -> DecisionTrace:
+        """🧾 Iniciar la traza de una señal"""
+        return DecisionTrace(self, signal)
+
+    def submit(self, trace: DecisionTrace):
+        if not self.enabled:
+            return
+        if self._thread is None:
+            # Sin escritor nadie vaciaría la cola
+            self.stats["not_running"] += 1
+            return
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _write_segment(self, rows: List[DecisionTrace]):
+        if not rows:
+            return
+        n = len(rows)
+        filter_us = np.full((n, len(FILTERS)), np.nan, dtype=np.float32)
+        indicators = np.full((n, len(INDICATORS)), np.nan, dtype=np.float32)
+        for i, row in enumerate(rows):
+            for index, value in row.timings.items():
+                filter_us[i, index] = value
+            for index, value in row.indicators.items():
+                indicators[i, index] = value
+
+        columns = {
+            "ts": np.fromiter((r.ts for r in rows), dtype=np.float64, count=n),
+            "symbol": np.array([r.symbol for r in rows]),
+            "strategy": np.array([r.strategy for r in rows]),
+            "side": np.array([r.side for r in rows]),
+            "confidence": np.fromiter((r.confidence for r in rows), dtype=np.float32, count=n),
+            "action": np.fromiter((_ACTION_INDEX[r.action] for r in rows), dtype=np.int8, count=n),
+            "evaluated": np.fromiter((r.evaluated for r in rows), dtype=np.uint16, count=n),
+            "failed": np.fromiter((r.failed for r in rows), dtype=np.uint16, count=n),
+            "total_us": np.fromiter(
+                ((r._last - r._started) * 1e6 for r in rows), dtype=np.float32, count=n
+            ),
+            "reason": np.array([r.reason for r in rows]),
+            "filter_us": filter_us,
+            "indicators": indicators,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        name = (
+            f"{SEGMENT_PREFIX}{int(columns['ts'].min())}_{int(columns['ts'].max()) + 1}"
+            f"_{int(time.time() * 1000)}_{self._sequence:06d}.npz"
+        )
+        path = os.path.join(self.directory, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez(fh, **columns)
+        os.replace(tmp_path, path)
+
+        self.stats["records"] += n
+        self.stats["segments"] += 1
+        self._rotate()
+
+    def _rotate(self, now: Optional[float] = None):
+        """Borrar segmentos fuera de la retención por antigüedad o por tamaño"""
+        now = time.time() if now is None else now
+        segments = list_segments(self.directory)
+        sizes = []
+        for path in segments:
+            try:
+                sizes.append(os.path.getsize(path))
+            except OSError:
+                sizes.append(0)
+        total = sum(sizes)
+        cutoff = now - self.retention_seconds if self.retention_seconds else None
+
+        # Del más viejo al más nuevo, sin tocar nunca el último escrito
+        for path, size in zip(segments[:-1], sizes[:-1]):
+            expired = cutoff is not None and int(_segment_parts(path)[1]) < cutoff
+            oversized = self.max_bytes and total > self.max_bytes
+            if not (expired or oversized):
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.stats["rotated"] += 1
+            except OSError as e:
+                logger.warning(f"⚠️ Decision log: no se pudo borrar {path}: {e}")
+
+    def _writer_loop(self):
+        buffer: List[DecisionTrace] = []
+        buffer_started = 0.0
+        while True:
+            timeout = self.flush_interval
+            if buffer:
+                timeout = max(0.0, buffer_started + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            flush = item is _FLUSH
+            if isinstance(item, DecisionTrace):
+                if not buffer:
+                    buffer_started = time.monotonic()
+                buffer.append(item)
+
+            due = buffer and time.monotonic() - buffer_started >= self.flush_interval
+            if flush or due or len(buffer) >= self.segment_records:
+                try:
+                    self._write_segment(buffer)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"❌ Error writing decision log segment: {e}")
+                buffer = []
+            if flush:
+                self._flushed.set()
+                if self._stop_event.is_set():
+                    return
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """💾 Escribir ya lo pendiente (bloquea hasta `timeout`)"""
+        if not (self._thread and self._thread.is_alive()):
+            return False
+        self._flushed.clear()
+        self._queue.put(_FLUSH)
+        return self._flushed.wait(timeout)
+
+    def start(self):
+        """🚀 Iniciar el hilo escritor"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._writer_loop, daemon=True, name="DecisionLogWriter"
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """🛑 Escribir lo pendiente y detener el hilo escritor"""
+        if not (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.set()
+        self.flush(timeout)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del decision log"""
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "pending": self._queue.qsize(),
+            "writer_running": bool(self._thread and self._thread.is_alive()),
+            **self.stats,
+        }
+
+
+# ----------------------------------------------------------------------
+# Consulta
+# ----------------------------------------------------------------------
+
+
+def list_segments(directory: str) -> List[str]:
+    """Segmentos del directorio, del más viejo al más nuevo"""
+    paths = glob.glob(os.path.join(directory, f"{SEGMENT_PREFIX}*.npz"))
+    return sorted(paths, key=lambda p: tuple(int(x) for x in _segment_parts(p)[2:]))
+
+
+def _segment_parts(path: str) -> List[str]:
+    # decisions_<desde>_<hasta>_<ms>_<seq>.npz
+    return os.path.basename(path)[len(SEGMENT_PREFIX) : -len(".npz")].split("_")
+
+
+def query_decisions(
+    directory: str,
+    symbol: Optional[str] = None,
+    strategy: Optional[str] = None,
+    action: Optional[str] = None,
+    failed_filter: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    🔎 Filtrar el decision log
+
+    Args:
+        directory: Directorio de los segmentos
+        symbol / strategy / action: Igualdad exacta
+        failed_filter: Filas donde ese filtro bloqueó la señal
+        since / until: Rango de epochs (se saltan segmentos fuera de rango)
+        limit: Devolver sólo las últimas `limit` filas
+
+    Returns:
+        Columnas (ver DecisionLog._write_segment) concatenadas y filtradas
+    """
+    action_code = _ACTION_INDEX[action] if action is not None else None
+    failed_bit = 1 << _FILTER_INDEX[failed_filter] if failed_filter is not None else None
+
+    chunks: Dict[str, List[np.ndarray]] = {}
+    for path in list_segments(directory):
+        start, end = (int(x) for x in _segment_parts(path)[:2])
+        if (since is not None and end < since) or (until is not None and start > until):
+            continue
+        with np.load(path) as segment:
+            ts = segment["ts"]
+            mask = np.ones(ts.shape, dtype=bool)
+            if since is not None:
+                mask &= ts >= since
+            if until is not None:
+                mask &= ts <= until
+            if action_code is not None:
+                mask &= segment["action"] == action_code
+            if failed_bit is not None:
+                mask &= (segment["failed"] & failed_bit) != 0
+            if symbol is not None:
+                mask &= segment["symbol"] == symbol
+            if strategy is not None:
+                mask &= segment["strategy"] == strategy
+            if not mask.any():
+                continue
+            for name in segment.files:
+                chunks.setdefault(name, []).append(segment[name][mask])
+
+    if not chunks:
+        return {}
+    result = {name: np.concatenate(parts) for name, parts in chunks.items()}
+    if limit is not None and len(result["ts"]) > limit:
+        order = np.argsort(result["ts"], kind="stable")[-limit:]
+        result = {name: values[order] for name, values in result.items()}
+    return result
+
+
+def summarize_decisions(result: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """📊 Conteos por acción, filtro bloqueante y símbolo + tiempos por filtro"""
+    if not result:
+        return {"records": 0}
+
+    actions = np.bincount(result["action"].astype(np.int64), minlength=len(ACTIONS))
+    failed = result["failed"]
+    filter_us = result["filter_us"]
+    filters = {}
+    for i, name in enumerate(FILTERS):
+        timings = filter_us[:, i]
+        timings = timings[~np.isnan(timings)]
+        filters[name] = {
+            "evaluated": int(len(timings)),
+            "blocked": int(np.count_nonzero(failed & (1 << i))),
+            "p50_us": round(float(np.percentile(timings, 50)), 1) if len(timings) else None,
+            "p95_us": round(float(np.percentile(timings, 95)), 1) if len(timings) else None,
+        }
+    symbols, counts = np.unique(result["symbol"], return_counts=True)
+    return {
+        "records": int(len(result["ts"])),
+        "from": float(result["ts"].min()),
+        "until": float(result["ts"].max()),
+        "actions": {name: int(actions[i]) for i, name in enumerate(ACTIONS) if actions[i]},
+        "filters": filters,
+        "symbols": dict(sorted(zip(symbols.tolist(), counts.tolist()), key=lambda kv: -kv[1])),
+    }
+
+
+def iter_records(result: Dict[str, np.ndarray]):
+    """🧾 Filas como diccionarios legibles (para mostrar pocas filas)"""
+    for i in range(len(result.get("ts", ()))):
+        failed = int(result["failed"][i])
+        evaluated = int(result["evaluated"][i])
+        yield {
+            "ts": float(result["ts"][i]),
+            "symbol": str(result["symbol"][i]),
+            "strategy": str(result["strategy"][i]),
+            "side": str(result["side"][i]),
+            "confidence": float(result["confidence"][i]),
+            "action": ACTIONS[int(result["action"][i])],
+            "reason": str(result["reason"][i]),
+            "passed": [n for b, n in enumerate(FILTERS) if evaluated & (1 << b) and not failed & (1 << b)],
+            "blocked_by": [n for b, n in enumerate(FILTERS) if failed & (1 << b)],
+            "indicators": {
+                n: float(v) for n, v in zip(INDICATORS, result["indicators"][i]) if not np.isnan(v)
+            },
+            "total_us": float(result["total_us"][i]),
+        }
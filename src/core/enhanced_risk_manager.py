@@ -5,7 +5,6 @@ position sizing inteligente y gestión de drawdown.
 Desarrollado por: Experto en Trading & Programación
 """
 
-import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -15,10 +14,16 @@ from enum import Enum
 
 # Importar componentes existentes
 from .enhanced_strategies import EnhancedSignal
+from .advanced_indicators import AdvancedIndicators
+from .portfolio_risk import portfolio_risk_engine
+from .monte_carlo_risk import monte_carlo_simulator
 from src.config.main_config import RiskManagerConfig, TradingProfiles
 
 logger = logging.getLogger(__name__)
 
+# Fracciones del tamaño que prueba el control de riesgo de trayectoria
+PATH_RISK_SCALES = (1.0, 0.75, 0.5, 0.25)
+
 
 class RiskLevel(Enum):
     """Niveles de riesgo"""
@@ -43,6 +48,7 @@ class PositionSizing:
     risk_level: RiskLevel
     reasoning: str
     max_risk_amount: float = 0.0  # Cantidad máxima de riesgo
+    path_risk: Optional[Dict] = None  # Resultado Monte Carlo (drawdown / pérdida diaria)
 
 
 @dataclass
@@ -105,6 +111,24 @@ class EnhancedRiskManager:
         # Inicialización del risk manager
         logger.info(f"🔧 EnhancedRiskManager inicializado con capital_client: {capital_client is not None}")
         
+        self.reload_profile_limits()
+        self.volatility_adjustment = True  # Ajustar tamaño según volatilidad
+
+        # Métricas de portfolio desde configuración centralizada
+        self.portfolio_value = self.config.INITIAL_PORTFOLIO_VALUE
+        self.current_drawdown = 0.0
+        self.max_historical_drawdown = 0.0
+        self.daily_pnl = 0.0
+        self.open_positions = {}
+        self.trade_history = []
+
+        # Motor de riesgo de portfolio (covarianza / VaR sobre retornos reales)
+        self.risk_engine = portfolio_risk_engine
+        self.path_simulator = monte_carlo_simulator
+        self.max_breach_probability = self.config.MONTE_CARLO_MAX_BREACH_PROBABILITY
+
+    def reload_profile_limits(self):
+        """🔄 Leer del perfil activo los límites de riesgo, sizing y stops"""
         self.max_portfolio_risk = self.config.get_max_risk_per_trade()  # Ya en decimal
         self.max_daily_risk = self.config.get_max_daily_risk()  # Ya en decimal
         self.max_drawdown_threshold = (
@@ -116,7 +140,6 @@ class EnhancedRiskManager:
         self.min_position_size = self.config.get_min_position_size()
         self.max_position_size = self.config.get_max_position_size()  # Ya en decimal
         self.kelly_fraction = self.config.get_kelly_fraction()
-        self.volatility_adjustment = True  # Ajustar tamaño según volatilidad
 
         # Stop loss dinámico profesional desde configuración centralizada
         self.atr_multiplier_range = (
@@ -130,14 +153,6 @@ class EnhancedRiskManager:
             self.config.get_breakeven_threshold()
         )  # Ya en decimal
 
-        # Métricas de portfolio desde configuración centralizada
-        self.portfolio_value = self.config.INITIAL_PORTFOLIO_VALUE
-        self.current_drawdown = 0.0
-        self.max_historical_drawdown = 0.0
-        self.daily_pnl = 0.0
-        self.open_positions = {}
-        self.trade_history = []
-
     def _get_dynamic_leverage(self, symbol: str) -> float:
         """Obtener apalancamiento dinámico desde Capital.com API"""
         logger.debug(f"🔍 Obteniendo apalancamiento dinámico para {symbol}")
@@ -188,8 +203,11 @@ class EnhancedRiskManager:
                 f"🔧 Portfolio value actualizado a: ${self.portfolio_value:.2f}"
             )
 
+            # Riesgo de portfolio con el trade propuesto (correlación, VaR marginal)
+            portfolio_risk = self._evaluate_portfolio_risk(signal)
+
             # Análisis de factores de riesgo del mercado
-            market_risk = self._analyze_market_risk_factors(signal)
+            market_risk = self._analyze_market_risk_factors(signal, portfolio_risk)
 
             # Calcular position sizing
             position_sizing = self._calculate_position_sizing(signal, market_risk)
@@ -201,7 +219,7 @@ class EnhancedRiskManager:
             dynamic_tp = self._configure_dynamic_take_profit(signal)
 
             # Métricas de riesgo del portfolio
-            portfolio_metrics = self._calculate_portfolio_risk_metrics()
+            portfolio_metrics = self._calculate_portfolio_risk_metrics(portfolio_risk)
 
             # Calcular score de riesgo general
             overall_risk_score = self._calculate_overall_risk_score(
@@ -224,10 +242,16 @@ class EnhancedRiskManager:
             min_confidence = profile[
                 "min_confidence_threshold"
             ]  # Ya está en formato decimal (0.0-1.0)
+            path_risk = position_sizing.path_risk or {}
+            if path_risk.get("limit_breached"):
+                recommendations.append(
+                    "🎲 Monte Carlo: riesgo de romper drawdown/pérdida diaria con cualquier tamaño operable - No operar"
+                )
             is_approved = (
                 risk_level not in [RiskLevel.EXTREME, RiskLevel.VERY_HIGH]
                 and not max_dd_alert
                 and signal.confidence_score >= min_confidence
+                and not path_risk.get("limit_breached", False)
             )
 
             return EnhancedRiskAssessment(
@@ -250,7 +274,57 @@ class EnhancedRiskManager:
             logger.error(f"Error assessing trade risk: {e}")
             return self._create_default_risk_assessment(signal)
 
-    def _analyze_market_risk_factors(self, signal: EnhancedSignal) -> Dict:
+    def _current_exposures(self) -> Dict[str, float]:
+        """Exposición firmada en USD por símbolo (largo > 0, corto < 0)"""
+        exposures: Dict[str, float] = {}
+        try:
+            if self.capital_client and hasattr(self.capital_client, "get_positions_snapshot"):
+                result = self.capital_client.get_positions_snapshot()
+                if result.get("success"):
+                    for position_data in result["snapshot"].positions:
+                        position = position_data.get("position", {}) or {}
+                        epic = (position_data.get("market", {}) or {}).get("epic")
+                        size = float(position.get("size", 0) or 0)
+                        level = float(position.get("level", 0) or 0)
+                        if not epic or size <= 0 or level <= 0:
+                            continue
+                        sign = -1.0 if str(position.get("direction", "")).upper() == "SELL" else 1.0
+                        exposures[epic] = exposures.get(epic, 0.0) + sign * size * level
+                    return exposures
+        except Exception as e:
+            logger.debug(f"Positions snapshot unavailable for portfolio risk: {e}")
+
+        # Fallback: posiciones locales (size en USD, el lado viene en signal_type)
+        for symbol, position in self.open_positions.items():
+            size = abs(float(position.get("size", 0) or 0))
+            sign = -1.0 if str(position.get("signal_type", "")).upper() == "SELL" else 1.0
+            exposures[symbol] = exposures.get(symbol, 0.0) + sign * size
+        return exposures
+
+    def _evaluate_portfolio_risk(self, signal: Optional[EnhancedSignal] = None) -> Dict:
+        """
+        Métricas del motor de riesgo de portfolio, opcionalmente con el trade
+        propuesto por `signal` dimensionado al tamaño máximo de posición
+        """
+        try:
+            candidate, candidate_exposure = None, 0.0
+            if signal is not None:
+                candidate = signal.symbol
+                sign = -1.0 if str(signal.signal_type).upper() == "SELL" else 1.0
+                candidate_exposure = sign * self.max_position_size * self.portfolio_value
+            return self.risk_engine.portfolio_metrics(
+                self._current_exposures(),
+                self.portfolio_value,
+                candidate=candidate,
+                candidate_exposure=candidate_exposure,
+            )
+        except Exception as e:
+            logger.error(f"Error evaluating portfolio risk: {e}")
+            return {}
+
+    def _analyze_market_risk_factors(
+        self, signal: EnhancedSignal, portfolio_risk: Optional[Dict] = None
+    ) -> Dict:
         """Analizar factores de riesgo del mercado"""
         try:
             risk_factors = {
@@ -288,9 +362,13 @@ class EnhancedRiskManager:
             else:
                 risk_factors["liquidity_risk"] = 0.6
 
-            # Riesgo de correlación (simplificado)
-            # En un sistema real, calcularíamos correlación con otras posiciones
-            risk_factors["correlation_risk"] = 0.3
+            # Riesgo de correlación: correlación del trade (con su dirección)
+            # con el portfolio abierto; 0.3 si no hay historial suficiente
+            if portfolio_risk and portfolio_risk.get("candidate_covered"):
+                correlation = portfolio_risk.get("candidate_correlation", 0.0)
+                risk_factors["correlation_risk"] = min(1.0, max(0.0, correlation))
+            else:
+                risk_factors["correlation_risk"] = 0.3
 
             # Riesgo por régimen de mercado
             if market_regime == "TRENDING":
@@ -370,11 +448,31 @@ class EnhancedRiskManager:
                     valor_negociacion *= volatility_adjustment
                     tamano_posicion *= volatility_adjustment
 
+            # Riesgo de trayectoria (Monte Carlo): reducir el tamaño mientras la
+            # probabilidad de romper drawdown o pérdida diaria supere el umbral
+            path_risk = self._evaluate_path_risk(signal, valor_negociacion)
+            size_scale = path_risk.get("size_scale", 1.0)
+            if size_scale < 1.0:
+                logger.info(
+                    f"🎲 Path risk {signal.symbol}: tamaño x{size_scale:.2f} "
+                    f"(P(DD)={path_risk.get('prob_drawdown_breach', 0):.1%}, "
+                    f"P(diaria)={path_risk.get('prob_daily_loss_breach', 0):.1%})"
+                )
+                monto_operacion *= size_scale
+                valor_negociacion *= size_scale
+                tamano_posicion *= size_scale
+
             # Aplicar límites mínimos y máximos
-            recommended_size = max(self.min_position_size, tamano_posicion)
-            # Asegurar tamaño mínimo negociable por instrumento (contrato mínimo típico 0.01)
-            if recommended_size < 0.01:
-                recommended_size = 0.01
+            min_tradable_size = max(self.min_position_size, 0.01)
+            if size_scale < 1.0 and tamano_posicion < min_tradable_size:
+                # Subir al mínimo deshace la reducción de Monte Carlo: no operar
+                path_risk["limit_breached"] = True
+                recommended_size = tamano_posicion
+            else:
+                recommended_size = max(self.min_position_size, tamano_posicion)
+                # Asegurar tamaño mínimo negociable por instrumento (contrato mínimo típico 0.01)
+                if recommended_size < 0.01:
+                    recommended_size = 0.01
             max_position_value = self.portfolio_value * self.max_position_size
 
             # Determinar nivel de riesgo basado en el porcentaje del portfolio usado
@@ -409,6 +507,13 @@ class EnhancedRiskManager:
             if atr_info and volatility_adjustment < 1.0:
                 reasoning += f", Ajuste volatilidad ATR: {volatility_adjustment:.1f}x (Percentil {atr_info.get('atr_percentile', 0):.1f}%)"
 
+            if path_risk.get("success"):
+                reasoning += (
+                    f", Monte Carlo x{size_scale:.2f}: P(DD>{self.max_drawdown_threshold:.0%})="
+                    f"{path_risk['prob_drawdown_breach']:.1%}, "
+                    f"P(pérdida diaria>{self.max_daily_risk:.1%})={path_risk['prob_daily_loss_breach']:.1%}"
+                )
+
             return PositionSizing(
                 recommended_size=round(recommended_size, 6),  # Más precisión y mínimo garantizado
                 max_position_size=round(max_position_value, 2),
@@ -422,6 +527,7 @@ class EnhancedRiskManager:
                 max_risk_amount=round(
                     monto_operacion, 2
                 ),  # El monto máximo que podemos perder
+                path_risk=path_risk,
             )
 
         except Exception as e:
@@ -446,6 +552,56 @@ class EnhancedRiskManager:
                 max_risk_amount=round(self.portfolio_value * 0.01, 2),
             )
 
+    def _evaluate_path_risk(self, signal: EnhancedSignal, exposure_value: float) -> Dict:
+        """
+        Simular drawdown y pérdida diaria del portfolio con el trade propuesto
+
+        Evalúa tamaños decrecientes (100%, 75%, 50%, 25%) sobre un mismo lote
+        de trayectorias y devuelve el primero cuyas probabilidades de ruptura
+        no superan `max_breach_probability`. Sin historial suficiente no se
+        ajusta el tamaño.
+
+        Returns:
+            Dict con el resultado de la simulación, `size_scale` y
+            `limit_breached` (True si ni el tamaño mínimo cumple)
+        """
+        try:
+            if self.portfolio_value <= 0 or exposure_value <= 0:
+                return {"success": False, "size_scale": 1.0}
+
+            sign = -1.0 if str(signal.signal_type).upper() == "SELL" else 1.0
+            result = self.path_simulator.simulate_scaled(
+                self._current_exposures(),
+                self.portfolio_value,
+                max_drawdown=self.max_drawdown_threshold,
+                daily_loss_limit=self.max_daily_risk,
+                candidate=signal.symbol,
+                candidate_exposure=sign * exposure_value,
+                scales=PATH_RISK_SCALES,
+            )
+            if not result.get("success"):
+                return {**result, "size_scale": 1.0}
+
+            summary = {k: v for k, v in result.items() if k != "scales"}
+            for outcome in result["scales"]:
+                if (
+                    outcome["prob_drawdown_breach"] <= self.max_breach_probability
+                    and outcome["prob_daily_loss_breach"] <= self.max_breach_probability
+                ):
+                    return {
+                        **summary,
+                        **outcome,
+                        "size_scale": outcome["scale"],
+                        "limit_breached": False,
+                    }
+
+            outcome = result["scales"][-1]
+            return {**summary, **outcome, "size_scale": outcome["scale"], "limit_breached": True}
+
+        except Exception as e:
+            logger.error(f"Error evaluating path risk for {signal.symbol}: {e}")
+            return {"success": False, "size_scale": 1.0}
+
     def _configure_dynamic_stop_loss(self, signal: EnhancedSignal) -> DynamicStopLoss:
         """Configurar stop loss dinámico"""
         try:
@@ -603,9 +759,14 @@ class EnhancedRiskManager:
                 confidence_threshold=RiskManagerConfig().get_tp_confidence_threshold(),
             )
 
-    def _calculate_portfolio_risk_metrics(self) -> Dict:
+    def _calculate_portfolio_risk_metrics(
+        self, portfolio_risk: Optional[Dict] = None
+    ) -> Dict:
         """Calcular métricas de riesgo del portfolio"""
         try:
+            if portfolio_risk is None:
+                portfolio_risk = self._evaluate_portfolio_risk()
+
             # Calcular utilización del portfolio con validación de división por cero
             total_position_size = sum(
                 pos.get("size", 0) for pos in self.open_positions.values()
@@ -626,6 +787,7 @@ class EnhancedRiskManager:
                 "risk_budget_used": round(
                     len(self.open_positions) * self.max_portfolio_risk, 4
                 ),
+                **portfolio_risk,
             }
         except Exception as e:
             logger.error(f"Error calculating portfolio metrics: {e}")
@@ -734,6 +896,12 @@ class EnhancedRiskManager:
             if portfolio_metrics.get("current_drawdown", 0) > 0.1:
                 recommendations.append("Drawdown alto - Considerar pausa en trading")
 
+            correlation = portfolio_metrics.get("candidate_correlation", 0.0)
+            if correlation >= self.correlation_threshold:
+                recommendations.append(
+                    f"Alta correlación con posiciones abiertas ({correlation:.2f}) - Reducir tamaño"
+                )
+
             if signal.risk_reward_ratio < 2.0:
                 recommendations.append(
                     "Ratio riesgo/beneficio bajo - Buscar mejor entrada"
@@ -899,29 +1067,37 @@ class EnhancedRiskManager:
             logger.error(f"Error updating position for {symbol}: {e}")
 
     def _get_current_market_data(self, symbol: str, current_price: float) -> Dict:
-        """Obtener datos de mercado actuales para análisis avanzado"""
+        """Obtener datos de mercado actuales para análisis avanzado
+
+        La volatilidad sale del ATR cacheado por la capa de indicadores; sin
+        ATR reciente se usan valores neutrales (no se asume tendencia ni momentum).
+        """
+        neutral = {
+            "volatility": 0.02,
+            "atr": None,
+            "volume_ratio": 1.0,
+            "trend_strength": 0.5,
+            "support_distance": 0.02,
+            "resistance_distance": 0.02,
+            "momentum": 0.5,
+        }
         try:
-            # Simular datos de mercado (en implementación real, obtener de exchange)
+            atr = AdvancedIndicators.get_cached_atr(symbol)
+            if not atr or not current_price or current_price <= 0:
+                return neutral
+
+            atr_ratio = atr / current_price
             return {
-                "volatility": 0.02,  # 2% volatilidad diaria estimada
-                "volume_ratio": 1.5,  # Ratio de volumen vs promedio
-                "trend_strength": 0.7,  # Fuerza de tendencia (0-1)
-                "support_distance": abs(current_price - (current_price * 0.98))
-                / current_price,
-                "resistance_distance": abs((current_price * 1.02) - current_price)
-                / current_price,
-                "momentum": 0.6,  # Momentum actual (0-1)
+                **neutral,
+                "volatility": atr_ratio,
+                "atr": atr,
+                # Soporte / resistencia aproximados a un ATR del precio
+                "support_distance": atr_ratio,
+                "resistance_distance": atr_ratio,
             }
         except Exception as e:
             logger.error(f"Error getting market data for {symbol}: {e}")
-            return {
-                "volatility": 0.02,
-                "volume_ratio": 1.0,
-                "trend_strength": 0.5,
-                "support_distance": 0.02,
-                "resistance_distance": 0.02,
-                "momentum": 0.5,
-            }
+            return neutral
 
     def _update_intelligent_trailing_stop(
         self, position: Dict, current_price: float, market_data: Dict
@@ -940,8 +1116,10 @@ class EnhancedRiskManager:
                 # Activar trailing solo si hay ganancia suficiente
                 if profit_pct >= self.trailing_stop_activation:
 
-                    # Calcular distancia de trailing basada en volatilidad y momentum
-                    base_distance = atr_multiplier * 0.01
+                    # Calcular distancia de trailing basada en ATR real, volatilidad y momentum
+                    base_distance = atr_multiplier * (
+                        market_data["volatility"] if market_data.get("atr") else 0.01
+                    )
 
                     # Ajustar distancia según condiciones de mercado
                     volatility_adj = (
@@ -972,7 +1150,9 @@ class EnhancedRiskManager:
                 profit_pct = (entry_price - current_price) / entry_price
 
                 if profit_pct >= self.trailing_stop_activation:
-                    base_distance = atr_multiplier * 0.01
+                    base_distance = atr_multiplier * (
+                        market_data["volatility"] if market_data.get("atr") else 0.01
+                    )
                     volatility_adj = 1 + (market_data["volatility"] - 0.02) * 10
                     momentum_adj = 1 - (market_data["momentum"] - 0.5) * 0.2
 
@@ -1217,6 +1397,10 @@ class EnhancedRiskManager:
                     "risk_budget_used": round(
                         len(self.open_positions) * self.max_portfolio_risk, 4
                     ),
+                    "portfolio_volatility": portfolio_metrics.get("portfolio_volatility"),
+                    "var_parametric": portfolio_metrics.get("var_parametric"),
+                    "var_historical": portfolio_metrics.get("var_historical"),
+                    "correlations": self.risk_engine.correlation_matrix(),
                 },
             }
 
@@ -1241,44 +1425,24 @@ class EnhancedRiskManager:
         """
         Calcular el percentil del ATR actual vs los últimos 5 días
 
+        Usa la serie de ATR que la capa de velas compartida deja en
+        AdvancedIndicators al descargar históricos; no consulta la API.
+
         Args:
             symbol: Símbolo del activo (ej: NVDA, BTCUSD)
             timeframe: Timeframe para el cálculo
-            periods: Períodos para el cálculo del ATR
+            periods: Períodos (span) de la EMA del True Range
             lookback_days: Días hacia atrás para calcular el percentil
 
         Returns:
             Dict con información del percentil de ATR
         """
         try:
-            # Obtener datos históricos extendidos para el cálculo del percentil
-            # Necesitamos más datos para tener suficiente historia de ATR
-            extended_periods = periods + (lookback_days * 24)
-
-            # Usar CapitalClient si está disponible para obtener OHLC reales
-            prices_list = []
-            if hasattr(self, "capital_client") and self.capital_client is not None and hasattr(self.capital_client, "get_historical_prices"):
-                timeframe_mapping = {
-                    "1m": "MINUTE",
-                    "5m": "MINUTE_5",
-                    "15m": "MINUTE_15",
-                    "30m": "MINUTE_30",
-                    "1h": "HOUR",
-                    "2h": "HOUR_2",
-                    "3h": "HOUR_3",
-                    "4h": "HOUR_4",
-                    "1d": "DAY",
-                    "1w": "WEEK",
-                }
-                resolution = timeframe_mapping.get(timeframe, "HOUR")
-                max_points = min(max(extended_periods, periods * 3), 1000)
-                result = self.capital_client.get_historical_prices(
-                    epic=symbol, resolution=resolution, max_points=max_points
-                )
-                prices_list = result.get("prices", []) if isinstance(result, dict) else []
+            # Serie de ATR de la capa compartida de velas (sin peticiones HTTP)
+            atr_values = AdvancedIndicators.get_atr_history(symbol, timeframe, span=periods)
 
             # Validación de datos
-            if not prices_list or len(prices_list) < periods:
+            if atr_values is None or len(atr_values) < periods:
                 logger.warning(f"Datos insuficientes para calcular percentil ATR de {symbol}")
                 return {
                     "current_atr": 0.0,
@@ -1288,29 +1452,11 @@ class EnhancedRiskManager:
                     "reason": "Datos insuficientes",
                 }
 
-            # Calcular ATR para todo el período
-            df = pd.DataFrame(prices_list)
-            df["high"] = pd.to_numeric(df["high"])
-            df["low"] = pd.to_numeric(df["low"])
-            df["close"] = pd.to_numeric(df["close"])
-
-            # Calcular True Range
-            df["prev_close"] = df["close"].shift(1)
-            df["tr1"] = df["high"] - df["low"]
-            df["tr2"] = abs(df["high"] - df["prev_close"])
-            df["tr3"] = abs(df["low"] - df["prev_close"])
-            df["true_range"] = df[["tr1", "tr2", "tr3"]].max(axis=1)
-
-            # Calcular ATR usando media móvil exponencial
-            df["atr"] = df["true_range"].ewm(span=periods).mean()
-
             # Obtener ATR actual (último valor)
-            current_atr = df["atr"].iloc[-1]
+            current_atr = atr_values[-1]
 
             # Calcular percentil del ATR actual vs los últimos lookback_days
-            recent_atr_values = (
-                df["atr"].dropna().tail(lookback_days * 24)
-            )  # Últimos 5 días aprox
+            recent_atr_values = atr_values[-lookback_days * 24 :]  # Últimos 5 días aprox
 
             if (
                 len(recent_atr_values) < 10
@@ -8,21 +8,20 @@ Desarrollado por: Experto en Trading & Programación
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Hashable, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import logging
 from abc import ABC, abstractmethod
 from functools import lru_cache
-import hashlib
-import time
 
 from src.config.main_config import (
     StrategyConfig,
-    CacheConfig,
     TechnicalAnalysisConfig,
     ConfluenceConfig,
 )
+from src.utils.shared_cache import get_shared_cache
+from .portfolio_risk import portfolio_risk_engine
 
 # Importar indicadores desde `ta`
 from ta.trend import EMAIndicator, ADXIndicator
@@ -125,6 +124,13 @@ class TradingStrategy(ABC):
                                 if "timestamp" in df.columns:
                                     df.set_index("timestamp", inplace=True)
                                 df.sort_index(inplace=True)
+                                # Alimentar la matriz de retornos del motor de riesgo de portfolio
+                                if isinstance(df.index, pd.DatetimeIndex):
+                                    portfolio_risk_engine.record_closes(
+                                        symbol, timeframe, df.index, df["close"].values
+                                    )
+                                # Serie de ATR para el percentil del risk manager
+                                AdvancedIndicators.record_atr_history(symbol, timeframe, df)
                                 return df[["open", "high", "low", "close", "volume"]].copy() if "volume" in df.columns else df[["open", "high", "low", "close"]].copy()
                             else:
                                 logging.warning(
@@ -246,12 +252,8 @@ class EnhancedSignal(TradingSignal):
 class EnhancedTradingStrategy(TradingStrategy):
     """Clase base para estrategias mejoradas con optimizaciones de cache"""
 
-    # Cache compartido entre instancias
-    _cache = {}
-    _cache_timestamps = {}
-    _cache_ttl = CacheConfig.get_ttl_for_operation(
-        "price_data"
-    )  # TTL desde configuración centralizada
+    # Cache compartido entre instancias (LRU thread-safe; TTL y límites en CacheConfig)
+    _cache = get_shared_cache("enhanced_strategies")
 
     def __init__(self, name: str, enable_filters: bool = True):
         super().__init__(name)
@@ -274,51 +276,24 @@ class EnhancedTradingStrategy(TradingStrategy):
         self.min_confluence_score = ConfluenceConfig.CONFLUENCE_THRESHOLDS["strong"]
 
     @classmethod
-    def _get_cache_key(cls, method_name: str, *args, **kwargs) -> str:
+    def _get_cache_key(cls, method_name: str, *args, **kwargs) -> Hashable:
         """Generar clave de cache única para método y parámetros"""
+        key = (method_name, args, tuple(sorted(kwargs.items())))
         try:
-            # Crear hash de los argumentos
-            key_data = f"{method_name}_{str(args)}_{str(sorted(kwargs.items()))}"
-            return hashlib.md5(key_data.encode()).hexdigest()
-        except Exception:
-            return f"{method_name}_{time.time()}"
+            hash(key)
+            return key
+        except TypeError:
+            return f"{method_name}_{args}_{sorted(kwargs.items())}"
 
     @classmethod
-    def _get_from_cache(cls, cache_key: str):
+    def _get_from_cache(cls, cache_key: Hashable):
         """Obtener valor del cache si es válido"""
-        current_time = time.time()
-        if (
-            cache_key in cls._cache
-            and cache_key in cls._cache_timestamps
-            and current_time - cls._cache_timestamps[cache_key] < cls._cache_ttl
-        ):
-            return cls._cache[cache_key]
-        return None
-
-    @classmethod
-    def _store_in_cache(cls, cache_key: str, value):
-        """Almacenar valor en cache con timestamp"""
-        cls._cache[cache_key] = value
-        cls._cache_timestamps[cache_key] = time.time()
-
-        # Limpiar cache viejo si es necesario
-        if (
-            len(cls._cache) > CacheConfig.MAX_CACHE_ENTRIES
-        ):  # Límite desde configuración
-            cls._cleanup_cache()
+        return cls._cache.get(cache_key)
 
     @classmethod
-    def _cleanup_cache(cls):
-        """Limpiar entradas viejas del cache"""
-        current_time = time.time()
-        expired_keys = [
-            key
-            for key, timestamp in cls._cache_timestamps.items()
-            if current_time - timestamp >= cls._cache_ttl
-        ]
-        for key in expired_keys:
-            cls._cache.pop(key, None)
-            cls._cache_timestamps.pop(key, None)
+    def _store_in_cache(cls, cache_key: Hashable, value):
+        """Almacenar valor en cache (LRU acotado por entradas y bytes)"""
+        cls._cache.set(cache_key, value)
 
     def analyze_volume(self, df: pd.DataFrame) -> Dict:
         """Analizar volumen avanzado para confirmación de señales con cache"""
@@ -333,7 +308,7 @@ class EnhancedTradingStrategy(TradingStrategy):
             # Generar clave de cache basada en los últimos datos de volumen
             volume_data = df["volume"].tail(50).values
             cache_key = self._get_cache_key(
-                "analyze_volume", str(volume_data.tobytes())
+                "analyze_volume", volume_data.tobytes()
             )
 
             # Verificar cache
@@ -0,0 +1,230 @@
+"""
+📚 Instrument Cache - Metadatos por epic con TTL largo
+Dealing rules, tamaño mínimo, apalancamiento y disponibilidad de trailing
+stop cambian muy rara vez, pero se consultaban en cada trade:
+
+- Una sola petición /markets por lote de epics (y una de preferencias de
+  cuenta para el apalancamiento) llena el cache.
+- Las lecturas sirven siempre el último valor conocido; si está vencido se
+  marca para que el hilo de refresco lo actualice en segundo plano.
+- Sólo un epic nunca visto se consulta en línea (single-flight), de modo
+  que el camino de decisión no hace peticiones HTTP en régimen normal.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class InstrumentMetadata:
+    """📚 Metadatos inmutables de un instrumento"""
+
+    epic: str
+    fetched_at: float  # time.monotonic() del refresco
+    min_stop_distance: Dict[str, Any] = field(default_factory=dict)
+    min_step_distance: Dict[str, Any] = field(default_factory=dict)
+    min_size_increment: Dict[str, Any] = field(default_factory=dict)
+    min_deal_size: Optional[float] = None
+    trailing_preference: str = "NOT_AVAILABLE"
+    asset_type: Optional[str] = None
+    leverage: Dict[str, Any] = field(default_factory=dict)
+
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def trailing_supported(self) -> bool:
+        return self.trailing_preference != "NOT_AVAILABLE"
+
+    def dealing_rules(self) -> Dict[str, Any]:
+        """Respuesta compatible con CapitalClient.get_dealing_rules()"""
+        return {
+            "success": True,
+            "min_stop_distance": self.min_stop_distance,
+            "min_step_distance": self.min_step_distance,
+            "min_size_increment": self.min_size_increment,
+            "trailing_preference": self.trailing_preference,
+            "cached": True,
+            "age_seconds": round(self.age_seconds(), 1),
+        }
+
+
+class InstrumentMetadataCache:
+    """
+    💾 Cache de metadatos de instrumentos con refresco en segundo plano
+
+    Args:
+        fetcher: Función epics -> {"success": bool, "instruments": {epic: dict}}
+            donde cada dict tiene los campos de InstrumentMetadata
+        ttl: Segundos tras los cuales una entrada se refresca
+        refresh_interval: Segundos entre pasadas del hilo de refresco
+        batch_size: Epics por petición en el refresco
+    """
+
+    def __init__(
+        self,
+        fetcher: Callable[[List[str]], Dict[str, Any]],
+        ttl: float,
+        refresh_interval: float,
+        batch_size: int = 25,
+    ):
+        self._fetcher = fetcher
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.batch_size = max(1, batch_size)
+        self._entries: Dict[str, InstrumentMetadata] = {}
+        self._stale: set = set()
+        self._fetch_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def get(
+        self, epic: str, allow_fetch: bool = True
+    ) -> Tuple[Optional[InstrumentMetadata], Optional[str]]:
+        """
+        📚 Metadatos de un epic
+
+        Args:
+            epic: Epic del instrumento
+            allow_fetch: Consultar en línea si el epic nunca se cargó
+
+        Returns:
+            (metadata, error). Una entrada vencida se devuelve igualmente y
+            queda marcada para el refresco en segundo plano.
+        """
+        entry = self._entries.get(epic)
+        if entry is not None:
+            if entry.age_seconds() >= self.ttl:
+                self._stale.add(epic)
+                self.stats["stale_hits"] += 1
+            else:
+                self.stats["hits"] += 1
+            return entry, None
+
+        if not allow_fetch:
+            return None, "Instrument not cached"
+
+        self.stats["misses"] += 1
+        with self._fetch_lock:
+            # Otro hilo pudo cargarlo mientras esperábamos el lock
+            entry = self._entries.get(epic)
+            if entry is not None:
+                return entry, None
+            error = self._refresh_batch([epic])
+        return self._entries.get(epic), error
+
+    def dealing_rules(self, epic: str, allow_fetch: bool = True) -> Dict[str, Any]:
+        """
+        📏 Dealing rules de `epic` en el formato de CapitalClient.get_dealing_rules()
+
+        Una entrada vencida se sirve igual (y se refresca en segundo plano);
+        con `allow_fetch=False` un epic nunca cargado no genera peticiones.
+        """
+        metadata, error = self.get(epic, allow_fetch=allow_fetch)
+        if metadata is None:
+            return {"success": False, "error": error or "No marketDetails found"}
+        return metadata.dealing_rules()
+
+    # ------------------------------------------------------------------
+    # Refresco
+    # ------------------------------------------------------------------
+
+    def _refresh_batch(self, epics: List[str]) -> Optional[str]:
+        try:
+            result = self._fetcher(epics)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if not result.get("success"):
+            self.stats["errors"] += 1
+            error = result.get("error", "Unknown error")
+            logger.warning(f"⚠️ Instrument metadata refresh failed for {epics}: {error}")
+            return error
+
+        now = time.monotonic()
+        for epic, data in (result.get("instruments") or {}).items():
+            self._entries[epic] = InstrumentMetadata(epic=epic, fetched_at=now, **data)
+            self._stale.discard(epic)
+        self.stats["refreshes"] += 1
+        return None
+
+    def warm(self, epics: Iterable[str]) -> int:
+        """🔥 Cargar por lotes los epics que aún no están en cache"""
+        pending = [epic for epic in dict.fromkeys(epics) if epic and epic not in self._entries]
+        with self._fetch_lock:
+            for i in range(0, len(pending), self.batch_size):
+                self._refresh_batch(pending[i : i + self.batch_size])
+        loaded = sum(1 for epic in pending if epic in self._entries)
+        if pending:
+            logger.info(f"📚 Instrument metadata warmed: {loaded}/{len(pending)} epics")
+        return loaded
+
+    def refresh_stale(self) -> int:
+        """🔄 Refrescar entradas vencidas (las leídas primero)"""
+        expired = {
+            epic for epic, entry in self._entries.items() if entry.age_seconds() >= self.ttl
+        }
+        pending = list(self._stale | expired)
+        if not pending:
+            return 0
+        with self._fetch_lock:
+            for i in range(0, len(pending), self.batch_size):
+                self._refresh_batch(pending[i : i + self.batch_size])
+        return len(pending)
+
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh_stale()
+            except Exception as e:
+                logger.error(f"❌ Error refreshing instrument metadata: {e}")
+
+    def start_background_refresh(self):
+        """🚀 Iniciar el hilo de refresco en segundo plano"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._refresh_loop, daemon=True, name="InstrumentMetadataRefresh"
+        )
+        self._thread.start()
+
+    def stop_background_refresh(self, timeout: float = 5.0):
+        """🛑 Detener el hilo de refresco"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def invalidate(self, epic: Optional[str] = None):
+        """🧹 Marcar un epic (o todos) para refresco"""
+        if epic is None:
+            self._stale.update(self._entries)
+        elif epic in self._entries:
+            self._stale.add(epic)
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del cache de instrumentos"""
+        return {
+            "instruments": len(self._entries),
+            "stale": len(self._stale),
+            "ttl_seconds": self.ttl,
+            "background_refresh": bool(self._thread and self._thread.is_alive()),
+            **self.stats,
+        }
@@ -0,0 +1,168 @@
+"""
+⏱️ Monitor Scheduler - Intervalo adaptativo por símbolo para el PositionMonitor
+Calcula cuándo volver a consultar el precio de cada símbolo con posiciones:
+
+- Distancia al trigger más cercano (SL/TP/trailing) medida en ATRs: lejos
+  del trigger se consulta poco, cerca se consulta a menudo.
+- Volatilidad reciente: si el precio se movió rápido desde la última
+  consulta, se estima el tiempo hasta alcanzar el trigger y se adelanta la
+  siguiente consulta.
+- Presupuesto global de consultas por minuto: si hay más símbolos vencidos
+  que presupuesto, se atienden primero los más atrasados.
+"""
+
+import heapq
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FAR_TRIGGER_ATR = 3.0  # A partir de esta distancia (en ATRs) se usa el intervalo máximo
+TIME_TO_TRIGGER_FRACTION = 0.5  # Consultar a mitad del tiempo estimado hasta el trigger
+FALLBACK_ATR_RATIO = 0.005  # ATR estimado (0.5% del precio) si no hay ATR cacheado
+
+
+class AdaptiveMonitorScheduler:
+    """⏱️ Planificador de consultas de precio por símbolo"""
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        max_requests_per_minute: int,
+        atr_provider: Optional[Callable[[str], Optional[float]]] = None,
+    ):
+        self.min_interval = float(min_interval)
+        self.max_interval = max(float(max_interval), self.min_interval)
+        self.max_requests_per_minute = max(1, int(max_requests_per_minute))
+        self.atr_provider = atr_provider
+
+        self._next_due: Dict[str, float] = {}
+        self._last_quote: Dict[str, Tuple[float, float]] = {}  # symbol -> (price, ts)
+        self._intervals: Dict[str, float] = {}
+        self._request_times: deque = deque()
+        self.stats = {"quotes_scheduled": 0, "quotes_deferred": 0}
+
+    # ------------------------------------------------------------------
+    # Planificación
+    # ------------------------------------------------------------------
+
+    def sync(self, symbols: Iterable[str], now: Optional[float] = None):
+        """🔄 Alinear los símbolos planificados con los que tienen posiciones"""
+        now = time.monotonic() if now is None else now
+        active = set(symbols)
+        for symbol in active:
+            self._next_due.setdefault(symbol, now)  # Símbolo nuevo: consultar ya
+        for symbol in [s for s in self._next_due if s not in active]:
+            self._next_due.pop(symbol, None)
+            self._last_quote.pop(symbol, None)
+            self._intervals.pop(symbol, None)
+
+    def _budget_remaining(self, now: float) -> int:
+        while self._request_times and now - self._request_times[0] > 60.0:
+            self._request_times.popleft()
+        return self.max_requests_per_minute - len(self._request_times)
+
+    def due_symbols(self, now: Optional[float] = None) -> List[str]:
+        """
+        📋 Símbolos cuya consulta venció, dentro del presupuesto global
+
+        Returns:
+            Símbolos a consultar ahora (los más atrasados primero)
+        """
+        now = time.monotonic() if now is None else now
+        due = [(due_at, symbol) for symbol, due_at in self._next_due.items() if due_at <= now]
+        if not due:
+            return []
+
+        budget = self._budget_remaining(now)
+        selected = [symbol for _, symbol in heapq.nsmallest(max(budget, 0), due)]
+        deferred = len(due) - len(selected)
+        if deferred > 0:
+            self.stats["quotes_deferred"] += deferred
+        for _ in selected:
+            self._request_times.append(now)
+        self.stats["quotes_scheduled"] += len(selected)
+        return selected
+
+    def record_quote(
+        self,
+        symbol: str,
+        price: float,
+        trigger_distance: Optional[float],
+        now: Optional[float] = None,
+    ) -> float:
+        """
+        📝 Registrar un precio consultado y planificar la próxima consulta
+
+        Args:
+            symbol: Símbolo consultado
+            price: Precio obtenido
+            trigger_distance: Distancia absoluta de precio al trigger más
+                cercano (None si el símbolo no tiene niveles)
+
+        Returns:
+            Intervalo (segundos) hasta la próxima consulta
+        """
+        now = time.monotonic() if now is None else now
+        if symbol not in self._next_due:
+            return self.max_interval
+
+        interval = self.max_interval
+        if trigger_distance is not None and price and price > 0:
+            atr = self.atr_provider(symbol) if self.atr_provider else None
+            if not atr:
+                atr = price * FALLBACK_ATR_RATIO
+            distance_atr = abs(trigger_distance) / atr
+
+            # Interpolación lineal entre el intervalo mínimo y el máximo
+            span = self.max_interval - self.min_interval
+            interval = self.min_interval + span * min(1.0, distance_atr / FAR_TRIGGER_ATR)
+
+            # Volatilidad reciente: tiempo estimado hasta alcanzar el trigger
+            previous = self._last_quote.get(symbol)
+            if previous is not None:
+                previous_price, previous_ts = previous
+                elapsed = now - previous_ts
+                moved_atr = abs(price - previous_price) / atr
+                if elapsed > 0 and moved_atr > 0:
+                    speed = moved_atr / elapsed  # ATRs por segundo
+                    time_to_trigger = distance_atr / speed
+                    interval = min(interval, time_to_trigger * TIME_TO_TRIGGER_FRACTION)
+
+        interval = max(self.min_interval, min(self.max_interval, interval))
+        self._last_quote[symbol] = (price, now)
+        self._intervals[symbol] = interval
+        self._next_due[symbol] = now + interval
+        return interval
+
+    def postpone(self, symbol: str, now: Optional[float] = None):
+        """⏭️ Reintentar un símbolo cuya consulta falló tras el intervalo mínimo"""
+        now = time.monotonic() if now is None else now
+        if symbol in self._next_due:
+            self._next_due[symbol] = now + self.min_interval
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """⏳ Segundos hasta el próximo símbolo vencido (acotado a [min, max])"""
+        now = time.monotonic() if now is None else now
+        if not self._next_due:
+            return self.max_interval
+        wait = min(self._next_due.values()) - now
+        if self._budget_remaining(now) <= 0 and self._request_times:
+            # Sin presupuesto: esperar a que salga la consulta más antigua de la ventana
+            wait = max(wait, 60.0 - (now - self._request_times[0]))
+        return max(self.min_interval, min(self.max_interval, wait))
+
+    def get_status(self) -> Dict:
+        """📊 Estado del planificador"""
+        now = time.monotonic()
+        return {
+            "symbols": len(self._next_due),
+            "intervals": {s: round(i, 2) for s, i in self._intervals.items()},
+            "requests_last_minute": len(self._request_times),
+            "budget_per_minute": self.max_requests_per_minute,
+            "next_check_in": round(self.seconds_until_next(now), 2) if self._next_due else None,
+            **self.stats,
+        }
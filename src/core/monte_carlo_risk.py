@@ -0,0 +1,283 @@
+"""
+🎲 Monte Carlo Risk - Riesgo de trayectoria para el position sizing
+Bootstrap de barras históricas (filas completas de la matriz de retornos
+del motor de riesgo de portfolio, preservando la correlación entre
+símbolos) en miles de trayectorias vectorizadas del portfolio:
+
+- Probabilidad de superar el drawdown máximo del perfil en el horizonte.
+- Probabilidad de romper el límite de pérdida diaria en algún día.
+- Distribución del drawdown máximo y del retorno final.
+
+Sólo se remuestrean barras en las que todos los símbolos tienen retorno
+(sin rellenar huecos con 0). Las exposiciones son fijas en USD, así que
+el P&L de la trayectoria es la suma acumulada del P&L de cada barra y es
+lineal en el tamaño: los índices del bootstrap se generan en un único
+lote con el RNG de NumPy y todos los tamaños evaluados de un trade
+reescalan el P&L del trade sobre las mismas trayectorias. Los resultados
+se cachean por (símbolos con su peso redondeado al bucket de tamaño,
+escalas evaluadas, versión del motor de riesgo).
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config.main_config import RiskManagerConfig
+
+from .portfolio_risk import PortfolioRiskEngine, portfolio_risk_engine
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHE_ENTRIES = 256
+
+
+def _cumulative(bar_pnl: np.ndarray) -> np.ndarray:
+    """Suma acumulada in-place a lo largo de las barras (filas)"""
+    for i in range(1, bar_pnl.shape[0]):
+        np.add(bar_pnl[i - 1], bar_pnl[i], out=bar_pnl[i])
+    return bar_pnl
+
+
+class MonteCarloRiskSimulator:
+    """🎲 Simulador bootstrap de drawdown y pérdida diaria"""
+
+    def __init__(
+        self,
+        risk_engine: PortfolioRiskEngine,
+        n_paths: int = 10000,
+        horizon_bars: int = 120,
+        bars_per_day: int = 24,
+        size_bucket: float = 0.01,
+        min_observations: int = 30,
+        seed: Optional[int] = None,
+    ):
+        self.risk_engine = risk_engine
+        self.n_paths = max(100, int(n_paths))
+        self.bars_per_day = max(1, int(bars_per_day))
+        # Horizonte múltiplo de días completos
+        days = max(1, int(horizon_bars) // self.bars_per_day)
+        self.horizon_bars = days * self.bars_per_day
+        self.size_bucket = size_bucket
+        self.min_observations = min_observations
+        self._rng = np.random.default_rng(seed)
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self.stats = {"simulations": 0, "cache_hits": 0, "last_elapsed_ms": 0.0}
+
+    def _bucket(self, weight: float) -> float:
+        return round(round(weight / self.size_bucket) * self.size_bucket, 6)
+
+    def simulate(
+        self,
+        exposures: Dict[str, float],
+        portfolio_value: float,
+        max_drawdown: float,
+        daily_loss_limit: float,
+    ) -> Dict:
+        """
+        🎲 Simular el portfolio con las exposiciones dadas
+
+        Args:
+            exposures: symbol -> exposición firmada en USD (incluye el trade propuesto)
+            portfolio_value: Valor del portfolio en USD
+            max_drawdown: Drawdown máximo permitido (decimal)
+            daily_loss_limit: Pérdida diaria máxima permitida (decimal)
+
+        Returns:
+            Dict con probabilidades de ruptura y distribución de drawdown;
+            `success=False` si no hay historial suficiente
+        """
+        result = self.simulate_scaled(exposures, portfolio_value, max_drawdown, daily_loss_limit)
+        if not result.get("success"):
+            return result
+        summary = {k: v for k, v in result.items() if k != "scales"}
+        return {**summary, **result["scales"][0]}
+
+    def simulate_scaled(
+        self,
+        exposures: Dict[str, float],
+        portfolio_value: float,
+        max_drawdown: float,
+        daily_loss_limit: float,
+        candidate: Optional[str] = None,
+        candidate_exposure: float = 0.0,
+        scales: Sequence[float] = (1.0,),
+    ) -> Dict:
+        """
+        🎲 Simular el portfolio con un trade propuesto a varios tamaños
+
+        El bootstrap se hace una sola vez: el retorno de cada barra es lineal
+        en los pesos, así que cada escala recombina `base + scale * trade`
+        sobre la misma matriz de barras remuestreadas.
+
+        Args:
+            exposures: symbol -> exposición firmada en USD de las posiciones abiertas
+            portfolio_value: Valor del portfolio en USD
+            max_drawdown: Drawdown máximo permitido (decimal)
+            daily_loss_limit: Pérdida diaria máxima permitida (decimal)
+            candidate: Símbolo del trade propuesto (opcional)
+            candidate_exposure: Exposición firmada en USD del trade a escala 1
+            scales: Fracciones del trade a evaluar
+
+        Returns:
+            Dict con `scales` (un resultado por escala, en el mismo orden);
+            `success=False` si no hay historial suficiente
+        """
+        if portfolio_value <= 0:
+            return {"success": False, "error": "Portfolio value must be positive"}
+
+        weights = {
+            symbol: self._bucket(exposure / portfolio_value)
+            for symbol, exposure in exposures.items()
+            if exposure
+        }
+        weights = {symbol: w for symbol, w in weights.items() if w != 0}
+        candidate_weight = self._bucket(candidate_exposure / portfolio_value) if candidate else 0.0
+        if not candidate_weight:
+            candidate = None
+        if not weights and candidate is None:
+            return {"success": False, "error": "No exposure to simulate"}
+
+        symbols = sorted(set(weights) | ({candidate} if candidate else set()))
+        returns, covered, version = self.risk_engine.returns_for(symbols, self.min_observations)
+        scales = tuple(float(scale) for scale in scales)
+        key = (
+            tuple(sorted(weights.items())),
+            candidate,
+            candidate_weight,
+            scales,
+            round(max_drawdown, 4),
+            round(daily_loss_limit, 4),
+            version,
+        )
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return {**cached, "cached": True}
+
+        uncovered = [s for s in symbols if s not in covered]
+        if not covered or returns.shape[0] < self.min_observations:
+            return {
+                "success": False,
+                "error": f"Insufficient history ({returns.shape[0]} common bars)",
+                "uncovered_symbols": uncovered,
+            }
+
+        started = time.perf_counter()
+        # P&L de cada barra histórica (fracción del portfolio): posiciones
+        # abiertas y trade propuesto a escala 1
+        simple = np.expm1(returns)
+        base_bars = (simple @ np.array([weights.get(s, 0.0) for s in covered])).astype(np.float32)
+        candidate_bars = (
+            simple @ np.array([candidate_weight if s == candidate else 0.0 for s in covered])
+        ).astype(np.float32)
+
+        # Matriz (barras x trayectorias): cada fila es una barra de todas las trayectorias
+        index_dtype = np.uint16 if simple.shape[0] <= np.iinfo(np.uint16).max else np.int32
+        index = self._rng.integers(
+            0, simple.shape[0], size=(self.horizon_bars, self.n_paths), dtype=index_dtype
+        )
+        base_pnl = _cumulative(np.take(base_bars, index))
+        candidate_pnl = _cumulative(np.take(candidate_bars, index)) if candidate else None
+
+        equity = np.empty_like(base_pnl)
+        outcomes = []
+        for scale in scales:
+            if candidate_pnl is None:
+                np.add(base_pnl, 1.0, out=equity)
+            else:
+                # P&L lineal en el tamaño: reescalar el del trade sobre las mismas trayectorias
+                np.multiply(candidate_pnl, scale, out=equity)
+                equity += base_pnl
+                equity += 1.0
+            outcomes.append(
+                {
+                    "scale": scale,
+                    **self._path_metrics(equity, portfolio_value, max_drawdown, daily_loss_limit),
+                }
+            )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        result = {
+            "success": True,
+            "paths": self.n_paths,
+            "horizon_bars": self.horizon_bars,
+            "history_bars": int(returns.shape[0]),
+            "uncovered_symbols": uncovered,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "scales": outcomes,
+        }
+
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > MAX_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+            self.stats["simulations"] += 1
+            self.stats["last_elapsed_ms"] = round(elapsed_ms, 2)
+        return {**result, "cached": False}
+
+    def _path_metrics(
+        self,
+        equity: np.ndarray,
+        portfolio_value: float,
+        max_drawdown: float,
+        daily_loss_limit: float,
+    ) -> Dict:
+        """Drawdown, pérdida diaria y retorno final de una curva de equity (barras x trayectorias)"""
+        np.maximum(equity, 0.0, out=equity)
+
+        # Drawdown máximo recorriendo las barras (cada paso vectorizado sobre las trayectorias)
+        peak = np.ones(self.n_paths, dtype=equity.dtype)
+        lowest_ratio = np.ones(self.n_paths, dtype=equity.dtype)
+        ratio = np.empty(self.n_paths, dtype=equity.dtype)
+        for bar in equity:
+            np.maximum(peak, bar, out=peak)
+            np.divide(bar, peak, out=ratio)
+            np.minimum(lowest_ratio, ratio, out=lowest_ratio)
+        max_drawdowns = 1.0 - lowest_ratio
+
+        # Pérdida intradía respecto al equity de apertura de cada día
+        days = self.horizon_bars // self.bars_per_day
+        daily = equity.reshape(days, self.bars_per_day, self.n_paths)
+        day_open = np.vstack([np.ones((1, self.n_paths), dtype=equity.dtype), daily[:-1, -1]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            worst_intraday = daily.min(axis=1) / day_open - 1.0
+        daily_breach = (worst_intraday <= -daily_loss_limit).any(axis=0)
+
+        final_returns = equity[-1] - 1.0
+        return {
+            "prob_drawdown_breach": round(float((max_drawdowns >= max_drawdown).mean()), 4),
+            "prob_daily_loss_breach": round(float(daily_breach.mean()), 4),
+            "expected_max_drawdown": round(float(max_drawdowns.mean()), 4),
+            "max_drawdown_p95": round(float(np.quantile(max_drawdowns, 0.95)), 4),
+            "var_horizon_95": round(
+                max(0.0, -float(np.quantile(final_returns, 0.05))) * portfolio_value, 2
+            ),
+        }
+
+    def get_status(self) -> Dict:
+        """📊 Estado del simulador"""
+        return {
+            "paths": self.n_paths,
+            "horizon_bars": self.horizon_bars,
+            "cache_entries": len(self._cache),
+            **self.stats,
+        }
+
+
+# Instancia global sobre la matriz de retornos del motor de riesgo de portfolio
+monte_carlo_simulator = MonteCarloRiskSimulator(
+    portfolio_risk_engine,
+    n_paths=RiskManagerConfig.MONTE_CARLO_PATHS,
+    horizon_bars=RiskManagerConfig.MONTE_CARLO_HORIZON_BARS,
+    bars_per_day=RiskManagerConfig.MONTE_CARLO_BARS_PER_DAY,
+    size_bucket=RiskManagerConfig.MONTE_CARLO_SIZE_BUCKET,
+    min_observations=RiskManagerConfig.PORTFOLIO_RISK_MIN_OBSERVATIONS,
+)
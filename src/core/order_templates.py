@@ -0,0 +1,339 @@
+"""
+⚡ Order Templates - Plantillas de orden pre-validadas por símbolo
+Todo lo que `_execute_real_trade` necesita antes de enviar una orden y que
+no depende de la señal (tamaño mínimo e incremento, distancias mínimas,
+dealing rules, apalancamiento, divisa, balance disponible, modo hedging,
+trailing disponible y último bid/offer) se mantiene en una plantilla por
+epic refrescada en segundo plano.
+
+Una señal aprobada se convierte así en una llamada a `place_order` sin
+peticiones adicionales; sólo si la plantilla falta o su cotización está
+vencida se consulta en línea ese símbolo.
+
+También registra la latencia señal aprobada -> orden enviada y, aparte,
+la duración del envío (ida y vuelta al broker).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from ..utils import metrics
+except ImportError:
+    from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 500
+
+
+@dataclass(frozen=True)
+class AccountState:
+    """💰 Estado de cuenta compartido por todas las plantillas"""
+
+    available_balance: float = 0.0
+    currency: Optional[str] = None
+    currency_symbol: str = "$"
+    hedging_mode: bool = False
+    fetched_at: float = 0.0  # time.monotonic()
+
+
+@dataclass(frozen=True)
+class OrderTemplate:
+    """⚡ Plantilla inmutable de orden para un epic"""
+
+    epic: str
+    built_at: float  # time.monotonic()
+    min_size: float
+    size_increment: float = 0.0
+    dealing_rules: Dict[str, Any] = field(default_factory=dict)
+    leverage: Optional[float] = None
+    trailing_available: bool = False
+    bid: Optional[float] = None
+    offer: Optional[float] = None
+    quote_at: float = 0.0  # time.monotonic() del bid/offer
+    account: AccountState = AccountState()
+
+    def quote_age(self) -> float:
+        return time.monotonic() - self.quote_at if self.quote_at else float("inf")
+
+    @property
+    def spread(self) -> float:
+        if self.bid is not None and self.offer is not None and self.offer > self.bid:
+            return self.offer - self.bid
+        return 0.0
+
+
+class OrderTemplateBook:
+    """
+    📒 Plantillas de orden por epic con refresco en segundo plano
+
+    Args:
+        capital_client: CapitalClient (dealing rules y apalancamiento salen de
+            su cache de instrumentos)
+        refresh_interval: Segundos entre refrescos de cuenta y cotizaciones
+        quote_max_age: Antigüedad máxima del bid/offer para usarlo sin refrescar
+    """
+
+    def __init__(self, capital_client, refresh_interval: float, quote_max_age: float):
+        self.capital_client = capital_client
+        self.refresh_interval = refresh_interval
+        self.quote_max_age = quote_max_age
+        self._epics: List[str] = []
+        self._templates: Dict[str, OrderTemplate] = {}
+        self._account = AccountState()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._submissions = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {"hits": 0, "inline_builds": 0, "refreshes": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    def _refresh_account(self) -> AccountState:
+        balance = self.capital_client.get_available_balance()
+        preferences = self.capital_client.get_account_preferences()
+        previous = self._account
+        account = AccountState(
+            available_balance=(
+                float(balance.get("available", 0) or 0)
+                if balance.get("success")
+                else previous.available_balance
+            ),
+            currency=balance.get("currency") if balance.get("success") else previous.currency,
+            currency_symbol=(
+                (balance.get("symbol") or "$")
+                if balance.get("success")
+                else previous.currency_symbol
+            ),
+            hedging_mode=(
+                bool(preferences.get("hedging_mode", False))
+                if preferences.get("success")
+                else previous.hedging_mode
+            ),
+            fetched_at=time.monotonic(),
+        )
+        if not balance.get("success"):
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Order templates: balance refresh failed: {balance.get('error')}")
+        self._account = account
+        return account
+
+    def _build(self, epic: str, quote: Optional[Dict[str, Any]], account: AccountState) -> OrderTemplate:
+        client = self.capital_client
+        rules = client.get_dealing_rules(epic)
+        if not rules.get("success"):
+            rules = {}
+        leverage_info = client.get_leverage_for_symbol(epic)
+        trailing = client.is_trailing_stop_available(epic)
+        increment = (rules.get("min_size_increment") or {}).get("value")
+
+        bid = offer = None
+        quote_at = 0.0
+        if quote:
+            bid, offer = quote.get("bid"), quote.get("offer")
+            quote_at = time.monotonic()
+
+        return OrderTemplate(
+            epic=epic,
+            built_at=time.monotonic(),
+            min_size=client.get_minimum_order_size(epic),
+            size_increment=float(increment or 0.0),
+            dealing_rules=rules,
+            leverage=(
+                float(leverage_info["current_leverage"])
+                if leverage_info.get("success") and "current_leverage" in leverage_info
+                else None
+            ),
+            trailing_available=bool(trailing.get("available", False)),
+            bid=bid,
+            offer=offer,
+            quote_at=quote_at,
+            account=account,
+        )
+
+    def refresh(self, epics: Optional[Iterable[str]] = None) -> int:
+        """🔄 Reconstruir plantillas (cuenta + cotizaciones en una pasada por lote)"""
+        epics = list(epics) if epics is not None else list(self._epics)
+        if not epics:
+            return 0
+        try:
+            account = self._refresh_account()
+            quotes = self.capital_client.get_market_data(epics) or {}
+            templates = {epic: self._build(epic, quotes.get(epic), account) for epic in epics}
+            with self._lock:
+                self._templates.update(templates)
+            self.stats["refreshes"] += 1
+            return len(templates)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Error refreshing order templates: {e}")
+            return 0
+
+    def set_epics(self, epics: Iterable[str]):
+        """📋 Definir los epics que se mantienen en segundo plano"""
+        self._epics = list(dict.fromkeys(epic for epic in epics if epic))
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def get(self, epic: str) -> Optional[OrderTemplate]:
+        """
+        ⚡ Plantilla lista para enviar la orden de `epic`
+
+        Si no existe o su cotización supera `quote_max_age` se reconstruye
+        en línea sólo para ese epic (cuenta y reglas salen del cache).
+        """
+        template = self._templates.get(epic)
+        if template is not None and template.quote_age() <= self.quote_max_age:
+            self.stats["hits"] += 1
+            return template
+
+        self.stats["inline_builds"] += 1
+        try:
+            account = self._account
+            if account.fetched_at == 0.0:
+                account = self._refresh_account()
+            quote = (self.capital_client.get_market_data([epic]) or {}).get(epic)
+            template = self._build(epic, quote, account)
+            with self._lock:
+                self._templates[epic] = template
+            return template
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Error building order template for {epic}: {e}")
+            return template
+
+    def peek(self, epic: str) -> Optional[OrderTemplate]:
+        """📋 Plantilla actual de `epic` tal cual (sin reconstruirla ni consultar)"""
+        return self._templates.get(epic)
+
+    def cached_inputs(self, epic: str) -> Tuple[Optional[float], Optional[float], Dict[str, Any]]:
+        """
+        📦 (bid, offer, dealing rules) de `epic` sin ninguna petición
+
+        Usa la plantilla existente aunque su cotización esté vencida y, para
+        las reglas que falten, el cache de instrumentos (una entrada vencida
+        se sirve y se refresca en segundo plano; un epic nunca visto no se
+        consulta).
+        """
+        template = self.peek(epic)
+        bid = template.bid if template is not None else None
+        offer = template.offer if template is not None else None
+        if template is not None and template.dealing_rules:
+            return bid, offer, template.dealing_rules
+        rules = self.capital_client.instrument_cache.dealing_rules(epic, allow_fetch=False)
+        return bid, offer, rules if rules.get("success") else {}
+
+    def after_order(self, epic: str, margin_used: float = 0.0):
+        """
+        🧾 Actualizar la plantilla tras enviar una orden
+
+        Descuenta el margen de forma optimista y pide un refresco inmediato
+        del balance real en segundo plano.
+        """
+        with self._lock:
+            self._account = replace(
+                self._account,
+                available_balance=max(0.0, self._account.available_balance - margin_used),
+            )
+            self._templates = {
+                key: replace(template, account=self._account)
+                for key, template in self._templates.items()
+            }
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Latencia señal -> orden
+    # ------------------------------------------------------------------
+
+    def record_signal_to_order(self, symbol: str, approved_at: float) -> float:
+        """⏱️ Registrar la latencia desde la aprobación de la señal hasta el envío"""
+        latency = time.perf_counter() - approved_at
+        metrics.signal_to_order_latency.observe(latency, symbol=symbol)
+        self._latencies.append(latency)
+        logger.info(f"⏱️ Signal->order {symbol}: {latency * 1000:.1f} ms")
+        return latency
+
+    def record_submission(self, symbol: str, submitted_at: float) -> float:
+        """⏱️ Registrar la duración del envío de la orden (ida y vuelta al broker)"""
+        duration = time.perf_counter() - submitted_at
+        metrics.order_submission_latency.observe(duration, symbol=symbol)
+        self._submissions.append(duration)
+        logger.info(f"⏱️ Order submission {symbol}: {duration * 1000:.1f} ms")
+        return duration
+
+    @staticmethod
+    def _summary(latencies) -> Dict[str, Any]:
+        samples = sorted(latencies)
+        if not samples:
+            return {"samples": 0}
+
+        def pct(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+
+        return {
+            "samples": len(samples),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
+
+    def latency_summary(self) -> Dict[str, Any]:
+        """📊 Percentiles de latencia señal -> orden (ms)"""
+        return self._summary(self._latencies)
+
+    def submission_summary(self) -> Dict[str, Any]:
+        """📊 Percentiles de la duración del envío de órdenes (ms)"""
+        return self._summary(self._submissions)
+
+    # ------------------------------------------------------------------
+    # Refresco en segundo plano
+    # ------------------------------------------------------------------
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+
+    def start(self):
+        """🚀 Iniciar el refresco en segundo plano"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._refresh_loop, daemon=True, name="OrderTemplateRefresh"
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """🛑 Detener el refresco en segundo plano"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado de las plantillas y latencia señal -> orden"""
+        quote_ages = [t.quote_age() for t in self._templates.values() if t.quote_at]
+        return {
+            "templates": len(self._templates),
+            "tracked_epics": len(self._epics),
+            "max_quote_age_seconds": round(max(quote_ages), 1) if quote_ages else None,
+            "background_refresh": bool(self._thread and self._thread.is_alive()),
+            "signal_to_order": self.latency_summary(),
+            "order_submission": self.submission_summary(),
+            **self.stats,
+        }
@@ -1,6 +1,7 @@
 """
 🎭 Universal Trading Analyzer - Paper Trader (Simplificado)
-Ejecutor de trades virtuales sin base de datos - usando Capital.com directamente
+Ejecutor de trades virtuales sin base de datos - usando Capital.com directamente.
+Opcionalmente persiste fills y balances en un journal append-only (ver trade_journal).
 """
 
 from __future__ import annotations
@@ -9,6 +10,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 from dataclasses import dataclass
 import random
+import threading
+import time
 
 # Importar configuración
 import sys
@@ -31,6 +34,13 @@ from src.config.time_trading_config import (
     _detect_market_type,
 )
 
+try:
+    from .trade_journal import TradeJournal, TradeHistoryIndex
+    from .portfolio_book import PortfolioBook
+except ImportError:
+    from core.trade_journal import TradeJournal, TradeHistoryIndex
+    from core.portfolio_book import PortfolioBook
+
 # Asegurar conversión a float consistente desde configuración
 FEE_RATE: float = float(TRADING_FEES)
 
@@ -74,6 +84,7 @@ class PaperTrader:
         initial_balance: float = None,
         initial_positions: Dict = None,
         capital_client=None,
+        journal_dir: Optional[str] = None,
     ):
         """
         Inicializar Paper Trader
@@ -82,6 +93,7 @@ class PaperTrader:
             initial_balance: Balance inicial en USD (opcional, usa config si no se especifica)
             initial_positions: Posiciones iniciales de Capital.com para sincronizar (opcional)
             capital_client: Cliente de Capital.com para obtener valores reales (opcional)
+            journal_dir: Directorio del journal persistente (None = sólo en memoria)
         """
         # Configuración del paper trader desde archivo centralizado
         self.config = PaperTraderConfig()
@@ -96,31 +108,32 @@ class PaperTrader:
         self.max_balance_usage = self.config.MAX_BALANCE_USAGE
         self.min_confidence_threshold = self.config.get_min_confidence_threshold()
 
-        # Portfolio en memoria (simplificado)
-        self.portfolio = {
-            "USD": {
-                "quantity": self.initial_balance,
-                "avg_price": 1.0,
-                "current_price": 1.0,
-                "current_value": self.initial_balance,
-                "unrealized_pnl": 0.0,
-                "unrealized_pnl_percentage": 0.0,
-                "last_updated": datetime.now(),
-            }
-        }
+        # Portfolio en memoria: cash USD + columnas NumPy por símbolo
+        self.book = PortfolioBook(cash=self.initial_balance)
+        # Lock del journal: protege el libro y sus agregados incrementales, que
+        # mutan el hilo de trading (fills) y el PositionMonitor (mark-to-market)
+        self._lock = threading.RLock()
 
         # Configurar logging basado en modo de operación
         log_level = logging.DEBUG if VERBOSE_LOGGING else logging.INFO
         logging.basicConfig(level=log_level)
         self.logger = logging.getLogger(__name__)
 
+        # Historial de trades en memoria (indexado por símbolo/estrategia/tiempo)
+        self.trades = []
+        self.trade_counter = 1
+        self._history_index = TradeHistoryIndex()
+
+        # Journal persistente: replay de snapshot + cola antes de sincronizar
+        self.journal: Optional[TradeJournal] = None
+        if journal_dir:
+            self._restore_from_journal(journal_dir)
+
         # Sincronizar posiciones iniciales de Capital.com si se proporcionan
         if initial_positions:
             self._sync_initial_positions(initial_positions, capital_client)
-
-        # Historial de trades en memoria
-        self.trades = []
-        self.trade_counter = 1
+            # El estado del broker prevalece: dejarlo persistido como base
+            self._write_journal_snapshot()
 
         # Verificaciones de modo de operación
         if PRODUCTION_MODE:
@@ -136,6 +149,104 @@ class PaperTrader:
             f"🎭 Paper Trader initialized with ${self.initial_balance:,.2f}"
         )
 
+    def _restore_from_journal(self, journal_dir: str):
+        """
+        📂 Abrir el journal y restaurar portfolio + historial persistidos
+
+        Args:
+            journal_dir: Directorio del journal
+        """
+        try:
+            self.journal = TradeJournal(
+                journal_dir,
+                snapshot_every=getattr(self.config, "JOURNAL_SNAPSHOT_EVERY", 500),
+                lock=self._lock,
+            )
+            started = time.perf_counter()
+            state = self.journal.load()
+            if not state:
+                self.logger.info(f"📓 Trade journal initialized at {journal_dir}")
+                return
+
+            if state.get("initial_balance") is not None:
+                self.initial_balance = float(state["initial_balance"])
+            if state.get("portfolio"):
+                self.book = PortfolioBook.from_dict(
+                    state["portfolio"], default_cash=self.initial_balance
+                )
+            self.trades = state.get("trades", [])
+            self.trade_counter = state.get("trade_counter", len(self.trades) + 1)
+            self._history_index.rebuild(self.trades)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.logger.info(
+                f"📓 Restored {len(self.trades)} paper trades from journal "
+                f"({self.journal.stats['replayed_events']} events replayed) in {elapsed_ms:.1f}ms"
+            )
+        except Exception as e:
+            self.logger.error(f"❌ Error restoring paper trader journal: {e}")
+            self.journal = None
+
+    @property
+    def portfolio(self) -> Dict[str, Dict]:
+        """
+        📒 Portfolio en el formato dict por símbolo (USD + posiciones)
+
+        Vista materializada del PortfolioBook; modificarla no altera el estado.
+        """
+        with self._lock:
+            return self.book.to_dict()
+
+    def _record_trade(self, trade_record: Dict):
+        """
+        📝 Registrar un trade en el historial, el índice y el journal
+
+        Args:
+            trade_record: Registro del trade ya aplicado al portfolio
+        """
+        self.trades.append(trade_record)
+        self._history_index.add(len(self.trades) - 1, trade_record)
+
+        if not self.journal:
+            return
+        try:
+            symbol = trade_record["symbol"]
+            self.journal.append_fill(
+                trade_record,
+                {
+                    "USD": self.book.entry("USD"),
+                    symbol: self.book.entry(symbol),
+                },
+            )
+            if self.journal.needs_snapshot:
+                self._write_journal_snapshot()
+        except Exception as e:
+            self.logger.error(f"❌ Error writing trade #{trade_record.get('id')} to journal: {e}")
+
+    def _record_balance(self, reason: str):
+        """💵 Registrar en el journal un cambio de cash sin trade asociado"""
+        if not self.journal:
+            return
+        try:
+            self.journal.append_balance(
+                {"USD": self.book.entry("USD")}, reason, initial_balance=self.initial_balance
+            )
+            if self.journal.needs_snapshot:
+                self._write_journal_snapshot()
+        except Exception as e:
+            self.logger.error(f"❌ Error writing balance change to journal: {e}")
+
+    def _write_journal_snapshot(self):
+        """📸 Compactar el journal en un snapshot del estado actual"""
+        if not self.journal:
+            return
+        try:
+            self.journal.write_snapshot(
+                self.book.to_dict(), self.trades, self.trade_counter, self.initial_balance
+            )
+        except Exception as e:
+            self.logger.error(f"❌ Error writing paper trader snapshot: {e}")
+
     def _sync_initial_positions(self, capital_positions: Dict, capital_client=None):
         """
         🔄 Sincronizar posiciones iniciales de Capital.com con el paper trader
@@ -187,19 +298,9 @@ class PaperTrader:
                     )
                     continue
 
-                # Calcular valor de la posición
-                position_value = abs(quantity) * avg_price
-
                 # Agregar posición al portfolio del paper trader
-                self.portfolio[symbol] = {
-                    "quantity": quantity,
-                    "avg_price": avg_price,
-                    "current_price": avg_price,  # Se actualizará con precios reales
-                    "current_value": position_value,
-                    "unrealized_pnl": 0.0,
-                    "unrealized_pnl_percentage": 0.0,
-                    "last_updated": datetime.now(),
-                }
+                # (current_price = entrada; se actualiza con mark_to_market)
+                self.book.set_position(symbol, quantity, avg_price)
 
                 synced_positions += 1
                 position_type = "LONG" if quantity > 0 else "SHORT"
@@ -210,8 +311,7 @@ class PaperTrader:
             # Usar valores reales de Capital.com si están disponibles
             if real_available_balance is not None and real_equity is not None:
                 # Usar el balance disponible real de Capital.com
-                self.portfolio["USD"]["quantity"] = real_available_balance
-                self.portfolio["USD"]["current_value"] = real_available_balance
+                self.book.set_cash(real_available_balance)
 
                 # Guardar valores reales para cálculos de portfolio
                 self._real_equity = real_equity
@@ -225,17 +325,12 @@ class PaperTrader:
                 self.logger.info(f"💵 P&L real: ${real_pnl:.2f}")
             else:
                 # Fallback: usar cálculo anterior si no hay valores reales
-                total_portfolio_value = sum(
-                    abs(pos["quantity"]) * pos["avg_price"]
-                    for symbol, pos in self.portfolio.items()
-                    if symbol != "USD"
-                )
+                total_portfolio_value = self.book.cost_basis_total()
                 adjusted_usd_balance = max(
                     self.initial_balance, total_portfolio_value * 0.2
                 )
 
-                self.portfolio["USD"]["quantity"] = adjusted_usd_balance
-                self.portfolio["USD"]["current_value"] = adjusted_usd_balance
+                self.book.set_cash(adjusted_usd_balance)
 
                 self.logger.info(
                     f"✅ Sincronizadas {synced_positions} posiciones de Capital.com con paper trader"
@@ -256,6 +351,29 @@ class PaperTrader:
             self.logger.error(f"❌ Error sincronizando posiciones iniciales: {e}")
             # No fallar la inicialización por este error
 
+    def sync_with_broker(self, balance: float, capital_positions: Dict, capital_client=None):
+        """
+        🔄 Sincronizar balance y posiciones de Capital.com tras la construcción
+
+        Equivale a pasar initial_balance/initial_positions al constructor; un
+        portfolio restaurado del journal conserva su cash.
+
+        Args:
+            balance: Balance disponible real
+            capital_positions: Diccionario con posiciones de Capital.com
+            capital_client: Cliente de Capital.com para obtener valores reales
+        """
+        with self._lock:
+            restored = bool(self.trades) or len(self.book) > 0
+            self.initial_balance = balance
+            if not restored:
+                self.book.set_cash(balance)
+            if capital_positions:
+                self._sync_initial_positions(capital_positions, capital_client)
+                self._write_journal_snapshot()
+            else:
+                self._record_balance("broker_sync")
+
     def reset_portfolio(self) -> Dict:
         """
         🔄 Resetear el portfolio a los valores por defecto
@@ -264,22 +382,18 @@ class PaperTrader:
             Dict con el resultado del reset
         """
         try:
-            # Resetear portfolio a valores iniciales
-            self.portfolio = {
-                "USD": {
-                    "quantity": self.initial_balance,
-                    "avg_price": 1.0,
-                    "current_price": 1.0,
-                    "current_value": self.initial_balance,
-                    "unrealized_pnl": 0.0,
-                    "unrealized_pnl_percentage": 0.0,
-                    "last_updated": datetime.now(),
-                }
-            }
+            with self._lock:
+                # Resetear portfolio a valores iniciales
+                self.book.reset(self.initial_balance)
+
+                # Limpiar historial de trades
+                self.trades = []
+                self.trade_counter = 1
+                self._history_index.clear()
 
-            # Limpiar historial de trades
-            self.trades = []
-            self.trade_counter = 1
+                if self.journal:
+                    self.journal.append_reset(self.book.to_dict(), self.initial_balance)
+                    self._write_journal_snapshot()
 
             self.logger.info(f"🔄 Portfolio reset to ${self.initial_balance:,.2f}")
 
@@ -338,11 +452,13 @@ class PaperTrader:
                     entry_value=0.0,
                 )
 
-            # Ejecutar según el tipo de señal
+            # Ejecutar según el tipo de señal (fill + journal bajo el mismo lock)
             if signal.signal_type.upper() == "BUY":
-                return self._execute_buy(signal)
+                with self._lock:
+                    return self._execute_buy(signal)
             elif signal.signal_type.upper() == "SELL":
-                return self._execute_sell(signal)
+                with self._lock:
+                    return self._execute_sell(signal)
             else:
                 return TradeResult(
                     success=False,
@@ -463,25 +579,25 @@ class PaperTrader:
         try:
             symbol = signal.symbol
             price = signal.price
+            strategy = getattr(signal, "strategy_name", None)
 
             # En CFDs, verificar si ya tenemos una posición abierta
-            if symbol in self.portfolio:
-                position = self.portfolio[symbol]
-                current_quantity = position["quantity"]
+            if symbol in self.book:
+                current_quantity = self.book.quantity(symbol)
 
                 # Si ya tenemos posición corta, cerrarla primero y luego abrir larga
                 if current_quantity < 0:
-                    close_result = self._close_short_position(symbol, price)
+                    close_result = self._close_short_position(symbol, price, strategy)
                     if not close_result.success:
                         return close_result
                     # Abrir nueva posición larga después de cerrar la corta
-                    return self._open_long_position(symbol, price)
+                    return self._open_long_position(symbol, price, strategy)
                 # Si ya tenemos posición larga, aumentarla según la estrategia
                 elif current_quantity > 0:
-                    return self._increase_long_position(symbol, price)
+                    return self._increase_long_position(symbol, price, strategy)
 
             # Abrir nueva posición larga (CFD BUY)
-            return self._open_long_position(symbol, price)
+            return self._open_long_position(symbol, price, strategy)
 
         except Exception as e:
             self.logger.error(f"❌ Error executing buy: {e}")
@@ -494,9 +610,11 @@ class PaperTrader:
                 entry_value=0.0,
             )
 
-    def _close_short_position(self, symbol: str, price: float) -> TradeResult:
+    def _close_short_position(
+        self, symbol: str, price: float, strategy: Optional[str] = None
+    ) -> TradeResult:
         """🔄 Cerrar posición corta existente"""
-        position = self.portfolio[symbol]
+        position = self.book.entry(symbol)
         quantity = abs(position["quantity"])  # Convertir a positivo
         entry_price = position["avg_price"]
 
@@ -534,10 +652,11 @@ class PaperTrader:
             "status": "CLOSED",
             "exit_time": datetime.now(),
             "is_paper_trade": True,
+            "strategy": strategy,
             "notes": f"Paper trade CLOSE SHORT {symbol} | PnL: ${net_pnl:.2f}",
         }
 
-        self.trades.append(trade_record)
+        self._record_trade(trade_record)
 
         pnl_sign = "+" if net_pnl >= 0 else ""
         self.logger.info(
@@ -553,7 +672,9 @@ class PaperTrader:
             entry_value=exit_value,
         )
 
-    def _open_long_position(self, symbol: str, price: float) -> TradeResult:
+    def _open_long_position(
+        self, symbol: str, price: float, strategy: Optional[str] = None
+    ) -> TradeResult:
         """📈 Abrir nueva posición larga (CFD BUY)"""
         # Calcular cantidad basada en el tamaño máximo de posición
         usd_balance = self.get_balance("USD")
@@ -603,12 +724,7 @@ class PaperTrader:
         self._update_usd_balance(-total_margin_required)
         self._update_asset_balance(symbol, quantity, price)
         # Guardar metadata de margen y exposición para cierres consistentes
-        try:
-            self.portfolio[symbol]["reserved_margin"] = required_margin
-            self.portfolio[symbol]["leverage"] = leverage
-            self.portfolio[symbol]["entry_value"] = max_trade_value
-        except Exception:
-            pass
+        self.book.set_margin(symbol, required_margin, leverage, max_trade_value)
 
         # Crear registro de trade
         trade_id = self.trade_counter
@@ -627,10 +743,11 @@ class PaperTrader:
             "status": "OPEN",
             "entry_time": datetime.now(),
             "is_paper_trade": True,
+            "strategy": strategy,
             "notes": f"Paper trade OPEN LONG {symbol}",
         }
 
-        self.trades.append(trade_record)
+        self._record_trade(trade_record)
 
         self.logger.info(
             f"✅ OPEN LONG: {quantity:.6f} {symbol} @ ${price:.2f} (Trade #{trade_id})"
@@ -645,11 +762,13 @@ class PaperTrader:
             entry_value=max_trade_value,
         )
 
-    def _increase_long_position(self, symbol: str, price: float) -> TradeResult:
+    def _increase_long_position(
+        self, symbol: str, price: float, strategy: Optional[str] = None
+    ) -> TradeResult:
         """📈 Aumentar posición larga existente"""
         # Por simplicidad, por ahora cerramos la posición existente y abrimos una nueva
         # En el futuro se puede implementar lógica más sofisticada
-        return self._open_long_position(symbol, price)
+        return self._open_long_position(symbol, price, strategy)
 
     def _execute_sell(self, signal: "TradingSignal") -> TradeResult:
         """
@@ -667,25 +786,25 @@ class PaperTrader:
         try:
             symbol = signal.symbol
             price = signal.price
+            strategy = getattr(signal, "strategy_name", None)
 
             # En CFDs, verificar si ya tenemos una posición abierta
-            if symbol in self.portfolio:
-                position = self.portfolio[symbol]
-                current_quantity = position["quantity"]
+            if symbol in self.book:
+                current_quantity = self.book.quantity(symbol)
 
                 # Si ya tenemos posición larga, cerrarla primero y luego abrir corta
                 if current_quantity > 0:
-                    close_result = self._close_long_position(symbol, price)
+                    close_result = self._close_long_position(symbol, price, strategy)
                     if not close_result.success:
                         return close_result
                     # Abrir nueva posición corta después de cerrar la larga
-                    return self._open_short_position(symbol, price)
+                    return self._open_short_position(symbol, price, strategy)
                 # Si ya tenemos posición corta, aumentarla según la estrategia
                 elif current_quantity < 0:
-                    return self._increase_short_position(symbol, price)
+                    return self._increase_short_position(symbol, price, strategy)
 
             # Abrir nueva posición corta (CFD SELL)
-            return self._open_short_position(symbol, price)
+            return self._open_short_position(symbol, price, strategy)
 
         except Exception as e:
             self.logger.error(f"❌ Error executing sell: {e}")
@@ -698,9 +817,11 @@ class PaperTrader:
                 entry_value=0.0,
             )
 
-    def _close_long_position(self, symbol: str, price: float) -> TradeResult:
+    def _close_long_position(
+        self, symbol: str, price: float, strategy: Optional[str] = None
+    ) -> TradeResult:
         """🔄 Cerrar posición larga existente"""
-        position = self.portfolio[symbol]
+        position = self.book.entry(symbol)
         quantity = position["quantity"]
         entry_price = position["avg_price"]
 
@@ -736,10 +857,11 @@ class PaperTrader:
             "status": "CLOSED",
             "exit_time": datetime.now(),
             "is_paper_trade": True,
+            "strategy": strategy,
             "notes": f"Paper trade CLOSE LONG {symbol} | PnL: ${net_pnl:.2f}",
         }
 
-        self.trades.append(trade_record)
+        self._record_trade(trade_record)
 
         pnl_sign = "+" if net_pnl >= 0 else ""
         self.logger.info(
@@ -755,7 +877,9 @@ class PaperTrader:
             entry_value=sale_value,
         )
 
-    def _open_short_position(self, symbol: str, price: float) -> TradeResult:
+    def _open_short_position(
+        self, symbol: str, price: float, strategy: Optional[str] = None
+    ) -> TradeResult:
         """📉 Abrir nueva posición corta (CFD SELL)"""
         # Calcular cantidad basada en el tamaño máximo de posición
         usd_balance = self.get_balance("USD")
@@ -804,12 +928,7 @@ class PaperTrader:
         self._update_usd_balance(-total_margin_required)
         self._update_asset_balance(symbol, quantity, price)  # Cantidad negativa
         # Guardar metadata de margen y exposición para cierres consistentes
-        try:
-            self.portfolio[symbol]["reserved_margin"] = required_margin
-            self.portfolio[symbol]["leverage"] = leverage
-            self.portfolio[symbol]["entry_value"] = max_trade_value
-        except Exception:
-            pass
+        self.book.set_margin(symbol, required_margin, leverage, max_trade_value)
 
         # Crear registro de trade
         trade_id = self.trade_counter
@@ -828,10 +947,11 @@ class PaperTrader:
             "status": "OPEN",
             "entry_time": datetime.now(),
             "is_paper_trade": True,
+            "strategy": strategy,
             "notes": f"Paper trade OPEN SHORT {symbol}",
         }
 
-        self.trades.append(trade_record)
+        self._record_trade(trade_record)
 
         self.logger.info(
             f"✅ OPEN SHORT: {abs(quantity):.6f} {symbol} @ ${price:.2f} (Trade #{trade_id})"
@@ -846,11 +966,13 @@ class PaperTrader:
             entry_value=max_trade_value,
         )
 
-    def _increase_short_position(self, symbol: str, price: float) -> TradeResult:
+    def _increase_short_position(
+        self, symbol: str, price: float, strategy: Optional[str] = None
+    ) -> TradeResult:
         """📉 Aumentar posición corta existente"""
         # Por simplicidad, por ahora cerramos la posición existente y abrimos una nueva
         # En el futuro se puede implementar lógica más sofisticada
-        return self._open_short_position(symbol, price)
+        return self._open_short_position(symbol, price, strategy)
 
     def get_portfolio_summary(self) -> Dict:
         """
@@ -860,21 +982,19 @@ class PaperTrader:
             Dict con el resumen del portfolio
         """
         try:
-            # Calcular PnL no realizado sobre posiciones (excluyendo USD)
-            total_pnl = sum(
-                pos["unrealized_pnl"]
-                for symbol, pos in self.portfolio.items()
-                if symbol != "USD"
-            )
+            with self._lock:
+                # PnL no realizado sobre posiciones (agregado incremental del book)
+                total_pnl = float(self.book.unrealized_pnl_total)
+                usd_value = self.book.cash
+                positions = list(self.book.positions())
             # Equity simulado: USD disponible + PnL no realizado
-            usd_value = self.portfolio.get("USD", {}).get("current_value", 0.0)
             total_value = usd_value + total_pnl
             funds_balance = usd_value  # Fondos (sin P&L), equivalente a saldo disponible en cash
 
             # Crear lista de assets (posiciones abiertas)
             assets = []
-            for symbol, position in self.portfolio.items():
-                if symbol != "USD" and position["quantity"] != 0:
+            for symbol, position in positions:
+                if position["quantity"] != 0:
                     qty = position["quantity"]
                     direction = "LONG" if qty > 0 else "SHORT"
                     assets.append(
@@ -897,20 +1017,14 @@ class PaperTrader:
                 "total_value": total_value,
                 "funds_balance": funds_balance,
                 "initial_balance": self.initial_balance,
-                "available_balance": self.portfolio.get("USD", {}).get("quantity", 0.0),
+                "available_balance": self.book.cash,
                 "total_pnl": total_pnl,
                 "total_pnl_percentage": (
                     (total_pnl / self.initial_balance) * 100
                     if self.initial_balance > 0
                     else 0.0
                 ),
-                "positions": len(
-                    [
-                        pos
-                        for sym, pos in self.portfolio.items()
-                        if sym != "USD" and pos["quantity"] != 0
-                    ]
-                ),
+                "positions": len(self.book),
                 "assets": assets,
                 "last_updated": datetime.now(),
             }
@@ -938,9 +1052,9 @@ class PaperTrader:
             float: Balance disponible
         """
         try:
-            if symbol in self.portfolio:
-                return self.portfolio[symbol]["quantity"]
-            return 0.0
+            if symbol == "USD":
+                return self.book.cash
+            return self.book.quantity(symbol)
         except Exception as e:
             self.logger.error(f"❌ Error getting balance for {symbol}: {e}")
             return 0.0
@@ -963,21 +1077,7 @@ class PaperTrader:
             amount: Cantidad a agregar/quitar (puede ser negativa)
         """
         try:
-            if "USD" not in self.portfolio:
-                self.portfolio["USD"] = {
-                    "quantity": self.initial_balance,
-                    "avg_price": 1.0,
-                    "current_price": 1.0,
-                    "current_value": self.initial_balance,
-                    "unrealized_pnl": 0.0,
-                    "unrealized_pnl_percentage": 0.0,
-                    "last_updated": datetime.now(),
-                }
-
-            self.portfolio["USD"]["quantity"] += amount
-            self.portfolio["USD"]["current_value"] = self.portfolio["USD"]["quantity"]
-            self.portfolio["USD"]["last_updated"] = datetime.now()
-
+            self.book.adjust_cash(amount)
         except Exception as e:
             self.logger.error(f"❌ Error updating USD balance: {e}")
 
@@ -993,67 +1093,8 @@ class PaperTrader:
             price: Precio actual
         """
         try:
-            if asset_symbol not in self.portfolio:
-                self.portfolio[asset_symbol] = {
-                    "quantity": 0.0,
-                    "avg_price": price,
-                    "current_price": price,
-                    "current_value": 0.0,
-                    "unrealized_pnl": 0.0,
-                    "unrealized_pnl_percentage": 0.0,
-                    "last_updated": datetime.now(),
-                }
-
-            position = self.portfolio[asset_symbol]
-            old_quantity = position["quantity"]
-            new_quantity = old_quantity + quantity_change
-
-            # Actualizar precio promedio para largos y cortos
-            if quantity_change != 0:
-                if old_quantity == 0:
-                    position["avg_price"] = price
-                else:
-                    # Usar cantidades absolutas para shorts
-                    abs_old = abs(old_quantity)
-                    abs_change = abs(quantity_change)
-                    abs_new = abs(new_quantity)
-                    position["avg_price"] = (
-                        (abs_old * position["avg_price"]) + (abs_change * price)
-                    ) / max(abs_new, 1e-12)
-
-            position["quantity"] = new_quantity
-            position["current_price"] = price
-            # Exposición actual (valor absoluto)
-            position["current_value"] = abs(new_quantity) * price
-
-            # Calcular PnL no realizado
-            if new_quantity > 0:
-                # Largo: sube precio, PnL positivo
-                position["unrealized_pnl"] = (
-                    price - position["avg_price"]
-                ) * new_quantity
-                position["unrealized_pnl_percentage"] = (
-                    (price - position["avg_price"]) / position["avg_price"]
-                ) * 100
-            elif new_quantity < 0:
-                # Corto: baja precio, PnL positivo
-                abs_qty = abs(new_quantity)
-                position["unrealized_pnl"] = (
-                    position["avg_price"] - price
-                ) * abs_qty
-                position["unrealized_pnl_percentage"] = (
-                    (position["avg_price"] - price) / position["avg_price"]
-                ) * 100
-            else:
-                position["unrealized_pnl"] = 0.0
-                position["unrealized_pnl_percentage"] = 0.0
-
-            position["last_updated"] = datetime.now()
-
-            # Eliminar posición solo si la cantidad es exactamente 0
-            if new_quantity == 0:
-                del self.portfolio[asset_symbol]
-
+            # Precio medio ponderado; la posición se elimina si la cantidad queda en 0
+            self.book.apply_fill(asset_symbol, quantity_change, price)
         except Exception as e:
             self.logger.error(f"❌ Error updating {asset_symbol} balance: {e}")
 
@@ -1065,11 +1106,11 @@ class PaperTrader:
             List[Dict]: Lista de posiciones abiertas
         """
         try:
+            with self._lock:
+                book_positions = list(self.book.positions())
             positions = []
-            for symbol, position in self.portfolio.items():
-                if (
-                    symbol != "USD" and position["quantity"] != 0
-                ):  # Incluir tanto posiciones largas como cortas
+            for symbol, position in book_positions:
+                if position["quantity"] != 0:  # Incluir tanto posiciones largas como cortas
                     positions.append(
                         {
                             "symbol": symbol,
@@ -1089,19 +1130,109 @@ class PaperTrader:
             self.logger.error(f"❌ Error getting open positions: {e}")
             return []
 
-    def get_trade_history(self) -> List[Dict]:
+    def mark_to_market(self, prices: Dict[str, float]) -> int:
+        """
+        💹 Marcar las posiciones abiertas a nuevos precios
+
+        Args:
+            prices: symbol -> precio actual (símbolos sin posición se ignoran)
+
+        Returns:
+            int: Número de posiciones actualizadas
+        """
+        try:
+            with self._lock:
+                return self.book.mark_many(prices)
+        except Exception as e:
+            self.logger.error(f"❌ Error marking portfolio to market: {e}")
+            return 0
+
+    def get_trade_history(
+        self,
+        symbol: Optional[str] = None,
+        strategy: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
         """
         📈 Obtener historial de trades
 
+        Sin argumentos devuelve todos los trades en orden cronológico. Con
+        filtros o paginación usa el índice y devuelve sólo la página pedida
+        (más recientes primero).
+
         Returns:
             List[Dict]: Lista de trades realizados
         """
         try:
-            return self.trades.copy()
+            if (
+                symbol is None
+                and strategy is None
+                and start is None
+                and end is None
+                and not offset
+                and limit is None
+            ):
+                return self.trades.copy()
+            return self.query_trades(
+                symbol=symbol,
+                strategy=strategy,
+                start=start,
+                end=end,
+                offset=offset,
+                limit=limit,
+            )["trades"]
         except Exception as e:
             self.logger.error(f"❌ Error getting trade history: {e}")
             return []
 
+    def query_trades(
+        self,
+        symbol: Optional[str] = None,
+        strategy: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = 50,
+        newest_first: bool = True,
+    ) -> Dict:
+        """
+        🔎 Consulta paginada del historial de trades
+
+        Args:
+            symbol: Filtrar por símbolo
+            strategy: Filtrar por estrategia que generó la señal
+            start / end: Rango de tiempo (inclusivo)
+            offset / limit: Paginación
+            newest_first: Más recientes primero
+
+        Returns:
+            Dict con la página de trades y el total que cumple los filtros
+        """
+        try:
+            page, total = self._history_index.query(
+                self.trades,
+                symbol=symbol,
+                strategy=strategy,
+                start=start.timestamp() if start else None,
+                end=end.timestamp() if end else None,
+                offset=offset,
+                limit=limit,
+                newest_first=newest_first,
+            )
+            return {
+                "success": True,
+                "trades": page,
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+            }
+        except Exception as e:
+            self.logger.error(f"❌ Error querying trade history: {e}")
+            return {"success": False, "error": str(e), "trades": [], "total": 0}
+
     def calculate_portfolio_performance(self) -> Dict:
         """
         📊 Calcular rendimiento del portfolio usando valores reales de Capital.com
@@ -1114,7 +1245,7 @@ class PaperTrader:
             if hasattr(self, "_real_equity") and hasattr(self, "_real_pnl"):
                 total_value = self._real_equity
                 total_pnl = self._real_pnl
-                balance_usd = self.portfolio["USD"]["current_value"]
+                balance_usd = self.book.cash
 
                 # Calcular total invertido basado en equity - pnl
                 total_invested = total_value - total_pnl
@@ -1130,25 +1261,14 @@ class PaperTrader:
                     "total_return_percentage": total_return_percentage,
                     "initial_balance": self.initial_balance,
                     "usd_balance": balance_usd,
-                    "open_positions": len(
-                        [
-                            pos
-                            for symbol, pos in self.portfolio.items()
-                            if symbol != "USD" and pos.get("quantity", 0) != 0
-                        ]
-                    ),
+                    "open_positions": len(self.book),
                 }
 
             # Fallback: calcular usando posiciones del paper trader
-            total_value = 0.0
-            total_pnl = 0.0
-
-            for symbol, position in self.portfolio.items():
-                current_value = position.get("current_value", 0.0)
-                unrealized_pnl = position.get("unrealized_pnl", 0.0)
-
-                total_value += current_value
-                total_pnl += unrealized_pnl
+            # (cash + exposición a precio actual, PnL no realizado incremental)
+            with self._lock:
+                total_value = self.book.cash + float(self.book.exposure_total)
+                total_pnl = float(self.book.unrealized_pnl_total)
 
             # Calcular porcentaje de retorno
             total_return_percentage = 0.0
@@ -1161,13 +1281,7 @@ class PaperTrader:
                 "total_return_percentage": total_return_percentage,
                 "initial_balance": self.initial_balance,
                 "usd_balance": self.get_balance("USD"),
-                "open_positions": len(
-                    [
-                        pos
-                        for symbol, pos in self.portfolio.items()
-                        if symbol != "USD" and pos.get("quantity", 0) != 0
-                    ]
-                ),
+                "open_positions": len(self.book),
             }
 
         except Exception as e:
@@ -0,0 +1,362 @@
+"""
+📒 Portfolio Book - Representación compacta del portfolio del PaperTrader
+Columnas NumPy (quantity, avg_price, last_price, margen reservado, ...)
+indexadas por una tabla de símbolos, más el cash en USD:
+
+- Marcar todo el libro a un vector de quotes es una sola operación
+  vectorizada.
+- Los agregados (PnL no realizado, exposición) se mantienen de forma
+  incremental en cada fill o quote individual, de modo que el resumen del
+  portfolio es O(1).
+- Las filas se eliminan por swap con la última fila.
+
+Convención de signo: quantity > 0 largo, quantity < 0 corto, por lo que el
+PnL no realizado es siempre quantity * (last_price - avg_price).
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CASH_SYMBOL = "USD"
+_INITIAL_CAPACITY = 16
+
+# Columnas float64 por fila
+_COLUMNS = (
+    "quantity",
+    "avg_price",
+    "last_price",
+    "reserved_margin",
+    "leverage",
+    "entry_value",
+    "unrealized_pnl",
+    "updated_at",  # epoch
+)
+
+
+class PortfolioBook:
+    """📒 Cash + posiciones en columnas NumPy con agregados incrementales"""
+
+    def __init__(self, cash: float = 0.0, capacity: int = _INITIAL_CAPACITY):
+        self.cash = float(cash)
+        self.cash_updated_at = time.time()
+        self._rows: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._size = 0
+        self._cols: Dict[str, np.ndarray] = {
+            name: np.zeros(max(1, capacity), dtype=np.float64) for name in _COLUMNS
+        }
+        self.unrealized_pnl_total = 0.0
+        self.exposure_total = 0.0  # Suma de |quantity| * last_price
+
+    # ------------------------------------------------------------------
+    # Tabla de símbolos
+    # ------------------------------------------------------------------
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rows
+
+    def __len__(self) -> int:
+        return self._size
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def _col(self, name: str) -> np.ndarray:
+        return self._cols[name][: self._size]
+
+    def _ensure_capacity(self):
+        capacity = len(self._cols["quantity"])
+        if self._size < capacity:
+            return
+        for name, column in self._cols.items():
+            grown = np.zeros(capacity * 2, dtype=np.float64)
+            grown[:capacity] = column
+            self._cols[name] = grown
+
+    def _add_row(self, symbol: str, price: float) -> int:
+        self._ensure_capacity()
+        row = self._size
+        self._rows[symbol] = row
+        self._symbols.append(symbol)
+        self._size += 1
+        for column in self._cols.values():
+            column[row] = 0.0
+        self._cols["avg_price"][row] = price
+        self._cols["last_price"][row] = price
+        self._cols["updated_at"][row] = time.time()
+        return row
+
+    def _remove_row(self, symbol: str):
+        row = self._rows.pop(symbol)
+        self._subtract_aggregates(row)
+        last = self._size - 1
+        if row != last:
+            for column in self._cols.values():
+                column[row] = column[last]
+            moved = self._symbols[last]
+            self._symbols[row] = moved
+            self._rows[moved] = row
+        self._symbols.pop()
+        self._size -= 1
+        if self._size == 0:
+            # Evitar arrastrar error de redondeo de los agregados incrementales
+            self.unrealized_pnl_total = 0.0
+            self.exposure_total = 0.0
+
+    # ------------------------------------------------------------------
+    # Agregados incrementales
+    # ------------------------------------------------------------------
+
+    def _subtract_aggregates(self, row: int):
+        self.unrealized_pnl_total -= self._cols["unrealized_pnl"][row]
+        self.exposure_total -= abs(self._cols["quantity"][row]) * self._cols["last_price"][row]
+
+    def _add_aggregates(self, row: int):
+        """Recalcular el PnL de una fila y sumarlo (tras _subtract_aggregates)"""
+        quantity = self._cols["quantity"][row]
+        last_price = self._cols["last_price"][row]
+        pnl = quantity * (last_price - self._cols["avg_price"][row])
+        self._cols["unrealized_pnl"][row] = pnl
+        self.unrealized_pnl_total += pnl
+        self.exposure_total += abs(quantity) * last_price
+
+    def _recompute_aggregates(self):
+        quantity = self._col("quantity")
+        self.unrealized_pnl_total = float(self._col("unrealized_pnl").sum())
+        self.exposure_total = float(np.abs(quantity).dot(self._col("last_price")))
+
+    # ------------------------------------------------------------------
+    # Cash
+    # ------------------------------------------------------------------
+
+    def adjust_cash(self, amount: float):
+        self.cash += float(amount)
+        self.cash_updated_at = time.time()
+
+    def set_cash(self, amount: float):
+        self.cash = float(amount)
+        self.cash_updated_at = time.time()
+
+    # ------------------------------------------------------------------
+    # Fills y posiciones
+    # ------------------------------------------------------------------
+
+    def apply_fill(self, symbol: str, quantity_change: float, price: float):
+        """
+        📈 Aplicar un cambio de cantidad a `price` (precio medio ponderado)
+
+        La fila se elimina cuando la cantidad resultante es exactamente 0.
+        """
+        row = self._rows.get(symbol)
+        if row is None:
+            row = self._add_row(symbol, price)
+
+        quantity = self._cols["quantity"]
+        avg_price = self._cols["avg_price"]
+        old_quantity = quantity[row]
+        new_quantity = old_quantity + quantity_change
+
+        if new_quantity == 0:
+            self._remove_row(symbol)
+            return
+
+        self._subtract_aggregates(row)
+        if quantity_change != 0:
+            if old_quantity == 0:
+                avg_price[row] = price
+            else:
+                # Usar cantidades absolutas para shorts
+                avg_price[row] = (
+                    abs(old_quantity) * avg_price[row] + abs(quantity_change) * price
+                ) / max(abs(new_quantity), 1e-12)
+
+        quantity[row] = new_quantity
+        self._cols["last_price"][row] = price
+        self._cols["updated_at"][row] = time.time()
+        self._add_aggregates(row)
+
+    def set_position(
+        self,
+        symbol: str,
+        quantity: float,
+        avg_price: float,
+        last_price: Optional[float] = None,
+        reserved_margin: float = 0.0,
+        leverage: float = 0.0,
+        entry_value: float = 0.0,
+        updated_at: Optional[float] = None,
+    ):
+        """🔄 Fijar una posición completa (sincronización o restauración)"""
+        if quantity == 0:
+            if symbol in self._rows:
+                self._remove_row(symbol)
+            return
+        row = self._rows.get(symbol)
+        if row is None:
+            row = self._add_row(symbol, avg_price)
+        self._subtract_aggregates(row)
+        self._cols["quantity"][row] = quantity
+        self._cols["avg_price"][row] = avg_price
+        self._cols["last_price"][row] = avg_price if last_price is None else last_price
+        self._cols["reserved_margin"][row] = reserved_margin
+        self._cols["leverage"][row] = leverage
+        self._cols["entry_value"][row] = entry_value
+        self._cols["updated_at"][row] = time.time() if updated_at is None else updated_at
+        self._add_aggregates(row)
+
+    def set_margin(
+        self, symbol: str, reserved_margin: float, leverage: float, entry_value: float
+    ):
+        """💼 Guardar metadata de margen de una posición abierta"""
+        row = self._rows.get(symbol)
+        if row is None:
+            return
+        self._cols["reserved_margin"][row] = reserved_margin
+        self._cols["leverage"][row] = leverage
+        self._cols["entry_value"][row] = entry_value
+
+    def quantity(self, symbol: str) -> float:
+        row = self._rows.get(symbol)
+        return float(self._cols["quantity"][row]) if row is not None else 0.0
+
+    def reset(self, cash: float):
+        """🔄 Vaciar el libro y fijar el cash"""
+        self._rows = {}
+        self._symbols = []
+        self._size = 0
+        self.unrealized_pnl_total = 0.0
+        self.exposure_total = 0.0
+        self.set_cash(cash)
+
+    def cost_basis_total(self) -> float:
+        """Suma de |quantity| * avg_price de las posiciones abiertas"""
+        return float(np.abs(self._col("quantity")).dot(self._col("avg_price")))
+
+    # ------------------------------------------------------------------
+    # Mark-to-market
+    # ------------------------------------------------------------------
+
+    def mark(self, symbol: str, price: float) -> bool:
+        """💹 Marcar un símbolo a un nuevo precio (agregados por diferencia)"""
+        row = self._rows.get(symbol)
+        if row is None or not price or price <= 0:
+            return False
+        self._subtract_aggregates(row)
+        self._cols["last_price"][row] = price
+        self._cols["updated_at"][row] = time.time()
+        self._add_aggregates(row)
+        return True
+
+    def mark_many(self, prices: Dict[str, float]) -> int:
+        """
+        💹 Marcar el libro a un conjunto de quotes en una operación vectorizada
+
+        Args:
+            prices: symbol -> precio (los símbolos sin posición se ignoran)
+
+        Returns:
+            Número de posiciones marcadas
+        """
+        rows, values = [], []
+        for symbol, price in prices.items():
+            row = self._rows.get(symbol)
+            if row is not None and price and price > 0:
+                rows.append(row)
+                values.append(price)
+        if not rows:
+            return 0
+        if len(rows) == 1:
+            self.mark(self._symbols[rows[0]], values[0])
+            return 1
+
+        index = np.asarray(rows, dtype=np.intp)
+        self._cols["last_price"][index] = np.asarray(values, dtype=np.float64)
+        self._cols["updated_at"][index] = time.time()
+        n = self._size
+        self._cols["unrealized_pnl"][:n] = self._col("quantity") * (
+            self._col("last_price") - self._col("avg_price")
+        )
+        self._recompute_aggregates()
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Vistas en formato legacy (dict por símbolo)
+    # ------------------------------------------------------------------
+
+    def entry(self, symbol: str) -> Optional[Dict]:
+        """Entrada del portfolio en el formato dict histórico (None si no existe)"""
+        if symbol == CASH_SYMBOL:
+            return {
+                "quantity": self.cash,
+                "avg_price": 1.0,
+                "current_price": 1.0,
+                "current_value": self.cash,
+                "unrealized_pnl": 0.0,
+                "unrealized_pnl_percentage": 0.0,
+                "last_updated": datetime.fromtimestamp(self.cash_updated_at),
+            }
+        row = self._rows.get(symbol)
+        if row is None:
+            return None
+        return self._row_dict(row)
+
+    def _row_dict(self, row: int) -> Dict:
+        cols = self._cols
+        quantity = float(cols["quantity"][row])
+        avg_price = float(cols["avg_price"][row])
+        last_price = float(cols["last_price"][row])
+        pnl_percentage = 0.0
+        if avg_price > 0 and quantity != 0:
+            direction = 1.0 if quantity > 0 else -1.0
+            pnl_percentage = direction * (last_price - avg_price) / avg_price * 100
+        entry = {
+            "quantity": quantity,
+            "avg_price": avg_price,
+            "current_price": last_price,
+            "current_value": abs(quantity) * last_price,
+            "unrealized_pnl": float(cols["unrealized_pnl"][row]),
+            "unrealized_pnl_percentage": pnl_percentage,
+            "last_updated": datetime.fromtimestamp(float(cols["updated_at"][row])),
+        }
+        if cols["leverage"][row] > 0:
+            entry["reserved_margin"] = float(cols["reserved_margin"][row])
+            entry["leverage"] = float(cols["leverage"][row])
+            entry["entry_value"] = float(cols["entry_value"][row])
+        return entry
+
+    def positions(self) -> Iterable[tuple]:
+        """(symbol, entry) de cada posición abierta"""
+        return ((symbol, self._row_dict(row)) for row, symbol in enumerate(self._symbols))
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Portfolio completo (USD + posiciones) en formato dict histórico"""
+        portfolio = {CASH_SYMBOL: self.entry(CASH_SYMBOL)}
+        portfolio.update(self.positions())
+        return portfolio
+
+    @classmethod
+    def from_dict(cls, portfolio: Dict[str, Dict], default_cash: float = 0.0) -> "PortfolioBook":
+        """Construir el libro desde el formato dict histórico (journal, snapshots)"""
+        cash_entry = portfolio.get(CASH_SYMBOL) or {}
+        book = cls(cash=cash_entry.get("quantity", default_cash), capacity=len(portfolio) + 1)
+        for symbol, entry in portfolio.items():
+            if symbol == CASH_SYMBOL or not entry:
+                continue
+            updated = entry.get("last_updated")
+            book.set_position(
+                symbol,
+                float(entry.get("quantity", 0.0)),
+                float(entry.get("avg_price", 0.0)),
+                last_price=float(entry.get("current_price") or entry.get("avg_price", 0.0)),
+                reserved_margin=float(entry.get("reserved_margin", 0.0)),
+                leverage=float(entry.get("leverage", 0.0)),
+                entry_value=float(entry.get("entry_value", 0.0)),
+                updated_at=updated.timestamp() if isinstance(updated, datetime) else None,
+            )
+        return book
@@ -0,0 +1,390 @@
+"""
+📐 Portfolio Risk Engine - Riesgo de portfolio a partir de retornos reales
+Mantiene una matriz móvil de log-retornos (barras x símbolos) alimentada
+por las velas que descargan las estrategias, y sobre ella:
+
+- Covarianza por pares actualizada de forma incremental en cada barra
+  (sumas de r_i, r_i*r_j y conteos por par; al salir una barra de la
+  ventana se restan sus productos externos).
+- Matriz de correlación cacheada por versión (sólo se recalcula si entró
+  o salió alguna barra).
+- Volatilidad del portfolio, riesgo marginal de un trade propuesto y VaR
+  histórico / paramétrico como operaciones vectorizadas de NumPy.
+
+Los pesos son exposiciones firmadas (largo > 0, corto < 0) divididas por
+el valor del portfolio, por lo que la volatilidad y el VaR son por barra
+del timeframe configurado.
+"""
+
+import logging
+import math
+import threading
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.config.main_config import RiskManagerConfig
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_SYMBOLS = 8
+
+
+def _to_epoch(ts) -> float:
+    if hasattr(ts, "timestamp"):
+        return float(ts.timestamp())
+    return float(ts)
+
+
+class PortfolioRiskEngine:
+    """📐 Matriz móvil de retornos + covarianza incremental"""
+
+    def __init__(
+        self,
+        timeframe: str = "1h",
+        window: int = 250,
+        min_observations: int = 30,
+        var_confidence: float = 0.95,
+    ):
+        self.timeframe = timeframe
+        self.window = max(2, int(window))
+        self.min_observations = max(2, int(min_observations))
+        self.var_confidence = var_confidence
+        self._z = NormalDist().inv_cdf(var_confidence)
+
+        self._lock = threading.RLock()
+        self._columns: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._last_ts: Dict[str, float] = {}
+        self._last_close: Dict[str, float] = {}
+
+        # Ring de barras: fila -> timestamp (NaN = libre)
+        self._returns = np.full((self.window, _INITIAL_SYMBOLS), np.nan)
+        self._row_ts = np.full(self.window, np.nan)
+        self._row_of_ts: Dict[float, int] = {}
+
+        # Sumas por pares sobre filas donde ambos símbolos tienen retorno
+        self._sum_x = np.zeros((_INITIAL_SYMBOLS, _INITIAL_SYMBOLS))  # [i, j] = sum r_i
+        self._sum_xy = np.zeros((_INITIAL_SYMBOLS, _INITIAL_SYMBOLS))
+        self._count = np.zeros((_INITIAL_SYMBOLS, _INITIAL_SYMBOLS))
+
+        self._version = 0
+        self._cached_version = -1
+        self._cov: Optional[np.ndarray] = None
+        self._corr: Optional[np.ndarray] = None
+
+    # ------------------------------------------------------------------
+    # Ingesta de velas
+    # ------------------------------------------------------------------
+
+    def _column(self, symbol: str) -> int:
+        column = self._columns.get(symbol)
+        if column is not None:
+            return column
+        column = len(self._symbols)
+        capacity = self._returns.shape[1]
+        if column >= capacity:
+            grown = capacity * 2
+            returns = np.full((self.window, grown), np.nan)
+            returns[:, :capacity] = self._returns
+            self._returns = returns
+            for name in ("_sum_x", "_sum_xy", "_count"):
+                matrix = np.zeros((grown, grown))
+                matrix[:capacity, :capacity] = getattr(self, name)
+                setattr(self, name, matrix)
+        self._columns[symbol] = column
+        self._symbols.append(symbol)
+        return column
+
+    def record_closes(
+        self, symbol: str, timeframe: str, timestamps: Iterable, closes: Iterable
+    ) -> int:
+        """
+        🕯️ Incorporar cierres de velas de un símbolo
+
+        Sólo se procesan las barras posteriores a la última vista para el
+        símbolo; las velas de otro timeframe se ignoran.
+
+        Returns:
+            Número de retornos nuevos incorporados
+        """
+        if timeframe != self.timeframe:
+            return 0
+        try:
+            ts_list = [_to_epoch(ts) for ts in timestamps]
+            close_list = [float(c) for c in closes]
+        except Exception as e:
+            logger.debug(f"📐 Invalid candles for {symbol}: {e}")
+            return 0
+        if len(ts_list) != len(close_list) or not ts_list:
+            return 0
+
+        with self._lock:
+            last_ts = self._last_ts.get(symbol)
+            start = 0
+            if last_ts is not None:
+                start = len(ts_list)
+                while start > 0 and ts_list[start - 1] > last_ts:
+                    start -= 1
+                if start == len(ts_list):
+                    return 0
+            else:
+                # Primera carga: sólo hace falta la ventana (+1 cierre de referencia)
+                start = max(0, len(ts_list) - self.window - 1)
+
+            column = self._column(symbol)
+            previous = self._last_close.get(symbol) if last_ts is not None else None
+            added = 0
+            for ts, close in zip(ts_list[start:], close_list[start:]):
+                if close <= 0:
+                    continue
+                if previous is not None and previous > 0:
+                    if self._add_return(column, ts, math.log(close / previous)):
+                        added += 1
+                previous = close
+                self._last_ts[symbol] = ts
+            self._last_close[symbol] = previous
+            if added:
+                self._version += 1
+            return added
+
+    def _row_for(self, ts: float) -> Optional[int]:
+        row = self._row_of_ts.get(ts)
+        if row is not None:
+            return row
+        free = np.flatnonzero(np.isnan(self._row_ts))
+        if free.size:
+            row = int(free[0])
+        else:
+            row = int(np.nanargmin(self._row_ts))
+            if ts <= self._row_ts[row]:
+                return None  # Más antigua que toda la ventana
+            self._evict_row(row)
+        self._row_ts[row] = ts
+        self._row_of_ts[ts] = row
+        return row
+
+    def _evict_row(self, row: int):
+        values = self._returns[row]
+        mask = ~np.isnan(values)
+        v = np.where(mask, values, 0.0)
+        m = mask.astype(float)
+        self._sum_xy -= np.outer(v, v)
+        self._sum_x -= np.outer(v, m)
+        self._count -= np.outer(m, m)
+        self._returns[row] = np.nan
+        del self._row_of_ts[float(self._row_ts[row])]
+        self._row_ts[row] = np.nan
+
+    def _add_return(self, column: int, ts: float, value: float) -> bool:
+        row = self._row_for(ts)
+        if row is None or not np.isnan(self._returns[row, column]):
+            return False
+        others = self._returns[row]
+        mask = ~np.isnan(others)
+        present = np.flatnonzero(mask)
+        vals = others[present]
+
+        self._sum_xy[column, present] += value * vals
+        self._sum_xy[present, column] += value * vals
+        self._sum_xy[column, column] += value * value
+        self._sum_x[column, present] += value
+        self._sum_x[present, column] += vals
+        self._sum_x[column, column] += value
+        self._count[column, present] += 1
+        self._count[present, column] += 1
+        self._count[column, column] += 1
+
+        self._returns[row, column] = value
+        return True
+
+    # ------------------------------------------------------------------
+    # Matrices
+    # ------------------------------------------------------------------
+
+    def _refresh_matrices(self):
+        if self._cached_version == self._version and self._cov is not None:
+            return
+        n = len(self._symbols)
+        count = self._count[:n, :n]
+        sum_x = self._sum_x[:n, :n]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (self._sum_xy[:n, :n] - sum_x * sum_x.T / count) / (count - 1)
+        cov[count < self.min_observations] = np.nan
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+        self._cov = cov
+        self._corr = corr
+        self._cached_version = self._version
+
+    def covariance(self) -> np.ndarray:
+        with self._lock:
+            self._refresh_matrices()
+            return self._cov
+
+    def correlation_matrix(self) -> Dict[str, Dict[str, float]]:
+        """🔗 Correlaciones por pares (sólo pares con observaciones suficientes)"""
+        with self._lock:
+            self._refresh_matrices()
+            result: Dict[str, Dict[str, float]] = {}
+            for i, a in enumerate(self._symbols):
+                row = {}
+                for j, b in enumerate(self._symbols):
+                    value = self._corr[i, j]
+                    if i != j and not np.isnan(value):
+                        row[b] = round(float(value), 4)
+                result[a] = row
+            return result
+
+    # ------------------------------------------------------------------
+    # Métricas de portfolio
+    # ------------------------------------------------------------------
+
+    def _weights(self, exposures: Dict[str, float], portfolio_value: float) -> np.ndarray:
+        weights = np.zeros(len(self._symbols))
+        if portfolio_value <= 0:
+            return weights
+        for symbol, exposure in exposures.items():
+            column = self._columns.get(symbol)
+            if column is not None:
+                weights[column] += exposure / portfolio_value
+        return weights
+
+    def portfolio_metrics(
+        self,
+        exposures: Dict[str, float],
+        portfolio_value: float,
+        candidate: Optional[str] = None,
+        candidate_exposure: float = 0.0,
+    ) -> Dict:
+        """
+        📊 Volatilidad, VaR y riesgo marginal del portfolio
+
+        Args:
+            exposures: symbol -> exposición firmada en USD (largo > 0, corto < 0)
+            portfolio_value: Valor del portfolio en USD
+            candidate: Símbolo del trade propuesto (opcional)
+            candidate_exposure: Exposición firmada del trade propuesto
+
+        Returns:
+            Dict con métricas por barra del timeframe configurado. Los
+            símbolos sin historial suficiente se reportan en `uncovered`.
+        """
+        with self._lock:
+            self._refresh_matrices()
+            cov = np.nan_to_num(self._cov) if self._cov is not None else np.zeros((0, 0))
+            weights = self._weights(exposures, portfolio_value)
+            uncovered = [s for s in exposures if s not in self._columns]
+
+            variance = float(weights @ cov @ weights) if weights.size else 0.0
+            volatility = math.sqrt(max(variance, 0.0))
+
+            # VaR histórico: pérdidas del portfolio actual sobre las barras de la ventana
+            filled = ~np.isnan(self._row_ts)
+            historical_var = 0.0
+            if weights.size and filled.sum() >= self.min_observations:
+                returns = np.nan_to_num(self._returns[filled, : len(self._symbols)])
+                pnl = returns @ weights
+                historical_var = max(0.0, -float(np.quantile(pnl, 1 - self.var_confidence)))
+
+            metrics = {
+                "portfolio_volatility": round(volatility, 6),
+                "var_parametric": round(self._z * volatility * portfolio_value, 2),
+                "var_historical": round(historical_var * portfolio_value, 2),
+                "var_confidence": self.var_confidence,
+                "timeframe": self.timeframe,
+                "observations": int(filled.sum()),
+                "uncovered_symbols": uncovered,
+            }
+
+            if candidate is None or portfolio_value <= 0:
+                return metrics
+
+            column = self._columns.get(candidate)
+            if column is None or np.isnan(self._cov[column, column]):
+                metrics["candidate_covered"] = False
+                return metrics
+
+            delta = candidate_exposure / portfolio_value
+            after = weights.copy()
+            after[column] += delta
+            volatility_after = math.sqrt(max(float(after @ cov @ after), 0.0))
+            candidate_std = math.sqrt(max(cov[column, column], 0.0))
+
+            # Correlación del trade (con su signo) con el portfolio actual
+            correlation = 0.0
+            if volatility > 0 and candidate_std > 0:
+                correlation = (
+                    math.copysign(1.0, delta) * float(cov[column] @ weights)
+                    / (candidate_std * volatility)
+                )
+
+            metrics.update(
+                {
+                    "candidate_covered": True,
+                    "portfolio_volatility_after": round(volatility_after, 6),
+                    "marginal_volatility": round(volatility_after - volatility, 6),
+                    "marginal_var_parametric": round(
+                        self._z * (volatility_after - volatility) * portfolio_value, 2
+                    ),
+                    "candidate_correlation": round(max(-1.0, min(1.0, correlation)), 4),
+                }
+            )
+            return metrics
+
+    def returns_for(
+        self, symbols: List[str], min_observations: Optional[int] = None
+    ) -> Tuple[np.ndarray, List[str], int]:
+        """
+        📜 Log-retornos de la ventana para `symbols` (barras x símbolos)
+
+        Sólo se cubren los símbolos con al menos `min_observations` retornos
+        en la ventana (por defecto el mínimo del motor), y sólo se devuelven
+        las barras en las que todos los símbolos cubiertos tienen retorno:
+        un hueco no se rellena con 0, que simularía una barra plana.
+
+        Returns:
+            (matriz sin NaN, símbolos cubiertos en orden de columnas,
+            versión del motor)
+        """
+        minimum = self.min_observations if min_observations is None else min_observations
+        with self._lock:
+            filled = ~np.isnan(self._row_ts)
+            window = self._returns[filled]
+            covered, columns = [], []
+            for symbol in symbols:
+                column = self._columns.get(symbol)
+                if column is None:
+                    continue
+                if int((~np.isnan(window[:, column])).sum()) >= minimum:
+                    covered.append(symbol)
+                    columns.append(column)
+            matrix = window[:, columns]
+            complete = ~np.isnan(matrix).any(axis=1)
+            return matrix[complete], covered, self._version
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get_status(self) -> Dict:
+        """📊 Estado del motor"""
+        with self._lock:
+            return {
+                "symbols": len(self._symbols),
+                "bars": int((~np.isnan(self._row_ts)).sum()),
+                "window": self.window,
+                "timeframe": self.timeframe,
+                "version": self._version,
+            }
+
+
+# Instancia global alimentada por la descarga de velas de las estrategias
+portfolio_risk_engine = PortfolioRiskEngine(
+    timeframe=RiskManagerConfig.PORTFOLIO_RISK_TIMEFRAME,
+    window=RiskManagerConfig.PORTFOLIO_RISK_WINDOW,
+    min_observations=RiskManagerConfig.PORTFOLIO_RISK_MIN_OBSERVATIONS,
+    var_confidence=RiskManagerConfig.PORTFOLIO_VAR_CONFIDENCE,
+)
@@ -21,6 +21,8 @@ from src.config.main_config import TradingBotConfig, RiskManagerConfig, TradingP
 from .enhanced_strategies import TradingSignal
 from .paper_trader import PaperTrader, TradeResult
 from .advanced_indicators import AdvancedIndicators
+from .trigger_book import TriggerBook
+from .trailing_engine import TrailingEngine
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -102,9 +104,15 @@ class PositionManager:
         # Cache de posiciones para optimización
         self.positions_cache = {}
         self.last_cache_update = 0
+        self._snapshot_version = 0  # Versión del snapshot de posiciones ya convertida
+
         profile = TradingProfiles.get_current_profile()
         self.cache_duration = profile["position_check_interval"]  # segundos
 
+        # Índice de niveles SL/TP/trailing por símbolo para evaluar quotes
+        self.trigger_book = TriggerBook()
+        self.position_timeout_hours = profile.get("position_timeout_hours", 6)
+
         # Configuración de trailing stops desde RiskManagerConfig
         self.trailing_stop_activation = (
             self.risk_config.TRAILING_STOP_ACTIVATION
@@ -113,6 +121,17 @@ class PositionManager:
             "default_trailing_distance"
         ]  # Ya en decimal
 
+        # Motor local de trailing stop / TP dinámico (ATR del layer de indicadores)
+        self.trailing_engine = TrailingEngine(
+            capital_client,
+            atr_provider=AdvancedIndicators.get_cached_atr,
+            activation=self.trailing_stop_activation,
+            atr_multiplier=profile.get("atr_default", 2.0),
+            fallback_distance=self.trailing_stop_distance,
+            min_amend_interval=profile.get("trailing_amend_min_interval", 10),
+            max_amends_per_minute=profile.get("trailing_max_amends_per_minute", 30),
+        )
+
         # Estadísticas
         self.stats = {
             "positions_managed": 0,
@@ -138,25 +157,21 @@ class PositionManager:
                 logger.debug("📊 No Capital.com client available")
                 return []
 
-            # Obtener posiciones de Capital.com
-            positions_result = self.capital_client.get_positions()
-            if not positions_result.get("success"):
+            # Snapshot compartido de Capital.com (un refresco fallido es un error, no datos viejos)
+            snapshot_result = self.capital_client.get_positions_snapshot(
+                force_refresh=refresh_cache
+            )
+            if not snapshot_result.get("success"):
                 logger.warning(
-                    f"⚠️ Failed to get positions: {positions_result.get('error')}"
+                    f"⚠️ Failed to get positions: {snapshot_result.get('error')}"
                 )
                 return []
 
-            capital_positions = positions_result.get("positions", [])
-            active_positions = []
+            snapshot = snapshot_result["snapshot"]
+            if snapshot.version != self._snapshot_version:
+                self._rebuild_positions_cache(snapshot)
 
-            for position in capital_positions:
-                try:
-                    position_info = self._convert_capital_position_to_info(position)
-                    if position_info:
-                        active_positions.append(position_info)
-                except Exception as e:
-                    logger.error(f"❌ Error converting position: {e}")
-                    continue
+            active_positions = list(self.positions_cache.values())
 
             logger.debug(f"📊 Found {len(active_positions)} active positions")
             return active_positions
@@ -165,6 +180,86 @@ class PositionManager:
             logger.error(f"❌ Error getting active positions: {e}")
             return []
 
+    def _rebuild_positions_cache(self, snapshot):
+        """🔄 Reconstruir el cache de PositionInfo desde un snapshot nuevo
+
+        Sólo se ejecuta cuando cambia la versión del snapshot; el trailing
+        stop local de las posiciones que siguen abiertas se conserva en el
+        trailing engine.
+        """
+        rebuilt = {}
+        for position in snapshot.positions:
+            try:
+                position_info = self._convert_capital_position_to_info(position)
+                if position_info:
+                    rebuilt[position_info.trade_id] = position_info
+            except Exception as e:
+                logger.error(f"❌ Error converting position: {e}")
+                continue
+
+        self.positions_cache = rebuilt
+        self._snapshot_version = snapshot.version
+        self.last_cache_update = time.time()
+        self.trailing_engine.sync(rebuilt.values())
+        for position_info in rebuilt.values():
+            trailing, take_profit = self.trailing_engine.get_levels(position_info.trade_id)
+            position_info.trailing_stop = trailing
+            if take_profit is not None:
+                position_info.take_profit = take_profit
+        self.trigger_book.rebuild(rebuilt.values(), deadline_for=self._timeout_deadline)
+
+    def _timeout_deadline(self, position: PositionInfo) -> Optional[float]:
+        """⏰ Epoch a partir del cual la posición es candidata a timeout"""
+        if position.entry_time is None:
+            return None
+        try:
+            return (
+                position.entry_time + timedelta(hours=self.position_timeout_hours)
+            ).timestamp()
+        except Exception:
+            return None
+
+    def process_quote(
+        self, symbol: str, price: float
+    ) -> List[Tuple[PositionInfo, str]]:
+        """🎯 Aplicar un nuevo precio a las posiciones de un símbolo
+
+        Actualiza precio y trailing stops de las posiciones del símbolo y
+        devuelve sólo las que deben cerrarse, consultando el trigger book
+        (O(log n + k)) en lugar de evaluar cada posición.
+
+        Args:
+            symbol: Símbolo del quote
+            price: Precio actual
+
+        Returns:
+            Lista de (posición, razón de cierre)
+        """
+        try:
+            for trade_id in self.trigger_book.trade_ids_for_symbol(symbol):
+                self.update_position_price(trade_id, price)
+
+            exits: Dict[int, str] = {}
+
+            # Timeout tiene prioridad (igual que check_exit_conditions)
+            for trade_id in self.trigger_book.expired(symbol, time.time()):
+                position = self.positions_cache.get(trade_id)
+                if position and self._check_position_timeout(position):
+                    exits[trade_id] = "POSITION_TIMEOUT"
+
+            for trade_id, reason in self.trigger_book.crossed(symbol, price):
+                exits.setdefault(trade_id, reason)
+
+            return [
+                (self.positions_cache[trade_id], reason)
+                for trade_id, reason in exits.items()
+                if trade_id in self.positions_cache
+            ]
+
+        except Exception as e:
+            logger.error(f"❌ Error processing quote for {symbol}: {e}")
+            return []
+
     # Método _create_position_info eliminado - las posiciones se obtienen directamente de Capital.com
 
     def update_position_price(self, trade_id: int, new_price: float) -> bool:
@@ -223,42 +318,31 @@ class PositionManager:
             position: Información de la posición
         """
         try:
-            # Solo para posiciones BUY por ahora
-            if position.trade_type != "BUY":
+            new_trailing = self.trailing_engine.on_price(
+                position.trade_id, position.current_price
+            )
+            if new_trailing is None:
                 return
 
-            # Verificar si la posición está en ganancia suficiente para activar trailing
-            profit_percentage = (
-                position.unrealized_pnl_percentage / 100.0
-            )  # Convertir porcentaje a decimal para comparación
+            old_trailing = position.trailing_stop
+            position.trailing_stop = new_trailing
+            self.trigger_book.set_level(
+                position.trade_id, "trailing_stop", new_trailing
+            )
 
-            if profit_percentage >= self.trailing_stop_activation:
-                # Calcular nuevo trailing stop
-                new_trailing = position.current_price * (
-                    1 - self.trailing_stop_distance
+            if old_trailing is None:
+                self.stats["trailing_stops_activated"] += 1
+                logger.info(
+                    f"📈 Trailing stop activated for {position.symbol}: ${new_trailing:.4f}"
+                )
+            else:
+                logger.debug(
+                    f"📈 Trailing stop updated for {position.symbol}: ${old_trailing:.4f} -> ${new_trailing:.4f}"
                 )
-
-                # Solo actualizar si es mejor que el trailing actual
-                if (
-                    position.trailing_stop is None
-                    or new_trailing > position.trailing_stop
-                ):
-                    old_trailing = position.trailing_stop
-                    position.trailing_stop = new_trailing
-
-                    if old_trailing is None:
-                        self.stats["trailing_stops_activated"] += 1
-                        logger.info(
-                            f"📈 Trailing stop activated for {position.symbol}: ${new_trailing:.4f}"
-                        )
-                    else:
-                        logger.debug(
-                            f"📈 Trailing stop updated for {position.symbol}: ${old_trailing:.4f} -> ${new_trailing:.4f}"
-                        )
 
         except Exception as e:
             logger.error(
-                f"❌ Error updating trailing stop for position {position.trade_id}: {e}"
+                f"❌ Error updating trailing stop for {position.trade_id}: {e}"
             )
 
     def check_exit_conditions(self, position: PositionInfo) -> Optional[str]:
@@ -363,6 +447,7 @@ class PositionManager:
                     )
                 
                 self.stats["positions_managed"] += 1
+                self.trigger_book.remove(trade_id)
 
                 # Actualizar estadísticas según la razón
                 if "TAKE_PROFIT" in reason:
@@ -600,11 +685,13 @@ class PositionManager:
         Returns:
             Número de trailing stops actualizados
         """
-        # Base de datos eliminada - trailing stops se gestionan directamente en Capital.com
-        logger.debug(
-            "🎯 Trailing stops simplificados - usando Capital.com directamente"
-        )
-        return 0
+        moves_before = self.trailing_engine.stats["trailing_moves"]
+        for symbol, price in market_data.items():
+            if not price:
+                continue
+            for trade_id in self.trigger_book.trade_ids_for_symbol(symbol):
+                self.update_position_price(trade_id, price)
+        return self.trailing_engine.stats["trailing_moves"] - moves_before
 
     def update_dynamic_take_profits(
         self, market_data: Dict[str, float], risk_manager=None
@@ -618,11 +705,35 @@ class PositionManager:
         Returns:
             Número de take profits actualizados
         """
-        # Simplificado - los take profits dinámicos se gestionan directamente en Capital.com
-        logger.debug(
-            "🎯 Take profits dinámicos simplificados - usando Capital.com directamente"
-        )
-        return 0
+        updated = 0
+        for symbol, price in market_data.items():
+            if not price:
+                continue
+            for trade_id in self.trigger_book.trade_ids_for_symbol(symbol):
+                position = self.positions_cache.get(trade_id)
+                if position is None or not position.entry_price:
+                    continue
+                direction = -1 if position.trade_type == "SELL" else 1
+                profit_pct = direction * (price - position.entry_price) / position.entry_price
+                new_tp = self._calculate_dynamic_take_profit(position, price, profit_pct)
+                if new_tp is None or not self.trailing_engine.set_take_profit(trade_id, new_tp):
+                    continue
+                position.take_profit = new_tp
+                self.trigger_book.set_level(trade_id, "take_profit", new_tp)
+                updated += 1
+        return updated
+
+    def flush_amendments(self) -> int:
+        """📤 Enviar a Capital.com los niveles SL/TP modificados (coalescidos)
+
+        Returns:
+            Número de posiciones modificadas en el broker
+        """
+        try:
+            return self.trailing_engine.flush()
+        except Exception as e:
+            logger.error(f"❌ Error flushing SL/TP amendments: {e}")
+            return 0
 
     def _calculate_dynamic_take_profit(
         self, position: "PositionInfo", current_price: float, current_profit_pct: float
@@ -22,11 +22,16 @@ from src.config.main_config import (
     TradingBotConfig,
     RiskManagerConfig,
     TradingProfiles,
+    ProfileSnapshot,
     CacheConfig,
 )
 from .enhanced_strategies import TradingSignal
 from .paper_trader import PaperTrader, TradeResult
 from .position_manager import PositionManager, PositionInfo
+from .monitor_scheduler import AdaptiveMonitorScheduler
+from .advanced_indicators import AdvancedIndicators
+from src.utils import metrics
+from src.utils.event_stream import event_stream
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -67,6 +72,7 @@ class PositionMonitor:
         price_fetcher: Callable[[str], float],
         paper_trader=None,
         capital_client=None,
+        tick_callback: Optional[Callable[[], None]] = None,
     ):
         """
         Inicializar el monitor de posiciones
@@ -75,8 +81,10 @@ class PositionMonitor:
             price_fetcher: Función para obtener precios actuales
             paper_trader: Instancia del paper trader para ejecutar órdenes
             capital_client: Cliente de Capital.com para operaciones reales
+            tick_callback: Función invocada al final de cada ciclo de monitoreo
         """
         self.price_fetcher = price_fetcher
+        self.tick_callback = tick_callback
         self.paper_trader = paper_trader
         self.capital_client = capital_client
         self.config = TradingBotConfig()
@@ -90,6 +98,9 @@ class PositionMonitor:
         self.monitor_thread = None
         self.stop_event = threading.Event()
 
+        # Perfil capturado al inicio de cada iteración del loop
+        self._cycle_profile: Optional[ProfileSnapshot] = None
+
         # Cache de precios para optimización
         self.price_cache = {}
         self.last_price_update = {}
@@ -112,6 +123,14 @@ class PositionMonitor:
             "price_data"
         )  # segundos de validez del cache
 
+        # Intervalo adaptativo por símbolo dentro de un presupuesto global de consultas
+        self.scheduler = AdaptiveMonitorScheduler(
+            min_interval=profile.get("monitor_min_interval", 1),
+            max_interval=profile.get("monitor_max_interval", self.monitor_interval * 4),
+            max_requests_per_minute=profile.get("monitor_max_quotes_per_minute", 60),
+            atr_provider=AdvancedIndicators.get_cached_atr,
+        )
+
         # Inicializar estadísticas del monitor
         self.stats = {
             "tp_executed": 0,
@@ -126,9 +145,7 @@ class PositionMonitor:
         """🧹 Limpiar trades procesados que ya no están en posiciones activas"""
         try:
             # Obtener IDs de posiciones activas actuales
-            active_positions = self.position_manager.get_active_positions(
-                refresh_cache=True
-            )
+            active_positions = self.position_manager.get_active_positions()
             active_trade_ids = {pos.trade_id for pos in active_positions}
 
             # Remover trades procesados que ya no están activos
@@ -188,15 +205,25 @@ class PositionMonitor:
         logger.info("📊 Starting position monitoring loop")
 
         cleanup_counter = 0
-        profile = TradingProfiles.get_current_profile()
         from src.config.main_config import TradingBotConfig
 
         cleanup_interval = (
             TradingBotConfig.get_cleanup_interval()
         )  # Limpiar cada N ciclos
 
+        # Momento en que debería arrancar la siguiente iteración (para medir lag)
+        expected_start = None
+
         while self.monitoring_active and not self.stop_event.is_set():
+            iteration_start = time.monotonic()
+            if expected_start is not None:
+                metrics.monitor_loop_lag.observe(
+                    max(0.0, iteration_start - expected_start)
+                )
             try:
+                # Un único perfil para todas las posiciones de esta iteración
+                self._cycle_profile = TradingProfiles.snapshot()
+
                 # Incrementar contador de ciclos
                 self.stats["monitoring_cycles"] += 1
                 cleanup_counter += 1
@@ -206,38 +233,48 @@ class PositionMonitor:
                     self._cleanup_processed_trades()
                     cleanup_counter = 0
 
-                # Obtener posiciones activas del PositionManager (refrescar cache)
-                active_positions = self.position_manager.get_active_positions(
-                    refresh_cache=True
-                )
+                # Posiciones activas desde el snapshot compartido (refresco por TTL)
+                active_positions = self.position_manager.get_active_positions()
 
                 if not active_positions:
                     # No hay posiciones, esperar más tiempo
-                    time.sleep(self.monitor_interval * 2)
+                    expected_start = self._finish_iteration(
+                        iteration_start, self.monitor_interval * 2
+                    )
                     continue
 
                 logger.debug(f"📊 Monitoring {len(active_positions)} active positions")
 
-                # Recopilar precios actuales para todas las posiciones
+                # Consultar sólo los símbolos cuya próxima revisión venció
+                # (intervalo adaptativo por distancia al trigger y volatilidad)
+                self.scheduler.sync({position.symbol for position in active_positions})
                 market_data = {}
-                for position in active_positions:
+                for symbol in self.scheduler.due_symbols():
                     try:
-                        current_price = self._get_current_price(position.symbol)
-                        market_data[position.symbol] = current_price
+                        current_price = self._get_current_price(
+                            symbol, max_age=self.scheduler.min_interval
+                        )
                     except ValueError as e:
                         logger.warning(
-                            f"⚠️ No se pudo obtener precio para {position.symbol}: {e}"
+                            f"⚠️ No se pudo obtener precio para {symbol}: {e}"
                         )
-                        # Continuar con otras posiciones
-                        continue
+                        current_price = None
                     except Exception as e:
                         logger.error(
-                            f"🚨 Error inesperado obteniendo precio para {position.symbol}: {e}"
+                            f"🚨 Error inesperado obteniendo precio para {symbol}: {e}"
                         )
-                        continue
+                        current_price = None
+                    if current_price:
+                        market_data[symbol] = current_price
+                    else:
+                        self.scheduler.postpone(symbol)
 
                 # Actualizar trailing stops dinámicos
                 if market_data:
+                    # Mark-to-market vectorizado del portfolio simulado
+                    if self.paper_trader:
+                        self.paper_trader.mark_to_market(market_data)
+
                     try:
                         updated_count = self.position_manager.update_trailing_stops(
                             market_data
@@ -261,34 +298,82 @@ class PositionMonitor:
                     except Exception as e:
                         logger.error(f"❌ Error updating dynamic take profits: {e}")
 
-                # Procesar cada posición
+                    # Enviar a Capital.com los niveles movidos (coalescidos y con rate limit)
+                    amended = self.position_manager.flush_amendments()
+                    if amended > 0:
+                        logger.debug(f"📤 Amended {amended} positions on Capital.com")
+
+                # Procesar cada quote contra el trigger book: sólo se evalúan
+                # las posiciones cuyo nivel fue cruzado
+                positions_by_symbol: Dict[str, List[PositionInfo]] = {}
                 for position in active_positions:
+                    positions_by_symbol.setdefault(position.symbol, []).append(position)
+
+                for symbol, current_price in market_data.items():
                     if self.stop_event.is_set():
                         break
+                    if current_price is None:
+                        continue
 
-                    try:
-                        self._monitor_position(position)
-                    except Exception as e:
-                        logger.error(
-                            f"❌ Error monitoring position {position.trade_id}: {e}"
-                        )
+                    triggered = set()
+                    for position, close_reason in self.position_manager.process_quote(
+                        symbol, current_price
+                    ):
+                        triggered.add(position.trade_id)
+                        if position.trade_id in self.processed_trades:
+                            continue
+                        try:
+                            self._handle_exit(position, current_price, close_reason)
+                        except Exception as e:
+                            logger.error(
+                                f"❌ Error monitoring position {position.trade_id}: {e}"
+                            )
+
+                    # Estado periódico de las posiciones que siguen abiertas
+                    for position in positions_by_symbol.get(symbol, ()):
+                        if position.trade_id not in triggered:
+                            self._log_position_status(position, current_price)
+
+                # Planificar la próxima consulta de cada símbolo con los niveles ya actualizados
+                for symbol, current_price in market_data.items():
+                    self.scheduler.record_quote(
+                        symbol,
+                        current_price,
+                        self.position_manager.trigger_book.nearest_distance(
+                            symbol, current_price
+                        ),
+                    )
 
-                # Esperar antes del siguiente ciclo
-                time.sleep(self.monitor_interval)
+                # Esperar hasta el próximo símbolo vencido
+                expected_start = self._finish_iteration(
+                    iteration_start, self.scheduler.seconds_until_next()
+                )
 
             except Exception as e:
                 logger.error(f"❌ Error in monitoring loop: {e}")
-                time.sleep(self.monitor_interval)
+                expected_start = self._finish_iteration(
+                    iteration_start, self.monitor_interval
+                )
 
         logger.info("📊 Position monitoring loop ended")
 
+    def _finish_iteration(self, iteration_start: float, sleep_seconds: float) -> float:
+        """⏱️ Registrar duración de la iteración, dormir y devolver el inicio esperado"""
+        metrics.monitor_loop_duration.observe(time.monotonic() - iteration_start)
+        if self.tick_callback:
+            try:
+                self.tick_callback()
+            except Exception as e:
+                logger.error(f"❌ Error in monitor tick callback: {e}")
+        expected_start = time.monotonic() + sleep_seconds
+        self.stop_event.wait(sleep_seconds)
+        return expected_start
+
     def _get_open_positions(self) -> List[Dict]:
         """📊 Obtener posiciones abiertas directamente de Capital.com"""
         try:
             # Usar PositionManager que ya maneja Capital.com
-            active_positions = self.position_manager.get_active_positions(
-                refresh_cache=True
-            )
+            active_positions = self.position_manager.get_active_positions()
 
             return [
                 {
@@ -308,132 +393,146 @@ class PositionMonitor:
             logger.error(f"❌ Error getting open positions from Capital.com: {e}")
             return []
 
-    def _monitor_position(self, position: PositionInfo):
-        """🔄 Monitorear una posición individual"""
+    def _handle_exit(self, position: PositionInfo, current_price: float, close_reason: str):
+        """🎯 Cerrar una posición cuyo nivel de salida fue alcanzado"""
         symbol = position.symbol
         trade_id = position.trade_id
 
-        # Verificar si este trade ya fue procesado para cierre
-        if trade_id in self.processed_trades:
-            return
-
-        # Obtener precio actual
-        try:
-            current_price = self._get_current_price(symbol)
-        except ValueError as e:
-            logger.warning(f"⚠️ No se pudo obtener precio para {symbol}: {e}")
-            return
-        except Exception as e:
-            logger.error(f"🚨 Error inesperado obteniendo precio para {symbol}: {e}")
-            return
+        # Verificar si ya hemos intentado cerrar este trade demasiadas veces
+        if trade_id in self.failed_close_attempts:
+            if self.failed_close_attempts[trade_id] >= self.max_close_attempts:
+                logger.warning(
+                    f"⚠️ Trade {trade_id} marked as processed after {self.max_close_attempts} failed attempts - continuing monitoring"
+                )
+                self.processed_trades.add(trade_id)
+                # Clear from failed attempts to avoid memory buildup
+                del self.failed_close_attempts[trade_id]
+                return
 
-        # Actualizar precio en PositionManager
-        self.position_manager.update_position_price(trade_id, current_price)
+        logger.info(
+            f"🎯 Position {trade_id} ({symbol}) should close: {close_reason} "
+            f"| Current: ${current_price:.4f} | Entry: ${position.entry_price:.4f}"
+        )
 
-        # Verificar condiciones de cierre
-        close_reason = self.position_manager.check_exit_conditions(position)
+        # Ejecutar cierre usando PositionManager
+        try:
+            success = self.position_manager.close_position(
+                trade_id, current_price, close_reason
+            )
 
-        if close_reason:
-            # Verificar si ya hemos intentado cerrar este trade demasiadas veces
-            if trade_id in self.failed_close_attempts:
-                if self.failed_close_attempts[trade_id] >= self.max_close_attempts:
-                    logger.warning(
-                        f"⚠️ Trade {trade_id} marked as processed after {self.max_close_attempts} failed attempts - continuing monitoring"
-                    )
-                    self.processed_trades.add(trade_id)
-                    # Clear from failed attempts to avoid memory buildup
+            if success:
+                logger.info(f"✅ Position {trade_id} closed successfully")
+                # Marcar como procesado exitosamente
+                self.processed_trades.add(trade_id)
+                # Limpiar contador de intentos fallidos si existía
+                if trade_id in self.failed_close_attempts:
                     del self.failed_close_attempts[trade_id]
-                    return
 
-            logger.info(
-                f"🎯 Position {trade_id} ({symbol}) should close: {close_reason} "
-                f"| Current: ${current_price:.4f} | Entry: ${position.entry_price:.4f}"
-            )
-
-            # Ejecutar cierre usando PositionManager
-            try:
-                success = self.position_manager.close_position(
-                    trade_id, current_price, close_reason
+                # Actualizar estadísticas del monitor
+                if close_reason == "TAKE_PROFIT":
+                    self.stats["tp_executed"] += 1
+                elif close_reason in ["STOP_LOSS", "TRAILING_STOP"]:
+                    self.stats["sl_executed"] += 1
+
+                event_stream.publish(
+                    "position_closed",
+                    {
+                        "trade_id": trade_id,
+                        "deal_id": position.deal_id,
+                        "symbol": symbol,
+                        "trade_type": position.trade_type,
+                        "reason": close_reason,
+                        "entry_price": position.entry_price,
+                        "exit_price": current_price,
+                    },
                 )
-
-                if success:
-                    logger.info(f"✅ Position {trade_id} closed successfully")
-                    # Marcar como procesado exitosamente
-                    self.processed_trades.add(trade_id)
-                    # Limpiar contador de intentos fallidos si existía
-                    if trade_id in self.failed_close_attempts:
-                        del self.failed_close_attempts[trade_id]
-
-                    # Actualizar estadísticas del monitor
-                    if close_reason == "TAKE_PROFIT":
-                        self.stats["tp_executed"] += 1
-                    elif close_reason in ["STOP_LOSS", "TRAILING_STOP"]:
-                        self.stats["sl_executed"] += 1
-                else:
-                    # Incrementar contador de intentos fallidos
-                    if trade_id not in self.failed_close_attempts:
-                        self.failed_close_attempts[trade_id] = 0
-                    self.failed_close_attempts[trade_id] += 1
-
-                    logger.error(
-                        f"❌ Failed to close position {trade_id} "
-                        f"(attempt {self.failed_close_attempts[trade_id]}/{self.max_close_attempts})"
-                    )
-                    
-            except Exception as e:
-                logger.error(f"❌ Exception while closing position {trade_id}: {str(e)}")
-                # Treat exceptions as failed attempts but don't crash
+            else:
+                # Incrementar contador de intentos fallidos
                 if trade_id not in self.failed_close_attempts:
                     self.failed_close_attempts[trade_id] = 0
                 self.failed_close_attempts[trade_id] += 1
-                logger.error(
-                    f"❌ Failed to close position {trade_id} due to exception (attempt {self.failed_close_attempts[trade_id]}/{self.max_close_attempts})"
-                )
-        else:
-            # Log de estado (solo cada minuto para evitar spam)
-            if (
-                trade_id not in getattr(self, "_last_log_time", {})
-                or time.time() - getattr(self, "_last_log_time", {}).get(trade_id, 0)
-                > 60
-            ):
-
-                if not hasattr(self, "_last_log_time"):
-                    self._last_log_time = {}
-                self._last_log_time[trade_id] = time.time()
-
-                # Validar que entry_price no sea None antes del cálculo
-                if position.entry_price is None or position.entry_price == 0:
-                    logger.warning(
-                        f"⚠️ Position {trade_id} has invalid entry_price: {position.entry_price}"
-                    )
-                    pnl_pct = 0.0
-                else:
-                    pnl_pct = (
-                        (current_price - position.entry_price) / position.entry_price
-                    ) * 100
-                    if position.trade_type == "SELL":
-                        pnl_pct = -pnl_pct
-
-                # Formatear SL y TP manejando valores None
-                sl_str = (
-                    f"${position.stop_loss:.4f}"
-                    if position.stop_loss is not None
-                    else "N/A"
+
+                event_stream.publish(
+                    "position_close_failed",
+                    {
+                        "trade_id": trade_id,
+                        "symbol": symbol,
+                        "reason": close_reason,
+                        "attempt": self.failed_close_attempts[trade_id],
+                        "max_attempts": self.max_close_attempts,
+                    },
                 )
-                tp_str = (
-                    f"${position.take_profit:.4f}"
-                    if position.take_profit is not None
-                    else "N/A"
+
+                logger.error(
+                    f"❌ Failed to close position {trade_id} "
+                    f"(attempt {self.failed_close_attempts[trade_id]}/{self.max_close_attempts})"
                 )
+                
+        except Exception as e:
+            logger.error(f"❌ Exception while closing position {trade_id}: {str(e)}")
+            # Treat exceptions as failed attempts but don't crash
+            if trade_id not in self.failed_close_attempts:
+                self.failed_close_attempts[trade_id] = 0
+            self.failed_close_attempts[trade_id] += 1
+            logger.error(
+                f"❌ Failed to close position {trade_id} due to exception (attempt {self.failed_close_attempts[trade_id]}/{self.max_close_attempts})"
+            )
 
-                logger.debug(
-                    f"📊 Position {trade_id} ({symbol}): ${current_price:.4f} "
-                    f"| PnL: {pnl_pct:.2f}% "
-                    f"| SL: {sl_str} | TP: {tp_str}"
+    def _log_position_status(self, position: PositionInfo, current_price: float):
+        """📝 Log periódico del estado de una posición abierta"""
+        trade_id = position.trade_id
+        symbol = position.symbol
+
+        # Log de estado (solo cada minuto para evitar spam)
+        if (
+            trade_id not in getattr(self, "_last_log_time", {})
+            or time.time() - getattr(self, "_last_log_time", {}).get(trade_id, 0)
+            > 60
+        ):
+
+            if not hasattr(self, "_last_log_time"):
+                self._last_log_time = {}
+            self._last_log_time[trade_id] = time.time()
+
+            # Validar que entry_price no sea None antes del cálculo
+            if position.entry_price is None or position.entry_price == 0:
+                logger.warning(
+                    f"⚠️ Position {trade_id} has invalid entry_price: {position.entry_price}"
                 )
+                pnl_pct = 0.0
+            else:
+                pnl_pct = (
+                    (current_price - position.entry_price) / position.entry_price
+                ) * 100
+                if position.trade_type == "SELL":
+                    pnl_pct = -pnl_pct
+
+            # Formatear SL y TP manejando valores None
+            sl_str = (
+                f"${position.stop_loss:.4f}"
+                if position.stop_loss is not None
+                else "N/A"
+            )
+            tp_str = (
+                f"${position.take_profit:.4f}"
+                if position.take_profit is not None
+                else "N/A"
+            )
+
+            logger.debug(
+                f"📊 Position {trade_id} ({symbol}): ${current_price:.4f} "
+                f"| PnL: {pnl_pct:.2f}% "
+                f"| SL: {sl_str} | TP: {tp_str}"
+            )
+
+    def _get_current_price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """💰 Obtener precio actual con cache
 
-    def _get_current_price(self, symbol: str) -> Optional[float]:
-        """💰 Obtener precio actual con cache"""
+        Args:
+            symbol: Símbolo a consultar
+            max_age: Antigüedad máxima aceptada del precio cacheado (por defecto
+                price_cache_duration)
+        """
         # Validar símbolo antes de procesar
         if not symbol or not symbol.strip():
             logger.error(f"❌ Symbol is empty or invalid: '{symbol}'")
@@ -443,8 +542,11 @@ class PositionMonitor:
 
         # Verificar cache
         if symbol in self.price_cache and symbol in self.last_price_update:
-            if now - self.last_price_update[symbol] < self.price_cache_duration:
+            cache_duration = self.price_cache_duration if max_age is None else max_age
+            if now - self.last_price_update[symbol] < cache_duration:
+                metrics.record_cache_lookup("position_monitor_price", True)
                 return self.price_cache[symbol]
+        metrics.record_cache_lookup("position_monitor_price", False)
 
         # Obtener precio fresco
         try:
@@ -599,6 +701,11 @@ class PositionMonitor:
         self.failed_close_attempts.clear()
         logger.info("✅ Processed trades reset completed")
 
+    def _profile(self) -> ProfileSnapshot:
+        """📸 Perfil de la iteración en curso (o el publicado fuera del loop)"""
+        profile = self._cycle_profile
+        return profile if profile is not None else TradingProfiles.snapshot()
+
     def _calculate_trailing_stop(
         self, position: Dict, current_price: float
     ) -> Optional[float]:
@@ -608,9 +715,7 @@ class PositionMonitor:
             trade_type = position["trade_type"]
 
             # Configuración de trailing stop desde perfil (decimal)
-            trailing_distance = TradingProfiles.get_current_profile()[
-                "default_trailing_distance"
-            ]
+            trailing_distance = self._profile().default_trailing_distance
 
             if trade_type == "BUY":
                 # Para posiciones largas, trailing stop se mueve hacia arriba
@@ -678,6 +783,7 @@ class PositionMonitor:
                 "trailing_stops_activated", 0
             ),
             "total_realized_pnl": position_stats["total_realized_pnl"],
+            "scheduler": self.scheduler.get_status(),
         }
 
     def process_position_timeouts(self) -> Dict[str, int]:
@@ -0,0 +1,222 @@
+"""
+📸 Positions Snapshot - Vista única y versionada de las posiciones abiertas
+Un solo snapshot de /positions compartido por todos los lectores
+(TradingBot, PositionManager, PositionMonitor, API):
+
+- Un hilo en segundo plano lo refresca antes de que venza el TTL, así
+  los lectores no esperan a /positions en régimen normal. Si el hilo no
+  corre (p. ej. sólo la API), se refresca por TTL bajo demanda, con una
+  sola petición aunque haya varios hilos leyendo a la vez.
+- Si un refresco falla, todos los lectores reciben el error: nunca se
+  sirve un snapshot desactualizado como si fuera vigente.
+- Se invalida inmediatamente tras nuestras propias órdenes
+  (place_order / close_position) para no leer estado obsoleto.
+- Índices por dealId y por símbolo (epic) para búsquedas O(1).
+- Cada refresco incrementa `version`, de forma que los consumidores pueden
+  reconstruir sus estructuras derivadas sólo cuando algo cambió.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PositionsSnapshot:
+    """📸 Snapshot inmutable de las posiciones abiertas en Capital.com"""
+
+    version: int
+    fetched_at: float  # time.monotonic() del refresco
+    positions: Tuple[Dict[str, Any], ...] = ()
+    by_deal_id: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    by_symbol: Dict[str, Tuple[Dict[str, Any], ...]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, version: int, positions: List[Dict[str, Any]]) -> "PositionsSnapshot":
+        """Construir el snapshot y sus índices a partir de la respuesta de /positions"""
+        by_deal_id: Dict[str, Dict[str, Any]] = {}
+        by_symbol: Dict[str, List[Dict[str, Any]]] = {}
+        for position_data in positions:
+            position = position_data.get("position", {}) or {}
+            deal_id = position.get("dealId") or position_data.get("dealId")
+            if deal_id:
+                by_deal_id[deal_id] = position_data
+            epic = (position_data.get("market", {}) or {}).get("epic")
+            if epic:
+                by_symbol.setdefault(epic, []).append(position_data)
+
+        return cls(
+            version=version,
+            fetched_at=time.monotonic(),
+            positions=tuple(positions),
+            by_deal_id=by_deal_id,
+            by_symbol={epic: tuple(items) for epic, items in by_symbol.items()},
+        )
+
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def get(self, deal_id: str) -> Optional[Dict[str, Any]]:
+        """Posición por dealId (O(1))"""
+        return self.by_deal_id.get(deal_id)
+
+    def for_symbol(self, epic: str) -> Tuple[Dict[str, Any], ...]:
+        """Posiciones de un epic (O(1))"""
+        return self.by_symbol.get(epic, ())
+
+    def as_result(self) -> Dict[str, Any]:
+        """Respuesta compatible con CapitalClient.get_positions()"""
+        return {
+            "success": True,
+            "positions": list(self.positions),
+            "snapshot_version": self.version,
+            "snapshot_age_seconds": round(self.age_seconds(), 3),
+        }
+
+
+class PositionsCache:
+    """
+    💾 Cache single-flight del snapshot de posiciones
+
+    Args:
+        fetcher: Función que devuelve el resultado de /positions
+            ({"success": bool, "positions": [...]})
+        ttl: Segundos tras los cuales el snapshot se refresca en la próxima lectura
+        refresh_interval: Edad a partir de la cual el hilo en segundo plano
+            lo refresca (menor que `ttl`; por defecto la mitad)
+    """
+
+    def __init__(
+        self,
+        fetcher: Callable[[], Dict[str, Any]],
+        ttl: float,
+        refresh_interval: Optional[float] = None,
+    ):
+        self._fetcher = fetcher
+        self.ttl = ttl
+        self.refresh_interval = min(ttl, refresh_interval or ttl / 2)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Optional[PositionsSnapshot] = None
+        self._version = 0
+        self._dirty = True
+        self._refresh_lock = threading.Lock()
+        self.stats = {"hits": 0, "refreshes": 0, "invalidations": 0, "errors": 0}
+
+    def _is_fresh(self, snapshot: Optional[PositionsSnapshot], max_age: float) -> bool:
+        return (
+            snapshot is not None
+            and not self._dirty
+            and snapshot.age_seconds() < max_age
+        )
+
+    def get_snapshot(
+        self, force_refresh: bool = False, max_age: Optional[float] = None
+    ) -> Tuple[Optional[PositionsSnapshot], Optional[str]]:
+        """
+        📸 Obtener el snapshot vigente (refrescando si hace falta)
+
+        Args:
+            force_refresh: Ignorar el TTL y consultar /positions
+            max_age: TTL específico para esta lectura (por defecto self.ttl)
+
+        Returns:
+            (snapshot, None) o (None, error) si el refresco falla
+        """
+        max_age = self.ttl if max_age is None else max_age
+        snapshot = self._snapshot
+        if not force_refresh and self._is_fresh(snapshot, max_age):
+            self.stats["hits"] += 1
+            return snapshot, None
+
+        requested_at = time.monotonic()
+        with self._refresh_lock:
+            # Otro hilo pudo refrescar mientras esperábamos el lock
+            snapshot = self._snapshot
+            if (
+                snapshot is not None
+                and not self._dirty
+                and snapshot.fetched_at >= requested_at
+            ) or (not force_refresh and self._is_fresh(snapshot, max_age)):
+                self.stats["hits"] += 1
+                return snapshot, None
+
+            # Se marca limpio antes de la petición: una invalidación concurrente
+            # (orden propia en vuelo) vuelve a marcarlo sucio
+            self._dirty = False
+            try:
+                result = self._fetcher()
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            if not result.get("success"):
+                self._dirty = True
+                self.stats["errors"] += 1
+                error = result.get("error", "Unknown error")
+                logger.warning(f"⚠️ Positions snapshot refresh failed: {error}")
+                return None, error
+
+            self._version += 1
+            snapshot = PositionsSnapshot.build(
+                self._version, result.get("positions", []) or []
+            )
+            self._snapshot = snapshot
+            self.stats["refreshes"] += 1
+            logger.debug(
+                f"📸 Positions snapshot v{snapshot.version}: {len(snapshot.positions)} positions"
+            )
+            return snapshot, None
+
+    def _refresh_loop(self):
+        # Revisar a mitad de intervalo: la edad nunca supera 1.5x refresh_interval
+        while not self._stop_event.wait(self.refresh_interval / 2):
+            try:
+                self.get_snapshot(max_age=self.refresh_interval)
+            except Exception as e:
+                logger.error(f"❌ Error refreshing positions snapshot: {e}")
+
+    def start_background_refresh(self):
+        """🚀 Iniciar el hilo de refresco en segundo plano"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._refresh_loop, daemon=True, name="PositionsSnapshotRefresh"
+        )
+        self._thread.start()
+
+    def stop_background_refresh(self, timeout: float = 5.0):
+        """🛑 Detener el hilo de refresco"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def invalidate(self, reason: str = ""):
+        """🧹 Invalidar el snapshot (la próxima lectura consulta /positions)"""
+        self._dirty = True
+        self.stats["invalidations"] += 1
+        if reason:
+            logger.debug(f"📸 Positions snapshot invalidated: {reason}")
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del cache de posiciones"""
+        snapshot = self._snapshot
+        return {
+            "version": self._version,
+            "ttl_seconds": self.ttl,
+            "refresh_interval_seconds": self.refresh_interval,
+            "background_refresh": bool(self._thread and self._thread.is_alive()),
+            "dirty": self._dirty,
+            "positions": len(snapshot.positions) if snapshot else 0,
+            "age_seconds": round(snapshot.age_seconds(), 3) if snapshot else None,
+            **self.stats,
+        }
@@ -16,6 +16,7 @@ from dataclasses import dataclass
 # Importar el sistema existente
 from .enhanced_strategies import TradingSignal, TradingStrategy, EnhancedSignal
 from .capital_client import CapitalClient
+from .advanced_indicators import AdvancedIndicators
 try:
     from ..config.main_config import StrategyConfig, TradingBotConfig
 except ImportError:
@@ -97,6 +98,8 @@ class ProfessionalStrategyAdapter(TradingStrategy):
                     if not pd.isna(df["atr"].iloc[-1])
                     else current_price * 0.02
                 )
+                if not pd.isna(df["atr"].iloc[-1]):
+                    AdvancedIndicators.record_atr(symbol, atr)
 
                 logger.info(
                     f"📊 Indicadores calculados - RSI: {current_rsi:.1f}, EMA21: {ema_21:.2f}, EMA50: {ema_50:.2f}"
@@ -0,0 +1,431 @@
+"""
+📓 Trade Journal - Persistencia append-only del PaperTrader
+Journal line-delimited (JSONL) de fills y cambios de balance con snapshots
+compactos periódicos:
+
+- Cada evento se añade al final del journal con un número de secuencia
+  creciente (flush + fsync), nunca se reescriben líneas.
+- Cada `snapshot_every` eventos se escribe un snapshot compacto del estado
+  (portfolio, trades, trade_counter) de forma atómica (tmp + os.replace) y
+  el journal se trunca.
+- Al arrancar: snapshot + cola del journal. Los eventos con secuencia ya
+  incluida en el snapshot se ignoran y una última línea incompleta (corte
+  a mitad de escritura) se descarta.
+
+Además incluye `TradeHistoryIndex`, un índice en memoria por símbolo,
+estrategia y tiempo para paginar el historial sin copiarlo entero.
+"""
+
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = "journal.jsonl"
+SNAPSHOT_FILENAME = "snapshot.json"
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Campos datetime de trades y entradas del portfolio (se serializan en ISO 8601)
+_DATETIME_FIELDS = ("entry_time", "exit_time", "last_updated")
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _restore_datetimes(record: Optional[Dict]) -> Optional[Dict]:
+    if not record:
+        return record
+    for key in _DATETIME_FIELDS:
+        value = record.get(key)
+        if isinstance(value, str):
+            try:
+                record[key] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return record
+
+
+def trade_timestamp(trade: Dict) -> float:
+    """Epoch del trade (exit_time para cierres, entry_time para aperturas)"""
+    moment = trade.get("exit_time") or trade.get("entry_time")
+    if isinstance(moment, datetime):
+        return moment.timestamp()
+    if isinstance(moment, (int, float)):
+        return float(moment)
+    return 0.0
+
+
+class TradeJournal:
+    """
+    📓 Journal append-only + snapshots compactos de un PaperTrader
+
+    Args:
+        directory: Directorio donde se guardan journal y snapshot
+        snapshot_every: Eventos entre snapshots compactos
+        fsync: Forzar fsync en cada evento (durabilidad ante cortes)
+        lock: RLock compartido con el dueño del estado (PaperTrader), para que
+            el cambio del portfolio y su evento se apliquen bajo el mismo lock
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        snapshot_every: int = 500,
+        fsync: bool = True,
+        lock: Optional[threading.RLock] = None,
+    ):
+        self.directory = directory
+        self.snapshot_every = max(1, int(snapshot_every))
+        self.fsync = fsync
+        self.journal_path = os.path.join(directory, JOURNAL_FILENAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILENAME)
+
+        self._lock = lock if lock is not None else threading.RLock()
+        self._file = None
+        self._seq = 0
+        self._events_since_snapshot = 0
+        self.stats = {"events_written": 0, "snapshots_written": 0, "replayed_events": 0}
+
+        os.makedirs(directory, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        📂 Reconstruir el estado desde snapshot + cola del journal
+
+        Returns:
+            Dict con portfolio, trades, trade_counter e initial_balance,
+            o None si no hay nada persistido
+        """
+        state = None
+        snapshot_seq = 0
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                snapshot_seq = int(snapshot.get("seq", 0))
+                state = {
+                    "portfolio": {
+                        symbol: _restore_datetimes(entry)
+                        for symbol, entry in snapshot.get("portfolio", {}).items()
+                    },
+                    "trades": [_restore_datetimes(t) for t in snapshot.get("trades", [])],
+                    "trade_counter": int(snapshot.get("trade_counter", 1)),
+                    "initial_balance": snapshot.get("initial_balance"),
+                }
+            except Exception as e:
+                logger.error(f"❌ Error loading journal snapshot {self.snapshot_path}: {e}")
+
+        self._seq = snapshot_seq
+        replayed = 0
+        valid_bytes = 0
+        truncated_tail = False
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        truncated_tail = True  # Escritura interrumpida
+                        break
+                    try:
+                        event = json.loads(raw_line)
+                    except ValueError:
+                        truncated_tail = True
+                        break
+                    valid_bytes += len(raw_line)
+                    seq = int(event.get("seq", 0))
+                    if seq <= snapshot_seq:
+                        continue  # Ya incluido en el snapshot
+                    if state is None:
+                        state = {
+                            "portfolio": {},
+                            "trades": [],
+                            "trade_counter": 1,
+                            "initial_balance": None,
+                        }
+                    self._apply(state, event)
+                    self._seq = max(self._seq, seq)
+                    replayed += 1
+
+            if truncated_tail:
+                logger.warning(
+                    f"⚠️ Discarding incomplete tail of trade journal at byte {valid_bytes}"
+                )
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid_bytes)
+
+        self._events_since_snapshot = replayed
+        self.stats["replayed_events"] = replayed
+        return state
+
+    @staticmethod
+    def _apply(state: Dict[str, Any], event: Dict[str, Any]):
+        event_type = event.get("type")
+        if event_type == "reset":
+            state["portfolio"] = {
+                symbol: _restore_datetimes(entry)
+                for symbol, entry in (event.get("portfolio") or {}).items()
+            }
+            state["trades"] = []
+            state["trade_counter"] = 1
+            state["initial_balance"] = event.get("initial_balance")
+            return
+
+        if event.get("initial_balance") is not None:
+            state["initial_balance"] = event["initial_balance"]
+
+        trade = event.get("trade")
+        if trade:
+            trade = _restore_datetimes(trade)
+            state["trades"].append(trade)
+            state["trade_counter"] = max(state["trade_counter"], int(trade.get("id", 0)) + 1)
+
+        for symbol, entry in (event.get("changes") or {}).items():
+            if entry is None:
+                state["portfolio"].pop(symbol, None)
+            else:
+                state["portfolio"][symbol] = _restore_datetimes(entry)
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _write(self, event: Dict[str, Any]):
+        with self._lock:
+            self._seq += 1
+            event["seq"] = self._seq
+            line = json.dumps(event, default=_json_default, separators=(",", ":")) + "\n"
+            if self._file is None:
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._events_since_snapshot += 1
+            self.stats["events_written"] += 1
+
+    def append_fill(self, trade: Dict, changes: Dict[str, Optional[Dict]]):
+        """
+        📝 Registrar un fill y el estado resultante de las entradas afectadas
+
+        Args:
+            trade: Registro del trade
+            changes: symbol -> entrada del portfolio tras el fill (None = eliminada)
+        """
+        self._write({"type": "fill", "trade": trade, "changes": changes})
+
+    def append_balance(
+        self,
+        changes: Dict[str, Optional[Dict]],
+        reason: str = "",
+        initial_balance: Optional[float] = None,
+    ):
+        """
+        💵 Registrar un cambio de balance sin trade asociado
+
+        Args:
+            changes: symbol -> entrada del portfolio tras el cambio
+            reason: Origen del cambio (p.ej. "broker_sync")
+            initial_balance: Nuevo balance inicial, si también cambió
+        """
+        event = {"type": "balance", "reason": reason, "changes": changes}
+        if initial_balance is not None:
+            event["initial_balance"] = initial_balance
+        self._write(event)
+
+    def append_reset(self, portfolio: Dict[str, Dict], initial_balance: float):
+        """🔄 Registrar un reset completo del portfolio"""
+        self._write(
+            {"type": "reset", "portfolio": portfolio, "initial_balance": initial_balance}
+        )
+
+    @property
+    def needs_snapshot(self) -> bool:
+        return self._events_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(
+        self,
+        portfolio: Dict[str, Dict],
+        trades: List[Dict],
+        trade_counter: int,
+        initial_balance: float,
+    ):
+        """
+        📸 Escribir un snapshot compacto (atómico) y truncar el journal
+
+        Si el proceso cae entre el reemplazo del snapshot y el truncado, los
+        eventos que quedan en el journal se ignoran en el replay por su `seq`.
+        """
+        with self._lock:
+            snapshot = {
+                "format": SNAPSHOT_FORMAT_VERSION,
+                "seq": self._seq,
+                "written_at": datetime.now().isoformat(),
+                "initial_balance": initial_balance,
+                "trade_counter": trade_counter,
+                "portfolio": portfolio,
+                "trades": trades,
+            }
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, default=_json_default, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.journal_path, "w", encoding="utf-8"):
+                pass  # Truncar: todo lo anterior está en el snapshot
+
+            self._events_since_snapshot = 0
+            self.stats["snapshots_written"] += 1
+        logger.debug(f"📸 Trade journal snapshot written at seq {snapshot['seq']}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del journal"""
+        return {
+            "directory": self.directory,
+            "seq": self._seq,
+            "events_since_snapshot": self._events_since_snapshot,
+            "snapshot_every": self.snapshot_every,
+            **self.stats,
+        }
+
+
+class TradeHistoryIndex:
+    """
+    🗂️ Índice del historial de trades por símbolo, estrategia y tiempo
+
+    Guarda sólo posiciones dentro de la lista de trades del PaperTrader
+    (listas paralelas ordenadas por timestamp), de modo que una consulta
+    paginada hace bisect sobre el rango de tiempo y sólo materializa la
+    página pedida.
+    """
+
+    def __init__(self):
+        # clave -> (timestamps ordenados, posiciones en la lista de trades)
+        self._series: Dict[Tuple[str, Any], Tuple[List[float], List[int]]] = {}
+
+    def clear(self):
+        self._series = {}
+
+    def _insert(self, key: Tuple[str, Any], ts: float, position: int):
+        times, positions = self._series.setdefault(key, ([], []))
+        if not times or ts >= times[-1]:
+            times.append(ts)
+            positions.append(position)
+            return
+        i = bisect_right(times, ts)
+        times.insert(i, ts)
+        positions.insert(i, position)
+
+    def add(self, position: int, trade: Dict):
+        """➕ Indexar el trade en la posición `position` de la lista de trades"""
+        ts = trade_timestamp(trade)
+        self._insert(("all", None), ts, position)
+        self._insert(("symbol", trade.get("symbol")), ts, position)
+        strategy = trade.get("strategy")
+        if strategy:
+            self._insert(("strategy", strategy), ts, position)
+
+    def rebuild(self, trades: List[Dict]):
+        """🧱 Reconstruir el índice completo (tras replay o reset)"""
+        self.clear()
+        for position, trade in enumerate(trades):
+            self.add(position, trade)
+
+    def _range(
+        self, key: Tuple[str, Any], start: Optional[float], end: Optional[float]
+    ) -> Tuple[List[int], int, int]:
+        times, positions = self._series.get(key, ([], []))
+        lo = bisect_left(times, start) if start is not None else 0
+        hi = bisect_right(times, end) if end is not None else len(times)
+        return positions, lo, hi
+
+    def query(
+        self,
+        trades: List[Dict],
+        symbol: Optional[str] = None,
+        strategy: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> Tuple[List[Dict], int]:
+        """
+        🔎 Página del historial que cumple los filtros
+
+        Args:
+            trades: Lista de trades indexada
+            symbol / strategy: Filtros opcionales
+            start / end: Rango de tiempo (epoch, inclusivo)
+            offset / limit: Paginación
+            newest_first: Orden descendente por tiempo
+
+        Returns:
+            (trades de la página, total de trades que cumplen los filtros)
+        """
+        # Serie base: la más selectiva disponible; el otro filtro se aplica al recorrer
+        if symbol is not None and strategy is not None:
+            symbol_len = len(self._series.get(("symbol", symbol), ((), ()))[0])
+            strategy_len = len(self._series.get(("strategy", strategy), ((), ()))[0])
+            if symbol_len <= strategy_len:
+                key, residual = ("symbol", symbol), ("strategy", strategy)
+            else:
+                key, residual = ("strategy", strategy), ("symbol", symbol)
+        elif symbol is not None:
+            key, residual = ("symbol", symbol), None
+        elif strategy is not None:
+            key, residual = ("strategy", strategy), None
+        else:
+            key, residual = ("all", None), None
+
+        positions, lo, hi = self._range(key, start, end)
+        offset = max(0, int(offset))
+
+        if residual is None:
+            total = hi - lo
+            if newest_first:
+                stop = hi - offset
+                begin = stop - limit if limit is not None else lo
+                page_positions = positions[max(lo, begin) : max(lo, stop)][::-1]
+            else:
+                begin = lo + offset
+                stop = begin + limit if limit is not None else hi
+                page_positions = positions[begin : min(hi, stop)]
+            return [trades[p] for p in page_positions], total
+
+        field, value = residual
+        indices = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+        page: List[Dict] = []
+        total = 0
+        for i in indices:
+            trade = trades[positions[i]]
+            if trade.get(field) != value:
+                continue
+            if total >= offset and (limit is None or len(page) < limit):
+                page.append(trade)
+            total += 1
+        return page, total
+
@@ -9,7 +9,7 @@ import os
 import schedule
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, Hashable, List, Optional, Any
 from dataclasses import dataclass
 import threading
 import json
@@ -23,9 +23,12 @@ import weakref
 from src.config.main_config import (
     TradingBotConfig,
     TradingProfiles,
+    ProfileSnapshot,
     RiskManagerConfig,
     APIConfig,
     CacheConfig,
+    PaperTraderConfig,
+    LiveTradingConfig,
     GLOBAL_SYMBOLS,
 )
 from src.config.time_trading_config import (
@@ -44,17 +47,21 @@ try:
 except Exception:
     ZoneInfo = None
 from .enhanced_strategies import TradingSignal
-from .professional_adapter import ProfessionalStrategyAdapter
-from .mean_reversion_adapter import MeanReversionAdapter
-from .breakout_adapter import BreakoutAdapter
-from .consensus_adapter import ConsensusAdapter
+from .advanced_indicators import AdvancedIndicators
 from .paper_trader import PaperTrader, TradeResult
 from .enhanced_risk_manager import EnhancedRiskManager, EnhancedRiskAssessment
 from .position_monitor import PositionMonitor
 
-from .capital_client import CapitalClient, create_capital_client_from_env
+from .capital_client import CapitalClient, get_shared_capital_client
+from .order_templates import OrderTemplateBook
+from .decision_log import DecisionLog
 from src.utils.market_hours import market_hours_checker
+from src.utils.async_logging import AUDIT
+from src.utils.shared_cache import get_shared_cache
 from src.utils.signal_quality import summarize_quality
+from src.utils import metrics
+from src.utils.profiler import sampling_profiler
+from src.utils.event_stream import event_stream
 
 # Indicadores técnicos para filtros adicionales
 try:
@@ -84,6 +91,12 @@ logging.getLogger('src.core.trading_bot').setLevel(logging.INFO)
 logging.getLogger('src.core.balance_manager').setLevel(logging.INFO)
 logging.getLogger('src.core.capital_client').setLevel(logging.INFO)
 
+# Balance usado hasta que Capital.com responde (o si no responde)
+DEFAULT_BALANCE = 1000.0
+
+# Tareas de inicialización en segundo plano, en orden de ejecución
+BACKGROUND_INIT_TASKS = ("account_sync", "strategy_warmup")
+
 
 @dataclass
 class BotStatus:
@@ -103,6 +116,34 @@ class BotStatus:
     next_analysis_time: datetime
 
 
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """
+    📸 Snapshot inmutable de estado y reporte del bot
+
+    Se publica tras cada ciclo de análisis y cada tick del monitor; la API lo
+    sirve sin hacer I/O contra Capital.com. Los dicts son copias desacopladas
+    (serializadas a JSON y vueltas a cargar) y no deben mutarse.
+    """
+
+    version: int
+    etag: str
+    generated_at: datetime
+    reason: str
+    bot_status: Dict[str, Any]
+    detailed_report: Dict[str, Any]
+
+    def age_seconds(self) -> float:
+        """Segundos transcurridos desde la publicación"""
+        return (datetime.now(UTC_TZ) - self.generated_at).total_seconds()
+
+    def is_stale(self, max_age_seconds: float = None) -> bool:
+        """True si el snapshot supera la antigüedad máxima configurada"""
+        if max_age_seconds is None:
+            max_age_seconds = CacheConfig.SNAPSHOT_STALE_AFTER
+        return self.age_seconds() > max_age_seconds
+
+
 class TradingBot:
     """
     🤖 Trading Bot Principal con optimizaciones de rendimiento
@@ -118,21 +159,17 @@ class TradingBot:
     - Procesamiento paralelo de estrategias
     """
 
-    # Cache compartido entre instancias
-    _cache = {}
-    _cache_timestamps = {}
-
-    # Cache TTL se obtiene de la configuración del perfil
-    @classmethod
-    def _get_cache_ttl(cls):
-        return CacheConfig.get_ttl_for_operation("price_data")
+    # Cache compartido entre instancias (LRU thread-safe; TTL y límites en CacheConfig)
+    _cache = get_shared_cache("trading_bot")
 
-    def __init__(self, analysis_interval_minutes: int = None):
+    def __init__(self, analysis_interval_minutes: int = None, deferred_init: bool = False):
         """
         Inicializar Trading Bot Profesional
 
         Args:
             analysis_interval_minutes: Intervalo entre análisis (usa configuración centralizada si no se especifica)
+            deferred_init: Construir sin I/O de red; la sincronización de cuenta y
+                el warm-up de estrategias corren luego con start_background_init()
         """
         # Configuración centralizada del bot
         self.config = TradingBotConfig()
@@ -148,21 +185,41 @@ class TradingBot:
         # Configurar logger PRIMERO
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
+        # Inicialización en segundo plano (sincronización de cuenta + warm-up)
+        self.deferred_init = deferred_init
+        self._readiness = {
+            name: {"state": "pending", "started_at": None, "elapsed_ms": None, "error": None}
+            for name in BACKGROUND_INIT_TASKS
+        }
+        self._readiness_lock = threading.Lock()
+        self._ready_event = threading.Event()
+        self._background_init_thread: Optional[threading.Thread] = None
+
         # Cliente de Capital.com
         self.capital_client = None
-        self._initialize_capital_client()
+        if deferred_init:
+            # Construcción pura en memoria: el broker se sincroniza en segundo plano
+            real_balance = DEFAULT_BALANCE
+            initial_positions = {}
+        else:
+            self._initialize_capital_client()
 
-        # Obtener balance real para sincronizar con paper trader
-        real_balance = self._get_real_balance()
+            # Obtener balance real para sincronizar con paper trader
+            real_balance = self._get_real_balance()
 
-        # Obtener posiciones existentes de Capital.com para sincronizar
-        initial_positions = self._get_capital_positions_for_sync()
+            # Obtener posiciones existentes de Capital.com para sincronizar
+            initial_positions = self._get_capital_positions_for_sync()
 
         # Componentes principales
         self.paper_trader = PaperTrader(
             initial_balance=real_balance,
             initial_positions=initial_positions,
             capital_client=self.capital_client,
+            journal_dir=(
+                PaperTraderConfig.JOURNAL_DIR
+                if PaperTraderConfig.JOURNAL_ENABLED
+                else None
+            ),
         )
         self.risk_manager = EnhancedRiskManager(capital_client=self.capital_client)
 
@@ -171,6 +228,7 @@ class TradingBot:
             price_fetcher=self._get_current_price,
             paper_trader=self.paper_trader,
             capital_client=self.capital_client,
+            tick_callback=self._on_monitor_tick,
         )
 
         # Sistema de eventos para comunicación con LiveTradingBot
@@ -188,7 +246,9 @@ class TradingBot:
 
         # Estrategias disponibles (Enhanced)
         self.strategies = {}
-        self._initialize_strategies()
+        self.individual_strategies = {}
+        if not deferred_init:
+            self._initialize_strategies()
 
         # Símbolos a analizar - usar configuración centralizada
         self.symbols = GLOBAL_SYMBOLS.copy()
@@ -204,8 +264,25 @@ class TradingBot:
             os.getenv("ENABLE_REAL_TRADING", "false").lower() == "true"
         )
 
+        # Plantillas de orden pre-validadas para el fast path de trading real
+        self.order_templates = (
+            self._create_order_templates(self.capital_client)
+            if self.capital_client is not None
+            else None
+        )
+
         # Previews de órdenes calculadas (para pruebas sin enviar a Capital.com)
         self.order_previews: List[Dict[str, Any]] = []
+
+        # Decision log columnar: una fila por señal procesada (escritura en segundo plano)
+        self.decision_log = DecisionLog(
+            directory=self.config.DECISION_LOG_DIR,
+            segment_records=self.config.DECISION_LOG_SEGMENT_RECORDS,
+            flush_interval=self.config.DECISION_LOG_FLUSH_INTERVAL,
+            retention_days=self.config.DECISION_LOG_RETENTION_DAYS,
+            max_bytes=self.config.DECISION_LOG_MAX_MB * 1024 * 1024,
+            enabled=self.config.DECISION_LOG_ENABLED,
+        )
         self.real_trading_size_multiplier = float(
             os.getenv("REAL_TRADING_SIZE_MULTIPLIER", "0.1")
         )  # 10% del tamaño de paper trading por defecto
@@ -290,10 +367,26 @@ class TradingBot:
         self.analysis_thread = None
         self.stop_event = threading.Event()
 
+        # Snapshot publicado de estado/reporte (servido por la API sin I/O)
+        self._status_snapshot: Optional[StatusSnapshot] = None
+        self._snapshot_version = 0
+        self._snapshot_build_lock = threading.Lock()
+        self._last_snapshot_publish = 0.0
+        self._snapshot_scheduled = False  # snapshot del monitor encolado en el executor
+
         self.logger.info(
             "🤖 Trading Bot initialized with Position Monitor and Trade Cooldown System"
         )
 
+        if not deferred_init:
+            # Todo se sincronizó en el constructor
+            for task in self._readiness.values():
+                task["state"] = "ready"
+            self._ready_event.set()
+
+        # Primer snapshot para que el dashboard tenga datos desde el arranque
+        self.publish_status_snapshot(reason="init")
+
     # ==========================
     # Helpers de datos/indicadores
     # ==========================
@@ -383,7 +476,7 @@ class TradingBot:
         except Exception:
             return None
 
-    def _calculate_chop_metrics(self, df: Any, ema_window: int = 20) -> Dict[str, float]:
+    def _calculate_chop_metrics(self, df: Any, ema_window: int = 20, symbol: Optional[str] = None) -> Dict[str, float]:
         """Calcular métricas anti-chop: ADX, ATR normalizado y pendiente EMA.
 
         Retorna ratios normalizados respecto al precio: `atr_ratio` y `ema_slope_ratio`.
@@ -415,6 +508,8 @@ class TradingBot:
                 try:
                     atr_series = AverageTrueRange(high=high, low=low, close=close, window=14).average_true_range()
                     current_atr = float(atr_series.iloc[-1])
+                    if symbol:
+                        AdvancedIndicators.record_atr(symbol, current_atr)
                     atr_ratio = current_atr / current_price if current_price > 0 else 0.0
                     atr_pct = atr_ratio * 100.0
                 except Exception:
@@ -491,14 +586,128 @@ class TradingBot:
     def _initialize_capital_client(self):
         """🔌 Inicializar cliente de Capital.com"""
         try:
-            self.capital_client = create_capital_client_from_env()
-            # Crear sesión automáticamente
-            self.capital_client.create_session()
+            # Cliente compartido del proceso (reutiliza la sesión si ya existe)
+            self.capital_client = get_shared_capital_client("trading_bot")
             self.logger.info("✅ Capital.com client initialized successfully")
         except Exception as e:
             self.logger.error(f"❌ Failed to initialize Capital.com client: {e}")
             self.capital_client = None
 
+    def _create_order_templates(self, capital_client) -> OrderTemplateBook:
+        """⚡ Crear el libro de plantillas de orden sobre el cliente dado"""
+        return OrderTemplateBook(
+            capital_client,
+            refresh_interval=LiveTradingConfig.ORDER_TEMPLATE_REFRESH_INTERVAL,
+            quote_max_age=LiveTradingConfig.ORDER_TEMPLATE_QUOTE_MAX_AGE,
+        )
+
+    def _attach_capital_client(self, capital_client):
+        """🔌 Conectar un cliente obtenido tras la construcción a todos los componentes"""
+        self.capital_client = capital_client
+        self.risk_manager.capital_client = capital_client
+        self.position_monitor.capital_client = capital_client
+        position_manager = self.position_monitor.position_manager
+        position_manager.capital_client = capital_client
+        position_manager.trailing_engine.capital_client = capital_client
+        if self.order_templates is None:
+            self.order_templates = self._create_order_templates(capital_client)
+
+    # ==========================
+    # Inicialización en segundo plano
+    # ==========================
+
+    def _run_init_task(self, name: str, func) -> bool:
+        """⏱️ Ejecutar una tarea de inicialización registrando estado y tiempos"""
+        with self._readiness_lock:
+            self._readiness[name].update(
+                state="running",
+                started_at=datetime.now(UTC_TZ).isoformat(),
+                error=None,
+            )
+        started = time.perf_counter()
+        try:
+            func()
+            state, error = "ready", None
+        except Exception as e:
+            state, error = "failed", str(e)
+            self.logger.error(f"❌ Background init task '{name}' failed: {e}")
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        with self._readiness_lock:
+            self._readiness[name].update(state=state, elapsed_ms=elapsed_ms, error=error)
+        self.logger.info(f"⏱️ Background init task '{name}': {state} in {elapsed_ms:.0f}ms")
+        return state == "ready"
+
+    def _sync_account(self):
+        """🔄 Conectar a Capital.com y sincronizar balance y posiciones"""
+        self._initialize_capital_client()
+        if self.capital_client is None:
+            raise RuntimeError("Capital.com client not available")
+        self._attach_capital_client(self.capital_client)
+        real_balance = self._get_real_balance()
+        initial_positions = self._get_capital_positions_for_sync()
+        self.paper_trader.sync_with_broker(
+            real_balance, initial_positions, self.capital_client
+        )
+
+    def _warm_up_strategies(self):
+        """🧠 Construir las estrategias (tras la cuenta, para usar su cliente)"""
+        self._initialize_strategies()
+        if not self.strategies:
+            raise RuntimeError("No strategies initialized")
+
+    def _background_init(self):
+        self._run_init_task("account_sync", self._sync_account)
+        self._run_init_task("strategy_warmup", self._warm_up_strategies)
+        self._ready_event.set()
+        self.publish_status_snapshot(reason="ready")
+
+    def start_background_init(self):
+        """
+        🚀 Lanzar la sincronización de cuenta y el warm-up en segundo plano
+
+        Si una inicialización anterior terminó con tareas fallidas, se reintenta.
+        """
+        if self._background_init_thread and self._background_init_thread.is_alive():
+            return
+        if self._ready_event.is_set():
+            if self.is_ready:
+                return
+            self._ready_event.clear()
+        self._background_init_thread = threading.Thread(
+            target=self._background_init, daemon=True, name="TradingBotInit"
+        )
+        self._background_init_thread.start()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """⏳ Esperar a que termine la inicialización en segundo plano"""
+        if not self._ready_event.is_set():
+            self.start_background_init()
+        return self._ready_event.wait(timeout)
+
+    @property
+    def is_ready(self) -> bool:
+        with self._readiness_lock:
+            return all(task["state"] == "ready" for task in self._readiness.values())
+
+    def _failed_init_tasks(self) -> Dict[str, Optional[str]]:
+        with self._readiness_lock:
+            return {
+                name: task["error"]
+                for name, task in self._readiness.items()
+                if task["state"] == "failed"
+            }
+
+    def get_readiness(self) -> Dict[str, Any]:
+        """📋 Estado de las tareas de inicialización (para /health)"""
+        with self._readiness_lock:
+            tasks = {name: dict(task) for name, task in self._readiness.items()}
+        return {
+            "ready": all(task["state"] == "ready" for task in tasks.values()),
+            "initialized": self._ready_event.is_set(),
+            "deferred_init": self.deferred_init,
+            "tasks": tasks,
+        }
+
     def _get_real_balance(self) -> float:
         """💰 Obtener balance real de Capital.com"""
         try:
@@ -547,9 +756,8 @@ class TradingBot:
             self.logger.debug(f"🔍 Traceback completo: {traceback.format_exc()}")
 
         # Fallback: usar balance por defecto de configuración
-        default_balance = 1000.0  # Balance por defecto
-        self.logger.info(f"💰 Usando balance por defecto: ${default_balance:.2f}")
-        return default_balance
+        self.logger.info(f"💰 Usando balance por defecto: ${DEFAULT_BALANCE:.2f}")
+        return DEFAULT_BALANCE
 
     def _get_capital_positions_for_sync(self) -> Dict:
         """
@@ -563,7 +771,7 @@ class TradingBot:
                 self.logger.info("ℹ️ Capital client not available, no positions to sync")
                 return {}
 
-            positions_result = self.capital_client.get_positions()
+            positions_result = self.capital_client.get_cached_positions()
             if not positions_result.get("success"):
                 self.logger.warning(
                     f"⚠️ Failed to get positions: {positions_result.get('error')}"
@@ -666,6 +874,13 @@ class TradingBot:
     def _initialize_strategies(self):
         """🔧 Inicializar estrategias de trading"""
         try:
+            # Los módulos de estrategias (talib, consenso...) se cargan aquí, al
+            # primer uso, y no al importar el bot
+            from .professional_adapter import ProfessionalStrategyAdapter
+            from .mean_reversion_adapter import MeanReversionAdapter
+            from .breakout_adapter import BreakoutAdapter
+            from .consensus_adapter import ConsensusAdapter
+
             # Estrategia de consenso como estrategia principal
             self.strategies = {
                 "ConsensusStrategy": ConsensusAdapter(self.capital_client),
@@ -699,48 +914,29 @@ class TradingBot:
             self.individual_strategies = {}
 
     @classmethod
-    def _get_cache_key(cls, method_name: str, *args, **kwargs) -> str:
+    def _get_cache_key(cls, method_name: str, *args, **kwargs) -> Hashable:
         """Generar clave de cache única para método y parámetros"""
+        key = (method_name, args, tuple(sorted(kwargs.items())))
         try:
-            key_data = f"{method_name}_{str(args)}_{str(sorted(kwargs.items()))}"
-            return hashlib.md5(key_data.encode()).hexdigest()
-        except Exception:
-            return f"{method_name}_{time.time()}"
+            hash(key)
+            return key
+        except TypeError:
+            return f"{method_name}_{args}_{sorted(kwargs.items())}"
 
     @classmethod
-    def _get_from_cache(cls, cache_key: str):
+    def _get_from_cache(cls, cache_key: Hashable):
         """Obtener valor del cache si es válido"""
-        current_time = time.time()
-        if (
-            cache_key in cls._cache
-            and cache_key in cls._cache_timestamps
-            and current_time - cls._cache_timestamps[cache_key] < cls._get_cache_ttl()
-        ):
-            return cls._cache[cache_key]
-        return None
+        return cls._cache.get(cache_key)
 
     @classmethod
-    def _store_in_cache(cls, cache_key: str, value):
-        """Almacenar valor en cache con timestamp"""
-        cls._cache[cache_key] = value
-        cls._cache_timestamps[cache_key] = time.time()
-
-        # Limpiar cache viejo si es necesario
-        if len(cls._cache) > 500:  # Límite de entradas
-            cls._cleanup_cache()
+    def _store_in_cache(cls, cache_key: Hashable, value):
+        """Almacenar valor en cache (LRU acotado por entradas y bytes)"""
+        cls._cache.set(cache_key, value)
 
     @classmethod
     def _cleanup_cache(cls):
         """Limpiar entradas viejas del cache"""
-        current_time = time.time()
-        expired_keys = [
-            key
-            for key, timestamp in cls._cache_timestamps.items()
-            if current_time - timestamp >= cls._get_cache_ttl()
-        ]
-        for key in expired_keys:
-            cls._cache.pop(key, None)
-            cls._cache_timestamps.pop(key, None)
+        cls._cache.purge_expired()
 
     def start(self):
         """
@@ -750,6 +946,22 @@ class TradingBot:
             self.logger.warning("⚠️ Bot is already running")
             return
 
+        if not self.is_ready:
+            if self._ready_event.is_set():
+                # La inicialización anterior falló: reintentarla antes de arrancar
+                self.start_background_init()
+            self.logger.info("⏳ Waiting for background initialization before starting...")
+            if not self.wait_until_ready(timeout=self.config.BACKGROUND_INIT_TIMEOUT):
+                self.logger.error(
+                    f"❌ Background initialization not finished after {self.config.BACKGROUND_INIT_TIMEOUT}s; bot not started"
+                )
+                return
+            failed = self._failed_init_tasks()
+            if failed:
+                # Sin cuenta sincronizada se operaría con el balance por defecto y sin cliente
+                self.logger.error(f"❌ Background initialization failed {failed}; bot not started")
+                return
+
         self.is_running = True
         self.start_time = datetime.now(UTC_TZ)
         self.stop_event.clear()
@@ -761,7 +973,9 @@ class TradingBot:
 
         # Configurar schedule para análisis periódico
         schedule.clear()
-        schedule.every(self.analysis_interval).minutes.do(self._run_analysis_cycle)
+        schedule.every(self.analysis_interval).minutes.do(self._run_analysis_cycle).tag(
+            "analysis"
+        )
 
         # Programar reset diario exacto a la hora configurada en UTC
         try:
@@ -798,6 +1012,24 @@ class TradingBot:
         except Exception as e:
             self.logger.warning(f"⚠️ Could not schedule pre-reset profit taking: {e}")
 
+        # Precargar metadatos de instrumentos y mantenerlos frescos en segundo plano
+        if self.capital_client is not None:
+            try:
+                cache = self.capital_client.instrument_cache
+                cache.warm(self._normalize_symbol_for_capital(symbol) for symbol in self.symbols)
+                cache.start_background_refresh()
+            except Exception as e:
+                self.logger.warning(f"⚠️ Could not warm instrument metadata cache: {e}")
+            self.capital_client.positions_cache.start_background_refresh()
+
+        self.decision_log.start()
+
+        if self.enable_real_trading and self.order_templates is not None:
+            self.order_templates.set_epics(
+                self._normalize_symbol_for_capital(symbol) for symbol in self.symbols
+            )
+            self.order_templates.start()
+
         # Iniciar thread de ejecución (sin análisis inicial inmediato)
         self.analysis_thread = threading.Thread(target=self._run_scheduler, daemon=True)
         self.analysis_thread.start()
@@ -856,6 +1088,13 @@ class TradingBot:
         else:
             self.logger.info("🔍 Position monitoring was disabled")
 
+        if self.capital_client is not None:
+            self.capital_client.instrument_cache.stop_background_refresh()
+            self.capital_client.positions_cache.stop_background_refresh()
+        if self.order_templates is not None:
+            self.order_templates.stop()
+        self.decision_log.stop()
+
         # Limpiar ThreadPoolExecutor
         if hasattr(self, "executor") and self.executor:
             profile_config = TradingProfiles.get_current_profile()
@@ -1076,25 +1315,28 @@ class TradingBot:
 
         try:
             capital_symbol = self._normalize_symbol_for_capital(signal.symbol)
-            current_price = self._get_current_price(signal.symbol)
 
-            # Precios lado y spread
+            # Precios lado, spread y dealing rules desde la plantilla de orden y
+            # el cache de instrumentos (sin peticiones a Capital.com)
             bid = None
             offer = None
             spread = None
-            if self.capital_client:
-                md = self.capital_client.get_market_data([capital_symbol])
-                if md and capital_symbol in md:
-                    bid = md[capital_symbol].get("bid")
-                    offer = md[capital_symbol].get("offer")
-                    if bid is not None and offer is not None and offer > bid:
-                        spread = offer - bid
+            dr = {"success": False}
+            if self.order_templates is not None:
+                bid, offer, dr = self.order_templates.cached_inputs(capital_symbol)
+                dr = dr or {"success": False}
+            if bid is not None and offer is not None and offer > bid:
+                spread = offer - bid
             preview["bid"] = bid
             preview["offer"] = offer
             preview["spread"] = spread
+            current_price = (
+                (bid + offer) / 2.0
+                if spread is not None
+                else float(preview["entry_price"] or 0.0)
+            )
 
             # Dealing rules
-            dr = self.capital_client.get_dealing_rules(capital_symbol) if self.capital_client else {"success": False}
             if dr.get("success"):
                 preview["dealing_rules"] = {
                     "minStopOrProfitDistance": dr.get("min_stop_distance", {}),
@@ -1107,8 +1349,7 @@ class TradingBot:
             take_profit = None
             risk_reward = None
             try:
-                current_profile_config = TradingProfiles.get_current_profile()
-                current_profile = current_profile_config.get("name", "")
+                current_profile = self._profile().name
                 # Usar ROI-based para perfiles que lo soportan
                 if current_profile in ["Scalping", "Intraday"]:
                     from .trend_following_professional import TrendFollowingProfessional
@@ -1515,19 +1756,15 @@ class TradingBot:
             bool: True si se puede abrir nueva posición, False si se alcanzó el límite
         """
         try:
-            # Obtener configuración actual
-            current_profile = TradingProfiles.get_current_profile()
-            max_positions = current_profile.get(
-                "max_positions", 8
-            )  # Default 8 si no está configurado
-            max_positions_per_symbol = current_profile.get(
-                "max_positions_per_symbol", None
-            )
+            # Obtener configuración del perfil del ciclo
+            current_profile = self._profile()
+            max_positions = current_profile.max_positions  # Default 8 si no está configurado
+            max_positions_per_symbol = current_profile.max_positions_per_symbol
 
             # Contar posiciones abiertas usando Capital.com
             if self.capital_client and self.enable_real_trading:
                 # Usar endpoint /positions de Capital.com para trading real
-                positions_result = self.capital_client.get_positions()
+                positions_result = self.capital_client.get_cached_positions()
 
                 if positions_result.get("success"):
                     open_positions = positions_result.get("positions", [])
@@ -1652,12 +1889,10 @@ class TradingBot:
         """
         try:
             # Obtener configuración de cooldown del perfil actual
-            current_profile = TradingProfiles.get_current_profile()
-            min_time_between_trades = current_profile.get(
-                "min_time_between_trades_minutes", 0
-            )
-            min_time_between_opposite_signals = current_profile.get(
-                "min_time_between_opposite_signals_minutes", 0
+            current_profile = self._profile()
+            min_time_between_trades = current_profile.min_time_between_trades_minutes
+            min_time_between_opposite_signals = (
+                current_profile.min_time_between_opposite_signals_minutes
             )
 
             symbol = signal.symbol
@@ -1805,12 +2040,12 @@ class TradingBot:
         - Opuesto fuerte: requerir `strength` fuerte o alta confianza.
         """
         try:
-            cfg = TradingProfiles.get_current_profile()
-            min_hold = int(cfg.get("antiflip_min_hold_minutes", 0))
-            exit_cd = int(cfg.get("antiflip_cooldown_after_exit_minutes", 0))
-            persist_n = int(cfg.get("antiflip_opposite_persistence_count", 0))
-            hyst_mult = float(cfg.get("antiflip_hysteresis_multiplier", 1.0))
-            strong_required = bool(cfg.get("antiflip_require_strong_opposite", False))
+            cfg = self._profile()
+            min_hold = cfg.antiflip_min_hold_minutes
+            exit_cd = cfg.antiflip_cooldown_after_exit_minutes
+            persist_n = cfg.antiflip_opposite_persistence_count
+            hyst_mult = cfg.antiflip_hysteresis_multiplier
+            strong_required = cfg.antiflip_require_strong_opposite
 
             symbol = signal.symbol
             signal_type = signal.signal_type
@@ -1912,14 +2147,10 @@ class TradingBot:
                 )
 
             # Mostrar estado específico de los símbolos que estamos monitoreando
-            tradeable_symbols = []
-            non_tradeable_symbols = []
-
-            for symbol in self.symbols:
-                if market_hours_checker.should_trade(symbol)[0]:
-                    tradeable_symbols.append(symbol)
-                else:
-                    non_tradeable_symbols.append(symbol)
+            tradeable_symbols = market_hours_checker.calendar.tradable_symbols(self.symbols)
+            non_tradeable_symbols = [
+                symbol for symbol in self.symbols if symbol not in tradeable_symbols
+            ]
 
             if tradeable_symbols:
                 self.logger.info(
@@ -1946,10 +2177,26 @@ class TradingBot:
                 self.logger.error(f"❌ Error in scheduler: {e}")
                 time.sleep(APIConfig.ERROR_RECOVERY_SLEEP)
 
+    def _profile(self) -> ProfileSnapshot:
+        """📸 Perfil fijado para el ciclo en curso (o el publicado fuera de un ciclo)"""
+        return TradingProfiles.snapshot()
+
     def _run_analysis_cycle(self):
         """
         🔄 Ejecutar un ciclo completo de análisis con cache y procesamiento paralelo
+
+        El perfil se captura una vez al inicio y se fija en el hilo del ciclo:
+        todas las comprobaciones usan la misma versión aunque /bot/profile
+        publique otra a mitad. El trabajo enviado al executor recibe el mismo
+        snapshot como argumento.
         """
+        with TradingProfiles.pinned(TradingProfiles.snapshot()):
+            self._run_pinned_analysis_cycle()
+
+    def _run_pinned_analysis_cycle(self):
+        """🔄 Cuerpo del ciclo de análisis (con el perfil ya fijado)"""
+        cycle_start = time.perf_counter()
+        sampling_profiler.notify_cycle_start()
         try:
             self.logger.info("🔄 Starting optimized analysis cycle...")
 
@@ -2145,8 +2392,7 @@ class TradingBot:
                 self.max_daily_trades * weekend_params["max_daily_trades_multiplier"]
             )
             # Usar el umbral de calidad del perfil para calcular el máximo adaptativo
-            profile = TradingProfiles.get_current_profile()
-            quality_threshold = profile.get("daily_trades_quality_threshold", 80.0)
+            quality_threshold = self._profile().daily_trades_quality_threshold
             adaptive_max_trades = int(
                 TradingProfiles.get_adaptive_daily_trades_limit(
                     current_trades_count=self.stats["daily_trades"],
@@ -2223,6 +2469,10 @@ class TradingBot:
             
             # Don't stop the bot - continue with next cycle
             self.logger.info("🔄 Bot will continue with next analysis cycle despite error")
+        finally:
+            metrics.analysis_cycle_duration.observe(time.perf_counter() - cycle_start)
+            sampling_profiler.notify_cycle_end()
+            self.publish_status_snapshot(reason="analysis_cycle")
 
     def _analyze_symbols_parallel(self) -> List[TradingSignal]:
         """
@@ -2236,17 +2486,18 @@ class TradingBot:
             for strategy_name, strategy in self.strategies.items():
                 tasks.append((symbol, strategy_name, strategy))
 
-        # Ejecutar análisis en paralelo
+        # Ejecutar análisis en paralelo (los hilos del executor no heredan el
+        # perfil fijado en este hilo: se les pasa el snapshot del ciclo)
+        profile = self._profile()
         try:
             futures = []
             for symbol, strategy_name, strategy in tasks:
                 future = self.executor.submit(
-                    self._analyze_single_symbol, symbol, strategy_name, strategy
+                    self._analyze_single_symbol, symbol, strategy_name, strategy, profile
                 )
                 futures.append(future)
 
             # Recopilar resultados
-            profile_config = TradingProfiles.get_current_profile()
             timeout = self.config.get_analysis_future_timeout()
             for future in futures:
                 try:
@@ -2282,20 +2533,53 @@ class TradingBot:
         return all_signals
 
     def _analyze_single_symbol(
-        self, symbol: str, strategy_name: str, strategy
+        self,
+        symbol: str,
+        strategy_name: str,
+        strategy,
+        profile: Optional[ProfileSnapshot] = None,
     ) -> Optional[TradingSignal]:
         """
         📈 Analizar un símbolo con una estrategia específica
+
+        Args:
+            profile: Snapshot del ciclo; se fija en este hilo mientras la
+                estrategia analiza (por defecto, el publicado)
         """
         try:
-            signal = strategy.analyze(symbol)
+            with TradingProfiles.pinned(profile or TradingProfiles.snapshot()):
+                signal = strategy.analyze(symbol)
             if hasattr(signal, "strategy_name"):
                 signal.strategy_name = strategy_name
+            if signal:
+                metrics.signals_generated.inc(
+                    strategy=strategy_name, signal_type=signal.signal_type
+                )
+                if signal.signal_type != "HOLD":
+                    self._publish_signal_event(signal, strategy_name)
             return signal
         except Exception as e:
             self.logger.error(f"❌ Error analyzing {symbol} with {strategy_name}: {e}")
             return None
 
+    def _publish_signal_event(self, signal: TradingSignal, strategy_name: str):
+        """📡 Difundir una señal generada al stream de eventos"""
+        try:
+            event_stream.publish(
+                "signal_generated",
+                {
+                    "symbol": signal.symbol,
+                    "strategy": strategy_name,
+                    "signal_type": signal.signal_type,
+                    "confidence": signal.confidence_score,
+                    "price": getattr(signal, "price", None),
+                    "stop_loss": getattr(signal, "stop_loss_price", None),
+                    "take_profit": getattr(signal, "take_profit_price", None),
+                },
+            )
+        except Exception as e:
+            self.logger.debug(f"Error publishing signal event: {e}")
+
     def _analyze_symbols_sequential(self) -> List[TradingSignal]:
         """
         🐌 Análisis secuencial como fallback
@@ -2308,7 +2592,11 @@ class TradingBot:
                     weekend_indicator = "🏖️" if self._is_weekend_trading() else "📊"
 
                     if signal:
+                        metrics.signals_generated.inc(
+                            strategy=strategy_name, signal_type=signal.signal_type
+                        )
                         if signal.signal_type != "HOLD":
+                            self._publish_signal_event(signal, strategy_name)
                             all_signals.append(signal)
                             self.stats["signals_generated"] += 1
                             # Tracking separado para fines de semana
@@ -2346,9 +2634,17 @@ class TradingBot:
         weekend_indicator = "🏖️" if self._is_weekend_trading() else "🎯"
         self.logger.info(f"{weekend_indicator} Starting sequential symbol-by-symbol analysis with immediate execution...")
         
-        total_symbols = len(self.symbols)
+        # Saltar mercados cerrados (consulta binaria sobre el calendario precompilado)
+        calendar = market_hours_checker.calendar
+        now_ts = time.time()
+        symbols = [symbol for symbol in self.symbols if calendar.is_open(symbol, now_ts)]
+        closed_symbols = [symbol for symbol in self.symbols if symbol not in symbols]
+        if closed_symbols:
+            self.logger.info(f"⏸️ Mercado cerrado, se omite el análisis: {', '.join(closed_symbols)}")
+
+        total_symbols = len(symbols)
         
-        for symbol_index, symbol in enumerate(self.symbols, 1):
+        for symbol_index, symbol in enumerate(symbols, 1):
             try:
                 self.logger.info(f"📊 {symbol} ({symbol_index}/{total_symbols})")
                 
@@ -2429,11 +2725,17 @@ class TradingBot:
         adjusted_min_confidence = base_threshold * weekend_params["min_confidence_multiplier"]
 
         # Filtrar señales por confianza mínima (ajustada para fines de semana)
-        high_confidence_signals = [
-            signal
-            for signal in signals
-            if signal.confidence_score >= adjusted_min_confidence
-        ]
+        high_confidence_signals = []
+        for signal in signals:
+            trace = self.decision_log.begin(signal)
+            if trace.check(
+                "confidence",
+                signal.confidence_score >= adjusted_min_confidence,
+                f"confidence {signal.confidence_score:.1f} < {adjusted_min_confidence:.1f}",
+            ):
+                high_confidence_signals.append((signal, trace))
+            else:
+                trace.finish()
 
         if not high_confidence_signals:
             is_weekend = datetime.now(UTC_TZ).strftime("%A").lower() in ["saturday", "sunday"]
@@ -2448,7 +2750,7 @@ class TradingBot:
             return
 
         # Ordenar por confianza (mayor primero)
-        high_confidence_signals.sort(key=lambda x: x.confidence_score, reverse=True)
+        high_confidence_signals.sort(key=lambda x: x[0].confidence_score, reverse=True)
 
         weekend_indicator = "🏖️" if self._is_weekend_trading() else "🎯"
         self.logger.info(
@@ -2459,7 +2761,7 @@ class TradingBot:
         portfolio_summary = self.get_portfolio_summary()
 
         # Procesar cada señal de forma secuencial con balance actualizado
-        for i, signal in enumerate(high_confidence_signals, 1):
+        for i, (signal, trace) in enumerate(high_confidence_signals, 1):
             try:
                 weekend_indicator = "🏖️" if self._is_weekend_trading() else "📊"
                 self.logger.info(
@@ -2484,12 +2786,14 @@ class TradingBot:
                     * weekend_params_loop["max_daily_trades_multiplier"]
                 )
 
-                if self.stats["daily_trades"] >= adaptive_max_trades_loop:
+                if not trace.check(
+                    "daily_limit",
+                    self.stats["daily_trades"] < adaptive_max_trades_loop,
+                    f"daily trades {self.stats['daily_trades']} >= {adaptive_max_trades_loop}",
+                ):
                     if (
                         signal.confidence_score
-                        >= TradingProfiles.get_current_profile().get(
-                            "daily_trades_quality_threshold", 80.0
-                        )
+                        >= self._profile().daily_trades_quality_threshold
                     ):
                         self.logger.info(
                             f"⏸️ Adaptive daily trade limit reached for high-confidence signal ({adaptive_max_trades_loop})"
@@ -2501,12 +2805,14 @@ class TradingBot:
                     break
 
                 # CRÍTICO: Verificar límite de posiciones simultáneas (global y por símbolo)
-                if not self._check_max_positions_limit(symbol=signal.symbol):
+                if not trace.check(
+                    "max_positions", self._check_max_positions_limit(symbol=signal.symbol)
+                ):
                     self.logger.info("⏸️ Maximum positions limit reached")
                     break
 
                 # Verificar cooldown entre trades del mismo símbolo
-                if not self._check_trade_cooldown(signal):
+                if not trace.check("cooldown", self._check_trade_cooldown(signal)):
                     continue  # El método ya registra el mensaje de log
 
                 # Filtro estricto adicional para señales de consenso
@@ -2523,27 +2829,33 @@ class TradingBot:
                     coherence = float(getattr(signal, "coherence_score", 0.0))
                     contrib = int(getattr(signal, "contributing_strategies_count", 0))
                     rr = float(getattr(signal, "risk_reward_ratio", 0.0))
+                    trace.note(consensus_pct=consensus_pct, coherence=coherence, risk_reward=rr)
 
                     if consensus_pct < min_consensus_pct:
                         self.logger.info(
                             f"❌ {signal.symbol}: Consenso insuficiente {consensus_pct:.1f}% < {min_consensus_pct}%"
                         )
+                        trace.check("consensus", False, f"consensus {consensus_pct:.1f} < {min_consensus_pct}")
                         continue
                     if coherence < min_coherence_pct:
                         self.logger.info(
                             f"❌ {signal.symbol}: Coherencia insuficiente {coherence:.1f}% < {min_coherence_pct}%"
                         )
+                        trace.check("consensus", False, f"coherence {coherence:.1f} < {min_coherence_pct}")
                         continue
                     if contrib < min_contrib:
                         self.logger.info(
                             f"❌ {signal.symbol}: Estrategias contribuyentes {contrib} < {min_contrib}"
                         )
+                        trace.check("consensus", False, f"contributors {contrib} < {min_contrib}")
                         continue
                     if rr < min_rr:
                         self.logger.info(
                             f"❌ {signal.symbol}: R/R insuficiente {rr:.2f} < {min_rr:.2f}"
                         )
+                        trace.check("consensus", False, f"R/R {rr:.2f} < {min_rr:.2f}")
                         continue
+                    trace.check("consensus", True)
 
                 # Filtro MTF simétrico: bloquear entradas contra la dirección dominante
                 try:
@@ -2640,16 +2952,17 @@ class TradingBot:
                             tfp.get_market_data = _tf_get_market_data
                     except Exception:
                         pass
-                    mtf = tfp.analyze_multi_timeframe_alignment(signal.symbol)
+                    mtf = tfp.analyze_multi_timeframe_alignment(
+                        signal.symbol, profile=self._profile()
+                    )
                     dom = mtf.get("dominant_direction")
                     consensus = float(mtf.get("consensus", 0.0))
                     strength = float(mtf.get("avg_strength", 0.0))
                     aligned = bool(mtf.get("aligned", False))
+                    trace.note(mtf_consensus=consensus, mtf_strength=strength)
 
                     # Umbral más laxo para aplicar el guard-rail incluso si no "alinea" estricto
-                    filter_consensus_th = TradingProfiles.get_current_profile().get(
-                        "mtf_filter_consensus_threshold", 0.66
-                    )
+                    filter_consensus_th = self._profile().mtf_filter_consensus_threshold
 
                     dominant_known = dom in {"bullish", "bearish"}
                     # Aplicar guard-rail si:
@@ -2666,22 +2979,25 @@ class TradingBot:
                             self.logger.info(
                                 f"🚫 {signal.symbol}: SELL filtrado por MTF (dominante {dom}, consenso {consensus:.1%}, fuerza {strength:.2f}, umbral {filter_consensus_th:.2f})"
                             )
+                            trace.check("mtf", False, f"SELL against {dom} MTF")
                             continue
                         if side == "BUY" and dom == "bearish":
                             self.logger.info(
                                 f"🚫 {signal.symbol}: BUY filtrado por MTF (dominante {dom}, consenso {consensus:.1%}, fuerza {strength:.2f}, umbral {filter_consensus_th:.2f})"
                             )
+                            trace.check("mtf", False, f"BUY against {dom} MTF")
                             continue
                 except Exception as e:
                     self.logger.warning(
                         f"⚠️ {signal.symbol}: Error aplicando filtro MTF: {e}"
                     )
+                trace.check("mtf", True)
 
                 # Verificar horarios de mercado
                 should_trade, market_reason = market_hours_checker.should_trade(
                     signal.symbol
                 )
-                if not should_trade:
+                if not trace.check("market_hours", should_trade, market_reason):
                     self.logger.info(f"⏰ {signal.symbol}: {market_reason}")
                     continue
 
@@ -2689,28 +3005,33 @@ class TradingBot:
 
                 # 🔍 Filtro Anti-Chop (opcional por perfil)
                 try:
-                    profile_cfg = TradingProfiles.get_current_profile()
-                    if bool(profile_cfg.get("chop_filter_enabled", False)):
-                        tf = str(profile_cfg.get("chop_timeframe", "15m"))
+                    profile_cfg = self._profile()
+                    if profile_cfg.chop_filter_enabled:
+                        tf = profile_cfg.chop_timeframe
                         df = self._get_ohlc_dataframe(signal.symbol, timeframe=tf, periods=240)
-                        metrics = self._calculate_chop_metrics(df)
-                        adx_th = float(profile_cfg.get("adx_threshold", 20))
-                        atr_min = float(profile_cfg.get("atr_min_ratio", 0.0012))
-                        ema_min = float(profile_cfg.get("ema_slope_min_ratio", 0.0003))
+                        chop_metrics = self._calculate_chop_metrics(df, symbol=signal.symbol)
+                        trace.note(
+                            adx=chop_metrics["adx"],
+                            atr_ratio=chop_metrics["atr_ratio"],
+                            ema_slope_ratio=chop_metrics["ema_slope_ratio"],
+                        )
+                        adx_th = profile_cfg.adx_threshold
+                        atr_min = profile_cfg.atr_min_ratio
+                        ema_min = profile_cfg.ema_slope_min_ratio
 
                         self.logger.info(
-                            f"🧭 {signal.symbol} Anti-Chop metrics: ADX={metrics['adx']:.1f}, ATR%={metrics['atr_percentage']:.2f}%, ATR/Price={metrics['atr_ratio']:.4f}, EMA slope/Price={metrics['ema_slope_ratio']:.4f}"
+                            f"🧭 {signal.symbol} Anti-Chop metrics: ADX={chop_metrics['adx']:.1f}, ATR%={chop_metrics['atr_percentage']:.2f}%, ATR/Price={chop_metrics['atr_ratio']:.4f}, EMA slope/Price={chop_metrics['ema_slope_ratio']:.4f}"
                         )
 
                         blocked_reasons = []
-                        if metrics["adx"] < adx_th:
-                            blocked_reasons.append(f"ADX {metrics['adx']:.1f} < {adx_th:.1f}")
-                        if metrics["atr_ratio"] < atr_min:
-                            blocked_reasons.append(f"ATR ratio {metrics['atr_ratio']:.4f} < {atr_min:.4f}")
-                        if abs(metrics["ema_slope_ratio"]) < ema_min:
-                            blocked_reasons.append(f"EMA slope ratio {metrics['ema_slope_ratio']:.4f} < {ema_min:.4f}")
-
-                        if blocked_reasons:
+                        if chop_metrics["adx"] < adx_th:
+                            blocked_reasons.append(f"ADX {chop_metrics['adx']:.1f} < {adx_th:.1f}")
+                        if chop_metrics["atr_ratio"] < atr_min:
+                            blocked_reasons.append(f"ATR ratio {chop_metrics['atr_ratio']:.4f} < {atr_min:.4f}")
+                        if abs(chop_metrics["ema_slope_ratio"]) < ema_min:
+                            blocked_reasons.append(f"EMA slope ratio {chop_metrics['ema_slope_ratio']:.4f} < {ema_min:.4f}")
+
+                        if not trace.check("anti_chop", not blocked_reasons, ", ".join(blocked_reasons)):
                             self.logger.info(
                                 f"🧱 {signal.symbol}: señal filtrada por Anti-Chop -> {', '.join(blocked_reasons)}"
                             )
@@ -2726,8 +3047,8 @@ class TradingBot:
 
                         # Validación opcional de Breakout + Retest
                         if bool(profile_cfg.get("require_breakout_retest", False)):
-                            ok, reason = self._passes_breakout_retest(signal, df, metrics.get("atr_percentage", 0.15), profile_cfg)
-                            if not ok:
+                            ok, reason = self._passes_breakout_retest(signal, df, chop_metrics.get("atr_percentage", 0.15), profile_cfg)
+                            if not trace.check("breakout_retest", ok, reason):
                                 self.logger.info(f"🧪 {signal.symbol}: filtro Breakout+Retest NO pasó -> {reason}")
                                 continue
                             else:
@@ -2765,6 +3086,15 @@ class TradingBot:
                 risk_assessment.position_sizing.recommended_size = (
                     adjusted_position_size
                 )
+                trace.note(
+                    risk_score=risk_assessment.overall_risk_score,
+                    position_size=adjusted_position_size,
+                )
+                trace.check(
+                    "risk",
+                    risk_assessment.is_approved,
+                    f"Risk level: {risk_assessment.risk_level.value}",
+                )
 
                 is_weekend = datetime.now(UTC_TZ).strftime("%A").lower() in [
                     "saturday",
@@ -2789,13 +3119,29 @@ class TradingBot:
                 if risk_assessment.is_approved and self.enable_trading:
                     # Verificar política AntiFlip antes de ejecutar
                     pre_position_dir = self._get_open_position_direction(signal.symbol)
-                    if not self._passes_antiflip_policy(signal):
+                    if not trace.check("antiflip", self._passes_antiflip_policy(signal)):
                         self.logger.info(
                             f"🛑 {signal.symbol}: señal filtrada por política AntiFlip"
                         )
                         continue
+                    # Señal aprobada: inicio de la latencia señal -> orden
+                    approved_at = time.perf_counter()
 
-                    # Construir preview de orden (SL/TSL ajustados por reglas) antes de ejecutar
+                    # Ejecutar trade real si está habilitado (antes del paper trade,
+                    # para que la simulación no retrase el envío de la orden)
+                    real_trade_result = None
+                    if self.enable_real_trading and self.capital_client:
+                        with metrics.order_latency.time(mode="real"):
+                            real_trade_result = self._execute_real_trade(
+                                signal, risk_assessment, approved_at=approved_at
+                            )
+
+                    # Ejecutar paper trade siempre
+                    with metrics.order_latency.time(mode="paper"):
+                        trade_result = self.paper_trader.execute_signal(signal)
+
+                    # Preview de orden (SL/TSL ajustados por reglas), fuera de la
+                    # ventana señal -> orden
                     try:
                         preview = self._build_order_preview(signal, risk_assessment)
                         if isinstance(preview, dict):
@@ -2803,16 +3149,6 @@ class TradingBot:
                     except Exception:
                         pass
 
-                    # Ejecutar paper trade siempre
-                    trade_result = self.paper_trader.execute_signal(signal)
-
-                    # Ejecutar trade real si está habilitado
-                    real_trade_result = None
-                    if self.enable_real_trading and self.capital_client:
-                        real_trade_result = self._execute_real_trade(
-                            signal, risk_assessment
-                        )
-
                     if trade_result.success:
                         # Siempre contar trades ejecutados y métricas por día de semana/fin de semana
                         self.stats["trades_executed"] += 1
@@ -2913,13 +3249,16 @@ class TradingBot:
 
                         # Emitir evento de trade ejecutado
                         self._emit_trade_event(signal, trade_result, risk_assessment)
+                        trace.finish("executed")
                     else:
                         # Trade falló en ejecución - no contar como pérdida consecutiva
                         self.logger.warning(f"❌ Trade failed: {trade_result.message}")
+                        trace.finish("execution_failed", str(trade_result.message))
 
                 elif not risk_assessment.is_approved:
+                    trace.finish("risk_rejected")
                     rejection_reason = f"Risk level: {risk_assessment.risk_level.value}"
-                    self.logger.info(f"🚫 Trade rejected: {rejection_reason}")
+                    self.logger.info(f"🚫 Trade rejected: {rejection_reason}", extra=AUDIT)
 
                     # Mostrar recomendaciones
                     for rec in risk_assessment.recommendations:
@@ -2927,6 +3266,14 @@ class TradingBot:
 
             except Exception as e:
                 self.logger.error(f"❌ Error processing signal {signal.symbol}: {e}")
+                trace.finish("error", str(e))
+            finally:
+                # Filtros que cortaron con continue/break; sin fallos = aprobado con trading desactivado
+                trace.finish("filtered" if trace.failed else "trading_disabled")
+
+        # Señales que quedaron sin procesar tras un break (límite diario o de posiciones)
+        for _, trace in high_confidence_signals:
+            trace.finish("filtered", "not processed: cycle stopped by trade/position limit")
 
         # Actualizar P&L total
         current_pnl = portfolio_summary.get("total_pnl", 0)
@@ -3012,9 +3359,12 @@ class TradingBot:
         # No necesitamos mantener una base de datos local para esto
         pass
 
-    def get_status(self) -> BotStatus:
+    def get_status(self, portfolio_summary: Optional[Dict] = None) -> BotStatus:
         """
         📊 Obtener estado actual del bot
+
+        Args:
+            portfolio_summary: Resumen ya calculado (evita otra consulta a Capital.com)
         """
         uptime = "Not running"
         next_analysis = self.next_analysis_time  # Usar variable de instancia
@@ -3026,7 +3376,8 @@ class TradingBot:
             minutes, seconds = divmod(remainder, 60)
             uptime = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
-        portfolio_summary = self.get_portfolio_summary()
+        if portfolio_summary is None:
+            portfolio_summary = self.get_portfolio_summary()
 
         status = BotStatus(
             is_running=self.is_running,
@@ -3051,16 +3402,10 @@ class TradingBot:
             Dict: Resumen del portfolio
         """
         try:
-            logger.info(f"🔧 DEBUG: get_portfolio_summary iniciado")
-            logger.info(
-                f"🔧 DEBUG: capital_client disponible: {self.capital_client is not None}"
-            )
-
             if self.capital_client is None:
                 raise Exception("Capital client no está inicializado")
 
             # Obtener balance disponible de Capital.com
-            logger.info(f"🔧 DEBUG: llamando get_available_balance()")
             balance_info = self.capital_client.get_available_balance()
 
             if isinstance(balance_info, dict):
@@ -3077,13 +3422,8 @@ class TradingBot:
                 total_balance = 0.0
                 total_pnl = 0.0
 
-            logger.info(f"🔧 DEBUG: available_balance: ${available_balance:.2f}")
-            logger.info(f"🔧 DEBUG: total_balance (equity): ${total_balance:.2f}")
-            logger.info(f"🔧 DEBUG: profit_loss: ${total_pnl:.2f}")
-
             # Obtener posiciones abiertas de Capital.com (solo para contar)
-            logger.info(f"🔧 DEBUG: llamando get_positions()")
-            positions_response = self.capital_client.get_positions()
+            positions_response = self.capital_client.get_cached_positions()
 
             # Extraer la lista de posiciones de la respuesta
             positions = []
@@ -3091,7 +3431,6 @@ class TradingBot:
                 "positions"
             ):
                 positions = positions_response.get("positions", [])
-                logger.info(f"🔧 DEBUG: positions count: {len(positions)}")
 
             # Corrección: evitar doble conteo del PnL.
             # - En Capital.com, 'balance' representa el equity (incluye PnL de posiciones abiertas).
@@ -3102,10 +3441,6 @@ class TradingBot:
             funds_balance = available_balance
             total_value = total_balance
 
-            logger.info(
-                f"🔧 DEBUG: final total_value (equity from balance): ${total_value:.2f}"
-            )
-
             result = {
                 "total_value": total_value,  # Capital (equity)
                 "funds_balance": funds_balance,  # Fondos (cash disponible)
@@ -3115,7 +3450,6 @@ class TradingBot:
                 "source": "capital_com",
             }
 
-            logger.info(f"🔧 DEBUG: get_portfolio_summary returning: {result}")
             return result
         except Exception as e:
             # Fallback: intentar usar PaperTrader si está disponible
@@ -3125,7 +3459,6 @@ class TradingBot:
                     fallback = self.paper_trader.get_portfolio_summary()
                     if isinstance(fallback, dict):
                         fallback["source"] = "paper_trader_fallback"
-                        logger.info(f"🔧 DEBUG: usando fallback de paper trader: {fallback}")
                         return fallback
             except Exception as fe:
                 logger.error(f"❌ Error en fallback paper_trader: {fe}")
@@ -3157,7 +3490,7 @@ class TradingBot:
             # Intentar cierre en real si está habilitado
             if getattr(self, "enable_real_trading", False) and self.capital_client:
                 mode = "real"
-                positions_result = self.capital_client.get_positions()
+                positions_result = self.capital_client.get_cached_positions()
                 positions = positions_result.get("positions", []) if positions_result.get("success") else []
 
                 if not positions and not positions_result.get("success"):
@@ -3210,7 +3543,7 @@ class TradingBot:
                         result = self.paper_trader.execute_signal(close_signal)
                         if getattr(result, "success", False):
                             closed_count += 1
-                            self.logger.info(f"✅ Paper position {symbol} cerrada por {reason}")
+                            self.logger.info(f"✅ Paper position {symbol} cerrada por {reason}", extra=AUDIT)
                         else:
                             msg = getattr(result, "message", "Unknown error")
                             errors.append(f"paper {symbol}: {msg}")
@@ -3229,12 +3562,22 @@ class TradingBot:
         )
         return summary
 
-    def get_detailed_report(self) -> Dict:
+    def get_detailed_report(
+        self,
+        status: Optional[BotStatus] = None,
+        portfolio_summary: Optional[Dict] = None,
+    ) -> Dict:
         """
         📋 Obtener reporte detallado del bot
+
+        Args:
+            status: Estado ya calculado (opcional)
+            portfolio_summary: Resumen de portfolio ya calculado (opcional)
         """
-        status = self.get_status()
-        portfolio_summary = self.get_portfolio_summary()
+        if portfolio_summary is None:
+            portfolio_summary = self.get_portfolio_summary()
+        if status is None:
+            status = self.get_status(portfolio_summary=portfolio_summary)
         risk_report = self.risk_manager.generate_risk_report()
         open_positions = self.paper_trader.get_open_positions()
 
@@ -3324,6 +3667,134 @@ class TradingBot:
             "timestamp": datetime.now(UTC_TZ).isoformat(),
         }
 
+    def publish_status_snapshot(
+        self, reason: str = "manual", force: bool = True
+    ) -> Optional[StatusSnapshot]:
+        """
+        📸 Construir y publicar un snapshot inmutable de estado + reporte
+
+        El portfolio se consulta una sola vez por snapshot y el reemplazo de la
+        referencia es atómico, por lo que los lectores nunca ven un estado a medias.
+
+        Args:
+            reason: Origen de la publicación (analysis_cycle, monitor_tick, ...)
+            force: Si es False, respeta el intervalo mínimo entre publicaciones
+
+        Returns:
+            Snapshot vigente (nuevo o el anterior si no se publicó)
+        """
+        if (
+            not force
+            and time.monotonic() - self._last_snapshot_publish
+            < CacheConfig.SNAPSHOT_MIN_PUBLISH_INTERVAL
+        ):
+            return self._status_snapshot
+
+        # Si ya hay otra construcción en curso, no duplicar el trabajo
+        if not self._snapshot_build_lock.acquire(blocking=False):
+            return self._status_snapshot
+
+        try:
+            portfolio_summary = self.get_portfolio_summary()
+            status = self.get_status(portfolio_summary=portfolio_summary)
+            detailed_report = self.get_detailed_report(
+                status=status, portfolio_summary=portfolio_summary
+            )
+
+            initial_balance = (
+                self.paper_trader.initial_balance if self.paper_trader else 1000.0
+            )
+            bot_status = {
+                "is_running": status.is_running,
+                "uptime": status.uptime,
+                "total_signals_generated": status.total_signals_generated,
+                "total_trades_executed": status.total_trades_executed,
+                "successful_trades": status.successful_trades,
+                "win_rate": (
+                    status.successful_trades / max(1, status.total_trades_executed)
+                )
+                * 100,
+                "current_portfolio_value": status.current_portfolio_value,
+                "total_pnl": status.total_pnl,
+                "total_return_percentage": (
+                    (status.current_portfolio_value - initial_balance)
+                    / max(1e-9, initial_balance)
+                )
+                * 100,
+                "initial_balance": initial_balance,
+                "active_strategies": status.active_strategies,
+                "last_analysis_time": (
+                    status.last_analysis_time.isoformat()
+                    if status.last_analysis_time
+                    else None
+                ),
+                "next_analysis_time": (
+                    status.next_analysis_time.isoformat()
+                    if status.next_analysis_time
+                    else None
+                ),
+            }
+
+            payload = json.dumps(
+                {"bot_status": bot_status, "detailed_report": detailed_report},
+                sort_keys=True,
+                default=str,
+            )
+            data = json.loads(payload)
+            self._snapshot_version += 1
+            snapshot = StatusSnapshot(
+                version=self._snapshot_version,
+                etag=hashlib.md5(payload.encode()).hexdigest(),
+                generated_at=datetime.now(UTC_TZ),
+                reason=reason,
+                bot_status=data["bot_status"],
+                detailed_report=data["detailed_report"],
+            )
+            self._status_snapshot = snapshot
+            self._last_snapshot_publish = time.monotonic()
+            event_stream.publish(
+                "status_snapshot",
+                {"version": snapshot.version, "reason": reason, "etag": snapshot.etag},
+            )
+            return snapshot
+
+        except Exception as e:
+            self.logger.error(f"❌ Error publishing status snapshot: {e}")
+            return self._status_snapshot
+        finally:
+            self._snapshot_build_lock.release()
+
+    def get_status_snapshot(self) -> Optional[StatusSnapshot]:
+        """📸 Último snapshot publicado (sin I/O)"""
+        return self._status_snapshot
+
+    def _on_monitor_tick(self):
+        """
+        🔔 Callback del PositionMonitor: refrescar snapshot (con throttling)
+
+        El snapshot consulta balance y posiciones en Capital.com, así que se
+        construye en el executor: el hilo del monitor sólo lo encola y nunca
+        espera E/S entre chequeos de SL/TP.
+        """
+        if (
+            self._snapshot_scheduled
+            or time.monotonic() - self._last_snapshot_publish
+            < CacheConfig.SNAPSHOT_MIN_PUBLISH_INTERVAL
+        ):
+            return
+        self._snapshot_scheduled = True
+        try:
+            self.executor.submit(self._publish_monitor_snapshot)
+        except RuntimeError:
+            # Executor cerrado (bot detenido)
+            self._snapshot_scheduled = False
+
+    def _publish_monitor_snapshot(self):
+        try:
+            self.publish_status_snapshot(reason="monitor_tick", force=False)
+        finally:
+            self._snapshot_scheduled = False
+
     def get_configuration(self) -> Dict:
         """
         📋 Obtener configuración actual del bot
@@ -3563,6 +4034,51 @@ class TradingBot:
         except Exception as e:
             self.logger.error(f"❌ Error updating configuration: {e}")
 
+    def reconfigure(self) -> Dict[str, Any]:
+        """
+        🔄 Releer los parámetros del perfil activo sin reconstruir el bot
+
+        Cliente, paper trader, posiciones y estadísticas se conservan; si el bot
+        está corriendo se reprograma el análisis periódico con el nuevo intervalo.
+
+        Returns:
+            Dict con los parámetros aplicados
+        """
+        self.analysis_interval = self.config.get_analysis_interval()
+        self.min_confidence_threshold = self.config.get_min_confidence_threshold()
+        self.max_daily_trades = TradingProfiles.get_max_daily_trades()
+        self.max_concurrent_positions = self.config.get_max_concurrent_positions()
+        self.primary_timeframe = self.config.get_primary_timeframe()
+        self.confirmation_timeframe = self.config.get_confirmation_timeframe()
+        self.trend_timeframe = self.config.get_trend_timeframe()
+        self.max_daily_profit_percent = RiskManagerConfig.get_max_daily_profit_percent()
+        self.daily_profit_cap_mode = RiskManagerConfig.get_daily_profit_cap_mode()
+        self.risk_manager.reload_profile_limits()
+
+        if self.is_running:
+            schedule.clear("analysis")
+            schedule.every(self.analysis_interval).minutes.do(
+                self._run_analysis_cycle
+            ).tag("analysis")
+            self.next_analysis_time = datetime.now(UTC_TZ) + timedelta(
+                minutes=self.analysis_interval
+            )
+
+        applied = {
+            "analysis_interval": self.analysis_interval,
+            "min_confidence_threshold": self.min_confidence_threshold,
+            "max_daily_trades": self.max_daily_trades,
+            "max_concurrent_positions": self.max_concurrent_positions,
+            "timeframes": [
+                self.primary_timeframe,
+                self.confirmation_timeframe,
+                self.trend_timeframe,
+            ],
+        }
+        self.logger.info(f"🔄 Bot reconfigured in place: {applied}")
+        self.publish_status_snapshot(reason="reconfigure")
+        return applied
+
     def force_analysis(self):
         """
         🔄 Forzar análisis inmediato (útil para testing)
@@ -3658,6 +4174,9 @@ class TradingBot:
                 "message": trade_result.message,
             }
 
+            # Difundir a los suscriptores del stream (no bloquea)
+            event_stream.publish("trade_executed", event)
+
             self.event_queue.put(event, block=False)
 
         except queue.Full:
@@ -3677,6 +4196,9 @@ class TradingBot:
                 "portfolio_value": self.stats.get("total_pnl", 0),
             }
 
+            # Difundir a los suscriptores del stream (no bloquea)
+            event_stream.publish("analysis_completed", event)
+
             self.event_queue.put(event, block=False)
 
         except queue.Full:
@@ -3698,38 +4220,70 @@ class TradingBot:
         # No necesitamos agregar USD automáticamente
         return symbol.upper()
 
+    def _get_order_quote(self, capital_symbol: str, template=None) -> tuple:
+        """💱 (bid, offer) de la plantilla de orden o, sin plantilla, de la API"""
+        if template is not None:
+            return template.bid, template.offer
+        md = self.capital_client.get_market_data([capital_symbol]) if self.capital_client else {}
+        if md and capital_symbol in md:
+            return md[capital_symbol].get("bid"), md[capital_symbol].get("offer")
+        return None, None
+
+    def _get_cached_dealing_rules(self, capital_symbol: str, template=None) -> Dict[str, Any]:
+        """📏 Dealing rules de la plantilla o del cache de instrumentos (vencidas se sirven igual)"""
+        if template is not None and template.dealing_rules:
+            return template.dealing_rules
+        if self.capital_client is None:
+            return {"success": False}
+        return self.capital_client.instrument_cache.dealing_rules(capital_symbol)
+
     def _execute_real_trade(
-        self, signal: TradingSignal, risk_assessment
+        self, signal: TradingSignal, risk_assessment, approved_at: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         🔴 Ejecutar trade real en Capital.com
 
+        Usa la plantilla de orden pre-validada del símbolo (balance, reglas,
+        hedging y bid/offer ya cargados) para no hacer peticiones antes de
+        enviar la orden.
+
         Args:
             signal: Señal de trading
             risk_assessment: Evaluación de riesgo
+            approved_at: time.perf_counter() de la aprobación de la señal
+                (para medir la latencia señal -> orden)
 
         Returns:
             Dict con resultado del trade real
         """
         try:
-            # 1. Verificar balance disponible
-            balance_result = self.capital_client.get_available_balance()
-            if not balance_result.get("success"):
-                return {
-                    "success": False,
-                    "error": f"Failed to get account balance: {balance_result.get('error')}",
-                }
+            # 1. Convertir símbolo al formato de Capital.com
+            capital_symbol = self._normalize_symbol_for_capital(signal.symbol)
+            template = (
+                self.order_templates.get(capital_symbol)
+                if self.order_templates is not None
+                else None
+            )
 
-            available_balance = balance_result.get("available", 0)
-            currency_symbol = balance_result.get("symbol", "$")
+            # 2. Verificar balance disponible
+            if template is not None:
+                available_balance = template.account.available_balance
+                currency_symbol = template.account.currency_symbol
+            else:
+                balance_result = self.capital_client.get_available_balance()
+                if not balance_result.get("success"):
+                    return {
+                        "success": False,
+                        "error": f"Failed to get account balance: {balance_result.get('error')}",
+                    }
+
+                available_balance = balance_result.get("available", 0)
+                currency_symbol = balance_result.get("symbol", "$")
 
             self.logger.info(
                 f"💰 Available balance: {currency_symbol}{available_balance}"
             )
 
-            # 2. Convertir símbolo al formato de Capital.com
-            capital_symbol = self._normalize_symbol_for_capital(signal.symbol)
-
             # 3. Usar el tamaño de posición calculado por el risk manager (que ya considera apalancamiento)
             current_price = (
                 signal.price if hasattr(signal, "price") else signal.current_price
@@ -3751,8 +4305,12 @@ class TradingBot:
             real_size = round(real_size, 4)
 
             # 5. Validar y ajustar tamaño mínimo según Capital.com
-            if hasattr(self.capital_client, 'get_minimum_order_size'):
-                min_size = self.capital_client.get_minimum_order_size(capital_symbol)
+            if template is not None or hasattr(self.capital_client, 'get_minimum_order_size'):
+                min_size = (
+                    template.min_size
+                    if template is not None
+                    else self.capital_client.get_minimum_order_size(capital_symbol)
+                )
                 if real_size < min_size:
                     self.logger.warning(f"⚠️ Tamaño calculado {real_size:.4f} es menor al mínimo {min_size} para {capital_symbol}")
                     self.logger.info(f"🔧 Ajustando tamaño a mínimo requerido: {min_size}")
@@ -3819,8 +4377,7 @@ class TradingBot:
             take_profit = None
 
             # Verificar si estamos usando perfiles que soportan cálculo basado en ROI
-            current_profile_config = TradingProfiles.get_current_profile()
-            current_profile = current_profile_config.get("name", "")
+            current_profile = self._profile().name
             if current_profile in ["Scalping", "Intraday"]:
                 # Para perfiles ROI, recalcular TP/SL basado en ROI del balance invertido
                 try:
@@ -3828,8 +4385,15 @@ class TradingBot:
 
                     strategy_instance = TrendFollowingProfessional()
 
+                    # Precio de la plantilla (sin peticiones); en vivo sólo sin plantilla
+                    if template is not None:
+                        bid, offer = self._get_order_quote(capital_symbol, template)
+                        if bid is not None and offer is not None:
+                            current_price = (bid + offer) / 2.0
+                    else:
+                        current_price = self._get_current_price(signal.symbol)
+
                     # Obtener ATR para el cálculo
-                    current_price = self._get_current_price(signal.symbol)
                     atr = current_price * 0.02  # ATR estimado como 2% del precio
 
                     # Calcular TP/SL basado en ROI usando el tamaño de posición real
@@ -3842,18 +4406,15 @@ class TradingBot:
 
                     # Ajuste del stop loss sensible al spread del instrumento
                     try:
-                        md = self.capital_client.get_market_data([capital_symbol]) if self.capital_client else {}
-                        if md and capital_symbol in md:
-                            bid = md[capital_symbol].get("bid")
-                            offer = md[capital_symbol].get("offer")
-                            if bid is not None and offer is not None and offer > bid:
-                                spread = offer - bid
-                                if signal.signal_type == "BUY":
-                                    stop_loss = stop_loss - spread
-                                else:
-                                    stop_loss = stop_loss + spread
+                        bid, offer = self._get_order_quote(capital_symbol, template)
+                        if bid is not None and offer is not None and offer > bid:
+                            spread = offer - bid
+                            if signal.signal_type == "BUY":
+                                stop_loss = stop_loss - spread
+                            else:
+                                stop_loss = stop_loss + spread
                         # Aplicar mínimos de distancia del SL y redondeo según dealing rules
-                        dr = self.capital_client.get_dealing_rules(capital_symbol) if self.capital_client else {"success": False}
+                        dr = self._get_cached_dealing_rules(capital_symbol, template)
                         if dr.get("success"):
                             import math
                             min_stop = dr.get("min_stop_distance", {})
@@ -3948,7 +4509,15 @@ class TradingBot:
                     # Obtener precio actual para calcular distancias
                     ref_price = None
                     try:
-                        ref_price = self._get_current_price(signal.symbol)
+                        if template is not None:
+                            bid, offer = self._get_order_quote(capital_symbol, template)
+                            ref_price = (
+                                (bid + offer) / 2.0
+                                if bid is not None and offer is not None
+                                else current_price
+                            )
+                        else:
+                            ref_price = self._get_current_price(signal.symbol)
                     except Exception:
                         ref_price = None
 
@@ -3996,13 +4565,8 @@ class TradingBot:
 
             # 7. Aplicar estrictamente reglas del instrumento (min distance, steps, orientación)
             try:
-                bid = None
-                offer = None
-                md = self.capital_client.get_market_data([capital_symbol]) if self.capital_client else {}
-                if md and capital_symbol in md:
-                    bid = md[capital_symbol].get("bid")
-                    offer = md[capital_symbol].get("offer")
-                dr = self.capital_client.get_dealing_rules(capital_symbol) if self.capital_client else {"success": False}
+                bid, offer = self._get_order_quote(capital_symbol, template)
+                dr = self._get_cached_dealing_rules(capital_symbol, template)
                 if not dr.get("success"):
                     dr = {}
                 # Proveer símbolo actual al helper para clampeo por instrumento
@@ -4033,9 +4597,7 @@ class TradingBot:
             self.logger.info(f"🔴 Capital.com API URL: {self.capital_client.base_url}")
 
             # Determinar si usar trailing stop basado en configuración del perfil
-            use_trailing_stop = TradingProfiles.get_current_profile().get(
-                "use_trailing_stop", False
-            )
+            use_trailing_stop = self._profile().use_trailing_stop
             trailing_distance = None
             trailing_stop_available = False
 
@@ -4044,10 +4606,7 @@ class TradingBot:
                 bid = None
                 offer = None
                 try:
-                    md = self.capital_client.get_market_data([capital_symbol]) if self.capital_client else {}
-                    if md and capital_symbol in md:
-                        bid = md[capital_symbol].get("bid")
-                        offer = md[capital_symbol].get("offer")
+                    bid, offer = self._get_order_quote(capital_symbol, template)
                 except Exception as e:
                     self.logger.warning(f"⚠️ Error obteniendo bid/offer para {capital_symbol}: {e}")
 
@@ -4093,7 +4652,11 @@ class TradingBot:
                     f"🔴 Verificando modo hedging y posiciones existentes para BUY..."
                 )
 
-                preferences_result = self.capital_client.get_account_preferences()
+                preferences_result = (
+                    {"success": True, "hedging_mode": template.account.hedging_mode}
+                    if template is not None
+                    else self.capital_client.get_account_preferences()
+                )
                 hedging_mode = False
                 if preferences_result.get("success"):
                     hedging_mode = preferences_result.get("hedging_mode", False)
@@ -4105,7 +4668,7 @@ class TradingBot:
                         f"⚠️ No se pudo obtener preferencias de cuenta: {preferences_result.get('error')}"
                     )
 
-                positions_result = self.capital_client.get_positions()
+                positions_result = self.capital_client.get_cached_positions()
                 if not positions_result.get("success"):
                     return {
                         "success": False,
@@ -4145,7 +4708,10 @@ class TradingBot:
                         }
 
                 # Abrir BUY (en modo hedging siempre abre; en modo normal abre tras cierre o si no había opuesta)
-                self.logger.info(f"🔴 Enviando orden BUY a Capital.com...")
+                self.logger.info(f"🔴 Enviando orden BUY a Capital.com...", extra=AUDIT)
+                if approved_at is not None and self.order_templates is not None:
+                    self.order_templates.record_signal_to_order(capital_symbol, approved_at)
+                submitted_at = time.perf_counter()
                 if trailing_stop_available and trailing_distance:
                     result = self.capital_client.buy_market_order(
                         epic=capital_symbol,
@@ -4178,7 +4744,11 @@ class TradingBot:
                 )
 
                 # Obtener preferencias de cuenta para verificar modo hedging
-                preferences_result = self.capital_client.get_account_preferences()
+                preferences_result = (
+                    {"success": True, "hedging_mode": template.account.hedging_mode}
+                    if template is not None
+                    else self.capital_client.get_account_preferences()
+                )
                 hedging_mode = False
                 if preferences_result.get("success"):
                     hedging_mode = preferences_result.get("hedging_mode", False)
@@ -4191,7 +4761,7 @@ class TradingBot:
                     )
 
                 # Obtener posiciones existentes
-                positions_result = self.capital_client.get_positions()
+                positions_result = self.capital_client.get_cached_positions()
                 if not positions_result.get("success"):
                     return {
                         "success": False,
@@ -4237,8 +4807,11 @@ class TradingBot:
                         f"🔄 Abriendo nueva posición SELL en modo hedging (manteniendo posición existente)"
                     )
                 else:
-                    self.logger.info(f"🔴 Enviando orden SELL a Capital.com...")
+                    self.logger.info(f"🔴 Enviando orden SELL a Capital.com...", extra=AUDIT)
 
+                if approved_at is not None and self.order_templates is not None:
+                    self.order_templates.record_signal_to_order(capital_symbol, approved_at)
+                submitted_at = time.perf_counter()
                 if trailing_stop_available and trailing_distance:
                     result = self.capital_client.sell_market_order(
                         epic=capital_symbol,
@@ -4270,11 +4843,18 @@ class TradingBot:
                     "error": f"Unknown signal type: {signal.signal_type}",
                 }
 
+            # Duración del envío (ida y vuelta al broker), aparte de la latencia señal -> orden
+            if self.order_templates is not None:
+                self.order_templates.record_submission(capital_symbol, submitted_at)
+
             # Log del resultado
             if result.get("success"):
                 self.logger.info(
-                    f"🔴 Real trade SUCCESS: {signal.signal_type} {capital_symbol} - Deal ID: {result.get('deal_id')}"
+                    f"🔴 Real trade SUCCESS: {signal.signal_type} {capital_symbol} - Deal ID: {result.get('deal_id')}",
+                    extra=AUDIT,
                 )
+                if self.order_templates is not None:
+                    self.order_templates.after_order(capital_symbol, required_margin)
             else:
                 self.logger.error(
                     f"🔴 Real trade FAILED: {signal.signal_type} {capital_symbol} - Error: {result.get('error')}"
@@ -4352,7 +4932,7 @@ class TradingBot:
                 return []
 
             # Obtener posiciones abiertas de Capital.com
-            positions_result = self.capital_client.get_positions()
+            positions_result = self.capital_client.get_cached_positions()
             if not positions_result.get("success"):
                 self.logger.warning(
                     f"⚠️ Failed to get positions: {positions_result.get('error')}"
@@ -4727,6 +5307,19 @@ class TradingBot:
             return {"error": str(e)}
 
 
-trading_bot = TradingBot()
+_default_bot: Optional[TradingBot] = None
+_default_bot_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    """Instancia global `trading_bot` creada en el primer acceso, no al importar"""
+    global _default_bot
+    if name != "trading_bot":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _default_bot is None:
+        with _default_bot_lock:
+            if _default_bot is None:
+                _default_bot = TradingBot()
+    return _default_bot
     # --- IMPORTS LOCALES DIFERIDOS ---
     # Nota: evitamos import circulares; usaremos import a nivel de método
@@ -0,0 +1,345 @@
+"""
+🎯 Trailing Engine - Trailing stop y take profit dinámico locales
+Motor que sigue cada posición abierta con quotes en vivo y el ATR cacheado
+por la capa de indicadores, y empuja los niveles modificados a Capital.com.
+
+- Estado por posición en una tabla compacta de columnas `array` (una fila
+  por posición, borrado por swap con la última fila).
+- Los niveles sólo se mueven a favor de la posición (ratchet).
+- Las modificaciones se coalescen: sólo se envía el último nivel de cada
+  posición, respetando un intervalo mínimo por posición, un presupuesto
+  global de peticiones por minuto y el paso mínimo (minStepDistance) de
+  las dealing rules del instrumento.
+"""
+
+import logging
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+DEALING_RULES_TTL = 3600  # segundos
+FALLBACK_STEP_RATIO = 0.0001  # Paso mínimo si no hay dealing rules (0.01% del precio)
+
+
+def _level(value: Optional[float]) -> float:
+    return NAN if value is None else float(value)
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class TrailingEngine:
+    """🎯 Motor local de trailing stop / take profit dinámico"""
+
+    def __init__(
+        self,
+        capital_client=None,
+        atr_provider: Optional[Callable[[str], Optional[float]]] = None,
+        activation: float = 0.025,
+        atr_multiplier: float = 2.0,
+        fallback_distance: float = 0.015,
+        min_amend_interval: float = 10.0,
+        max_amends_per_minute: int = 30,
+    ):
+        """
+        Args:
+            capital_client: Cliente para enviar las modificaciones (None = sólo local)
+            atr_provider: Función symbol -> ATR cacheado (None si no hay)
+            activation: Ganancia (decimal) a partir de la cual se activa el trailing
+            atr_multiplier: Distancia del trailing en múltiplos de ATR
+            fallback_distance: Distancia (decimal del precio) si no hay ATR
+            min_amend_interval: Segundos mínimos entre modificaciones por posición
+            max_amends_per_minute: Presupuesto global de modificaciones
+        """
+        self.capital_client = capital_client
+        self.atr_provider = atr_provider
+        self.activation = activation
+        self.atr_multiplier = atr_multiplier
+        self.fallback_distance = fallback_distance
+        self.min_amend_interval = min_amend_interval
+        self.max_amends_per_minute = max_amends_per_minute
+
+        self._lock = threading.RLock()
+        self._rows: Dict[int, int] = {}  # trade_id -> fila
+        self._trade_ids: List[int] = []
+        self._deal_ids: List[str] = []
+        self._symbols: List[str] = []
+        self._direction = array("b")  # 1 = BUY, -1 = SELL
+        self._entry = array("d")
+        self._extreme = array("d")  # Mejor precio visto a favor
+        self._trail = array("d")  # Trailing stop local (NaN = inactivo)
+        self._tp = array("d")  # Take profit local
+        self._broker_stop = array("d")  # Niveles vigentes en Capital.com
+        self._broker_tp = array("d")
+        self._last_amend = array("d")  # time.monotonic() de la última modificación
+
+        self._pending: set = set()  # trade_ids con niveles por enviar
+        self._amend_times: deque = deque()
+        self._step_cache: Dict[str, Tuple[float, str, float]] = {}
+
+        self.stats = {
+            "trailing_moves": 0,
+            "tp_moves": 0,
+            "amendments_sent": 0,
+            "amendments_failed": 0,
+            "amendments_below_step": 0,
+            "amendments_deferred": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Tabla de posiciones
+    # ------------------------------------------------------------------
+
+    def sync(self, positions: Iterable):
+        """🔄 Sincronizar la tabla con las posiciones abiertas (PositionInfo)"""
+        with self._lock:
+            seen = set()
+            for position in positions:
+                seen.add(position.trade_id)
+                row = self._rows.get(position.trade_id)
+                if row is None:
+                    self._add_row(position)
+                    continue
+                # Niveles vigentes en el broker (pueden venir de nuestras modificaciones)
+                self._broker_stop[row] = _level(position.stop_loss)
+                self._broker_tp[row] = _level(position.take_profit)
+                if math.isnan(self._tp[row]):
+                    self._tp[row] = self._broker_tp[row]
+
+            for trade_id in [t for t in self._rows if t not in seen]:
+                self._remove_row(trade_id)
+
+    def _add_row(self, position):
+        entry = float(position.entry_price or position.current_price or 0.0)
+        self._rows[position.trade_id] = len(self._trade_ids)
+        self._trade_ids.append(position.trade_id)
+        self._deal_ids.append(position.deal_id)
+        self._symbols.append(position.symbol)
+        self._direction.append(-1 if str(position.trade_type).upper() == "SELL" else 1)
+        self._entry.append(entry)
+        self._extreme.append(float(position.current_price or entry))
+        self._trail.append(_level(position.trailing_stop))
+        self._tp.append(_level(position.take_profit))
+        self._broker_stop.append(_level(position.stop_loss))
+        self._broker_tp.append(_level(position.take_profit))
+        self._last_amend.append(0.0)
+
+    def _remove_row(self, trade_id: int):
+        row = self._rows.pop(trade_id)
+        last = len(self._trade_ids) - 1
+        columns = (
+            self._trade_ids,
+            self._deal_ids,
+            self._symbols,
+            self._direction,
+            self._entry,
+            self._extreme,
+            self._trail,
+            self._tp,
+            self._broker_stop,
+            self._broker_tp,
+            self._last_amend,
+        )
+        if row != last:
+            for column in columns:
+                column[row] = column[last]
+            self._rows[self._trade_ids[row]] = row
+        for column in columns:
+            column.pop()
+        self._pending.discard(trade_id)
+
+    def get_levels(self, trade_id: int) -> Tuple[Optional[float], Optional[float]]:
+        """(trailing_stop, take_profit) locales de una posición"""
+        with self._lock:
+            row = self._rows.get(trade_id)
+            if row is None:
+                return None, None
+            return _optional(self._trail[row]), _optional(self._tp[row])
+
+    def __len__(self):
+        return len(self._trade_ids)
+
+    # ------------------------------------------------------------------
+    # Actualización con quotes
+    # ------------------------------------------------------------------
+
+    def on_price(self, trade_id: int, price: float) -> Optional[float]:
+        """
+        📈 Aplicar un precio a una posición y mover el trailing si corresponde
+
+        Returns:
+            Nuevo trailing stop si se movió, None en otro caso
+        """
+        with self._lock:
+            row = self._rows.get(trade_id)
+            if row is None or not price or price <= 0:
+                return None
+
+            direction = self._direction[row]
+            if direction * (price - self._extreme[row]) > 0:
+                self._extreme[row] = price
+
+            entry = self._entry[row]
+            if entry <= 0 or direction * (price - entry) / entry < self.activation:
+                return None
+
+            symbol = self._symbols[row]
+            atr = self.atr_provider(symbol) if self.atr_provider else None
+            distance = (
+                atr * self.atr_multiplier if atr else price * self.fallback_distance
+            )
+            candidate = self._extreme[row] - direction * distance
+
+            current = self._trail[row]
+            if not math.isnan(current) and direction * (candidate - current) <= 0:
+                return None
+
+            self._trail[row] = candidate
+            self._pending.add(trade_id)
+            self.stats["trailing_moves"] += 1
+            return candidate
+
+    def set_take_profit(self, trade_id: int, new_tp: float) -> bool:
+        """🎯 Mover el take profit local (sólo a favor de la posición)"""
+        with self._lock:
+            row = self._rows.get(trade_id)
+            if row is None or new_tp is None:
+                return False
+            current = self._tp[row]
+            if not math.isnan(current) and self._direction[row] * (new_tp - current) <= 0:
+                return False
+            self._tp[row] = float(new_tp)
+            self._pending.add(trade_id)
+            self.stats["tp_moves"] += 1
+            return True
+
+    # ------------------------------------------------------------------
+    # Envío de modificaciones
+    # ------------------------------------------------------------------
+
+    def _min_step(self, symbol: str, price: float) -> float:
+        """Paso mínimo de modificación según dealing rules (cacheado por epic)"""
+        now = time.monotonic()
+        cached = self._step_cache.get(symbol)
+        if cached is None or now - cached[2] > DEALING_RULES_TTL:
+            value, unit = 0.0, "POINTS"
+            try:
+                rules = self.capital_client.get_dealing_rules(symbol)
+                if rules.get("success"):
+                    step = rules.get("min_step_distance") or {}
+                    value = float(step.get("value") or 0.0)
+                    unit = str(step.get("unit") or "POINTS").upper()
+            except Exception as e:
+                logger.debug(f"🎯 Dealing rules unavailable for {symbol}: {e}")
+            cached = (value, unit, now)
+            self._step_cache[symbol] = cached
+
+        value, unit, _ = cached
+        if value <= 0:
+            return price * FALLBACK_STEP_RATIO
+        if unit == "PERCENTAGE":
+            return price * value / 100.0
+        return value
+
+    def _budget_available(self, now: float) -> bool:
+        while self._amend_times and now - self._amend_times[0] > 60.0:
+            self._amend_times.popleft()
+        return len(self._amend_times) < self.max_amends_per_minute
+
+    def flush(self) -> int:
+        """
+        📤 Enviar a Capital.com las modificaciones pendientes (coalescidas)
+
+        Returns:
+            Número de posiciones modificadas en el broker
+        """
+        if not self.capital_client:
+            self._pending.clear()
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+            work = []
+            for trade_id in list(self._pending):
+                row = self._rows.get(trade_id)
+                if row is None:
+                    self._pending.discard(trade_id)
+                    continue
+                if now - self._last_amend[row] < self.min_amend_interval:
+                    self.stats["amendments_deferred"] += 1
+                    continue
+
+                step = self._min_step(self._symbols[row], self._extreme[row])
+                stop_level = self._trail[row]
+                if math.isnan(stop_level) or not (
+                    math.isnan(self._broker_stop[row])
+                    or self._direction[row] * (stop_level - self._broker_stop[row]) >= step
+                ):
+                    stop_level = NAN
+                tp_level = self._tp[row]
+                if math.isnan(tp_level) or not (
+                    math.isnan(self._broker_tp[row])
+                    or abs(tp_level - self._broker_tp[row]) >= step
+                ):
+                    tp_level = NAN
+
+                if math.isnan(stop_level) and math.isnan(tp_level):
+                    # Movimiento menor al paso mínimo: se envía cuando acumule más
+                    self._pending.discard(trade_id)
+                    self.stats["amendments_below_step"] += 1
+                    continue
+
+                if not self._budget_available(now):
+                    self.stats["amendments_deferred"] += 1
+                    break
+
+                self._amend_times.append(now)
+                self._last_amend[row] = now
+                self._pending.discard(trade_id)
+                work.append((trade_id, self._deal_ids[row], stop_level, tp_level))
+
+        amended = 0
+        for trade_id, deal_id, stop_level, tp_level in work:
+            try:
+                result = self.capital_client.update_position(
+                    deal_id,
+                    stop_level=None if math.isnan(stop_level) else round(stop_level, 6),
+                    profit_level=None if math.isnan(tp_level) else round(tp_level, 6),
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            with self._lock:
+                row = self._rows.get(trade_id)
+                if result.get("success"):
+                    amended += 1
+                    self.stats["amendments_sent"] += 1
+                    if row is not None:
+                        if not math.isnan(stop_level):
+                            self._broker_stop[row] = stop_level
+                        if not math.isnan(tp_level):
+                            self._broker_tp[row] = tp_level
+                else:
+                    self.stats["amendments_failed"] += 1
+                    self._pending.add(trade_id)  # Reintentar tras el intervalo mínimo
+                    logger.warning(
+                        f"⚠️ Failed to amend {deal_id}: {result.get('error')}"
+                    )
+        return amended
+
+    def get_status(self) -> Dict:
+        """📊 Estado del motor"""
+        with self._lock:
+            return {
+                "positions": len(self._trade_ids),
+                "pending_amendments": len(self._pending),
+                "amendments_last_minute": len(self._amend_times),
+                **self.stats,
+            }
@@ -12,7 +12,7 @@ Esta estrategia implementa:
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 from datetime import datetime
 import logging
 from dataclasses import dataclass
@@ -21,6 +21,9 @@ import pytz
 from .enhanced_strategies import TradingSignal, EnhancedSignal
 from .mean_reversion_professional import MarketRegime
 
+if TYPE_CHECKING:
+    from src.config.main_config import ProfileSnapshot
+
 logger = logging.getLogger(__name__)
 
 # Importar indicadores desde la librería `ta`
@@ -227,7 +230,9 @@ class TrendFollowingProfessional:
         else:
             return {"aligned": False, "direction": "neutral", "strength": 0.3}
 
-    def analyze_multi_timeframe_alignment(self, symbol: str) -> Dict:
+    def analyze_multi_timeframe_alignment(
+        self, symbol: str, profile: Optional["ProfileSnapshot"] = None
+    ) -> Dict:
         """🎯 NUEVA FUNCIÓN: Validación estricta de alineación multi-timeframe
 
         Analiza la alineación de tendencias en múltiples timeframes para evitar
@@ -235,17 +240,19 @@ class TrendFollowingProfessional:
 
         Args:
             symbol: Símbolo a analizar
+            profile: Snapshot del perfil del ciclo (por defecto, el vigente)
 
         Returns:
             Dict con información de alineación multi-timeframe
         """
         from src.config.main_config import TradingProfiles
 
-        # Obtener configuración del perfil actual
-        profile = TradingProfiles.get_current_profile()
-        timeframes = profile.get("timeframes", ["30m", "1h", "4h"])
-        mtf_require_alignment = profile.get("mtf_require_trend_alignment", True)
-        mtf_min_consensus = profile.get("mtf_min_consensus", 0.80)
+        # Un único snapshot del perfil para todos los timeframes
+        if profile is None:
+            profile = TradingProfiles.snapshot()
+        timeframes = profile.timeframes
+        mtf_require_alignment = profile.mtf_require_trend_alignment
+        mtf_min_consensus = profile.mtf_min_consensus
 
         if not mtf_require_alignment:
             return {
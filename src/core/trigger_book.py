@@ -0,0 +1,266 @@
+"""
+🎯 Trigger Book - Índice de niveles de salida por precio
+Por cada símbolo mantiene listas ordenadas (bisect) con los niveles de
+stop loss, take profit y trailing stop de las posiciones largas y cortas,
+además de los vencimientos por timeout.
+
+Con un nuevo precio se obtienen exactamente las posiciones cuyo nivel fue
+cruzado en O(log n + k), en lugar de recorrer todas las posiciones en cada
+tick:
+
+- Largos:  TP si nivel <= precio | SL / trailing si nivel >= precio
+- Cortos:  TP si nivel >= precio | SL / trailing si nivel <= precio
+"""
+
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Razones de cierre por precio en orden de prioridad (igual que check_exit_conditions)
+REASON_PRIORITY = ("TAKE_PROFIT", "STOP_LOSS", "TRAILING_STOP")
+
+# Tipo de nivel -> (razón, lado del precio que dispara: "below" = nivel <= precio)
+_LEVEL_KINDS = {
+    ("BUY", "take_profit"): ("TAKE_PROFIT", "below"),
+    ("BUY", "stop_loss"): ("STOP_LOSS", "above"),
+    ("BUY", "trailing_stop"): ("TRAILING_STOP", "above"),
+    ("SELL", "take_profit"): ("TAKE_PROFIT", "above"),
+    ("SELL", "stop_loss"): ("STOP_LOSS", "below"),
+    ("SELL", "trailing_stop"): ("TRAILING_STOP", "below"),
+}
+
+
+class _SortedLevels:
+    """Listas paralelas ordenadas por nivel: precios y trade_ids"""
+
+    __slots__ = ("levels", "ids")
+
+    def __init__(self):
+        self.levels: List[float] = []
+        self.ids: List[int] = []
+
+    def insert(self, level: float, trade_id: int):
+        i = bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.ids.insert(i, trade_id)
+
+    def remove(self, level: float, trade_id: int) -> bool:
+        i = bisect_left(self.levels, level)
+        end = bisect_right(self.levels, level)
+        while i < end:
+            if self.ids[i] == trade_id:
+                del self.levels[i]
+                del self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def at_or_below(self, price: float) -> List[int]:
+        """trade_ids con nivel <= precio"""
+        return self.ids[: bisect_right(self.levels, price)]
+
+    def at_or_above(self, price: float) -> List[int]:
+        """trade_ids con nivel >= precio"""
+        return self.ids[bisect_left(self.levels, price) :]
+
+    def __len__(self):
+        return len(self.levels)
+
+
+class TriggerBook:
+    """
+    📒 Libro de disparadores de salida por símbolo
+
+    Las posiciones se identifican por trade_id. Cada posición puede tener
+    como mucho un nivel por tipo (take_profit, stop_loss, trailing_stop)
+    y un vencimiento (timestamp epoch) para el timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # symbol -> {(direction, kind): _SortedLevels}
+        self._books: Dict[str, Dict[Tuple[str, str], _SortedLevels]] = {}
+        # symbol -> _SortedLevels de vencimientos (epoch)
+        self._deadlines: Dict[str, _SortedLevels] = {}
+        # trade_id -> (symbol, direction, {kind: level}, deadline)
+        self._entries: Dict[int, Tuple[str, str, Dict[str, float], Optional[float]]] = {}
+        # symbol -> trade_ids
+        self._by_symbol: Dict[str, set] = {}
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def add(
+        self,
+        trade_id: int,
+        symbol: str,
+        direction: str,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+        trailing_stop: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ):
+        """➕ Registrar (o reemplazar) los niveles de una posición"""
+        direction = "SELL" if str(direction).upper() == "SELL" else "BUY"
+        with self._lock:
+            self.remove(trade_id)
+            levels = {}
+            book = self._books.setdefault(symbol, {})
+            for kind, level in (
+                ("stop_loss", stop_loss),
+                ("take_profit", take_profit),
+                ("trailing_stop", trailing_stop),
+            ):
+                if level is None:
+                    continue
+                level = float(level)
+                book.setdefault((direction, kind), _SortedLevels()).insert(level, trade_id)
+                levels[kind] = level
+            if deadline is not None:
+                self._deadlines.setdefault(symbol, _SortedLevels()).insert(
+                    float(deadline), trade_id
+                )
+            self._entries[trade_id] = (symbol, direction, levels, deadline)
+            self._by_symbol.setdefault(symbol, set()).add(trade_id)
+
+    def remove(self, trade_id: int) -> bool:
+        """➖ Eliminar una posición del libro"""
+        with self._lock:
+            entry = self._entries.pop(trade_id, None)
+            if entry is None:
+                return False
+            symbol, direction, levels, deadline = entry
+            self._by_symbol.get(symbol, set()).discard(trade_id)
+            book = self._books.get(symbol, {})
+            for kind, level in levels.items():
+                sorted_levels = book.get((direction, kind))
+                if sorted_levels is not None:
+                    sorted_levels.remove(level, trade_id)
+            if deadline is not None and symbol in self._deadlines:
+                self._deadlines[symbol].remove(float(deadline), trade_id)
+            return True
+
+    def set_level(self, trade_id: int, kind: str, level: Optional[float]) -> bool:
+        """🔄 Mover un nivel de una posición (p.ej. trailing stop)"""
+        with self._lock:
+            entry = self._entries.get(trade_id)
+            if entry is None:
+                return False
+            symbol, direction, levels, _deadline = entry
+            sorted_levels = self._books[symbol].setdefault(
+                (direction, kind), _SortedLevels()
+            )
+            old_level = levels.pop(kind, None)
+            if old_level is not None:
+                sorted_levels.remove(old_level, trade_id)
+            if level is not None:
+                level = float(level)
+                sorted_levels.insert(level, trade_id)
+                levels[kind] = level
+            return True
+
+    def rebuild(self, positions: Iterable, deadline_for=None):
+        """
+        🧱 Reconstruir el libro completo desde objetos tipo PositionInfo
+
+        Args:
+            positions: Objetos con trade_id, symbol, trade_type, stop_loss,
+                take_profit y trailing_stop
+            deadline_for: Función opcional position -> epoch de timeout
+        """
+        with self._lock:
+            self._books = {}
+            self._deadlines = {}
+            self._entries = {}
+            self._by_symbol = {}
+            for position in positions:
+                self.add(
+                    position.trade_id,
+                    position.symbol,
+                    position.trade_type,
+                    stop_loss=position.stop_loss,
+                    take_profit=position.take_profit,
+                    trailing_stop=position.trailing_stop,
+                    deadline=deadline_for(position) if deadline_for else None,
+                )
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def crossed(self, symbol: str, price: float) -> List[Tuple[int, str]]:
+        """
+        🎯 Posiciones de `symbol` cuyos niveles fueron cruzados por `price`
+
+        Returns:
+            Lista de (trade_id, razón) con una sola razón por posición
+            (la de mayor prioridad)
+        """
+        with self._lock:
+            book = self._books.get(symbol)
+            if not book:
+                return []
+            hits: Dict[int, str] = {}
+
+            for (direction, kind), sorted_levels in book.items():
+                if not sorted_levels:
+                    continue
+                reason, side = _LEVEL_KINDS[(direction, kind)]
+                trade_ids = (
+                    sorted_levels.at_or_below(price)
+                    if side == "below"
+                    else sorted_levels.at_or_above(price)
+                )
+                for trade_id in trade_ids:
+                    current = hits.get(trade_id)
+                    if current is None or REASON_PRIORITY.index(
+                        reason
+                    ) < REASON_PRIORITY.index(current):
+                        hits[trade_id] = reason
+
+        return list(hits.items())
+
+    def nearest_distance(self, symbol: str, price: float) -> Optional[float]:
+        """📏 Distancia absoluta de `price` al nivel más cercano del símbolo (O(log n))"""
+        with self._lock:
+            book = self._books.get(symbol)
+            if not book:
+                return None
+            best = None
+            for sorted_levels in book.values():
+                levels = sorted_levels.levels
+                if not levels:
+                    continue
+                i = bisect_left(levels, price)
+                for j in (i - 1, i):
+                    if 0 <= j < len(levels):
+                        distance = abs(levels[j] - price)
+                        if best is None or distance < best:
+                            best = distance
+            return best
+
+    def expired(self, symbol: str, now: float) -> List[int]:
+        """⏰ trade_ids de `symbol` cuyo vencimiento por timeout ya pasó"""
+        with self._lock:
+            deadlines = self._deadlines.get(symbol)
+            return deadlines.at_or_below(now) if deadlines else []
+
+    def get_level(self, trade_id: int, kind: str) -> Optional[float]:
+        entry = self._entries.get(trade_id)
+        return entry[2].get(kind) if entry else None
+
+    def trade_ids_for_symbol(self, symbol: str) -> List[int]:
+        """trade_ids registrados para un símbolo"""
+        with self._lock:
+            return list(self._by_symbol.get(symbol, ()))
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return [symbol for symbol, book in self._books.items() if any(book.values())]
+
+    def __len__(self):
+        return len(self._entries)
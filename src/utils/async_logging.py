@@ -0,0 +1,295 @@
+"""
+📨 Async Logging - Logging no bloqueante para los hilos de trading
+Los hilos de trading (scheduler, PositionMonitor, workers del executor)
+sólo encolan el LogRecord en una cola acotada; un QueueListener en segundo
+plano hace el formateo y la E/S con los handlers originales (consola,
+archivo). Un disco o una consola lentos nunca retrasan una orden:
+
+- Cola llena: el registro se descarta y se cuenta, nunca se bloquea;
+  salvo WARNING+ y órdenes/trades, que esperan un hueco un instante y, si
+  sigue llena, se escriben en el hilo que loguea.
+- Límite por punto de llamada (logger + línea, token bucket) para
+  registros por debajo de WARNING: un mensaje ruidoso no silencia al
+  resto del módulo.
+- Muestreo de mensajes repetidos por punto de llamada: tras N
+  repeticiones en la ventana sólo pasa 1 de cada M, anotando cuántos se
+  omitieron.
+
+WARNING y superiores nunca se limitan ni se muestrean, tampoco los
+registros de órdenes y trades: los marcados con `extra=AUDIT` y los de los
+loggers de LoggingConfig.LOG_UNLIMITED_LOGGERS.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# extra= para registros de auditoría (órdenes, trades) que nunca se descartan
+AUDIT = {"audit": True}
+
+
+class RateLimitSamplingFilter(logging.Filter):
+    """
+    🚦 Límite y muestreo de mensajes repetidos por punto de llamada
+
+    Args:
+        rate_per_second: Registros por segundo permitidos por punto de llamada
+        burst: Ráfaga máxima por punto de llamada
+        sample_window: Segundos de la ventana de muestreo por punto de llamada
+        sample_after: Repeticiones que pasan sin muestrear en cada ventana
+        sample_every: Luego de `sample_after`, pasa 1 de cada `sample_every`
+        unlimited_loggers: Prefijos de logger que nunca se limitan ni muestrean
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        sample_window: float,
+        sample_after: int,
+        sample_every: int,
+        unlimited_loggers: Tuple[str, ...] = (),
+    ):
+        super().__init__()
+        self.rate_per_second = max(0.0, rate_per_second)
+        self.burst = max(1, burst)
+        self.sample_window = sample_window
+        self.sample_after = max(1, sample_after)
+        self.sample_every = max(1, sample_every)
+        self.unlimited_loggers = tuple(unlimited_loggers)
+        # (logger, línea) -> [tokens, última recarga]
+        self._buckets: Dict[Tuple[str, int], list] = {}
+        # (logger, línea) -> [inicio ventana, vistos, omitidos desde el último emitido]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+        self.stats = {"rate_limited": 0, "sampled_out": 0}
+
+    def exempt(self, record: logging.LogRecord) -> bool:
+        """True si el registro nunca se limita, muestrea ni descarta"""
+        if record.levelno >= logging.WARNING or getattr(record, "audit", False):
+            return True
+        return any(
+            record.name == prefix or record.name.startswith(prefix + ".")
+            for prefix in self.unlimited_loggers
+        )
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.exempt(record):
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.sample_window:
+                site = [now, 0, 0]
+                self._sites[key] = site
+            site[1] += 1
+            seen = site[1]
+            if seen > self.sample_after and (seen - self.sample_after) % self.sample_every:
+                site[2] += 1
+                self.stats["sampled_out"] += 1
+                return False
+
+            if self.rate_per_second > 0:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = [float(self.burst), now]
+                    self._buckets[key] = bucket
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+                bucket[1] = now
+                if bucket[0] < 1.0:
+                    site[2] += 1
+                    self.stats["rate_limited"] += 1
+                    return False
+                bucket[0] -= 1.0
+
+            suppressed, site[2] = site[2], 0
+
+        if suppressed:
+            record.msg = f"{record.msg} [+{suppressed} similares omitidos]"
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    📥 QueueHandler que no formatea en el hilo que loguea
+
+    Con la cola llena descarta el registro, salvo los que `keep` marca como
+    imprescindibles (WARNING+, órdenes y trades): éstos esperan hasta
+    `block_timeout` segundos un hueco y, si no lo hay, se escriben en el
+    propio hilo con `fallback_handlers`.
+
+    Args:
+        log_queue: Cola que vacía el QueueListener
+        fallback_handlers: Handlers del listener (escritura síncrona)
+        keep: record -> bool, registros que nunca se descartan
+        block_timeout: Espera máxima por un hueco para esos registros
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        fallback_handlers: Iterable[logging.Handler] = (),
+        keep: Optional[Callable[[logging.LogRecord], bool]] = None,
+        block_timeout: float = 0.05,
+    ):
+        super().__init__(log_queue)
+        self.fallback_handlers = list(fallback_handlers)
+        self.keep = keep or (lambda record: record.levelno >= logging.WARNING)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.written_synchronously = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # El formateo (mensaje, traceback) lo hacen los handlers del listener
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if not self.keep(record):
+            self.dropped += 1
+            return
+        try:
+            self.queue.put(record, timeout=self.block_timeout)
+            return
+        except queue.Full:
+            pass
+        # Mejor escribir en este hilo que perder un error, una orden o un trade
+        self.written_synchronously += 1
+        for handler in self.fallback_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class AsyncLogging:
+    """
+    📨 Instalación del pipeline de logging asíncrono sobre el logger raíz
+
+    Los handlers que tenga el logger raíz (p. ej. el de basicConfig) pasan
+    al QueueListener; en su lugar queda un único NonBlockingQueueHandler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._handler: Optional[NonBlockingQueueHandler] = None
+        self._filter: Optional[RateLimitSamplingFilter] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._handlers = []
+
+    @property
+    def installed(self) -> bool:
+        return self._listener is not None
+
+    def install(
+        self,
+        queue_size: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        sample_window: Optional[float] = None,
+        sample_after: Optional[int] = None,
+        sample_every: Optional[int] = None,
+    ) -> bool:
+        """🚀 Activar el logging asíncrono (idempotente). Por defecto usa LoggingConfig."""
+        try:
+            from src.config.main_config import LoggingConfig
+        except ImportError:
+            from config.main_config import LoggingConfig
+
+        with self._lock:
+            if self._listener is not None:
+                return True
+            if not LoggingConfig.ASYNC_LOGGING_ENABLED:
+                return False
+
+            root = logging.getLogger()
+            self._handlers = list(root.handlers)
+            if not self._handlers:
+                # Sin configuración previa: mismo formato que basicConfig del proyecto
+                console = logging.StreamHandler()
+                console.setFormatter(logging.Formatter(LoggingConfig.LOG_FORMAT))
+                self._handlers = [console]
+
+            self._queue = queue.Queue(
+                maxsize=queue_size if queue_size is not None else LoggingConfig.ASYNC_LOG_QUEUE_SIZE
+            )
+            self._filter = RateLimitSamplingFilter(
+                rate_per_second=(
+                    rate_per_second
+                    if rate_per_second is not None
+                    else LoggingConfig.LOG_RATE_LIMIT_PER_SECOND
+                ),
+                burst=burst if burst is not None else LoggingConfig.LOG_RATE_LIMIT_BURST,
+                sample_window=(
+                    sample_window
+                    if sample_window is not None
+                    else LoggingConfig.LOG_SAMPLE_WINDOW_SECONDS
+                ),
+                sample_after=(
+                    sample_after if sample_after is not None else LoggingConfig.LOG_SAMPLE_AFTER
+                ),
+                sample_every=(
+                    sample_every if sample_every is not None else LoggingConfig.LOG_SAMPLE_EVERY
+                ),
+                unlimited_loggers=LoggingConfig.LOG_UNLIMITED_LOGGERS,
+            )
+            self._handler = NonBlockingQueueHandler(
+                self._queue,
+                fallback_handlers=self._handlers,
+                keep=self._filter.exempt,
+                block_timeout=LoggingConfig.ASYNC_LOG_BLOCK_TIMEOUT,
+            )
+            self._handler.addFilter(self._filter)
+            self._listener = logging.handlers.QueueListener(
+                self._queue, *self._handlers, respect_handler_level=True
+            )
+
+            for handler in self._handlers:
+                root.removeHandler(handler)
+            root.addHandler(self._handler)
+            self._listener.start()
+
+        atexit.register(self.uninstall)
+        logger.debug("📨 Async logging enabled")
+        return True
+
+    def uninstall(self):
+        """🛑 Vaciar la cola y devolver los handlers originales al logger raíz"""
+        with self._lock:
+            if self._listener is None:
+                return
+            root = logging.getLogger()
+            root.removeHandler(self._handler)
+            # stop() procesa lo pendiente antes de terminar el hilo
+            self._listener.stop()
+            for handler in self._handlers:
+                root.addHandler(handler)
+            self._listener = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del pipeline de logging"""
+        if self._listener is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "queue_size": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "dropped_queue_full": self._handler.dropped,
+            "written_synchronously": self._handler.written_synchronously,
+            **self._filter.stats,
+        }
+
+
+# Instancia global
+async_logging = AsyncLogging()
@@ -0,0 +1,193 @@
+"""
+📡 Event Stream - Difusión de eventos del bot a múltiples suscriptores
+Ring buffer con número de secuencia monótono y cursores por suscriptor.
+
+- El productor (hilos del bot/monitor) nunca se bloquea: publicar es O(1)
+  más un aviso no bloqueante a los suscriptores asíncronos.
+- Cada suscriptor lee desde su propio cursor. Si el productor le da la vuelta
+  al buffer (el suscriptor es demasiado lento), ese suscriptor se descarta
+  (SubscriberLagged) en lugar de frenar al productor.
+- Los clientes que reconectan pueden reanudar desde un número de secuencia
+  (`Last-Event-ID` en SSE) mientras siga dentro de la ventana del buffer.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 2048
+MAX_SUBSCRIBERS = 100
+
+
+class SubscriberLagged(Exception):
+    """El suscriptor quedó fuera de la ventana del ring buffer"""
+
+    def __init__(self, cursor: int, oldest_available: int):
+        super().__init__(
+            f"Subscriber at seq {cursor} overtaken (oldest available {oldest_available})"
+        )
+        self.cursor = cursor
+        self.oldest_available = oldest_available
+
+
+class Subscription:
+    """📥 Suscriptor con cursor propio sobre el ring buffer"""
+
+    def __init__(self, stream: "EventStream", cursor: int):
+        self.stream = stream
+        self.cursor = cursor  # Próxima secuencia a leer
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.closed = False
+
+    def attach_loop(self):
+        """Asociar el suscriptor al event loop actual para recibir avisos"""
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+
+    def notify(self):
+        """Despertar al suscriptor (llamado desde cualquier hilo, no bloquea)"""
+        if self.loop is not None and self.wakeup is not None and not self.closed:
+            try:
+                self.loop.call_soon_threadsafe(self.wakeup.set)
+            except RuntimeError:
+                # Loop cerrado: el suscriptor ya no existe
+                self.closed = True
+
+    def poll(self, max_items: int = 100) -> List[Dict[str, Any]]:
+        """Leer eventos pendientes desde el cursor (lanza SubscriberLagged)"""
+        events, self.cursor = self.stream.read_from(self.cursor, max_items)
+        return events
+
+    async def wait(self, timeout: float) -> bool:
+        """Esperar nuevos eventos; True si hubo aviso antes del timeout"""
+        if self.wakeup is None:
+            self.attach_loop()
+        if self.cursor < self.stream.next_seq:
+            return True
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.wakeup.clear()
+
+    def close(self):
+        self.closed = True
+        self.stream.unsubscribe(self)
+
+
+class EventStream:
+    """📡 Ring buffer de eventos con fan-out a múltiples suscriptores"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffer: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+        self.stats = {"published": 0, "subscribers_dropped": 0}
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(1, self._next_seq - self.capacity)
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """
+        📢 Publicar un evento (nunca bloquea al productor)
+
+        Returns:
+            Número de secuencia asignado
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._buffer[seq % self.capacity] = {
+                "seq": seq,
+                "type": event_type,
+                "timestamp": datetime.now(pytz.UTC).isoformat(),
+                "data": data,
+            }
+            self._next_seq = seq + 1
+            self.stats["published"] += 1
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            subscriber.notify()
+        return seq
+
+    def read_from(self, cursor: int, max_items: int = 100):
+        """
+        Leer eventos con seq >= cursor
+
+        Returns:
+            (eventos, nuevo_cursor)
+
+        Raises:
+            SubscriberLagged: si el cursor ya fue sobrescrito
+        """
+        with self._lock:
+            oldest = self.oldest_seq
+            if cursor < oldest:
+                self.stats["subscribers_dropped"] += 1
+                raise SubscriberLagged(cursor, oldest)
+            end = min(self._next_seq, cursor + max_items)
+            events = [self._buffer[seq % self.capacity] for seq in range(cursor, end)]
+        return events, end
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        📥 Crear un suscriptor
+
+        Args:
+            last_event_id: Última secuencia recibida por el cliente; se reanuda
+                desde la siguiente. Si ya no está en el buffer se reanuda desde
+                el evento más antiguo disponible. None = sólo eventos nuevos.
+        """
+        with self._lock:
+            if len(self._subscribers) >= MAX_SUBSCRIBERS:
+                raise RuntimeError("Too many event stream subscribers")
+            if last_event_id is None:
+                cursor = self._next_seq
+            else:
+                cursor = min(max(int(last_event_id) + 1, self.oldest_seq), self._next_seq)
+            subscription = Subscription(self, cursor)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del stream"""
+        return {
+            "capacity": self.capacity,
+            "next_seq": self._next_seq,
+            "oldest_seq": self.oldest_seq,
+            "subscribers": len(self._subscribers),
+            "published": self.stats["published"],
+            "subscribers_dropped": self.stats["subscribers_dropped"],
+        }
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Formatear un evento como mensaje Server-Sent Events"""
+    payload = json.dumps(event, default=str)
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+# Instancia global
+event_stream = EventStream()
@@ -4,10 +4,12 @@ Verifica si los mercados están abiertos y si se encuentran en ventanas óptimas
 """
 
 import logging
-from datetime import datetime, time, timezone, timedelta
-from typing import Dict, Optional, Tuple, List
+from datetime import datetime, time
+from typing import Dict, Optional, Tuple
 import pytz
 
+from .trading_calendar import TradingCalendar, fmt_utc
+
 logger = logging.getLogger(__name__)
 
 # Importar configuración por símbolo
@@ -194,6 +196,9 @@ class MarketHoursChecker:
             # Australia: sin pausa
         }
 
+        # Sesiones precompiladas en rangos UTC (buffers, pausas y horas óptimas)
+        self.calendar = TradingCalendar(self, get_symbol_config)
+
     def get_market_type(self, symbol: str) -> str:
         """
         Obtener el tipo de mercado para un símbolo
@@ -219,50 +224,44 @@ class MarketHoursChecker:
         Returns:
             Tuple (is_open: bool, reason: str)
         """
-        if current_time is None:
-            current_time = datetime.now(self.utc)
-
-        market_type = self.get_market_type(symbol)
-        # Config por símbolo si existe, si no, fallback por tipo
-        market_config = self.symbol_specific_hours.get(symbol, self.market_hours[market_type])
+        ts = current_time.timestamp() if current_time is not None else None
+        calendar, ts = self.calendar.get(symbol, ts)
+        market_type = calendar.market_type
+        is_open = calendar.open.contains(ts)
 
         # Si el mercado está siempre abierto (Crypto, Forex)
-        if market_config["always_open"]:
-            if market_type == "CRYPTO":
-                return True, f"Crypto market is always open (24/7)"
-            elif market_type == "FOREX":
-                # Forex está cerrado solo los fines de semana
-                weekday = current_time.weekday()
-                if weekday == 5:  # Sábado
-                    return False, f"Forex market is closed on Saturday"
-                elif weekday == 6:  # Domingo antes de las 22:00 UTC
-                    if current_time.time() < time(22, 0):
-                        return False, f"Forex market opens Sunday at 22:00 UTC"
+        if calendar.always_open and market_type == "CRYPTO":
+            return True, f"Crypto market is always open (24/7)"
+        if calendar.always_open:
+            if is_open:
                 return True, f"Forex market is open (24/5)"
+            return False, f"Forex market opens Sunday at 22:00 UTC"
 
         # Para mercados con horarios específicos (Indices, Commodities)
-        market_tz = market_config["timezone"]
-        local_time = current_time.astimezone(market_tz)
-
-        # Verificar día de la semana
-        if local_time.weekday() not in market_config["days"]:
-            return False, f"{market_type} market is closed on weekends"
-
-        # Verificar horario
-        current_time_only = local_time.time()
-        open_time = market_config["open_time"]
-        close_time = market_config["close_time"]
-
-        if open_time <= current_time_only <= close_time:
+        if is_open:
             return (
                 True,
-                f"{market_type} market is open ({open_time} - {close_time} {market_tz.zone}) | now {local_time.strftime('%H:%M:%S')} {market_tz.zone} / {current_time.strftime('%H:%M:%S')} UTC",
-            )
-        else:
-            return (
-                False,
-                f"{market_type} market is closed (opens at {open_time} {market_tz.zone}) | now {local_time.strftime('%H:%M:%S')} {market_tz.zone} / {current_time.strftime('%H:%M:%S')} UTC",
+                f"{market_type} market is open ({calendar.zone}) | closes {fmt_utc(calendar.open.current_end(ts))} UTC",
             )
+        return (
+            False,
+            f"{market_type} market is closed | opens {fmt_utc(calendar.open.next_start(ts))} UTC",
+        )
+
+    def session_mask(self, symbol: str, timestamps, tradable: bool = False):
+        """
+        Máscara vectorizada de barras dentro de sesión para un símbolo
+
+        Args:
+            symbol: Símbolo del activo (US500, UK100, FR40, HK50...)
+            timestamps: Array NumPy datetime64 (naive se interpreta como UTC)
+            tradable: Exigir además la ventana operable (buffers, pausas y
+                horas óptimas), igual que should_trade
+
+        Returns:
+            np.ndarray[bool] con True para las barras dentro de sesión
+        """
+        return self.calendar.session_mask(symbol, timestamps, tradable=tradable)
 
     def get_market_status_summary(self, symbols: list) -> Dict[str, Dict]:
         """
@@ -290,87 +289,26 @@ class MarketHoursChecker:
 
         return summary
 
-    def should_trade(self, symbol: str) -> Tuple[bool, str]:
+    def should_trade(
+        self, symbol: str, current_time: Optional[datetime] = None
+    ) -> Tuple[bool, str]:
         """
         Determinar si se debe ejecutar un trade para un símbolo.
         Considera horario de mercado y ventanas óptimas (evita apertura/cierre y pausas).
 
+        La ventana operable (mercado abierto, sin buffers ni pausas de
+        mediodía y dentro de las horas óptimas UTC) viene precompilada en
+        `self.calendar`, así que la consulta es una búsqueda binaria.
+
         Args:
             symbol: Símbolo del activo
+            current_time: Tiempo actual (opcional, usa ahora si no se proporciona)
 
         Returns:
             Tuple (should_trade: bool, reason: str)
         """
-        is_open, reason = self.is_market_open(symbol)
-
-        if not is_open:
-            return False, f"Trading blocked: {reason}"
-
-        # Aplicar buffers y pausas de mediodía
-        # Obtener configuración del símbolo
-        market_type = self.get_market_type(symbol)
-        market_config = self.symbol_specific_hours.get(symbol, self.market_hours[market_type])
-        market_tz = market_config["timezone"]
-        current_utc = datetime.now(self.utc)
-        local_time = current_utc.astimezone(market_tz)
-
-        # Determinar buffers por símbolo
-        buffers = self.symbol_buffers.get(symbol, {})
-        open_buffer_min = buffers.get("open_buffer", self.default_open_buffer_min)
-        close_buffer_min = buffers.get("close_buffer", self.default_close_buffer_min)
-
-        # Construir ventanas con buffer
-        # Crear datetimes conscientes de zona horaria para evitar comparaciones naive/aware
-        open_naive = datetime.combine(local_time.date(), market_config["open_time"])  # naive
-        close_naive = datetime.combine(local_time.date(), market_config["close_time"])  # naive
-        try:
-            open_dt = market_tz.localize(open_naive)
-        except Exception:
-            # Fallback: si ya viene aware o falla localize, asegurar tz con replace
-            open_dt = open_naive.replace(tzinfo=market_tz)
-        try:
-            close_dt = market_tz.localize(close_naive)
-        except Exception:
-            close_dt = close_naive.replace(tzinfo=market_tz)
-
-        open_dt_buffered = open_dt + timedelta(minutes=open_buffer_min)
-        close_dt_buffered = close_dt - timedelta(minutes=close_buffer_min)
-
-        # Pausas de mediodía
-        lunch_breaks = self.symbol_lunch_breaks.get(symbol, [])
-        current_local_dt = local_time
-        current_local_time = current_local_dt.time()
-
-        for start_time, end_time in lunch_breaks:
-            if start_time <= current_local_time <= end_time:
-                return False, (
-                    f"Trading blocked: lunch break {start_time.strftime('%H:%M')}–{end_time.strftime('%H:%M')} "
-                    f"{market_tz.zone} | {current_local_dt.strftime('%H:%M')} local"
-                )
-
-        # Verificar si estamos dentro de la ventana óptima (evitar apertura/cierre)
-        if not (open_dt_buffered <= current_local_dt <= close_dt_buffered):
-            # Determinar motivo específico
-            if current_local_dt < open_dt_buffered:
-                return False, (
-                    f"Trading blocked: within open buffer (first {open_buffer_min}m) | "
-                    f"opens {market_config['open_time'].strftime('%H:%M')} {market_tz.zone}, optimal from {open_dt_buffered.strftime('%H:%M')}"
-                )
-            else:
-                return False, (
-                    f"Trading blocked: within close buffer (last {close_buffer_min}m) | "
-                    f"closes {market_config['close_time'].strftime('%H:%M')} {market_tz.zone}, optimal until {close_dt_buffered.strftime('%H:%M')}"
-                )
-
-        # Validar ventanas óptimas específicas del símbolo en UTC
-        optimal_ok, optimal_reason = self._is_within_symbol_optimal_hours_utc(symbol)
-        if not optimal_ok:
-            return False, optimal_reason
-
-        return True, (
-            f"Trading allowed: {optimal_reason} | buffered {open_dt_buffered.strftime('%H:%M')}–{close_dt_buffered.strftime('%H:%M')} "
-            f"{market_tz.zone}"
-        )
+        ts = current_time.timestamp() if current_time is not None else None
+        return self.calendar.explain(symbol, ts)
 
     def get_general_market_status(self) -> Dict[str, list]:
         """
@@ -404,56 +342,16 @@ class MarketHoursChecker:
         return {"open_markets": open_markets, "closed_markets": closed_markets}
 
     # ===== Utilidades internas =====
-    def _parse_time_range(self, range_str: str) -> Tuple[time, time]:
-        start_str, end_str = range_str.split("-")
-        sh, sm = map(int, start_str.split(":"))
-        eh, em = map(int, end_str.split(":"))
-        return time(sh, sm), time(eh, em)
-
-    def _is_time_in_ranges(self, current_t: time, ranges: List[Tuple[time, time]]) -> bool:
-        for start_t, end_t in ranges:
-            if start_t <= end_t:
-                if start_t <= current_t <= end_t:
-                    return True
-            else:
-                # Cruza medianoche
-                if current_t >= start_t or current_t <= end_t:
-                    return True
-        return False
-
     def _is_within_symbol_optimal_hours_utc(self, symbol: str) -> Tuple[bool, str]:
         """Verifica si el tiempo actual UTC cae dentro de las ventanas óptimas del símbolo.
-        Las ventanas se definen en UTC en symbols_config.
+        Las ventanas se definen en UTC en symbols_config y se compilan en el calendario.
         """
-        try:
-            cfg = get_symbol_config(symbol)
-            ranges_raw = cfg.get("optimal_hours", [])
-            if not ranges_raw:
-                return True, f"No optimal hours configured – default allow"
-
-            # Soporte para 24/5
-            if any(r.strip().upper() == "24/5" for r in ranges_raw):
-                return True, f"Symbol optimal hours: 24/5 (UTC)"
-
-            ranges_parsed: List[Tuple[time, time]] = []
-            for r in ranges_raw:
-                try:
-                    ranges_parsed.append(self._parse_time_range(r))
-                except Exception:
-                    logger.warning(f"Invalid optimal_hours range for {symbol}: '{r}'")
-
-            current_utc_time = datetime.now(self.utc).time()
-            in_range = self._is_time_in_ranges(current_utc_time, ranges_parsed)
-            if in_range:
-                # Construir texto de rangos para razón
-                ranges_txt = ", ".join([f"{s.strftime('%H:%M')}-{e.strftime('%H:%M')}" for s, e in ranges_parsed])
-                return True, f"Symbol optimal window active (UTC {ranges_txt})"
-            else:
-                ranges_txt = ", ".join([f"{s.strftime('%H:%M')}-{e.strftime('%H:%M')}" for s, e in ranges_parsed])
-                return False, f"Trading blocked: outside {symbol} optimal hours (UTC {ranges_txt})"
-        except Exception as e:
-            logger.warning(f"Error checking optimal hours for {symbol}: {e}")
-            return True, "Symbol optimal hours check error – default allow"
+        calendar, ts = self.calendar.get(symbol)
+        if calendar.optimal is None:
+            return True, f"Symbol optimal hours: {calendar.optimal_text} (UTC)"
+        if calendar.optimal.contains(ts):
+            return True, f"Symbol optimal window active (UTC {calendar.optimal_text})"
+        return False, f"Trading blocked: outside {symbol} optimal hours (UTC {calendar.optimal_text})"
 
 
 # Instancia global para uso en el bot
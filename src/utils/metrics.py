@@ -0,0 +1,406 @@
+"""
+📈 Métricas internas en formato Prometheus
+Contadores, gauges e histogramas en proceso, sin dependencias externas,
+renderizados en el formato de exposición de texto (text/plain; version=0.0.4).
+
+Diseño "lock-cheap":
+- Cada hilo escribe en su propio shard (threading.local), por lo que los
+  incrementos en los hilos de trading nunca compiten por un lock.
+- El lock sólo se toma la primera vez que un hilo usa una métrica (para
+  registrar su shard) y durante el scrape, que suma copias de los shards.
+- En el scrape, los shards de hilos ya terminados se pliegan en un valor
+  base de la métrica y se eliminan, así el número de shards no crece con
+  los hilos que van y vienen (executor, tareas en segundo plano...).
+"""
+
+import math
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Buckets por defecto (segundos) pensados para latencias HTTP y ciclos de análisis
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+def _escape_label_value(value: str) -> str:
+    """Escapar valores de labels según el formato de exposición"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra=None) -> str:
+    """Construir el bloque {k="v",...} de una muestra"""
+    pairs = [f'{n}="{_escape_label_value(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape_label_value(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Formatear un valor numérico (incluye +Inf/NaN)"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base común: nombre, ayuda, labels y shards por hilo"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        # (hilo dueño, shard); los de hilos terminados se pliegan en _base
+        self._shards: List[Tuple[weakref.ref, Dict]] = []
+        self._base: Dict = {}
+        self._shards_lock = threading.Lock()
+
+    def _label_key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Convertir kwargs de labels en una tupla ordenada"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Labels inválidos para {self.name}: {sorted(labels)} "
+                f"(esperados {list(self.labelnames)})"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _shard(self) -> Dict:
+        """Shard del hilo actual (se registra una sola vez por hilo)"""
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = {}
+            owner = weakref.ref(threading.current_thread())
+            with self._shards_lock:
+                self._shards.append((owner, shard))
+            self._local.values = shard
+        return shard
+
+    def _merge(self, totals: Dict, shard: Dict) -> None:
+        """Sumar `shard` sobre `totals` (sin compartir objetos mutables)"""
+        raise NotImplementedError
+
+    def _collect(self) -> Dict:
+        """
+        Sumar el valor base y los shards vivos
+
+        Un hilo terminado ya no escribe en su shard: se pliega en `_base` y
+        se descarta. Los shards vivos se suman sobre copias (dict.copy es
+        atómico bajo el GIL).
+        """
+        totals: Dict = {}
+        with self._shards_lock:
+            live = []
+            for owner, shard in self._shards:
+                thread = owner()
+                if thread is None or not thread.is_alive():
+                    self._merge(self._base, shard)
+                else:
+                    live.append((owner, shard))
+            self._shards = live
+            self._merge(totals, self._base)
+        for _, shard in live:
+            self._merge(totals, shard.copy())
+        return totals
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """🔢 Contador monótono con labels"""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Incrementar el contador (sin locks en el camino caliente)"""
+        if amount < 0:
+            raise ValueError("Los contadores sólo pueden incrementarse")
+        key = self._label_key(labels)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def _merge(self, totals: Dict, shard: Dict) -> None:
+        for key, value in shard.items():
+            totals[key] = totals.get(key, 0.0) + value
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """Sumar todos los shards"""
+        return self._collect()
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values().items())
+        ]
+
+
+class Gauge(_Metric):
+    """📏 Valor instantáneo (última escritura gana, asignación atómica)"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        """Fijar el valor actual"""
+        self._values[self._label_key(labels)] = float(value)
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        return self._values.copy()
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(_Metric):
+    """📊 Histograma acumulativo con buckets fijos"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """Registrar una observación en el shard del hilo actual"""
+        key = self._label_key(labels)
+        shard = self._shard()
+        state = shard.get(key)
+        if state is None:
+            # [conteos por bucket..., sum, count]
+            state = [0] * len(self.buckets) + [0.0, 0]
+            shard[key] = state
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def time(self, **labels) -> "_HistogramTimer":
+        """Context manager que observa la duración del bloque"""
+        return _HistogramTimer(self, labels)
+
+    def _merge(self, totals: Dict, shard: Dict) -> None:
+        for key, state in shard.items():
+            acc = totals.get(key)
+            if acc is None:
+                totals[key] = list(state)
+            else:
+                for i, v in enumerate(state):
+                    acc[i] += v
+
+    def values(self) -> Dict[Tuple[str, ...], List[float]]:
+        return self._collect()
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self.values().items()):
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                labels = _format_labels(
+                    self.labelnames, key, ("le", _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels_inf = _format_labels(self.labelnames, key, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels_inf} {int(state[-1])}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {int(state[-1])}")
+        return lines
+
+
+class _HistogramTimer:
+    """Temporizador para `with histogram.time(...)`"""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """🗂️ Registro de métricas del proceso"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames, **kw):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kw)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrica {name} ya registrada con otro tipo")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram,
+            name,
+            documentation,
+            labelnames,
+            buckets=buckets or DEFAULT_BUCKETS,
+        )
+
+    def render(self) -> str:
+        """Renderizar todas las métricas en formato de exposición de texto"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Content-Type del formato de exposición de texto de Prometheus
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Instancia global
+metrics_registry = MetricsRegistry()
+
+# ============================================================================
+# 📡 Métricas predefinidas del bot
+# ============================================================================
+
+capital_http_requests = metrics_registry.counter(
+    "capital_http_requests_total",
+    "Peticiones HTTP a Capital.com por endpoint y código de estado",
+    ("method", "endpoint", "status"),
+)
+capital_http_latency = metrics_registry.histogram(
+    "capital_http_request_duration_seconds",
+    "Latencia de peticiones HTTP a Capital.com",
+    ("method", "endpoint"),
+)
+capital_session_renew_latency = metrics_registry.histogram(
+    "capital_session_renew_duration_seconds",
+    "Duración de las renovaciones de sesión (login) con Capital.com",
+    ("trigger",),
+)
+capital_rate_limit_waits = metrics_registry.counter(
+    "capital_rate_limit_waits_total",
+    "Esperas por rate limiting / backoff hacia Capital.com",
+    ("reason",),
+)
+capital_rate_limit_wait_seconds = metrics_registry.counter(
+    "capital_rate_limit_wait_seconds_total",
+    "Segundos acumulados esperando por rate limiting / backoff",
+    ("reason",),
+)
+cache_requests = metrics_registry.counter(
+    "cache_requests_total",
+    "Consultas a caches internos por resultado (hit/miss)",
+    ("cache", "result"),
+)
+analysis_cycle_duration = metrics_registry.histogram(
+    "trading_bot_analysis_cycle_duration_seconds",
+    "Duración de los ciclos de análisis del TradingBot",
+)
+monitor_loop_lag = metrics_registry.histogram(
+    "position_monitor_loop_lag_seconds",
+    "Retraso del loop del PositionMonitor respecto al intervalo programado",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+monitor_loop_duration = metrics_registry.histogram(
+    "position_monitor_loop_duration_seconds",
+    "Duración de cada iteración del PositionMonitor",
+)
+signals_generated = metrics_registry.counter(
+    "trading_bot_signals_total",
+    "Señales generadas por estrategia y tipo",
+    ("strategy", "signal_type"),
+)
+order_latency = metrics_registry.histogram(
+    "trading_bot_order_latency_seconds",
+    "Latencia de ejecución de órdenes (paper / real)",
+    ("mode",),
+)
+signal_to_order_latency = metrics_registry.histogram(
+    "trading_bot_signal_to_order_seconds",
+    "Latencia desde la aprobación de la señal hasta el envío de la orden real",
+    ("symbol",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+order_submission_latency = metrics_registry.histogram(
+    "trading_bot_order_submission_seconds",
+    "Duración del envío de la orden real al broker (ida y vuelta)",
+    ("symbol",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Registrar un hit/miss de cache"""
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_rate_limit_wait(reason: str, seconds: float) -> None:
+    """Registrar una espera por rate limiting"""
+    capital_rate_limit_waits.inc(reason=reason)
+    capital_rate_limit_wait_seconds.inc(seconds, reason=reason)
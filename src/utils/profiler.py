@@ -0,0 +1,237 @@
+"""
+🔬 Sampling Profiler bajo demanda
+Muestrea periódicamente las pilas de TODOS los hilos del proceso
+(scheduler del TradingBot, PositionMonitor, workers del executor, API...)
+usando sys._current_frames() y las agrega en formato "collapsed stack",
+listo para flamegraph.pl / speedscope / inferno.
+
+Modos:
+- "duration": perfila durante N segundos
+- "next_cycle": espera al próximo ciclo de análisis del TradingBot y lo
+  perfila exactamente de principio a fin
+
+El muestreo corre en un hilo daemon propio; el overhead está acotado por
+un intervalo mínimo de muestreo, una duración máxima y una profundidad
+máxima de pila.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+# Límites para mantener el overhead acotado
+MIN_INTERVAL_MS = 5
+MAX_INTERVAL_MS = 1000
+MAX_DURATION_SECONDS = 120
+MAX_STACK_DEPTH = 128
+DEFAULT_CYCLE_WAIT_SECONDS = 900
+
+
+class SamplingProfiler:
+    """
+    Profiler por muestreo de pilas de todos los hilos (una sesión a la vez)
+    """
+
+    MODES = ("duration", "next_cycle")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._cycle_started = threading.Event()
+        self._cycle_finished = threading.Event()
+        self._session: Dict[str, Any] = {}
+        self._stacks: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Hooks del ciclo de análisis (llamados por TradingBot)
+    # ------------------------------------------------------------------
+
+    def notify_cycle_start(self):
+        """🔔 Marcar el inicio de un ciclo de análisis"""
+        if self._session.get("status") == "waiting_cycle":
+            self._cycle_finished.clear()
+            self._cycle_started.set()
+
+    def notify_cycle_end(self):
+        """🔔 Marcar el fin de un ciclo de análisis"""
+        if self._cycle_started.is_set():
+            self._cycle_finished.set()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self,
+        mode: str = "duration",
+        seconds: float = 10.0,
+        interval_ms: float = 10.0,
+        wait_timeout: float = DEFAULT_CYCLE_WAIT_SECONDS,
+    ) -> Dict[str, Any]:
+        """
+        🚀 Iniciar una sesión de profiling en segundo plano
+
+        Args:
+            mode: "duration" o "next_cycle"
+            seconds: Duración en modo "duration" (tope en modo "next_cycle")
+            interval_ms: Intervalo entre muestras en milisegundos
+            wait_timeout: Máximo tiempo de espera al próximo ciclo
+
+        Returns:
+            Dict con el estado de la sesión creada
+        """
+        if mode not in self.MODES:
+            return {
+                "success": False,
+                "error": f"Modo inválido: {mode}. Opciones: {list(self.MODES)}",
+            }
+
+        with self._lock:
+            if self.is_running():
+                return {
+                    "success": False,
+                    "error": "Ya hay una sesión de profiling en curso",
+                    "session": self.get_status(),
+                }
+
+            interval_ms = min(max(float(interval_ms), MIN_INTERVAL_MS), MAX_INTERVAL_MS)
+            seconds = min(max(float(seconds), 0.1), MAX_DURATION_SECONDS)
+
+            self._stop_event.clear()
+            self._cycle_started.clear()
+            self._cycle_finished.clear()
+            self._stacks = {}
+            self._session = {
+                "id": uuid.uuid4().hex[:12],
+                "mode": mode,
+                "status": "waiting_cycle" if mode == "next_cycle" else "sampling",
+                "interval_ms": interval_ms,
+                "max_seconds": seconds,
+                "requested_at": datetime.now(pytz.UTC).isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "samples": 0,
+                "elapsed_seconds": 0.0,
+                "error": None,
+            }
+
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(mode, seconds, interval_ms / 1000.0, wait_timeout),
+                daemon=True,
+                name="SamplingProfiler",
+            )
+            self._thread.start()
+
+        logger.info(
+            f"🔬 Profiling started: mode={mode}, max={seconds}s, interval={interval_ms}ms"
+        )
+        return {"success": True, "session": self.get_status()}
+
+    def stop(self) -> Dict[str, Any]:
+        """🛑 Detener la sesión en curso (se conservan las muestras)"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        return {"success": True, "session": self.get_status()}
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado de la sesión actual/última"""
+        status = dict(self._session)
+        status["unique_stacks"] = len(self._stacks)
+        return status
+
+    def get_collapsed(self) -> str:
+        """🔥 Resultado en formato collapsed stack ("a;b;c N" por línea)"""
+        stacks = dict(self._stacks)
+        return "".join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1])
+        )
+
+    # ------------------------------------------------------------------
+    # Muestreo
+    # ------------------------------------------------------------------
+
+    def _run(self, mode: str, seconds: float, interval: float, wait_timeout: float):
+        try:
+            if mode == "next_cycle":
+                logger.info("🔬 Waiting for next analysis cycle to profile...")
+                deadline = time.monotonic() + wait_timeout
+                while not self._cycle_started.wait(timeout=0.5):
+                    if self._stop_event.is_set() or time.monotonic() > deadline:
+                        self._session["status"] = "cancelled"
+                        self._session["error"] = "No se inició ningún ciclo de análisis"
+                        return
+                self._session["status"] = "sampling"
+
+            self._sample(mode, seconds, interval)
+            self._session["status"] = "completed"
+        except Exception as e:
+            logger.error(f"❌ Error in sampling profiler: {e}")
+            self._session["status"] = "error"
+            self._session["error"] = str(e)
+        finally:
+            self._session["finished_at"] = datetime.now(pytz.UTC).isoformat()
+            logger.info(
+                f"🔬 Profiling finished: {self._session.get('samples', 0)} samples, "
+                f"{len(self._stacks)} unique stacks"
+            )
+
+    def _sample(self, mode: str, seconds: float, interval: float):
+        own_ident = threading.get_ident()
+        start = time.monotonic()
+        self._session["started_at"] = datetime.now(pytz.UTC).isoformat()
+        stacks = self._stacks
+
+        while not self._stop_event.is_set():
+            elapsed = time.monotonic() - start
+            if elapsed >= seconds:
+                break
+            if mode == "next_cycle" and self._cycle_finished.is_set():
+                break
+
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                key = self._collapse(names.get(ident, f"thread-{ident}"), frame)
+                stacks[key] = stacks.get(key, 0) + 1
+            frame = None  # No retener frames entre muestras
+
+            self._session["samples"] += 1
+            self._session["elapsed_seconds"] = round(elapsed, 3)
+            time.sleep(interval)
+
+        self._session["elapsed_seconds"] = round(time.monotonic() - start, 3)
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        """Convertir un frame en una línea collapsed (raíz primero)"""
+        parts = []
+        depth = 0
+        while frame is not None and depth < MAX_STACK_DEPTH:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+            depth += 1
+        parts.append(thread_name.replace(" ", "_"))
+        parts.reverse()
+        return ";".join(p.replace(";", ":") for p in parts)
+
+
+# Instancia global
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,261 @@
+"""
+💾 Shared Cache - Cache LRU en memoria, thread-safe y acotado
+Reemplaza los dicts de clase (`_cache` / `_cache_timestamps`) que
+compartían TradingBot, EnhancedTradingStrategy y AdvancedIndicators y que
+se mutaban desde los hilos del executor sin locks:
+
+- Un cache por namespace, con TTL y límites tomados de CacheConfig.
+- Claves repartidas en N stripes, cada una con su lock y su OrderedDict,
+  así hilos que tocan claves distintas no compiten por el mismo lock.
+- Límites globales de entradas y de bytes estimados (no por stripe): al
+  pasarse se desaloja en O(1) (popitem) lo menos usado de la stripe que
+  escribe y, si no alcanza, de las siguientes. Las entradas vencidas se
+  descartan al leerlas.
+- Estadísticas de hits, misses, desalojos y hit ratio.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from . import metrics
+
+_MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    📏 Tamaño aproximado en bytes de un valor cacheado
+
+    Barato a propósito: arrays y DataFrames por su buffer, contenedores
+    sumando un nivel de elementos, objetos por su __dict__.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage):
+        try:
+            return int(memory_usage(index=True).sum())
+        except Exception:
+            pass
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += sys.getsizeof(item)
+            attrs = getattr(item, "__dict__", None)
+            if attrs is not None:
+                size += sys.getsizeof(attrs)
+    else:
+        attrs = getattr(value, "__dict__", None)
+        if attrs is not None:
+            size += sys.getsizeof(attrs)
+    return size
+
+
+_COUNTERS = ("hits", "misses", "evictions", "expirations")
+
+
+class _Stripe:
+    __slots__ = ("lock", "entries", "bytes", "counters")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (value, expires_at monotonic, size)
+        self.entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self.bytes = 0
+        # Contadores por stripe (se actualizan bajo su lock y se suman al leer)
+        self.counters = dict.fromkeys(_COUNTERS, 0)
+
+
+class SharedLRUCache:
+    """
+    💾 Cache LRU con TTL, límites de entradas/bytes y locks por stripe
+
+    Args:
+        namespace: Nombre del cache (etiqueta de métricas)
+        ttl: Segundos de vida por defecto de una entrada
+        max_entries: Entradas máximas del cache (entre todas las stripes)
+        max_bytes: Bytes estimados máximos del cache (entre todas las stripes)
+        stripes: Número de locks independientes (se redondea a potencia de 2)
+
+    Los totales se suman sin lock global: con escrituras concurrentes el
+    cache puede pasarse de forma transitoria en, como mucho, una entrada
+    por hilo escritor; cada escritura deja el cache dentro de los límites.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_entries: int,
+        max_bytes: int,
+        stripes: int = 16,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        n = 1
+        while n < max(1, stripes):
+            n <<= 1
+        self._mask = n - 1
+        self._stripes = [_Stripe() for _ in range(n)]
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self._oversized = 0
+
+    def _stripe(self, key: Hashable) -> _Stripe:
+        return self._stripes[hash(key) & self._mask]
+
+    def _over_budget(self) -> bool:
+        return (
+            sum(len(stripe.entries) for stripe in self._stripes) > self.max_entries
+            or sum(stripe.bytes for stripe in self._stripes) > self.max_bytes
+        )
+
+    @staticmethod
+    def _evict_lru(stripe: _Stripe):
+        _, evicted = stripe.entries.popitem(last=False)
+        stripe.bytes -= evicted[2]
+        stripe.counters["evictions"] += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """📦 Valor vigente de `key` (o `default`)"""
+        stripe = self._stripe(key)
+        now = time.monotonic()
+        with stripe.lock:
+            entry = stripe.entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    stripe.entries.move_to_end(key)
+                    stripe.counters["hits"] += 1
+                    value = entry[0]
+                else:
+                    del stripe.entries[key]
+                    stripe.bytes -= entry[2]
+                    stripe.counters["expirations"] += 1
+                    entry = None
+            if entry is None:
+                stripe.counters["misses"] += 1
+        metrics.record_cache_lookup(self.namespace, entry is not None)
+        return value if entry is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """💾 Guardar `value` (ttl en segundos; por defecto el del namespace)"""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            with self._stripes[0].lock:
+                self._oversized += 1
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        index = hash(key) & self._mask
+        stripe = self._stripes[index]
+        with stripe.lock:
+            previous = stripe.entries.pop(key, None)
+            if previous is not None:
+                stripe.bytes -= previous[2]
+            stripe.entries[key] = (value, expires_at, size)
+            stripe.bytes += size
+            # Primero lo menos usado de esta stripe (nunca la entrada recién escrita)
+            while len(stripe.entries) > 1 and self._over_budget():
+                self._evict_lru(stripe)
+
+        # Sólo queda la entrada nueva aquí: desalojar de las siguientes stripes
+        # (de a un lock por vez, así no hay orden de locks que respetar)
+        for offset in range(1, len(self._stripes)):
+            if not self._over_budget():
+                break
+            other = self._stripes[(index + offset) & self._mask]
+            with other.lock:
+                while other.entries and self._over_budget():
+                    self._evict_lru(other)
+
+    def get_or_set(self, key: Hashable, factory, ttl: Optional[float] = None) -> Any:
+        """Valor cacheado o el resultado de `factory()` (que se guarda)"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl=ttl)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.entries.pop(key, None)
+            if entry is None:
+                return default
+            stripe.bytes -= entry[2]
+            return entry[0]
+
+    def purge_expired(self) -> int:
+        """🧹 Eliminar entradas vencidas (recorre todas las stripes)"""
+        now = time.monotonic()
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                expired = [key for key, entry in stripe.entries.items() if entry[1] <= now]
+                for key in expired:
+                    stripe.bytes -= stripe.entries.pop(key)[2]
+                stripe.counters["expirations"] += len(expired)
+                removed += len(expired)
+        return removed
+
+    def clear(self):
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.entries.clear()
+                stripe.bytes = 0
+
+    def __len__(self) -> int:
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """📊 Tamaño, límites y hit ratio"""
+        stats = {
+            name: sum(stripe.counters[name] for stripe in self._stripes) for name in _COUNTERS
+        }
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "namespace": self.namespace,
+            "entries": len(self),
+            "bytes": sum(stripe.bytes for stripe in self._stripes),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "stripes": len(self._stripes),
+            "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else None,
+            "oversized": self._oversized,
+            **stats,
+        }
+
+
+_caches: Dict[str, SharedLRUCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_shared_cache(namespace: str) -> SharedLRUCache:
+    """💾 Cache del proceso para `namespace` (TTL y límites desde CacheConfig)"""
+    cache = _caches.get(namespace)
+    if cache is not None:
+        return cache
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            try:
+                from src.config.main_config import CacheConfig
+            except ImportError:
+                from config.main_config import CacheConfig
+
+            settings = CacheConfig.get_namespace_settings(namespace)
+            cache = SharedLRUCache(namespace, **settings)
+            _caches[namespace] = cache
+    return cache
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """📊 Estadísticas de todos los caches compartidos"""
+    return {namespace: cache.get_stats() for namespace, cache in list(_caches.items())}
@@ -0,0 +1,476 @@
+"""
+📅 Trading Calendar - Sesiones de mercado precompiladas en rangos UTC
+Compila por símbolo, para una ventana móvil de días, los intervalos de:
+
+- Mercado abierto (sesión local convertida a UTC, DST incluido).
+- Ventana operable: mercado abierto, sin los buffers de apertura/cierre,
+  sin pausas de mediodía y dentro de las horas óptimas UTC del símbolo
+  (symbols_config).
+
+Cada conjunto queda como dos tuplas ordenadas de epochs (inicios/fines),
+así "¿abierto ahora?", "próxima apertura" y "próximo cierre" son búsquedas
+binarias. Toda la conversión de zonas horarias con pytz ocurre al compilar
+(una vez por símbolo y ventana), nunca al consultar.
+"""
+
+import logging
+import threading
+import time as _time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[float, float]
+
+DAY_SECONDS = 86400.0
+# Los intervalos son cerrados [inicio, fin]; al restar uno se deja este margen
+_EPSILON = 1e-3
+
+
+# ----------------------------------------------------------------------
+# Aritmética de intervalos (listas ordenadas y sin solapes)
+# ----------------------------------------------------------------------
+
+
+def _merge(intervals: Iterable[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(i for i in intervals if i[0] <= i[1]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _intersect(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    result: List[Interval] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start <= end:
+            result.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _subtract(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    result: List[Interval] = []
+    j = 0
+    for start, end in a:
+        while j < len(b) and b[j][1] < start:
+            j += 1
+        k = j
+        cursor = start
+        while k < len(b) and b[k][0] <= end:
+            if b[k][0] > cursor:
+                result.append((cursor, b[k][0] - _EPSILON))
+            cursor = max(cursor, b[k][1] + _EPSILON)
+            k += 1
+        if cursor <= end:
+            result.append((cursor, end))
+    return result
+
+
+def _local_ts(tz, day: date, at: time) -> float:
+    """Epoch de `day at` en la zona `tz` (pytz localize resuelve el DST)."""
+    naive = datetime.combine(day, at)
+    try:
+        return tz.localize(naive).timestamp()
+    except AttributeError:
+        return naive.replace(tzinfo=tz).timestamp()
+
+
+def _parse_range(range_str: str) -> Tuple[int, int]:
+    """'HH:MM-HH:MM' -> (segundos desde medianoche inicio, fin)"""
+    start_str, end_str = range_str.split("-")
+    sh, sm = map(int, start_str.split(":"))
+    eh, em = map(int, end_str.split(":"))
+    return sh * 3600 + sm * 60, eh * 3600 + em * 60
+
+
+def fmt_utc(ts: Optional[float]) -> str:
+    if ts is None:
+        return "n/a"
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%a %H:%M")
+
+
+@dataclass(frozen=True)
+class SessionSet:
+    """⏱️ Intervalos UTC ordenados con consultas por búsqueda binaria"""
+
+    starts: Tuple[float, ...]
+    ends: Tuple[float, ...]
+
+    @classmethod
+    def from_intervals(cls, intervals: List[Interval]) -> "SessionSet":
+        return cls(tuple(s for s, _ in intervals), tuple(e for _, e in intervals))
+
+    def locate(self, ts: float) -> int:
+        """Índice del intervalo que contiene `ts` o -1"""
+        i = bisect_right(self.starts, ts) - 1
+        return i if i >= 0 and ts <= self.ends[i] else -1
+
+    def contains(self, ts: float) -> bool:
+        return self.locate(ts) >= 0
+
+    def next_start(self, ts: float) -> Optional[float]:
+        i = bisect_right(self.starts, ts)
+        return self.starts[i] if i < len(self.starts) else None
+
+    def current_end(self, ts: float) -> Optional[float]:
+        i = self.locate(ts)
+        return self.ends[i] if i >= 0 else None
+
+    def next_end(self, ts: float) -> Optional[float]:
+        """Fin del intervalo actual o, si está fuera, del siguiente"""
+        i = self.locate(ts)
+        if i >= 0:
+            return self.ends[i]
+        i = bisect_right(self.starts, ts)
+        return self.ends[i] if i < len(self.ends) else None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+@dataclass(frozen=True)
+class SymbolCalendar:
+    """📅 Sesiones compiladas de un símbolo para una ventana"""
+
+    symbol: str
+    market_type: str
+    zone: str
+    always_open: bool
+    open: SessionSet
+    tradable: SessionSet
+    # Componentes de la ventana operable (sólo para explicar bloqueos)
+    buffered: SessionSet
+    lunch: SessionSet
+    optimal: Optional[SessionSet]  # None = sin restricción
+    optimal_text: str
+    open_buffer_min: int
+    close_buffer_min: int
+
+
+class TradingCalendar:
+    """
+    📅 Calendario de trading precompilado sobre la config de MarketHoursChecker
+
+    Args:
+        checker: MarketHoursChecker con horarios, buffers y pausas por símbolo
+        optimal_hours_provider: symbol -> config con "optimal_hours" (UTC)
+        window_days: Días futuros compilados
+        lookback_days: Días pasados compilados (sesiones que cruzan medianoche)
+        rebuild_margin_days: Recompilar cuando quede menos que esto de ventana
+    """
+
+    def __init__(
+        self,
+        checker,
+        optimal_hours_provider: Callable[[str], Dict[str, Any]],
+        window_days: int = 14,
+        lookback_days: int = 1,
+        rebuild_margin_days: int = 2,
+    ):
+        self.checker = checker
+        self.optimal_hours_provider = optimal_hours_provider
+        self.window_days = max(rebuild_margin_days + 1, window_days)
+        self.lookback_days = max(1, lookback_days)
+        self.rebuild_margin = rebuild_margin_days * DAY_SECONDS
+        self._window: Tuple[float, float] = (0.0, 0.0)
+        self._symbols: Dict[str, SymbolCalendar] = {}
+        self._lock = threading.Lock()
+        self.stats = {"compilations": 0, "window_rebuilds": 0, "queries": 0}
+
+    # ------------------------------------------------------------------
+    # Compilación
+    # ------------------------------------------------------------------
+
+    def _ensure_window(self, ts: float) -> Tuple[float, float]:
+        window_from, window_until = self._window
+        if window_from <= ts <= window_until - self.rebuild_margin:
+            return self._window
+        with self._lock:
+            window_from, window_until = self._window
+            if not (window_from <= ts <= window_until - self.rebuild_margin):
+                day_start = ts - (ts % DAY_SECONDS)
+                self._window = (
+                    day_start - self.lookback_days * DAY_SECONDS,
+                    day_start + (self.window_days + 1) * DAY_SECONDS,
+                )
+                # Reemplazar (no vaciar) para que los lectores en curso no fallen
+                self._symbols = {}
+                self.stats["window_rebuilds"] += 1
+        return self._window
+
+    def _optimal_intervals(
+        self, symbol: str, days: List[date]
+    ) -> Tuple[Optional[List[Interval]], str]:
+        try:
+            ranges_raw = self.optimal_hours_provider(symbol).get("optimal_hours", [])
+        except Exception as e:
+            logger.warning(f"Error reading optimal hours for {symbol}: {e}")
+            return None, "error – default allow"
+        if not ranges_raw:
+            return None, "none configured – default allow"
+        if any(r.strip().upper() == "24/5" for r in ranges_raw):
+            return None, "24/5"
+
+        parsed = []
+        for r in ranges_raw:
+            try:
+                parsed.append(_parse_range(r))
+            except Exception:
+                logger.warning(f"Invalid optimal_hours range for {symbol}: '{r}'")
+        text = ", ".join(
+            f"{s // 3600:02d}:{s % 3600 // 60:02d}-{e // 3600:02d}:{e % 3600 // 60:02d}"
+            for s, e in parsed
+        )
+
+        intervals = []
+        for day in days:
+            midnight = datetime.combine(day, time(0, 0), tzinfo=timezone.utc).timestamp()
+            for start, end in parsed:
+                if start <= end:
+                    intervals.append((midnight + start, midnight + end))
+                else:
+                    # Cruza medianoche
+                    intervals.append((midnight + start, midnight + DAY_SECONDS + end))
+        return _merge(intervals), text
+
+    def _compile(self, symbol: str, window: Tuple[float, float]) -> SymbolCalendar:
+        checker = self.checker
+        window_from, window_until = window
+        market_type = checker.get_market_type(symbol)
+        config = checker.symbol_specific_hours.get(symbol, checker.market_hours[market_type])
+        tz = config["timezone"]
+        zone = getattr(tz, "zone", str(tz))
+
+        first_day = datetime.fromtimestamp(window_from, timezone.utc).date() - timedelta(days=1)
+        n_days = int((window_until - window_from) // DAY_SECONDS) + 2
+        days = [first_day + timedelta(days=k) for k in range(n_days)]
+
+        # 1) Mercado abierto
+        if config["always_open"] and market_type == "CRYPTO":
+            open_intervals = [(window_from, window_until)]
+        elif config["always_open"]:
+            # Forex: de domingo 22:00 UTC a sábado 00:00 UTC
+            open_intervals = []
+            for day in days:
+                if day.weekday() == 6:
+                    sunday_open = datetime.combine(day, time(22, 0), tzinfo=timezone.utc)
+                    saturday = sunday_open.replace(hour=0) + timedelta(days=6)
+                    open_intervals.append(
+                        (sunday_open.timestamp(), saturday.timestamp() - _EPSILON)
+                    )
+            # La semana en curso pudo abrir antes del primer domingo de la ventana
+            first_sunday = next(d for d in days if d.weekday() == 6)
+            previous_open = datetime.combine(
+                first_sunday - timedelta(days=7), time(22, 0), tzinfo=timezone.utc
+            )
+            open_intervals.append(
+                (
+                    previous_open.timestamp(),
+                    (previous_open.replace(hour=0) + timedelta(days=6)).timestamp() - _EPSILON,
+                )
+            )
+            open_intervals = _merge(open_intervals)
+        else:
+            open_intervals = _merge(
+                (_local_ts(tz, day, config["open_time"]), _local_ts(tz, day, config["close_time"]))
+                for day in days
+                if day.weekday() in config["days"]
+            )
+
+        # 2) Ventana diaria sin buffers de apertura/cierre (todos los días, como should_trade)
+        buffers = checker.symbol_buffers.get(symbol, {})
+        open_buffer = buffers.get("open_buffer", checker.default_open_buffer_min)
+        close_buffer = buffers.get("close_buffer", checker.default_close_buffer_min)
+        buffered = _merge(
+            (
+                _local_ts(tz, day, config["open_time"]) + open_buffer * 60,
+                _local_ts(tz, day, config["close_time"]) - close_buffer * 60,
+            )
+            for day in days
+        )
+
+        # 3) Pausas de mediodía (hora local)
+        lunch = _merge(
+            (_local_ts(tz, day, start), _local_ts(tz, day, end))
+            for day in days
+            for start, end in checker.symbol_lunch_breaks.get(symbol, [])
+        )
+
+        # 4) Horas óptimas UTC del símbolo
+        optimal, optimal_text = self._optimal_intervals(symbol, days)
+
+        tradable = _intersect(open_intervals, buffered)
+        if optimal is not None:
+            tradable = _intersect(tradable, optimal)
+        tradable = _subtract(tradable, lunch)
+
+        self.stats["compilations"] += 1
+        return SymbolCalendar(
+            symbol=symbol,
+            market_type=market_type,
+            zone=zone,
+            always_open=bool(config["always_open"]),
+            open=SessionSet.from_intervals(open_intervals),
+            tradable=SessionSet.from_intervals(tradable),
+            buffered=SessionSet.from_intervals(buffered),
+            lunch=SessionSet.from_intervals(lunch),
+            optimal=SessionSet.from_intervals(optimal) if optimal is not None else None,
+            optimal_text=optimal_text,
+            open_buffer_min=open_buffer,
+            close_buffer_min=close_buffer,
+        )
+
+    def get(self, symbol: str, ts: Optional[float] = None) -> Tuple[SymbolCalendar, float]:
+        """Calendario compilado del símbolo que cubre `ts` (epoch; por defecto ahora)"""
+        ts = _time.time() if ts is None else ts
+        window = self._ensure_window(ts)
+        self.stats["queries"] += 1
+        calendar = self._symbols.get(symbol)
+        if calendar is None:
+            calendar = self._compile(symbol, window)
+            with self._lock:
+                # Si la ventana cambió mientras compilábamos, no guardar la vieja
+                if self._window == window:
+                    symbols = dict(self._symbols)
+                    symbols[symbol] = calendar
+                    self._symbols = symbols
+        return calendar, ts
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def is_open(self, symbol: str, ts: Optional[float] = None) -> bool:
+        calendar, ts = self.get(symbol, ts)
+        return calendar.open.contains(ts)
+
+    def next_open(self, symbol: str, ts: Optional[float] = None) -> Optional[float]:
+        """Epoch de la próxima apertura (None si ya está abierto o fuera de ventana)"""
+        calendar, ts = self.get(symbol, ts)
+        if calendar.open.contains(ts):
+            return None
+        return calendar.open.next_start(ts)
+
+    def next_close(self, symbol: str, ts: Optional[float] = None) -> Optional[float]:
+        """Epoch del cierre de la sesión actual (o de la siguiente si está cerrado)"""
+        calendar, ts = self.get(symbol, ts)
+        return calendar.open.next_end(ts)
+
+    def is_tradable(self, symbol: str, ts: Optional[float] = None) -> bool:
+        calendar, ts = self.get(symbol, ts)
+        return calendar.tradable.contains(ts)
+
+    def next_tradable(self, symbol: str, ts: Optional[float] = None) -> Optional[float]:
+        calendar, ts = self.get(symbol, ts)
+        if calendar.tradable.contains(ts):
+            return ts
+        return calendar.tradable.next_start(ts)
+
+    def tradable_symbols(self, symbols: Iterable[str], ts: Optional[float] = None) -> List[str]:
+        """🔎 Filtrar los símbolos operables en `ts` (para saltar mercados cerrados)"""
+        ts = _time.time() if ts is None else ts
+        return [symbol for symbol in symbols if self.is_tradable(symbol, ts)]
+
+    def explain(self, symbol: str, ts: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        🧾 (operable, motivo) en el formato de MarketHoursChecker.should_trade
+
+        El motivo sale de los componentes compilados, sin conversiones de zona.
+        """
+        calendar, ts = self.get(symbol, ts)
+        if calendar.tradable.contains(ts):
+            until = calendar.tradable.current_end(ts)
+            return True, (
+                f"Trading allowed: {symbol} window active until {fmt_utc(until)} UTC "
+                f"(optimal UTC {calendar.optimal_text})"
+            )
+        next_window = calendar.tradable.next_start(ts)
+        if not calendar.open.contains(ts):
+            reason = (
+                f"{calendar.market_type} market is closed "
+                f"(opens {fmt_utc(calendar.open.next_start(ts))} UTC)"
+            )
+        elif calendar.lunch.contains(ts):
+            reason = f"lunch break until {fmt_utc(calendar.lunch.current_end(ts))} UTC ({calendar.zone})"
+        elif not calendar.buffered.contains(ts):
+            reason = (
+                f"within open/close buffer ({calendar.open_buffer_min}m/"
+                f"{calendar.close_buffer_min}m, {calendar.zone})"
+            )
+        else:
+            reason = f"outside {symbol} optimal hours (UTC {calendar.optimal_text})"
+        return False, f"Trading blocked: {reason} | next window {fmt_utc(next_window)} UTC"
+
+    def session_mask(self, symbol: str, timestamps, tradable: bool = False):
+        """
+        🧮 Máscara booleana "dentro de sesión" para un array de timestamps
+
+        Compila las sesiones del rango cubierto por `timestamps` (sin tocar la
+        ventana móvil) y resuelve todas las barras con un único
+        `np.searchsorted`, así que sirve para millones de velas.
+
+        Args:
+            symbol: Símbolo del activo
+            timestamps: Array datetime64 (naive = UTC, como en NumPy) o
+                cualquier cosa convertible con `np.asarray(...).astype("datetime64[ns]")`
+            tradable: Usar la ventana operable (buffers, pausas y horas
+                óptimas) en lugar del horario de mercado abierto
+
+        Returns:
+            np.ndarray[bool] con la misma forma que `timestamps` (NaT -> False)
+        """
+        import numpy as np
+
+        values = np.asarray(timestamps)
+        if values.dtype.kind != "M":
+            values = values.astype("datetime64[ns]")
+        values = values.astype("datetime64[ns]")
+        valid = ~np.isnat(values)
+        mask = np.zeros(values.shape, dtype=bool)
+        if not valid.any():
+            return mask
+
+        seconds = values.astype(np.int64) / 1e9
+        lo = float(seconds[valid].min())
+        hi = float(seconds[valid].max())
+        window = (lo - lo % DAY_SECONDS - DAY_SECONDS, hi - hi % DAY_SECONDS + 2 * DAY_SECONDS)
+        calendar = self._compile(symbol, window)
+        sessions = calendar.tradable if tradable else calendar.open
+        if not len(sessions):
+            return mask
+
+        starts = np.asarray(sessions.starts)
+        ends = np.asarray(sessions.ends)
+        idx = np.searchsorted(starts, seconds, side="right") - 1
+        inside = (idx >= 0) & (seconds <= ends[np.maximum(idx, 0)])
+        return inside & valid
+
+    def invalidate(self):
+        """🧹 Descartar lo compilado (tras cambiar horarios o símbolos)"""
+        with self._lock:
+            self._window = (0.0, 0.0)
+            self._symbols = {}
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del calendario"""
+        window_from, window_until = self._window
+        return {
+            "symbols_compiled": len(self._symbols),
+            "window_from": fmt_utc(window_from) if window_from else None,
+            "window_until": fmt_utc(window_until) if window_until else None,
+            "window_days": self.window_days,
+            **self.stats,
+        }
@@ -0,0 +1,11 @@
+"""
+Configuración común de pytest: asegura que el proyecto esté en sys.path
+para importar 'src.*' igual que main.py y los scripts.
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,101 @@
+"""Tests del pool acotado de llamadas bloqueantes de la API (main.run_blocking)"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    name = f"test_endpoint_{time.monotonic_ns()}"
+    monkeypatch.setitem(main.ENDPOINT_LIMITS, name, (2, 0.5))
+    yield name
+    main._endpoint_semaphores.pop(name, None)
+
+
+def test_run_blocking_returns_result_off_event_loop(endpoint):
+    loop_thread = threading.get_ident()
+
+    async def scenario():
+        return await main.run_blocking(endpoint, lambda x: (x * 2, threading.get_ident()), 21)
+
+    value, worker_thread = asyncio.run(scenario())
+    assert value == 42
+    assert worker_thread != loop_thread
+
+
+def test_run_blocking_caps_concurrency_per_endpoint(endpoint):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def work():
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+
+    async def scenario():
+        await asyncio.gather(*(main.run_blocking(endpoint, work) for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert state["peak"] == 2
+
+
+def test_run_blocking_times_out_with_504_and_releases_slot_later(endpoint):
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(HTTPException) as exc:
+            await main.run_blocking(endpoint, release.wait)
+        assert exc.value.status_code == 504
+        # El worker sigue ocupando su hueco hasta terminar de verdad
+        semaphore = main._endpoint_semaphores[endpoint]
+        assert semaphore._value == 1
+        release.set()
+        for _ in range(50):
+            if semaphore._value == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert semaphore._value == 2
+
+    asyncio.run(scenario())
+
+
+def test_health_answers_while_analysis_endpoints_fill_the_general_pool():
+    release = threading.Event()
+    slow = [
+        name
+        for name, (limit, _) in main.ENDPOINT_LIMITS.items()
+        if name not in main.STATUS_ENDPOINTS
+        for _ in range(limit)
+    ]
+
+    async def scenario():
+        analyses = [asyncio.create_task(main.run_blocking(name, release.wait)) for name in slow]
+        # Arranque / tareas en segundo plano sobre el mismo pool general
+        startup = [main.api_executor.submit(release.wait) for _ in range(main.API_WORKER_POOL_SIZE)]
+        await asyncio.sleep(0.05)
+        try:
+            health_timeout = main.ENDPOINT_LIMITS["health"][1]
+            started = time.monotonic()
+            results = await asyncio.gather(
+                main.run_blocking("health", lambda: "ok"),
+                main.run_blocking("status", lambda: "ok"),
+                main.run_blocking("dashboard", lambda: "ok"),
+            )
+            assert results == ["ok"] * 3
+            assert time.monotonic() - started < min(1.0, health_timeout)
+        finally:
+            release.set()
+            await asyncio.gather(*analyses)
+            for future in startup:
+                future.result(timeout=5)
+
+    asyncio.run(scenario())
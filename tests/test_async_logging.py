@@ -0,0 +1,121 @@
+"""Tests del logging asíncrono (src/utils/async_logging.py)"""
+
+import logging
+
+import pytest
+
+from src.config.main_config import LoggingConfig
+from src.utils.async_logging import AUDIT, AsyncLogging, RateLimitSamplingFilter
+
+
+def _record(name="src.core.trading_bot", lineno=10, level=logging.INFO, msg="tick", **extra):
+    record = logging.LogRecord(name, level, __file__, lineno, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def _filter(**kwargs):
+    options = dict(
+        rate_per_second=0.0, burst=1, sample_window=60.0, sample_after=1000, sample_every=1
+    )
+    options.update(kwargs)
+    return RateLimitSamplingFilter(**options)
+
+
+def test_rate_limit_is_per_call_site():
+    log_filter = _filter(rate_per_second=1e-9, burst=3)
+    noisy = [log_filter.filter(_record(lineno=10)) for _ in range(10)]
+    assert noisy.count(True) == 3
+    # Otro punto de llamada del mismo módulo conserva su propio cupo
+    assert log_filter.filter(_record(lineno=20))
+    assert log_filter.stats["rate_limited"] == 7
+
+
+def test_repeated_messages_are_sampled_and_report_omissions():
+    log_filter = _filter(sample_after=2, sample_every=5)
+    passed = [r for r in (_record() for _ in range(12)) if log_filter.filter(r)]
+    # 2 sin muestrear + la 7ª y la 12ª
+    assert len(passed) == 4
+    assert passed[-1].msg == "tick [+4 similares omitidos]"
+    assert log_filter.stats["sampled_out"] == 8
+
+
+def test_warnings_audit_records_and_unlimited_loggers_are_never_dropped():
+    log_filter = _filter(
+        rate_per_second=1e-9, burst=1, unlimited_loggers=("src.core.capital_client",)
+    )
+    assert log_filter.filter(_record())
+    assert not log_filter.filter(_record())
+
+    assert all(log_filter.filter(_record(level=logging.WARNING)) for _ in range(5))
+    assert all(log_filter.filter(_record(**AUDIT)) for _ in range(5))
+    assert all(log_filter.filter(_record(name="src.core.capital_client")) for _ in range(5))
+    other = [log_filter.filter(_record(name="src.core.capital_clientx")) for _ in range(2)]
+    assert other == [True, False]
+
+
+@pytest.fixture
+def isolated_root():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    for handler in handlers:
+        root.removeHandler(handler)
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_install_routes_records_through_the_queue_and_uninstall_restores(isolated_root):
+    sink = _ListHandler()
+    isolated_root.addHandler(sink)
+    isolated_root.setLevel(logging.INFO)
+
+    assert LoggingConfig.ASYNC_LOGGING_ENABLED
+    pipeline = AsyncLogging()
+    assert pipeline.install(queue_size=100, rate_per_second=0.0)
+    assert pipeline.install()  # idempotente
+    queue_handler = pipeline._handler
+    assert sink not in isolated_root.handlers and queue_handler in isolated_root.handlers
+
+    logging.getLogger("tests.async").info("order %s", "US500")
+    pipeline.uninstall()
+
+    assert sink.messages == ["order US500"]
+    assert sink in isolated_root.handlers and queue_handler not in isolated_root.handlers
+    assert pipeline.get_status() == {"enabled": False}
+
+
+def test_full_queue_drops_info_but_writes_audit_and_warnings_synchronously():
+    import queue
+
+    from src.utils.async_logging import NonBlockingQueueHandler
+
+    sink = _ListHandler()
+    log_filter = _filter()
+    handler = NonBlockingQueueHandler(
+        queue.Queue(maxsize=1),
+        fallback_handlers=[sink],
+        keep=log_filter.exempt,
+        block_timeout=0.01,
+    )
+    handler.handle(_record(msg="fills the queue"))
+
+    handler.handle(_record(msg="chatter"))
+    handler.handle(_record(msg="order US500 filled", **AUDIT))
+    handler.handle(_record(msg="broker timeout", level=logging.WARNING))
+
+    assert sink.messages == ["order US500 filled", "broker timeout"]
+    assert handler.dropped == 1 and handler.written_synchronously == 2
+    assert handler.queue.get_nowait().msg == "fills the queue"
@@ -0,0 +1,107 @@
+"""Tests del decision log columnar (src/core/decision_log.py)"""
+
+import os
+import time
+from types import SimpleNamespace
+
+from src.core.decision_log import (
+    DecisionLog,
+    iter_records,
+    list_segments,
+    query_decisions,
+    summarize_decisions,
+)
+
+
+def _signal(symbol="US500", strategy="Trend", price=5000.0):
+    return SimpleNamespace(
+        symbol=symbol, strategy_name=strategy, signal_type="BUY", confidence_score=80.0, price=price
+    )
+
+
+def _log(tmp_path, **kwargs):
+    options = dict(segment_records=1000, flush_interval=60.0)
+    options.update(kwargs)
+    return DecisionLog(str(tmp_path), **options)
+
+
+def test_traces_round_trip_through_segments(tmp_path):
+    log = _log(tmp_path)
+    log.start()
+    try:
+        trace = log.begin(_signal())
+        trace.check("confidence", True)
+        trace.note(adx=31.5, atr_ratio="n/a")
+        trace.check("mtf", False, "MTF desalineado")
+        trace.finish()
+        trace.finish("executed")  # sólo cuenta la primera
+
+        trace = log.begin(_signal(symbol="GOLD"))
+        trace.check("confidence", True)
+        trace.finish("executed")
+        assert log.flush()
+    finally:
+        log.stop()
+
+    assert len(list_segments(str(tmp_path))) == 1
+    blocked = query_decisions(str(tmp_path), failed_filter="mtf")
+    (record,) = list(iter_records(blocked))
+    assert record["symbol"] == "US500" and record["action"] == "filtered"
+    assert record["reason"] == "MTF desalineado"
+    assert record["passed"] == ["confidence"] and record["blocked_by"] == ["mtf"]
+    assert record["indicators"] == {"price": 5000.0, "adx": 31.5}
+
+    summary = summarize_decisions(query_decisions(str(tmp_path)))
+    assert summary["records"] == 2
+    assert summary["actions"] == {"executed": 1, "filtered": 1}
+    assert summary["filters"]["confidence"]["evaluated"] == 2
+    assert summary["filters"]["mtf"]["blocked"] == 1
+    assert query_decisions(str(tmp_path), symbol="GOLD", action="filtered") == {}
+
+
+def test_traces_are_discarded_without_a_writer(tmp_path):
+    log = _log(tmp_path)
+    log.begin(_signal()).finish("executed")
+    assert log.get_status()["pending"] == 0
+    assert log.stats["not_running"] == 1
+
+    log.start()
+    log.stop()
+    log.begin(_signal()).finish("executed")
+    assert log.get_status()["pending"] == 0
+    assert log.stats["not_running"] == 2
+
+
+def _write(log, ts):
+    trace = log.begin(_signal())
+    trace.ts = ts
+    trace.finish("executed")
+    log._write_segment([log._queue.get_nowait()])
+
+
+def test_retention_is_bounded_by_age(tmp_path):
+    log = _log(tmp_path, retention_days=1)
+    log._thread = object()  # encolar sin hilo escritor
+    now = time.time()
+    for days_ago in (3, 2, 0.5, 0):
+        _write(log, now - days_ago * 86400)
+
+    remaining = query_decisions(str(tmp_path))["ts"]
+    assert len(list_segments(str(tmp_path))) == 2
+    assert remaining.min() >= now - 86400
+
+
+def test_retention_is_bounded_by_size_but_keeps_the_newest(tmp_path):
+    log = _log(tmp_path, retention_days=0, max_bytes=1)
+    log._thread = object()
+    now = time.time()
+    for i in range(3):
+        _write(log, now + i)
+    (newest,) = list_segments(str(tmp_path))
+    assert query_decisions(str(tmp_path))["ts"].tolist() == [now + 2]
+
+    log.max_bytes = 3 * os.path.getsize(newest)
+    for i in range(3, 8):
+        _write(log, now + i)
+    assert len(list_segments(str(tmp_path))) == 3
+    assert log.stats["rotated"] == 5
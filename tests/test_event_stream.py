@@ -0,0 +1,60 @@
+"""Tests del ring buffer de eventos con cursores por suscriptor (src/utils/event_stream.py)"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.utils.event_stream import EventStream, SubscriberLagged, format_sse
+
+
+def test_subscribers_read_independently_from_their_cursor():
+    stream = EventStream(capacity=8)
+    early = stream.subscribe()
+    stream.publish("signal_generated", {"n": 1})
+    late = stream.subscribe()
+    stream.publish("signal_generated", {"n": 2})
+
+    assert [e["data"]["n"] for e in early.poll()] == [1, 2]
+    assert [e["data"]["n"] for e in late.poll()] == [2]
+    assert early.poll() == []
+
+
+def test_resume_from_last_event_id_and_clamp_to_window():
+    stream = EventStream(capacity=4)
+    for n in range(1, 7):
+        stream.publish("tick", {"n": n})
+
+    resumed = stream.subscribe(last_event_id=4)
+    assert [e["seq"] for e in resumed.poll()] == [5, 6]
+    # Secuencia ya sobrescrita: se reanuda desde la más antigua disponible
+    clamped = stream.subscribe(last_event_id=0)
+    assert [e["seq"] for e in clamped.poll()] == [3, 4, 5, 6]
+
+
+def test_slow_subscriber_is_dropped_instead_of_blocking_producer():
+    stream = EventStream(capacity=4)
+    slow = stream.subscribe()
+    for n in range(10):
+        stream.publish("tick", {"n": n})
+    with pytest.raises(SubscriberLagged):
+        slow.poll()
+    assert stream.get_status()["subscribers_dropped"] == 1
+
+
+def test_wait_is_woken_by_publish_from_another_thread():
+    stream = EventStream(capacity=8)
+
+    async def scenario():
+        subscription = stream.subscribe()
+        subscription.attach_loop()
+        threading.Timer(0.05, stream.publish, args=("trade", {"id": 1})).start()
+        assert await subscription.wait(timeout=2.0)
+        events = subscription.poll()
+        subscription.close()
+        return events
+
+    events = asyncio.run(scenario())
+    assert events[0]["type"] == "trade"
+    assert stream.get_status()["subscribers"] == 0
+    assert format_sse(events[0]).startswith("id: 1\nevent: trade\ndata: ")
@@ -0,0 +1,48 @@
+"""Tests del presupuesto de import en frío (scripts/check_import_time.py)"""
+
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_spec = importlib.util.spec_from_file_location(
+    "check_import_time", os.path.join(PROJECT_ROOT, "scripts", "check_import_time.py")
+)
+check_import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_import_time)
+
+BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "1.0"))
+
+
+def _run(code: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_cold_import_of_main_is_within_budget_and_defers_heavy_modules():
+    results = [check_import_time.measure_once() for _ in range(3)]
+    assert statistics.median(r["elapsed"] for r in results) <= BUDGET
+    assert all(r["loaded"] == [] for r in results)
+    # -X importtime se parsea (lo usa el script para mostrar los más lentos)
+    assert any(module.strip() == "main" for _, module in results[-1]["importtime"])
+
+
+def test_src_core_loads_engine_modules_only_on_attribute_access():
+    modules = ["pandas", "src.core.trading_bot", "src.core.paper_trader"]
+    loaded = _run(
+        "import json, sys\n"
+        "import src.core\n"
+        f"before = [m for m in {modules!r} if m in sys.modules]\n"
+        "src.core.PaperTrader\n"
+        f"after = [m for m in {modules!r} if m in sys.modules]\n"
+        "print(json.dumps({'before': before, 'after': after}))\n"
+    )
+    assert loaded["before"] == []
+    assert "src.core.paper_trader" in loaded["after"]
+    assert "src.core.trading_bot" not in loaded["after"]
@@ -0,0 +1,97 @@
+"""Tests del cache de metadatos de instrumentos (src/core/instrument_cache.py)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.instrument_cache import InstrumentMetadataCache
+
+
+class _Fetcher:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, epics):
+        self.calls.append(list(epics))
+        if self.fail:
+            return {"success": False, "error": "HTTP 503"}
+        return {
+            "success": True,
+            "instruments": {
+                epic: {"min_deal_size": 0.5, "trailing_preference": "AVAILABLE"} for epic in epics
+            },
+        }
+
+
+def test_warm_batches_and_reads_never_refetch():
+    fetcher = _Fetcher()
+    cache = InstrumentMetadataCache(fetcher, ttl=3600, refresh_interval=60, batch_size=2)
+    assert cache.warm(["A", "B", "C", "A"]) == 3
+    assert fetcher.calls == [["A", "B"], ["C"]]
+
+    entry, error = cache.get("B")
+    assert error is None and entry.min_deal_size == 0.5 and entry.trailing_supported
+    assert entry.dealing_rules()["cached"] is True
+    assert len(fetcher.calls) == 2 and cache.stats["hits"] == 1
+
+
+def test_unknown_epic_is_fetched_once_inline_unless_disabled():
+    fetcher = _Fetcher()
+    cache = InstrumentMetadataCache(fetcher, ttl=3600, refresh_interval=60)
+    assert cache.get("NEW", allow_fetch=False) == (None, "Instrument not cached")
+    assert fetcher.calls == []
+
+    entry, _ = cache.get("NEW")
+    cache.get("NEW")
+    assert entry.epic == "NEW" and fetcher.calls == [["NEW"]]
+
+
+def test_expired_entry_is_served_and_refreshed_in_background(monkeypatch):
+    fetcher = _Fetcher()
+    cache = InstrumentMetadataCache(fetcher, ttl=10, refresh_interval=60)
+    cache.warm(["A"])
+    fetched_at = cache._entries["A"].fetched_at
+
+    monkeypatch.setattr("src.core.instrument_cache.time.monotonic", lambda: fetched_at + 11)
+    entry, error = cache.get("A")
+    assert entry is not None and error is None
+    assert cache.stats["stale_hits"] == 1 and cache.get_status()["stale"] == 1
+
+    assert cache.refresh_stale() == 1
+    assert fetcher.calls[-1] == ["A"] and cache.get_status()["stale"] == 0
+
+
+def test_fetch_errors_are_reported_without_caching():
+    cache = InstrumentMetadataCache(_Fetcher(fail=True), ttl=3600, refresh_interval=60)
+    entry, error = cache.get("A")
+    assert entry is None and error == "HTTP 503"
+    assert cache.stats["errors"] == 1
+
+
+def test_background_refresh_thread_starts_and_stops():
+    cache = InstrumentMetadataCache(_Fetcher(), ttl=3600, refresh_interval=0.01)
+    cache.start_background_refresh()
+    assert cache.get_status()["background_refresh"] is True
+    cache.stop_background_refresh()
+    assert cache.get_status()["background_refresh"] is False
+
+
+def test_atr_history_uses_the_requested_span():
+    from src.core.advanced_indicators import AdvancedIndicators
+
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    df = pd.DataFrame({"high": close + 1, "low": close - 1, "close": close})
+    AdvancedIndicators.record_atr_history("TEST", "1h", df)
+
+    prev_close = df["close"].shift(1)
+    true_range = pd.concat(
+        [df["high"] - df["low"], (df["high"] - prev_close).abs(), (df["low"] - prev_close).abs()],
+        axis=1,
+    ).max(axis=1)
+    for span in (5, 20):
+        atr = AdvancedIndicators.get_atr_history("TEST", "1h", span=span)
+        expected = true_range.ewm(span=span).mean().to_numpy()[-len(atr) :]
+        assert len(atr) == AdvancedIndicators.ATR_HISTORY_LENGTH
+        assert atr[-1] == pytest.approx(expected[-1], rel=1e-6)
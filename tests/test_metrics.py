@@ -0,0 +1,91 @@
+"""Tests del registro de métricas en formato Prometheus (src/utils/metrics.py)"""
+
+import threading
+
+import pytest
+
+from src.utils.metrics import MetricsRegistry
+
+
+def test_counter_sums_shards_from_many_threads():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_events_total", "Eventos", ["kind"])
+    threads_count, per_thread = 8, 5000
+
+    def worker():
+        for _ in range(per_thread):
+            counter.inc(kind="a")
+
+    threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.values() == {("a",): float(threads_count * per_thread)}
+    assert f'test_events_total{{kind="a"}} {threads_count * per_thread}' in registry.render()
+
+
+def test_counter_rejects_negative_and_wrong_labels():
+    counter = MetricsRegistry().counter("test_c", "C", ["kind"])
+    with pytest.raises(ValueError):
+        counter.inc(-1, kind="a")
+    with pytest.raises(ValueError):
+        counter.inc(other="a")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_latency_seconds", "Latencia", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "test_latency_seconds_count 4" in text
+    assert "test_latency_seconds_sum 6.05" in text
+
+
+def test_histogram_timer_observes_block():
+    histogram = MetricsRegistry().histogram("test_timer_seconds", "T", ["mode"])
+    with histogram.time(mode="paper"):
+        pass
+    assert histogram.values()[("paper",)][-1] == 1
+
+
+def test_registry_rejects_type_conflict_and_escapes_labels():
+    registry = MetricsRegistry()
+    registry.counter("test_dup", "D", ["endpoint"]).inc(endpoint='a"b\nc')
+    with pytest.raises(ValueError):
+        registry.gauge("test_dup", "D")
+    assert 'test_dup{endpoint="a\\"b\\nc"} 1' in registry.render()
+
+
+def test_shards_of_finished_threads_are_folded_into_the_base_value():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_folded_total", "Eventos", ["kind"])
+    histogram = registry.histogram("test_folded_seconds", "Latencia", buckets=(1.0,))
+
+    def worker():
+        counter.inc(kind="a")
+        histogram.observe(0.5)
+
+    for _ in range(3):
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.values()
+        histogram.values()
+
+    counter.inc(kind="a")  # shard del hilo de test (vivo)
+    assert counter.values() == {("a",): 31.0}
+    assert histogram.values() == {(): [30, 15.0, 30]}
+    assert len(counter._shards) == 1 and len(histogram._shards) == 0
+
+    # El valor base no se comparte con lo devuelto
+    histogram.values()[()][0] = 0
+    assert histogram.values()[()][0] == 30
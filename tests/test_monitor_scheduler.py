@@ -0,0 +1,53 @@
+"""Tests del planificador adaptativo de consultas del monitor (src/core/monitor_scheduler.py)"""
+
+from src.core.monitor_scheduler import AdaptiveMonitorScheduler
+
+
+def _scheduler(**kwargs):
+    params = dict(min_interval=1.0, max_interval=30.0, max_requests_per_minute=100)
+    params.update(kwargs)
+    return AdaptiveMonitorScheduler(atr_provider=lambda symbol: 1.0, **params)
+
+
+def test_new_symbols_are_due_immediately_and_removed_ones_forgotten():
+    scheduler = _scheduler()
+    scheduler.sync({"US500", "GOLD"}, now=0.0)
+    assert sorted(scheduler.due_symbols(now=0.0)) == ["GOLD", "US500"]
+    scheduler.sync({"GOLD"}, now=1.0)
+    assert scheduler.get_status()["symbols"] == 1
+
+
+def test_interval_shrinks_near_trigger():
+    scheduler = _scheduler()
+    scheduler.sync({"FAR", "NEAR"}, now=0.0)
+    far = scheduler.record_quote("FAR", 100.0, trigger_distance=10.0, now=0.0)
+    near = scheduler.record_quote("NEAR", 100.0, trigger_distance=0.3, now=0.0)
+    assert far == 30.0
+    assert 1.0 <= near < 5.0
+    assert scheduler.record_quote("FAR", 100.0, trigger_distance=None, now=1.0) == 30.0
+
+
+def test_fast_moving_price_brings_next_check_forward():
+    scheduler = _scheduler()
+    scheduler.sync({"US500"}, now=0.0)
+    calm = scheduler.record_quote("US500", 100.0, trigger_distance=2.0, now=0.0)
+    fast = scheduler.record_quote("US500", 101.0, trigger_distance=2.0, now=1.0)
+    # 1 ATR/s con el trigger a 2 ATR -> consultar en ~1s, no en ~20s
+    assert calm > 15
+    assert fast == 1.0
+
+
+def test_budget_serves_most_overdue_first_and_defers_the_rest():
+    scheduler = _scheduler(max_requests_per_minute=2)
+    scheduler.sync({"A", "B", "C"}, now=0.0)
+    scheduler._next_due.update({"A": -5.0, "B": -1.0, "C": -10.0})
+
+    assert scheduler.due_symbols(now=0.0) == ["C", "A"]
+    for symbol in ("C", "A"):
+        scheduler.record_quote(symbol, 100.0, trigger_distance=None, now=0.0)
+    assert scheduler.due_symbols(now=1.0) == []
+    # Sin presupuesto se espera a que la ventana de un minuto libere hueco
+    assert scheduler.seconds_until_next(now=1.0) == 30.0
+    # El más atrasado (B) va primero cuando vuelve a haber presupuesto
+    assert scheduler.due_symbols(now=61.0) == ["B", "A"]
+    assert scheduler.stats["quotes_deferred"] == 3
@@ -0,0 +1,135 @@
+"""Tests del simulador de riesgo de trayectoria (src/core/monte_carlo_risk.py)"""
+
+from datetime import datetime
+
+import numpy as np
+
+from src.core.monte_carlo_risk import MonteCarloRiskSimulator
+from src.core.portfolio_risk import PortfolioRiskEngine
+
+TS = np.arange(1, 202) * 3600.0
+
+
+def _closes(seed, n=len(TS)):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def _engine():
+    engine = PortfolioRiskEngine(timeframe="1h", window=250, min_observations=30)
+    engine.record_closes("A", "1h", TS, _closes(1))
+    engine.record_closes("B", "1h", TS, _closes(2))
+    return engine
+
+
+def _simulator(engine, seed=3):
+    return MonteCarloRiskSimulator(
+        engine, n_paths=2000, horizon_bars=48, bars_per_day=24, min_observations=30, seed=seed
+    )
+
+
+def test_returns_for_skips_thin_symbols_and_incomplete_bars():
+    engine = _engine()
+    # C sólo tiene las últimas 11 barras; D las últimas 61
+    engine.record_closes("C", "1h", TS[-12:], _closes(3, 12))
+    engine.record_closes("D", "1h", TS[-62:], _closes(4, 62))
+
+    matrix, covered, _ = engine.returns_for(["A", "C", "D"])
+    assert covered == ["A", "D"]
+    assert matrix.shape == (61, 2)
+    assert not np.isnan(matrix).any()
+
+    matrix, covered, _ = engine.returns_for(["A", "C"], min_observations=5)
+    assert covered == ["A", "C"] and matrix.shape == (11, 2)
+
+
+def test_scales_reuse_paths_and_match_a_direct_simulation():
+    engine = _engine()
+    scaled = _simulator(engine).simulate_scaled(
+        {"A": 1000.0},
+        10_000.0,
+        max_drawdown=0.05,
+        daily_loss_limit=0.02,
+        candidate="B",
+        candidate_exposure=4000.0,
+        scales=(1.0, 0.5),
+    )
+    direct = _simulator(engine).simulate(
+        {"A": 1000.0, "B": 2000.0}, 10_000.0, max_drawdown=0.05, daily_loss_limit=0.02
+    )
+    assert scaled["success"] and [o["scale"] for o in scaled["scales"]] == [1.0, 0.5]
+    half = scaled["scales"][1]
+    for name in ("prob_drawdown_breach", "prob_daily_loss_breach", "expected_max_drawdown"):
+        assert abs(half[name] - direct[name]) < 1e-3
+
+
+def test_breach_probability_grows_with_size():
+    simulator = _simulator(_engine())
+    result = simulator.simulate_scaled(
+        {},
+        10_000.0,
+        max_drawdown=0.05,
+        daily_loss_limit=0.02,
+        candidate="A",
+        candidate_exposure=20_000.0,
+        scales=(1.0, 0.75, 0.5, 0.25),
+    )
+    breaches = [o["prob_drawdown_breach"] for o in result["scales"]]
+    assert breaches == sorted(breaches, reverse=True)
+    assert breaches[0] > breaches[-1]
+
+
+def test_insufficient_history_and_cache():
+    engine = _engine()
+    engine.record_closes("NEW", "1h", TS[-5:], _closes(5, 5))
+    simulator = _simulator(engine)
+
+    result = simulator.simulate({"NEW": 1000.0}, 10_000.0, 0.05, 0.02)
+    assert result["success"] is False and result["uncovered_symbols"] == ["NEW"]
+
+    first = simulator.simulate({"A": 1000.0}, 10_000.0, 0.05, 0.02)
+    second = simulator.simulate({"A": 1000.0}, 10_000.0, 0.05, 0.02)
+    assert first["cached"] is False and second["cached"] is True
+    assert second["prob_drawdown_breach"] == first["prob_drawdown_breach"]
+
+
+class _BreachingSimulator:
+    """Sólo el 25% del tamaño cumple los límites"""
+
+    def simulate_scaled(self, exposures, portfolio_value, scales, **kwargs):
+        outcomes = [
+            {"scale": s, "prob_drawdown_breach": 0.0 if s <= 0.25 else 0.5, "prob_daily_loss_breach": 0.0}
+            for s in scales
+        ]
+        return {"success": True, "scales": outcomes}
+
+
+def _signal(price):
+    from src.core.enhanced_strategies import EnhancedSignal
+
+    return EnhancedSignal(
+        symbol="US500",
+        signal_type="BUY",
+        price=price,
+        confidence_score=90.0,
+        strength="Strong",
+        strategy_name="Test",
+        timestamp=datetime(2026, 1, 5),
+    )
+
+
+def test_scaled_down_size_below_minimum_is_rejected_not_clamped():
+    from src.core.enhanced_risk_manager import EnhancedRiskManager
+
+    manager = EnhancedRiskManager()
+    manager.path_simulator = _BreachingSimulator()
+    manager.portfolio_value = 1000.0
+
+    sizing = manager._calculate_position_sizing(_signal(price=1_000_000.0), {})
+    assert sizing.path_risk["size_scale"] == 0.25
+    assert sizing.path_risk["limit_breached"] is True
+    assert sizing.recommended_size < manager.min_position_size
+
+    sizing = manager._calculate_position_sizing(_signal(price=1.0), {})
+    assert sizing.path_risk["limit_breached"] is False
+    assert sizing.recommended_size >= manager.min_position_size
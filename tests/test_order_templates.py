@@ -0,0 +1,125 @@
+"""Tests de las plantillas de orden pre-validadas (src/core/order_templates.py)"""
+
+import time
+
+from src.core.order_templates import OrderTemplateBook
+
+
+class _Client:
+    def __init__(self):
+        self.market_data_calls = []
+
+    def get_available_balance(self):
+        return {"success": True, "available": 1000.0, "currency": "USD", "symbol": "$"}
+
+    def get_account_preferences(self):
+        return {"success": True, "hedging_mode": True}
+
+    def get_market_data(self, epics):
+        self.market_data_calls.append(list(epics))
+        return {epic: {"bid": 99.0, "offer": 101.0} for epic in epics}
+
+    def get_dealing_rules(self, epic):
+        return {"success": True, "min_size_increment": {"value": 0.1}}
+
+    def get_leverage_for_symbol(self, epic):
+        return {"success": True, "current_leverage": 20}
+
+    def is_trailing_stop_available(self, epic):
+        return {"available": True}
+
+    def get_minimum_order_size(self, epic):
+        return 0.5
+
+
+def _book(client, quote_max_age=30.0):
+    return OrderTemplateBook(client, refresh_interval=60.0, quote_max_age=quote_max_age)
+
+
+def test_refresh_builds_templates_served_without_requests():
+    client = _Client()
+    book = _book(client)
+    book.set_epics(["US500", "GOLD", "US500"])
+    assert book.refresh() == 2
+    assert client.market_data_calls == [["US500", "GOLD"]]
+
+    template = book.get("GOLD")
+    assert template.min_size == 0.5 and template.size_increment == 0.1
+    assert template.leverage == 20.0 and template.trailing_available
+    assert template.spread == 2.0 and template.account.hedging_mode
+    assert len(client.market_data_calls) == 1 and book.stats["hits"] == 1
+
+
+def test_missing_or_stale_template_is_built_inline_for_that_epic():
+    client = _Client()
+    book = _book(client, quote_max_age=0.0)
+    book.set_epics(["US500"])
+    book.refresh()
+
+    assert book.get("US500") is not None
+    assert book.get("NEW").epic == "NEW"
+    assert client.market_data_calls[1:] == [["US500"], ["NEW"]]
+    assert book.stats["inline_builds"] == 2
+
+
+def test_after_order_reserves_margin_on_every_template():
+    book = _book(_Client())
+    book.set_epics(["US500", "GOLD"])
+    book.refresh()
+    book.after_order("US500", margin_used=250.0)
+    assert book.get("GOLD").account.available_balance == 750.0
+
+
+def test_signal_to_order_and_submission_are_measured_separately():
+    book = _book(_Client())
+    approved_at = time.perf_counter()
+    book.record_signal_to_order("US500", approved_at)
+    submitted_at = time.perf_counter() - 0.2  # ida y vuelta al broker
+    book.record_submission("US500", submitted_at)
+
+    status = book.get_status()
+    assert status["signal_to_order"]["samples"] == 1
+    assert status["order_submission"]["samples"] == 1
+    assert status["order_submission"]["p50_ms"] >= 200
+    assert status["signal_to_order"]["p50_ms"] < status["order_submission"]["p50_ms"]
+
+
+def test_cached_inputs_never_call_the_client(monkeypatch):
+    from src.core.instrument_cache import InstrumentMetadataCache
+
+    fetched = []
+
+    def fetcher(epics):
+        fetched.append(list(epics))
+        rules = {"min_stop_distance": {"unit": "POINTS", "value": 5}}
+        return {"success": True, "instruments": {epic: rules for epic in epics}}
+
+    client = _Client()
+    client.instrument_cache = InstrumentMetadataCache(fetcher, ttl=10, refresh_interval=60)
+    client.instrument_cache.warm(["US500", "GOLD"])
+    book = _book(client, quote_max_age=0.0)
+    book.set_epics(["US500"])
+    book.refresh()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("no client calls on the decision path")
+
+    for name in ("get_market_data", "get_dealing_rules", "get_available_balance"):
+        monkeypatch.setattr(client, name, fail)
+
+    # Plantilla con cotización vencida: se usa tal cual
+    assert book.cached_inputs("US500")[:2] == (99.0, 101.0)
+
+    # Sin plantilla: reglas del cache de instrumentos, aunque estén vencidas
+    entry = client.instrument_cache._entries["GOLD"]
+    monkeypatch.setattr(
+        "src.core.instrument_cache.time.monotonic", lambda: entry.fetched_at + 11
+    )
+    bid, offer, rules = book.cached_inputs("GOLD")
+    assert (bid, offer) == (None, None)
+    assert rules["min_stop_distance"] == {"unit": "POINTS", "value": 5}
+    assert client.instrument_cache.get_status()["stale"] == 1
+
+    # Epic nunca visto: sin reglas y sin consultar
+    assert book.cached_inputs("NEW") == (None, None, {})
+    assert fetched == [["US500", "GOLD"]]
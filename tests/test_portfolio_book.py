@@ -0,0 +1,103 @@
+"""Tests del libro columnar del PaperTrader (src/core/portfolio_book.py)"""
+
+import random
+import threading
+
+import pytest
+
+from src.core.portfolio_book import PortfolioBook
+
+
+def _recomputed(book):
+    pnl = exposure = 0.0
+    for _, entry in book.positions():
+        pnl += entry["quantity"] * (entry["current_price"] - entry["avg_price"])
+        exposure += abs(entry["quantity"]) * entry["current_price"]
+    return pnl, exposure
+
+
+def test_incremental_aggregates_match_recomputation():
+    rng = random.Random(7)
+    book = PortfolioBook(cash=10_000.0, capacity=2)
+    symbols = [f"S{i}" for i in range(12)]
+    for _ in range(500):
+        symbol = rng.choice(symbols)
+        op = rng.random()
+        if op < 0.5:
+            book.apply_fill(symbol, rng.choice([-2.0, -1.0, 1.0, 2.0]), rng.uniform(50, 150))
+        elif op < 0.8:
+            book.mark(symbol, rng.uniform(50, 150))
+        else:
+            book.mark_many({s: rng.uniform(50, 150) for s in rng.sample(symbols, 5)})
+
+        pnl, exposure = _recomputed(book)
+        assert book.unrealized_pnl_total == pytest.approx(pnl, abs=1e-6)
+        assert book.exposure_total == pytest.approx(exposure, abs=1e-6)
+
+
+def test_closing_a_row_swaps_the_last_one_into_place():
+    book = PortfolioBook(cash=0.0)
+    book.apply_fill("A", 1.0, 10.0)
+    book.apply_fill("B", -2.0, 20.0)
+    book.apply_fill("C", 3.0, 30.0)
+
+    book.apply_fill("A", -1.0, 12.0)
+
+    assert "A" not in book and len(book) == 2
+    assert book.symbols() == ["C", "B"]
+    assert book.entry("C")["quantity"] == 3.0
+    assert book.entry("B")["avg_price"] == 20.0
+
+
+def test_short_pnl_and_weighted_average_price():
+    book = PortfolioBook(cash=0.0)
+    book.apply_fill("US500", -1.0, 100.0)
+    book.apply_fill("US500", -1.0, 110.0)
+    assert book.entry("US500")["avg_price"] == pytest.approx(105.0)
+
+    book.mark("US500", 95.0)
+    entry = book.entry("US500")
+    assert entry["unrealized_pnl"] == pytest.approx(20.0)
+    assert entry["unrealized_pnl_percentage"] > 0
+
+
+def test_dict_round_trip_preserves_positions_and_margin():
+    book = PortfolioBook(cash=500.0)
+    book.apply_fill("GOLD", 2.0, 1900.0)
+    book.set_margin("GOLD", 380.0, 10.0, 3800.0)
+    book.mark("GOLD", 1910.0)
+
+    restored = PortfolioBook.from_dict(book.to_dict())
+    assert restored.cash == 500.0
+    assert restored.entry("GOLD")["reserved_margin"] == 380.0
+    assert restored.unrealized_pnl_total == pytest.approx(book.unrealized_pnl_total)
+
+
+def test_paper_trader_fills_and_marks_from_two_threads_keep_aggregates_consistent(tmp_path):
+    from src.core.paper_trader import PaperTrader
+
+    trader = PaperTrader(journal_dir=str(tmp_path))
+    symbols = [f"S{i}" for i in range(8)]
+    stop = threading.Event()
+
+    def fills():
+        rng = random.Random(1)
+        for _ in range(2000):
+            with trader._lock:
+                trader.book.apply_fill(rng.choice(symbols), rng.choice([-1.0, 1.0]), rng.uniform(90, 110))
+        stop.set()
+
+    def marks():
+        rng = random.Random(2)
+        while not stop.is_set():
+            trader.mark_to_market({s: rng.uniform(90, 110) for s in symbols})
+
+    threads = [threading.Thread(target=fills), threading.Thread(target=marks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pnl, exposure = _recomputed(trader.book)
+    assert trader.book.unrealized_pnl_total == pytest.approx(pnl, abs=1e-6)
+    assert trader.book.exposure_total == pytest.approx(exposure, abs=1e-6)
@@ -0,0 +1,72 @@
+"""Tests del motor de riesgo de portfolio (src/core/portfolio_risk.py)"""
+
+import numpy as np
+
+from src.core.portfolio_risk import PortfolioRiskEngine
+
+TS = np.arange(1, 202) * 3600.0
+
+
+def _closes(seed, drift=0.0):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(drift, 0.01, len(TS))))
+
+
+def _engine(window=250):
+    engine = PortfolioRiskEngine(timeframe="1h", window=window, min_observations=30)
+    a = _closes(1)
+    b = a * np.exp(np.random.default_rng(2).normal(0, 0.002, len(TS)))  # casi igual a A
+    engine.record_closes("A", "1h", TS, a)
+    engine.record_closes("B", "1h", TS, b)
+    return engine, a, b
+
+
+def test_incremental_covariance_matches_numpy():
+    engine, a, b = _engine()
+    expected = np.cov(np.vstack([np.diff(np.log(a)), np.diff(np.log(b))]))
+    np.testing.assert_allclose(engine.covariance(), expected, rtol=1e-9)
+    assert engine.correlation_matrix()["A"]["B"] > 0.9
+
+
+def test_window_evicts_oldest_bars_and_ignores_other_timeframes():
+    engine, a, b = _engine(window=50)
+    assert engine.record_closes("A", "4h", TS, a) == 0
+    assert engine.record_closes("A", "1h", TS, a) == 0  # nada nuevo
+    expected = np.cov(np.vstack([np.diff(np.log(a))[-50:], np.diff(np.log(b))[-50:]]))
+    np.testing.assert_allclose(engine.covariance(), expected, rtol=1e-9)
+    assert engine.get_status()["bars"] == 50
+
+
+def test_short_hedge_lowers_portfolio_volatility():
+    engine, _, _ = _engine()
+    long_only = engine.portfolio_metrics({"A": 1000.0}, 10_000.0)
+    hedged = engine.portfolio_metrics({"A": 1000.0, "B": -1000.0}, 10_000.0)
+    assert hedged["portfolio_volatility"] < long_only["portfolio_volatility"] / 3
+
+    adding_same_side = engine.portfolio_metrics(
+        {"A": 1000.0}, 10_000.0, candidate="B", candidate_exposure=1000.0
+    )
+    adding_hedge = engine.portfolio_metrics(
+        {"A": 1000.0}, 10_000.0, candidate="B", candidate_exposure=-1000.0
+    )
+    assert adding_same_side["candidate_correlation"] > 0.9
+    assert adding_hedge["candidate_correlation"] < -0.9
+    assert adding_hedge["marginal_volatility"] < 0 < adding_same_side["marginal_volatility"]
+
+
+def test_uncovered_symbols_are_reported():
+    engine, _, _ = _engine()
+    metrics = engine.portfolio_metrics({"A": 1000.0, "NEW": 500.0}, 10_000.0, candidate="NEW")
+    assert metrics["uncovered_symbols"] == ["NEW"]
+    assert metrics["candidate_covered"] is False
+
+
+def test_risk_manager_fallback_exposures_are_signed_by_side():
+    from src.core.enhanced_risk_manager import EnhancedRiskManager
+
+    manager = EnhancedRiskManager()
+    manager.open_positions = {
+        "A": {"size": 1000.0, "signal_type": "BUY"},
+        "B": {"size": 1000.0, "signal_type": "SELL"},
+    }
+    assert manager._current_exposures() == {"A": 1000.0, "B": -1000.0}
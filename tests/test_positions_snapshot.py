@@ -0,0 +1,98 @@
+"""Tests del snapshot compartido de posiciones (src/core/positions_snapshot.py)"""
+
+import threading
+import time
+
+from src.core.positions_snapshot import PositionsCache
+
+
+def _position(deal_id, epic, direction="BUY"):
+    return {"position": {"dealId": deal_id, "direction": direction}, "market": {"epic": epic}}
+
+
+class FakeFetcher:
+    def __init__(self, positions=None, delay=0.0):
+        self.positions = positions or []
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            return {"success": False, "error": "HTTP 500"}
+        return {"success": True, "positions": list(self.positions)}
+
+
+def test_snapshot_indexes_by_deal_id_and_symbol():
+    fetcher = FakeFetcher([_position("D1", "US500"), _position("D2", "US500"), _position("D3", "GOLD")])
+    snapshot, error = PositionsCache(fetcher, ttl=60).get_snapshot()
+
+    assert error is None
+    assert snapshot.get("D3")["market"]["epic"] == "GOLD"
+    assert len(snapshot.for_symbol("US500")) == 2
+    assert snapshot.as_result()["snapshot_version"] == 1
+
+
+def test_concurrent_readers_share_one_refresh():
+    fetcher = FakeFetcher([_position("D1", "US500")], delay=0.05)
+    cache = PositionsCache(fetcher, ttl=60)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_snapshot())) for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetcher.calls == 1
+    assert {snapshot.version for snapshot, _ in results} == {1}
+
+
+def test_invalidate_forces_refresh_and_bumps_version():
+    fetcher = FakeFetcher([_position("D1", "US500")])
+    cache = PositionsCache(fetcher, ttl=60)
+    cache.get_snapshot()
+    fetcher.positions.append(_position("D2", "GOLD"))
+    cache.invalidate("order placed")
+
+    snapshot, _ = cache.get_snapshot()
+    assert fetcher.calls == 2
+    assert snapshot.version == 2
+    assert snapshot.get("D2") is not None
+
+
+def test_failed_refresh_is_an_error_not_stale_data():
+    fetcher = FakeFetcher([_position("D1", "US500")])
+    cache = PositionsCache(fetcher, ttl=60)
+    cache.get_snapshot()
+    fetcher.fail = True
+
+    snapshot, error = cache.get_snapshot(force_refresh=True)
+    assert snapshot is None
+    assert error == "HTTP 500"
+    # Tras un fallo el snapshot queda sucio: la próxima lectura reintenta
+    fetcher.fail = False
+    snapshot, error = cache.get_snapshot()
+    assert error is None and snapshot.version == 2
+
+
+def test_background_refresh_keeps_readers_off_the_fetch_path():
+    fetcher = FakeFetcher([_position("D1", "US500")])
+    cache = PositionsCache(fetcher, ttl=1.0, refresh_interval=0.1)
+    cache.start_background_refresh()
+    try:
+        time.sleep(0.5)
+        assert cache.get_status()["background_refresh"]
+        refreshed = fetcher.calls
+        assert refreshed >= 2
+        snapshot, _ = cache.get_snapshot()
+        assert snapshot.age_seconds() < 1.0
+        assert fetcher.calls - refreshed <= 1
+    finally:
+        cache.stop_background_refresh()
+    assert not cache.get_status()["background_refresh"]
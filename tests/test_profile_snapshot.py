@@ -0,0 +1,68 @@
+"""Tests del snapshot versionado del perfil (TradingProfiles / ProfileSnapshot)"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.config.main_config import TradingProfiles
+
+
+@pytest.fixture
+def restore_profile():
+    original = TradingProfiles.get_current_profile_name()
+    yield
+    TradingProfiles.set_current_profile(original)
+
+
+def _other(name):
+    return "SCALPING" if name != "SCALPING" else "INTRADAY"
+
+
+def test_switch_publishes_a_new_version_and_old_snapshots_do_not_change(restore_profile):
+    before = TradingProfiles.snapshot()
+    TradingProfiles.set_current_profile(_other(before.key))
+    after = TradingProfiles.snapshot()
+
+    assert after.version == before.version + 1
+    assert after.key == _other(before.key)
+    assert before["timeframes"] == TradingProfiles.get_profile(before.key)["timeframes"]
+    with pytest.raises(TypeError):
+        before.settings["max_positions"] = 0
+    with pytest.raises(AttributeError):
+        before.max_positions = 0
+
+
+def test_pinned_snapshot_survives_a_concurrent_switch(restore_profile):
+    pinned = TradingProfiles.snapshot()
+    with TradingProfiles.pinned(pinned):
+        switcher = threading.Thread(
+            target=TradingProfiles.set_current_profile, args=(_other(pinned.key),)
+        )
+        switcher.start()
+        switcher.join()
+
+        assert TradingProfiles.snapshot() is pinned
+        assert TradingProfiles.get_current_profile_name() == pinned.key
+        assert TradingProfiles.get_current_profile() is TradingProfiles.get_profile(pinned.key)
+
+    assert TradingProfiles.snapshot().key == _other(pinned.key)
+
+
+def test_executor_workers_use_the_snapshot_they_are_given(restore_profile):
+    cycle_profile = TradingProfiles.snapshot()
+
+    def worker(profile=None):
+        if profile is None:
+            return TradingProfiles.get_current_profile_name()
+        with TradingProfiles.pinned(profile):
+            return TradingProfiles.get_current_profile_name()
+
+    with TradingProfiles.pinned(cycle_profile), ThreadPoolExecutor(max_workers=1) as executor:
+        TradingProfiles.set_current_profile(_other(cycle_profile.key))
+        inherited = executor.submit(worker).result()
+        passed = executor.submit(worker, cycle_profile).result()
+
+    # El pin no cruza hilos: sólo el snapshot pasado como argumento lo conserva
+    assert inherited == _other(cycle_profile.key)
+    assert passed == cycle_profile.key
@@ -0,0 +1,59 @@
+"""Tests del profiler por muestreo de todos los hilos (src/utils/profiler.py)"""
+
+import threading
+import time
+
+from src.utils.profiler import SamplingProfiler
+
+
+def _busy_worker_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_duration_mode_samples_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker_loop, args=(stop,), name="Busy Worker")
+    worker.start()
+    profiler = SamplingProfiler()
+    try:
+        assert profiler.start(mode="duration", seconds=0.3, interval_ms=5)["success"]
+        profiler._thread.join(timeout=5)
+    finally:
+        stop.set()
+        worker.join()
+
+    status = profiler.get_status()
+    assert status["status"] == "completed"
+    assert status["samples"] > 0
+    collapsed = profiler.get_collapsed()
+    assert any(
+        line.startswith("Busy_Worker;") and "_busy_worker_loop" in line
+        for line in collapsed.splitlines()
+    )
+
+
+def test_single_session_and_invalid_mode():
+    profiler = SamplingProfiler()
+    assert profiler.start(mode="bogus")["success"] is False
+    assert profiler.start(mode="duration", seconds=5, interval_ms=50)["success"]
+    try:
+        assert profiler.start(mode="duration")["success"] is False
+    finally:
+        profiler.stop()
+    assert not profiler.is_running()
+
+
+def test_next_cycle_mode_profiles_exactly_one_cycle():
+    profiler = SamplingProfiler()
+    assert profiler.start(mode="next_cycle", seconds=10, interval_ms=5)["success"]
+    time.sleep(0.05)
+    assert profiler.get_status()["status"] == "waiting_cycle"
+    profiler.notify_cycle_start()
+    time.sleep(0.1)
+    profiler.notify_cycle_end()
+    profiler._thread.join(timeout=5)
+
+    status = profiler.get_status()
+    assert status["status"] == "completed"
+    assert status["elapsed_seconds"] < 5
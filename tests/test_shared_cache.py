@@ -0,0 +1,100 @@
+"""Tests del cache LRU compartido (src/utils/shared_cache.py)"""
+
+import threading
+
+import numpy as np
+
+from src.utils.shared_cache import SharedLRUCache, estimate_size, get_shared_cache
+
+
+def _cache(max_entries=100, max_bytes=1 << 20, stripes=4, ttl=60.0):
+    return SharedLRUCache(
+        "test", ttl=ttl, max_entries=max_entries, max_bytes=max_bytes, stripes=stripes
+    )
+
+
+def test_get_set_and_lru_order_within_budget():
+    cache = _cache(max_entries=3, stripes=1)
+    for key in "abc":
+        cache.set(key, key.upper())
+    assert cache.get("a") == "A"  # "a" pasa a ser el más reciente
+    cache.set("d", "D")
+
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in "acd"] == ["A", "C", "D"]
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 3
+    assert stats["hits"] == 4 and stats["misses"] == 1
+
+
+def test_entry_budget_is_global_across_stripes():
+    cache = _cache(max_entries=10, stripes=16)
+    for i in range(200):
+        cache.set(("key", i), i)
+        assert len(cache) <= 10
+    # Con 16 stripes y 10 entradas un tope por stripe dejaría el cache vacío o desbordado
+    assert len(cache) == 10
+    assert cache.get(("key", 199)) == 199
+
+
+def test_byte_budget_is_global_and_only_oversized_values_are_refused():
+    block = np.zeros(1000, dtype=np.uint8)
+    cache = _cache(max_bytes=3500, stripes=8)
+    for i in range(20):
+        cache.set(i, block.copy())
+        assert cache.get_stats()["bytes"] <= 3500
+    assert len(cache) == 3 and cache.get(19) is not None
+
+    # Más grande que un octavo del presupuesto pero cabe en el total
+    cache.set("big", np.zeros(3000, dtype=np.uint8))
+    assert cache.get("big") is not None and cache.get_stats()["oversized"] == 0
+    cache.set("huge", np.zeros(4000, dtype=np.uint8))
+    assert cache.get("huge") is None and cache.get_stats()["oversized"] == 1
+
+
+def test_expired_entries_are_dropped():
+    cache = _cache(ttl=60.0)
+    cache.set("old", 1, ttl=-1)
+    cache.set("new", 2)
+    assert cache.get("old", "missing") == "missing"
+    cache.set("stale", 3, ttl=-1)
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1 and cache.get_stats()["expirations"] == 2
+
+
+def test_get_or_set_pop_and_clear():
+    cache = _cache()
+    calls = []
+    assert cache.get_or_set("k", lambda: calls.append(1) or "v") == "v"
+    assert cache.get_or_set("k", lambda: calls.append(1) or "w") == "v"
+    assert calls == [1]
+    assert cache.pop("k") == "v" and cache.pop("k", "gone") == "gone"
+    cache.set("x", 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.get_stats()["bytes"] == 0
+
+
+def test_concurrent_writers_stay_within_budget():
+    cache = _cache(max_entries=50, stripes=8)
+
+    def writer(worker):
+        for i in range(2000):
+            cache.set((worker, i), i)
+            cache.get((worker, i - 1))
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.get_stats()
+    assert stats["entries"] <= 50
+    stored = [entry for stripe in cache._stripes for entry in stripe.entries.values()]
+    assert stats["bytes"] == sum(estimate_size(value) for value, _, _ in stored)
+
+
+def test_namespaces_are_process_singletons():
+    cache = get_shared_cache("test_namespace")
+    assert get_shared_cache("test_namespace") is cache
+    assert cache.get_stats()["namespace"] == "test_namespace"
@@ -0,0 +1,97 @@
+"""Tests del journal append-only del PaperTrader (src/core/trade_journal.py)"""
+
+from datetime import datetime, timedelta
+
+from src.core.trade_journal import TradeHistoryIndex, TradeJournal
+
+T0 = datetime(2026, 1, 5, 12, 0, 0)
+
+
+def _trade(trade_id, symbol="US500", strategy="TrendFollowing", minutes=0):
+    return {
+        "id": trade_id,
+        "symbol": symbol,
+        "strategy": strategy,
+        "entry_time": T0 + timedelta(minutes=minutes),
+    }
+
+
+def _cash(amount):
+    return {"USD": {"quantity": amount, "avg_price": 1.0}}
+
+
+def test_replay_restores_fills_balances_and_initial_balance(tmp_path):
+    journal = TradeJournal(str(tmp_path), fsync=False)
+    journal.append_fill(_trade(1), {**_cash(900.0), "US500": {"quantity": 1.0, "avg_price": 100.0}})
+    journal.append_fill(_trade(2), {**_cash(1000.0), "US500": None})
+    journal.append_balance(_cash(2500.0), "broker_sync", initial_balance=2500.0)
+    journal.close()
+
+    state = TradeJournal(str(tmp_path), fsync=False).load()
+    assert [t["id"] for t in state["trades"]] == [1, 2]
+    assert state["trades"][0]["entry_time"] == T0
+    assert state["trade_counter"] == 3
+    assert state["portfolio"] == {"USD": {"quantity": 2500.0, "avg_price": 1.0}}
+    assert state["initial_balance"] == 2500.0
+
+
+def test_snapshot_truncates_journal_and_skips_already_included_events(tmp_path):
+    journal = TradeJournal(str(tmp_path), snapshot_every=2, fsync=False)
+    journal.append_fill(_trade(1), _cash(900.0))
+    journal.append_fill(_trade(2), _cash(800.0))
+    assert journal.needs_snapshot
+    journal.write_snapshot(_cash(800.0), [_trade(1), _trade(2)], 3, 1000.0)
+    journal.append_fill(_trade(3), _cash(700.0))
+    journal.close()
+
+    reloaded = TradeJournal(str(tmp_path), fsync=False)
+    state = reloaded.load()
+    assert [t["id"] for t in state["trades"]] == [1, 2, 3]
+    assert state["portfolio"]["USD"]["quantity"] == 700.0
+    assert state["initial_balance"] == 1000.0
+    assert reloaded.stats["replayed_events"] == 1
+
+
+def test_incomplete_tail_is_discarded(tmp_path):
+    journal = TradeJournal(str(tmp_path), fsync=False)
+    journal.append_fill(_trade(1), _cash(900.0))
+    journal.close()
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"type":"fill","seq":2,"trade":{"id"')
+
+    reloaded = TradeJournal(str(tmp_path), fsync=False)
+    assert [t["id"] for t in reloaded.load()["trades"]] == [1]
+    # El siguiente evento continúa la secuencia sobre un archivo limpio
+    reloaded.append_fill(_trade(2), _cash(800.0))
+    reloaded.close()
+    assert [t["id"] for t in TradeJournal(str(tmp_path)).load()["trades"]] == [1, 2]
+
+
+def test_history_index_pages_by_symbol_strategy_and_time():
+    trades = [
+        _trade(i, symbol="US500" if i % 2 else "GOLD", strategy="A" if i < 6 else "B", minutes=i)
+        for i in range(10)
+    ]
+    index = TradeHistoryIndex()
+    index.rebuild(trades)
+
+    page, total = index.query(trades, symbol="US500", limit=2)
+    assert total == 5 and [t["id"] for t in page] == [9, 7]
+    page, total = index.query(trades, symbol="GOLD", strategy="B", newest_first=False)
+    assert total == 2 and [t["id"] for t in page] == [6, 8]
+    start = (T0 + timedelta(minutes=3)).timestamp()
+    end = (T0 + timedelta(minutes=5)).timestamp()
+    page, total = index.query(trades, start=start, end=end, newest_first=False)
+    assert [t["id"] for t in page] == [3, 4, 5]
+
+
+def test_paper_trader_persists_broker_balance_and_initial_balance(tmp_path):
+    from src.core.paper_trader import PaperTrader
+
+    trader = PaperTrader(journal_dir=str(tmp_path))
+    trader.sync_with_broker(2500.0, {})
+    trader.journal.close()
+
+    restored = PaperTrader(journal_dir=str(tmp_path))
+    assert restored.initial_balance == 2500.0
+    assert restored.get_balance() == 2500.0
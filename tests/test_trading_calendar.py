@@ -0,0 +1,82 @@
+"""Tests del calendario de trading precompilado (src/utils/trading_calendar.py)"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.utils.market_hours import MarketHoursChecker
+
+
+def _ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+# US500: 9:30-16:00 Nueva York -> 14:30-21:00 UTC en enero (EST)
+MONDAY_OPEN = _ts(2026, 1, 5, 14, 30)
+MONDAY_CLOSE = _ts(2026, 1, 5, 21, 0)
+
+
+def test_is_open_follows_session_boundaries_and_weekends():
+    calendar = MarketHoursChecker().calendar
+    assert not calendar.is_open("US500", MONDAY_OPEN - 60)
+    assert calendar.is_open("US500", MONDAY_OPEN)
+    assert calendar.is_open("US500", MONDAY_CLOSE - 60)
+    assert not calendar.is_open("US500", MONDAY_CLOSE + 60)
+    assert not calendar.is_open("US500", _ts(2026, 1, 10, 16, 0))  # sábado
+
+    assert calendar.next_open("US500", MONDAY_OPEN - 60) == MONDAY_OPEN
+    assert calendar.next_close("US500", MONDAY_OPEN) == MONDAY_CLOSE
+    assert calendar.is_open("BTCUSD", _ts(2026, 1, 10, 3, 0))
+
+
+def test_is_open_honours_daylight_saving():
+    calendar = MarketHoursChecker().calendar
+    # Julio (EDT, UTC-4): la sesión abre a las 13:30 UTC
+    assert calendar.is_open("US500", _ts(2026, 7, 6, 13, 30))
+    assert not calendar.is_open("US500", _ts(2026, 7, 6, 20, 30))
+
+
+def test_session_mask_matches_scalar_lookups():
+    calendar = MarketHoursChecker().calendar
+    bars = np.arange(
+        np.datetime64("2026-01-02T00:00"), np.datetime64("2026-01-13T00:00"), np.timedelta64(15, "m")
+    )
+    seconds = bars.astype("datetime64[s]").astype(np.int64).astype(float)
+
+    for tradable, scalar in ((False, calendar.is_open), (True, calendar.is_tradable)):
+        mask = calendar.session_mask("US500", bars, tradable=tradable)
+        expected = np.array([scalar("US500", ts) for ts in seconds])
+        assert mask.dtype == bool and mask.shape == bars.shape
+        assert (mask == expected).all()
+
+    assert calendar.session_mask("US500", bars, tradable=True).sum() < calendar.session_mask(
+        "US500", bars
+    ).sum()
+
+
+def test_session_mask_handles_nat_naive_and_empty_input():
+    calendar = MarketHoursChecker().calendar
+    values = np.array(["2026-01-05T15:00", "NaT", "2026-01-05T22:00"], dtype="datetime64[ns]")
+    assert calendar.session_mask("US500", values).tolist() == [True, False, False]
+
+    aware = pd.DatetimeIndex(["2026-01-05 15:00", "2026-01-05 22:00"], tz="UTC")
+    assert calendar.session_mask("US500", aware.values).tolist() == [True, False]
+
+    assert calendar.session_mask("US500", np.array([], dtype="datetime64[ns]")).shape == (0,)
+    assert not calendar.session_mask("US500", np.array(["NaT"], dtype="datetime64[ns]")).any()
+
+
+def test_session_bars_drops_out_of_session_candles():
+    from src.core.advanced_indicators import AdvancedIndicators
+
+    index = pd.date_range("2026-01-09 20:00", periods=6, freq="h")  # viernes -> sábado
+    df = pd.DataFrame({"close": np.arange(6.0)}, index=index)
+
+    # El cierre (21:00 UTC) es inclusivo
+    kept = AdvancedIndicators.session_bars(df, "US500")
+    assert list(kept.index) == list(index[:2])
+    assert len(AdvancedIndicators.session_bars(df, "BTCUSD")) == 6
+
+    by_column = AdvancedIndicators.session_bars(df.reset_index(names="timestamp"), "US500")
+    assert by_column["close"].tolist() == [0.0, 1.0]
@@ -0,0 +1,86 @@
+"""Tests del motor local de trailing stop / TP dinámico (src/core/trailing_engine.py)"""
+
+from types import SimpleNamespace
+
+from src.core.trailing_engine import TrailingEngine
+
+
+def _position(trade_id, trade_type="BUY", entry=100.0, stop_loss=95.0, take_profit=120.0):
+    return SimpleNamespace(
+        trade_id=trade_id, deal_id=f"D{trade_id}", symbol="US500", trade_type=trade_type,
+        entry_price=entry, current_price=entry, stop_loss=stop_loss,
+        take_profit=take_profit, trailing_stop=None,
+    )
+
+
+class FakeClient:
+    def __init__(self, step=0.5, fail=False):
+        self.step = step
+        self.fail = fail
+        self.amendments = []
+
+    def get_dealing_rules(self, symbol):
+        return {"success": True, "min_step_distance": {"value": self.step, "unit": "POINTS"}}
+
+    def update_position(self, deal_id, stop_level=None, profit_level=None):
+        self.amendments.append((deal_id, stop_level, profit_level))
+        return {"success": not self.fail, "error": "rejected"}
+
+
+def test_trailing_activates_and_only_ratchets_in_favor():
+    engine = TrailingEngine(atr_provider=lambda symbol: 1.0, activation=0.02, atr_multiplier=2.0)
+    engine.sync([_position(1), _position(2, "SELL", stop_loss=105.0, take_profit=80.0)])
+
+    assert engine.on_price(1, 101.0) is None  # Por debajo de la activación
+    assert engine.on_price(1, 103.0) == 101.0
+    assert engine.on_price(1, 102.0) is None  # Nunca retrocede
+    assert engine.on_price(1, 104.0) == 102.0
+
+    assert engine.on_price(2, 97.0) == 99.0
+    assert engine.on_price(2, 98.0) is None
+    assert engine.get_levels(2) == (99.0, 80.0)
+
+
+def test_sync_removes_closed_positions_with_swap_delete():
+    engine = TrailingEngine(atr_provider=lambda symbol: 1.0, activation=0.0)
+    engine.sync([_position(1), _position(2), _position(3)])
+    engine.on_price(3, 110.0)
+    engine.sync([_position(3), _position(2)])
+
+    assert len(engine) == 2
+    assert engine.get_levels(1) == (None, None)
+    assert engine.get_levels(3) == (108.0, 120.0)
+
+
+def test_flush_coalesces_and_respects_interval_and_step():
+    client = FakeClient(step=0.5)
+    engine = TrailingEngine(
+        client, atr_provider=lambda symbol: 1.0, activation=0.0, min_amend_interval=60
+    )
+    engine.sync([_position(1)])
+    for price in (103.0, 104.0, 105.0):
+        engine.on_price(1, price)
+
+    assert engine.flush() == 1
+    assert client.amendments == [("D1", 103.0, None)]
+    # Dentro del intervalo mínimo la siguiente modificación se difiere
+    engine.on_price(1, 106.0)
+    assert engine.flush() == 0
+    assert engine.get_status()["pending_amendments"] == 1
+
+
+def test_flush_respects_global_budget_and_retries_failures():
+    client = FakeClient(fail=True)
+    engine = TrailingEngine(
+        client, atr_provider=lambda symbol: 1.0, activation=0.0,
+        min_amend_interval=0, max_amends_per_minute=2,
+    )
+    engine.sync([_position(i) for i in range(1, 5)])
+    for trade_id in range(1, 5):
+        engine.on_price(trade_id, 110.0)
+
+    assert engine.flush() == 0
+    assert len(client.amendments) == 2
+    status = engine.get_status()
+    assert status["amendments_failed"] == 2
+    assert status["pending_amendments"] == 4
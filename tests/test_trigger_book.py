@@ -0,0 +1,104 @@
+"""Tests del índice de niveles de salida (src/core/trigger_book.py) y su uso en PositionManager"""
+
+import random
+from datetime import datetime
+
+from src.core.trigger_book import REASON_PRIORITY, TriggerBook
+
+
+def _naive_reason(direction, price, stop_loss, take_profit, trailing_stop):
+    """Misma regla que el libro, evaluando la posición entera"""
+    if direction == "BUY":
+        checks = (
+            ("TAKE_PROFIT", take_profit is not None and price >= take_profit),
+            ("STOP_LOSS", stop_loss is not None and price <= stop_loss),
+            ("TRAILING_STOP", trailing_stop is not None and price <= trailing_stop),
+        )
+    else:
+        checks = (
+            ("TAKE_PROFIT", take_profit is not None and price <= take_profit),
+            ("STOP_LOSS", stop_loss is not None and price >= stop_loss),
+            ("TRAILING_STOP", trailing_stop is not None and price >= trailing_stop),
+        )
+    return next((reason for reason, hit in checks if hit), None)
+
+
+def test_crossed_matches_naive_scan():
+    rng = random.Random(7)
+    book = TriggerBook()
+    positions = {}
+    for trade_id in range(300):
+        direction = rng.choice(("BUY", "SELL"))
+        sign = 1 if direction == "BUY" else -1
+        levels = {
+            "stop_loss": 100 - sign * rng.uniform(1, 10) if rng.random() < 0.9 else None,
+            "take_profit": 100 + sign * rng.uniform(1, 10) if rng.random() < 0.9 else None,
+            "trailing_stop": 100 - sign * rng.uniform(0, 5) if rng.random() < 0.3 else None,
+        }
+        positions[trade_id] = (direction, levels)
+        book.add(trade_id, "US500", direction, **levels)
+
+    for price in [rng.uniform(85, 115) for _ in range(200)]:
+        expected = {
+            trade_id: reason
+            for trade_id, (direction, levels) in positions.items()
+            if (reason := _naive_reason(direction, price, **levels)) is not None
+        }
+        assert dict(book.crossed("US500", price)) == expected
+
+
+def test_set_level_remove_and_nearest_distance():
+    book = TriggerBook()
+    book.add(1, "GOLD", "BUY", stop_loss=95.0, take_profit=110.0)
+    book.add(2, "GOLD", "SELL", stop_loss=104.0, take_profit=90.0)
+
+    assert book.nearest_distance("GOLD", 100.0) == 4.0
+    book.set_level(1, "trailing_stop", 99.0)
+    assert book.get_level(1, "trailing_stop") == 99.0
+    assert dict(book.crossed("GOLD", 98.5)) == {1: "TRAILING_STOP"}
+
+    assert book.remove(1)
+    assert book.crossed("GOLD", 98.5) == []
+    assert book.trade_ids_for_symbol("GOLD") == [2]
+    assert REASON_PRIORITY[0] == "TAKE_PROFIT"
+
+
+def test_expired_deadlines():
+    book = TriggerBook()
+    book.add(1, "US500", "BUY", deadline=1000.0)
+    book.add(2, "US500", "BUY", deadline=2000.0)
+    assert book.expired("US500", 1500.0) == [1]
+
+
+def _position_info(trade_id, symbol, trade_type, entry, stop_loss, take_profit):
+    from src.core.position_manager import PositionInfo
+
+    return PositionInfo(
+        trade_id=trade_id, deal_id=f"D{trade_id}", symbol=symbol, trade_type=trade_type,
+        entry_price=entry, current_price=entry, quantity=1.0, entry_value=entry,
+        current_value=entry, unrealized_pnl=0.0, unrealized_pnl_percentage=0.0,
+        stop_loss=stop_loss, take_profit=take_profit, trailing_stop=None,
+        entry_time=datetime.now(), strategy_name="test", confidence_score=80.0,
+        timeframe="1h", notes="", days_held=0.0, max_profit=0.0, max_loss=0.0,
+        risk_reward_ratio=2.0,
+    )
+
+
+def test_position_manager_builds_and_processes_quotes():
+    from src.core.position_manager import PositionManager
+
+    manager = PositionManager()
+    positions = [
+        _position_info(1, "US500", "BUY", 100.0, 95.0, 110.0),
+        _position_info(2, "US500", "SELL", 100.0, 105.0, 90.0),
+    ]
+    manager.positions_cache = {p.trade_id: p for p in positions}
+    manager.trigger_book.rebuild(positions)
+
+    exits = manager.process_quote("US500", 111.0)
+    assert sorted((p.trade_id, reason) for p, reason in exits) == [
+        (1, "TAKE_PROFIT"),
+        (2, "STOP_LOSS"),
+    ]
+    assert manager.positions_cache[1].current_price == 111.0
+    assert manager.process_quote("US500", 100.0) == []